@@ -0,0 +1,238 @@
+"""Token budgeting for agent prompts: counting, transcript fitting, history summaries."""
+
+from __future__ import annotations
+
+import functools
+import json
+from typing import Any, Callable
+
+from loguru import logger
+
+from queryclaw import tracing
+from queryclaw.agent.memory import MemoryStore
+from queryclaw.agent.usage import charge
+from queryclaw.providers.base import LLMProvider
+
+_DEFAULT_CONTEXT_WINDOW = 32_000  # used when the provider does not know the model
+_MIN_BUDGET = 2_000
+_MESSAGE_OVERHEAD = 4  # role and framing tokens per message
+_KEEP_TAIL = 6  # newest transcript messages that are never compacted
+_TOOL_EXCERPT_CHARS = 300
+_ASST_EXCERPT_CHARS = 200
+_HISTORY_SHARE = 0.4  # history above this share of the budget is folded into the summary
+_SCHEMA_SHARE = 0.1  # share of the budget for the table list in the system prompt
+_SUMMARY_MAX_TOKENS = 600
+_COUNT_CACHE_SIZE = 4096
+
+_SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and a database agent.
+Merge the new messages into the existing summary and return only the updated summary.
+Keep what later questions may depend on: table and column names, filters, figures and results, \
+decisions made, changes applied to the database, and open questions. Drop pleasantries and \
+anything superseded. Write in the user's language, at most about 300 words."""
+
+
+class TokenCounter:
+    """Token counts from a local tokenizer estimate, memoized per string.
+
+    Messages are re-counted on every LLM call, but their text rarely changes,
+    so each distinct string is tokenized once.
+    """
+
+    def __init__(self, count: Callable[[str], int], cache_size: int = _COUNT_CACHE_SIZE) -> None:
+        self._count = functools.lru_cache(maxsize=cache_size)(count)
+
+    def text(self, text: str | None) -> int:
+        return self._count(text) if text else 0
+
+    def message(self, msg: dict[str, Any]) -> int:
+        tokens = _MESSAGE_OVERHEAD + self.text(_as_text(msg.get("content")))
+        if msg.get("tool_calls"):
+            tokens += self.text(json.dumps(msg["tool_calls"], ensure_ascii=False, sort_keys=True))
+        if msg.get("reasoning_content"):
+            tokens += self.text(msg["reasoning_content"])
+        return tokens
+
+
+def _as_text(content: Any) -> str:
+    if content is None or isinstance(content, str):
+        return content or ""
+    return json.dumps(content, ensure_ascii=False)
+
+
+class TranscriptView:
+    """A budget-fitted view of one ReACT run's messages.
+
+    ``fit()`` is called before every LLM call. It only counts the messages
+    appended since the previous call and compacts in place, oldest first,
+    so no per-iteration copy of the transcript is made. Compaction is
+    monotonic: once a message is shortened it stays that way, which keeps
+    the already-sent prefix byte-stable for provider prompt caching.
+
+    Pressure is relieved oldest message first: each one loses its stale
+    ``reasoning_content`` and long tool results or answers are cut to
+    excerpts. If that is not enough, the oldest history messages (from
+    before the current turn) are dropped. System messages and the newest
+    ``_KEEP_TAIL`` messages are never touched.
+    """
+
+    def __init__(self, messages: list[dict[str, Any]], budget: int, counter: TokenCounter) -> None:
+        self._source = messages
+        self._budget = budget
+        self._counter = counter
+        self._view: list[dict[str, Any]] = []
+        self._tokens: list[int] = []
+        self._total = 0
+        self._seen = 0
+        # History is everything between the system messages and the current user message.
+        self._history_start = next(
+            (i for i, m in enumerate(messages) if m.get("role") != "system"), len(messages),
+        )
+        self._history_end = max(self._history_start, len(messages) - 1)
+        self._compacted = self._history_start
+        self._warned = False
+
+    @property
+    def tokens(self) -> int:
+        return self._total
+
+    def fit(self) -> list[dict[str, Any]]:
+        """Return the messages to send, within budget when at all possible."""
+        for msg in self._source[self._seen:]:
+            count = self._counter.message(msg)
+            self._view.append(msg)
+            self._tokens.append(count)
+            self._total += count
+        self._seen = len(self._source)
+
+        while self._total > self._budget and self._compacted < len(self._view) - _KEEP_TAIL:
+            self._compact(self._compacted)
+            self._compacted += 1
+        while (
+            self._total > self._budget
+            and self._history_start < min(self._history_end, len(self._view) - _KEEP_TAIL)
+        ):
+            self._drop_oldest_history()
+
+        if self._total > self._budget and not self._warned:
+            logger.warning(
+                "Prompt is ~{} tokens, over the {}-token context budget after compaction",
+                self._total, self._budget,
+            )
+            self._warned = True
+        return self._view
+
+    def _replace(self, i: int, msg: dict[str, Any]) -> None:
+        count = self._counter.message(msg)
+        self._total += count - self._tokens[i]
+        self._view[i] = msg
+        self._tokens[i] = count
+
+    def _compact(self, i: int) -> None:
+        msg = self._view[i]
+        role = msg.get("role")
+        content = msg.get("content")
+        if msg.get("reasoning_content"):
+            msg = {**msg, "reasoning_content": ""}
+        if role == "tool" and isinstance(content, str) and len(content) > _TOOL_EXCERPT_CHARS:
+            msg = {**msg, "content": content[:_TOOL_EXCERPT_CHARS] + "\n\n[... truncated ...]"}
+        elif (
+            role == "assistant" and "tool_calls" not in msg
+            and isinstance(content, str) and len(content) > _ASST_EXCERPT_CHARS
+        ):
+            msg = {**msg, "content": content[:_ASST_EXCERPT_CHARS] + "\n[... truncated ...]"}
+        if msg is not self._view[i]:
+            self._replace(i, msg)
+
+    def _drop_oldest_history(self) -> None:
+        """Drop the oldest history message, then any non-user messages so history starts on a user turn."""
+        i = self._history_start
+        while True:
+            self._total -= self._tokens.pop(i)
+            self._view.pop(i)
+            self._history_end -= 1
+            self._compacted = max(self._history_start, self._compacted - 1)
+            if i >= self._history_end or self._view[i].get("role") == "user":
+                break
+
+
+class ContextBudget:
+    """Knows the model's context window and keeps prompts inside it.
+
+    The budget is the model's input window minus the tokens reserved for
+    the reply, optionally capped by *budget*. History that outgrows its
+    share is folded into the memory's running summary with an LLM call.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        model: str,
+        max_tokens: int,
+        budget: int = 0,
+    ) -> None:
+        self._provider = provider
+        self._model = model
+        window = provider.get_context_window(model) or _DEFAULT_CONTEXT_WINDOW
+        limit = max(_MIN_BUDGET, window - max_tokens)
+        self.total = min(budget, limit) if budget > 0 else limit
+        self.counter = TokenCounter(functools.partial(provider.count_tokens, model=model))
+
+    @property
+    def history_budget(self) -> int:
+        return int(self.total * _HISTORY_SHARE)
+
+    @property
+    def schema_budget(self) -> int:
+        return int(self.total * _SCHEMA_SHARE)
+
+    def view(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None) -> TranscriptView:
+        """Start fitting a ReACT run; tool definitions are charged against the budget up front."""
+        reserved = self.counter.text(json.dumps(tools, ensure_ascii=False)) if tools else 0
+        return TranscriptView(messages, self.total - reserved, self.counter)
+
+    async def summarize_history(self, memory: MemoryStore) -> bool:
+        """Fold the oldest turns of *memory* into its summary if history is over budget.
+
+        Folding stops at a user message and leaves history at about half its
+        share, so a summary call is not needed on every turn. Returns True
+        if the memory was folded. On an LLM error the history is left as is;
+        per-call fitting still keeps prompts within budget.
+        """
+        history = memory.get_recent()
+        counts = [self.counter.message(m) for m in history]
+        used = sum(counts) + self.counter.text(memory.summary)
+        if used <= self.history_budget or len(history) <= 2:
+            return False
+
+        target = self.history_budget // 2
+        fold = 0
+        while fold < len(history) - 2 and (used > target or history[fold].get("role") != "user"):
+            used -= counts[fold]
+            fold += 1
+        if fold == 0:
+            return False
+
+        transcript = "\n\n".join(f"[{m.get('role')}] {_as_text(m.get('content'))}" for m in history[:fold])
+        with tracing.span("llm.summarize", model=self._model, messages=fold) as span:
+            response = await self._provider.chat(
+                messages=[
+                    {"role": "system", "content": _SUMMARY_PROMPT},
+                    {
+                        "role": "user",
+                        "content": f"Existing summary:\n{memory.summary or '(none)'}\n\nNew messages:\n{transcript}",
+                    },
+                ],
+                model=self._model,
+                max_tokens=_SUMMARY_MAX_TOKENS,
+                temperature=0.0,
+            )
+            charge(self._provider, self._model, response)
+            span.set(finish_reason=response.finish_reason,
+                     **{k: v for k, v in response.usage.items() if k.endswith("_tokens")})
+        if response.finish_reason == "error" or not (response.content or "").strip():
+            logger.warning("History summary failed; keeping full history: {}", response.content)
+            return False
+
+        memory.fold(fold, response.content.strip())
+        logger.debug("Folded {} history messages into the conversation summary", fold)
+        return True
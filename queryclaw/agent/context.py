@@ -4,9 +4,11 @@ from __future__ import annotations
 
 import platform
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable
 
 from queryclaw.db.base import SQLAdapter
+from queryclaw.db.schema_cache import SchemaCache
+from queryclaw.agent.prefetch import SchemaPrefetcher
 from queryclaw.agent.skills import SkillsLoader
 
 
@@ -24,8 +26,17 @@ class ContextBuilder:
         read_only: bool = True,
         enable_subagent: bool = True,
         external_access_enabled: bool = False,
+        schema_cache: SchemaCache | None = None,
+        schema_token_budget: int | None = None,
+        count_tokens: Callable[[str], int] | None = None,
+        prefetcher: SchemaPrefetcher | None = None,
     ) -> None:
         self._db = db
+        self._prefetcher = prefetcher
+        self._schema_token_budget = schema_token_budget if count_tokens else None
+        self._count_tokens = count_tokens
+        self._schema_meta = schema_cache
+        self._schema_cache_version: int | None = None
         self._skills = skills or SkillsLoader()
         self._schema_cache: str | None = None
         self._read_only = read_only
@@ -34,11 +45,15 @@ class ContextBuilder:
 
     async def build_system_prompt(self) -> str:
         """Build the full system prompt with identity, schema, and skills."""
-        parts = [self._get_identity()]
+        return f"{self.build_stable_prompt()}\n\n---\n\n{await self.build_session_context()}"
 
-        schema_summary = await self._get_schema_summary()
-        if schema_summary:
-            parts.append(f"# Database Schema\n\n{schema_summary}")
+    def build_stable_prompt(self) -> str:
+        """Build the static part of the system prompt: identity, skills, guidelines.
+
+        The result is byte-identical across calls and turns (no clock, no
+        schema), so providers can cache it as a prompt prefix.
+        """
+        parts = [self._get_identity()]
 
         skills_summary = self._skills.build_skills_summary()
         if skills_summary:
@@ -48,18 +63,47 @@ class ContextBuilder:
 
         return "\n\n---\n\n".join(parts)
 
+    async def build_session_context(self, current_message: str = "") -> str:
+        """Build the volatile part of the system prompt: current time and schema summary.
+
+        With a prefetcher, the columns of tables that *current_message*
+        likely refers to are added after the table list.
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M (%A)")
+        parts = [f"# Session\n\n- Current time: {now}"]
+
+        schema_summary = await self._get_schema_summary()
+        if schema_summary:
+            if self._prefetcher is not None and current_message:
+                prefetched = await self._prefetcher.prefetch(current_message)
+                if prefetched:
+                    schema_summary = f"{schema_summary}\n\n{prefetched}"
+            parts.append(f"# Database Schema\n\n{schema_summary}")
+
+        return "\n\n---\n\n".join(parts)
+
     async def build_messages(
         self,
         history: list[dict[str, Any]],
         current_message: str,
+        summary: str = "",
     ) -> list[dict[str, Any]]:
-        """Build the complete message list for an LLM call."""
-        system_prompt = await self.build_system_prompt()
-        return [
-            {"role": "system", "content": system_prompt},
-            *history,
-            {"role": "user", "content": current_message},
+        """Build the complete message list for an LLM call.
+
+        The stable prompt and the session context go in two system messages,
+        in that order, so the cacheable prefix ends before anything that
+        changes between turns. A running *summary* of turns folded out of
+        *history* follows them.
+        """
+        messages = [
+            {"role": "system", "content": self.build_stable_prompt()},
+            {"role": "system", "content": await self.build_session_context(current_message)},
         ]
+        if summary:
+            messages.append({"role": "system", "content": f"# Earlier Conversation (summary)\n\n{summary}"})
+        messages.extend(history)
+        messages.append({"role": "user", "content": current_message})
+        return messages
 
     async def _get_schema_summary(self) -> str:
         """Get a compact table-name-only summary of the database schema.
@@ -68,13 +112,22 @@ class ContextBuilder:
         The LLM should call `schema_inspect` to get column details when needed.
         Internal tables (prefixed with `_queryclaw`) are excluded.
         """
-        if self._schema_cache is not None:
-            return self._schema_cache
-
-        try:
-            tables = await self._db.get_tables()
-        except Exception:
-            return ""
+        if self._schema_meta is not None:
+            # The shared cache notices DDL (ours or external) and bumps its version.
+            try:
+                tables = await self._schema_meta.get_tables(row_counts=False)
+            except Exception:
+                return ""
+            if self._schema_cache is not None and self._schema_cache_version == self._schema_meta.version:
+                return self._schema_cache
+            self._schema_cache_version = self._schema_meta.version
+        else:
+            if self._schema_cache is not None:
+                return self._schema_cache
+            try:
+                tables = await self._db.get_tables()
+            except Exception:
+                return ""
 
         if not tables:
             self._schema_cache = "Database is empty (no tables)."
@@ -87,12 +140,25 @@ class ContextBuilder:
             f"Tables ({len(user_tables)}):",
         ]
 
-        for table in user_tables:
+        used = 0
+        for i, table in enumerate(user_tables):
             rows_str = f" ({table.row_count} rows)" if table.row_count is not None else ""
-            lines.append(f"  - {table.name}{rows_str}")
+            line = f"  - {table.name}{rows_str}"
+            if self._schema_token_budget is not None:
+                used += self._count_tokens(line)
+                if used > self._schema_token_budget:
+                    lines.append(
+                        f"  - ... and {len(user_tables) - i} more tables "
+                        "(call `schema_inspect` with action `list_tables` to see them)"
+                    )
+                    break
+            lines.append(line)
 
         lines.append("")
-        lines.append("Column details are NOT listed above. You MUST call `schema_inspect` before writing any query.")
+        lines.append(
+            "Column details are NOT listed above (except for any prefetched tables below). "
+            "You MUST call `schema_inspect` before querying any other table."
+        )
 
         self._schema_cache = "\n".join(lines)
         return self._schema_cache
@@ -104,13 +170,13 @@ class ContextBuilder:
     def _get_identity(self) -> str:
         system = platform.system()
         runtime = f"{'macOS' if system == 'Darwin' else system} {platform.machine()}, Python {platform.python_version()}"
-        now = datetime.now().strftime("%Y-%m-%d %H:%M (%A)")
         db_type = self._db.db_type
 
         # --- Tools ---
         tools = [
             "`schema_inspect` — list tables, columns, indexes, foreign keys, row counts",
-            "`query_execute` — run SELECT queries, returns up to N rows",
+            "`query_execute` — run SELECT queries; returns a result handle, its shape and a preview",
+            "`query_result` — page, filter, sort, aggregate or profile a stored result by handle (no database access)",
             "`explain_plan` — run EXPLAIN on a query and return the execution plan",
             "`read_skill` — load a SKILL.md workflow by name (see Skills section)",
         ]
@@ -145,7 +211,7 @@ class ContextBuilder:
 
 You are **QueryClaw**, an AI-native database agent. You help users explore, query, and manage their database through natural language conversation.
 
-You are connected to a **{db_type}** database. The schema section below lists table names only — **column details are NOT provided**. You MUST call `schema_inspect` to discover columns before writing any query or DDL statement. Never guess column names.
+You are connected to a **{db_type}** database. The schema section below lists table names, plus the columns of a few tables that likely match the question. For any other table, you MUST call `schema_inspect` to discover columns before writing any query or DDL statement. Never guess column names.
 
 ## Available Tools
 
@@ -158,7 +224,6 @@ You are connected to a **{db_type}** database. The schema section below lists ta
 ## Runtime
 
 - Platform: {runtime}
-- Current time: {now}
 - Database type: {db_type}"""
 
     @staticmethod
@@ -167,7 +232,7 @@ You are connected to a **{db_type}** database. The schema section below lists ta
 
 - Answer in the **same language** as the user's question.
 - Be concise; format small result sets as markdown tables, summarize large ones.
-- **MUST call `schema_inspect`** before writing any query — column names are not in the prompt; guessing will fail.
+- **MUST call `schema_inspect`** before querying a table whose columns are not in the prompt; guessing will fail.
 - `query_execute` only accepts SELECT (including WITH...SELECT) — use `data_modify` or `ddl_execute` for other statements.
 - If a query fails, analyze the error and suggest a fix.
 - For multi-step tasks, briefly explain your plan before starting.
@@ -3,23 +3,29 @@
 from __future__ import annotations
 
 import asyncio
+import contextvars
 import json
-from typing import Any
+import time
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable
 
 from loguru import logger
 
-from typing import Callable, Awaitable
-
-_COMPACT_KEEP_TAIL = 6
-_COMPACT_TOOL_MAX = 500
-_COMPACT_ASST_MAX = 300
-
+from queryclaw import tracing
+from queryclaw.agent.budget import ContextBudget
 from queryclaw.agent.context import ContextBuilder
 from queryclaw.agent.memory import MemoryStore
+from queryclaw.agent.model_routing import ModelRouter
+from queryclaw.agent.prefetch import SchemaPrefetcher
+from queryclaw.agent.sessions import SessionStore
+from queryclaw.agent.usage import TurnUsage, UsageStore, charge, current as current_usage, metering
 from queryclaw.agent.skills import SkillsLoader
 from queryclaw.agent.subagent import SubAgentSpawner, SpawnSubAgentTool
 from queryclaw.db.base import SQLAdapter
-from queryclaw.providers.base import LLMProvider
+from queryclaw.db.routing import bind_session, reset_session
+from queryclaw.db.schema_cache import SchemaCache
+from queryclaw.providers.base import LLMProvider, LLMResponse
 from queryclaw.safety.audit import AuditLogger
 from queryclaw.safety.policy import SafetyPolicy
 from queryclaw.safety.redact import redact_private_info
@@ -28,6 +34,7 @@ from queryclaw.tools.registry import ToolRegistry
 from queryclaw.tools.read_skill import ReadSkillTool
 from queryclaw.tools.schema import SchemaInspectTool
 from queryclaw.tools.query import QueryExecuteTool
+from queryclaw.tools.results import QueryResultTool, ResultStore
 from queryclaw.tools.explain import ExplainPlanTool
 from queryclaw.tools.modify import DataModifyTool
 from queryclaw.tools.ddl import DDLExecuteTool
@@ -37,6 +44,31 @@ from queryclaw.config.schema import ExternalAccessConfig
 
 ConfirmationCallback = Callable[[str, str], Awaitable[bool]]
 
+_DEFAULT_MAX_CONCURRENT_SESSIONS = 4
+_SESSION_IDLE_TIMEOUT = 300.0  # seconds an idle session worker is kept before it exits
+
+
+@dataclass
+class AgentEvent:
+    """One step of a streamed agent turn (see ``AgentLoop.chat_stream``).
+
+    Types: ``token`` (content delta from the LLM), ``tool_start`` and
+    ``tool_end`` (a tool call and its result), ``final`` (the answer, last).
+    """
+
+    type: str
+    content: str | None = ""
+    tool: str = ""
+    arguments: dict[str, Any] = field(default_factory=dict)
+    ttft_ms: float | None = None  # on ``final``: turn start to first token
+
+
+# The inbound message being handled by the current session worker (channel mode).
+_current_msg: contextvars.ContextVar[Any] = contextvars.ContextVar("queryclaw_current_msg", default=None)
+
+# Usage-store session key for the interactive ``chat`` command.
+_CLI_SESSION = "cli"
+
 
 class AgentLoop:
     """The ReACT agent loop for database interaction.
@@ -63,6 +95,16 @@ class AgentLoop:
         confirmation_callback: ConfirmationCallback | None = None,
         bus: Any = None,
         external_access_config: ExternalAccessConfig | None = None,
+        max_concurrent_sessions: int = _DEFAULT_MAX_CONCURRENT_SESSIONS,
+        context_budget: int = 0,
+        session_store: SessionStore | None = None,
+        result_store: ResultStore | None = None,
+        schema_prefetch_tables: int = 3,
+        schema_prefetch_budget: int = 800,
+        usage_store: UsageStore | None = None,
+        session_token_budget: int = 0,
+        fast_model: str | None = None,
+        escalate_after_errors: int = 2,
     ) -> None:
         self.provider = provider
         self.db = db
@@ -77,20 +119,76 @@ class AgentLoop:
         self.tools = ToolRegistry()
         self.skills = SkillsLoader()
         ext_cfg = external_access_config
+        # Read-only work goes to replicas when the adapter routes reads.
+        self.read_db = db.for_reads()
+        self.schema_cache = SchemaCache(self.read_db)
+        # Prompt token budget: the model's context window, or context_budget if smaller.
+        self.budget = ContextBudget(provider, self.model, max_tokens, budget=context_budget)
+        # Columns of the tables a question likely needs, so the model can skip describe_table calls.
+        self.prefetcher = SchemaPrefetcher(
+            self.schema_cache, self.budget.counter.text,
+            max_tables=schema_prefetch_tables, token_budget=schema_prefetch_budget,
+        ) if schema_prefetch_tables > 0 else None
         self.context = ContextBuilder(
             db, self.skills,
             read_only=self.safety_policy.read_only,
             enable_subagent=enable_subagent,
             external_access_enabled=bool(ext_cfg and ext_cfg.enabled),
+            schema_cache=self.schema_cache,
+            schema_token_budget=self.budget.schema_budget,
+            count_tokens=self.budget.counter.text,
+            prefetcher=self.prefetcher,
         )
         self.memory = MemoryStore()
-        self.subagent_spawner = SubAgentSpawner(provider, db, model=self.model)
-        self._sessions: dict[str, MemoryStore] = {}
+        # Tool-selection iterations and subagents run on fast_model when one is set.
+        self.router = ModelRouter(
+            self.model, fast_model,
+            is_read_only=lambda name: (tool := self.tools.get(name)) is not None and tool.read_only,
+            escalate_after_errors=escalate_after_errors,
+        )
+        self.subagent_spawner = SubAgentSpawner(
+            provider, self.read_db, model=self.router.fast or self.model,
+            query_timeout=self.safety_policy.query_timeout,
+        )
+        # Channel-mode conversation memories, bounded and spilled to disk when evicted.
+        self.sessions = session_store or SessionStore()
+        # Query results the agent can re-read by handle without hitting the database.
+        self.results = result_store or ResultStore()
+        # Token and cost totals per session, model and tool; also enforces session_token_budget.
+        self.usage = usage_store or UsageStore()
+        self.session_token_budget = session_token_budget
+        # Per-turn iteration counts, to see what prefetching and prompt changes save.
+        self.turn_stats = {"turns": 0, "iterations": 0, "schema_calls": 0}
         self._running = False
-        self._current_msg: Any = None
+        self._session_queues: dict[str, asyncio.Queue] = {}
+        self._session_workers: dict[str, asyncio.Task] = {}
+        self.max_concurrent_sessions = self._effective_concurrency(max_concurrent_sessions)
+        self._session_slots = asyncio.Semaphore(self.max_concurrent_sessions)
 
         self._register_default_tools(max_query_rows, enable_subagent, ext_cfg)
 
+    @property
+    def _current_msg(self) -> Any:
+        """Inbound message of the session being processed in the calling task, if any."""
+        return _current_msg.get()
+
+    def _effective_concurrency(self, requested: int) -> int:
+        """Clamp the session limit to what the database connection can isolate.
+
+        Explicit transactions are only isolated per session when the adapter
+        pins a pooled connection to each task. On a single shared connection a
+        write-enabled agent handles one session at a time, so statements from
+        one chat never land inside another chat's open transaction.
+        """
+        requested = max(1, requested)
+        if requested > 1 and self.safety_policy.allows_write() and not getattr(self.db, "is_pooled", False):
+            logger.info(
+                "Write mode on a single database connection: processing sessions one at a time "
+                "(enable database.pool_enabled to run them in parallel)"
+            )
+            return 1
+        return requested
+
     def _register_default_tools(
         self,
         max_query_rows: int,
@@ -99,9 +197,13 @@ class AgentLoop:
     ) -> None:
         """Register the built-in database tools."""
         self.tools.register(ReadSkillTool(self.skills))
-        self.tools.register(SchemaInspectTool(self.db))
-        self.tools.register(QueryExecuteTool(self.db, max_rows=max_query_rows))
-        self.tools.register(ExplainPlanTool(self.db))
+        self.tools.register(SchemaInspectTool(self.read_db, schema_cache=self.schema_cache))
+        self.tools.register(QueryExecuteTool(
+            self.read_db, max_rows=max_query_rows, timeout=self.safety_policy.query_timeout,
+            result_store=self.results,
+        ))
+        self.tools.register(QueryResultTool(self.results))
+        self.tools.register(ExplainPlanTool(self.read_db))
         if enable_subagent:
             self.tools.register(SpawnSubAgentTool(self.subagent_spawner))
 
@@ -122,6 +224,7 @@ class AgentLoop:
                 validator=validator,
                 audit=audit,
                 confirmation_callback=self.confirmation_callback,
+                read_db=self.read_db,
             ))
             self.tools.register(DDLExecuteTool(
                 db=self.db,
@@ -130,6 +233,7 @@ class AgentLoop:
                 audit=audit,
                 confirmation_callback=self.confirmation_callback,
                 on_schema_change=self.context.invalidate_schema_cache,
+                schema_cache=self.schema_cache,
             ))
             self.tools.register(TransactionTool(
                 db=self.db,
@@ -145,13 +249,77 @@ class AgentLoop:
             user_message: The user's input message.
             debug: If True, print LLM prompts to the log (use with `queryclaw chat --debug`).
         """
-        messages = await self.context.build_messages(
-            history=self.memory.get_recent(),
+        with tracing.span("agent.turn", mode="chat"):
+            async with self._metered(_CLI_SESSION):
+                messages = await self._build_turn_messages(self.memory, user_message)
+                final_content, tools_used, updated_messages = await self._run_agent_loop(messages, log_prompt=debug)
+            return self._finish_turn(user_message, final_content, tools_used)
+
+    async def chat_stream(self, user_message: str, debug: bool = False) -> AsyncIterator[AgentEvent]:
+        """Like ``chat``, but yield ``AgentEvent``s while the turn runs.
+
+        Tokens are streamed from the provider as they are generated. The last
+        event is ``final`` with the same redacted text ``chat`` returns, plus
+        the turn's time to first token.
+        """
+        start = time.monotonic()
+        ttft_ms: float | None = None
+        with tracing.span("agent.turn", mode="chat", stream=True) as span:
+            async with self._metered(_CLI_SESSION):
+                messages = await self._build_turn_messages(self.memory, user_message)
+                final_content: str | None = None
+                tools_used: list[str] = []
+                async with aclosing(self._agent_events(messages, log_prompt=debug, stream=True)) as events:
+                    async for event in events:
+                        if event.type == "final":
+                            final_content = event.content
+                            continue
+                        if event.type == "token" and ttft_ms is None:
+                            ttft_ms = round((time.monotonic() - start) * 1000, 2)
+                        elif event.type == "tool_end":
+                            tools_used.append(event.tool)
+                        yield event
+            out = self._finish_turn(user_message, final_content, tools_used)
+            span.set(ttft_ms=ttft_ms)
+        if ttft_ms is not None:
+            logger.debug("Time to first token: {:.0f}ms", ttft_ms)
+        yield AgentEvent("final", content=out, ttft_ms=ttft_ms)
+
+    @asynccontextmanager
+    async def _metered(self, session: str, job_budget: int = 0) -> AsyncIterator[TurnUsage]:
+        """Count the turn's tokens and cost against *session* in the usage store.
+
+        The turn may spend what is left of the session's daily
+        ``session_token_budget``, and at most *job_budget* tokens (e.g. a
+        cron job's per-run budget). Either limit is off when 0.
+        """
+        limits: list[tuple[int, str]] = []
+        if job_budget > 0:
+            limits.append((job_budget, f"the job's token budget of {job_budget} tokens per run"))
+        if self.session_token_budget > 0:
+            left = max(0, self.session_token_budget - await self.usage.spent(session))
+            limits.append((left, f"this session's daily token budget of {self.session_token_budget} tokens"))
+        turn = TurnUsage(session)
+        if limits:
+            turn.budget, turn.budget_label = min(limits, key=lambda limit: limit[0])
+        try:
+            with metering(turn):
+                yield turn
+        finally:
+            await self.usage.record(turn)
+            logger.debug("Turn used {} tokens (${:.4f}) in session {}", turn.tokens, turn.cost_usd, session)
+
+    async def _build_turn_messages(self, memory: MemoryStore, user_message: str) -> list[dict[str, Any]]:
+        """Fold over-budget history into the memory's summary, then build the prompt."""
+        await self.budget.summarize_history(memory)
+        return await self.context.build_messages(
+            history=memory.get_recent(),
             current_message=user_message,
+            summary=memory.summary,
         )
 
-        final_content, tools_used, updated_messages = await self._run_agent_loop(messages, log_prompt=debug)
-
+    def _finish_turn(self, user_message: str, final_content: str | None, tools_used: list[str]) -> str:
+        """Record the turn in memory and return the redacted answer."""
         self.memory.add("user", user_message)
         out = final_content or "(no response)"
         out = redact_private_info(out)
@@ -173,11 +341,45 @@ class AgentLoop:
         Returns:
             (final_content, tools_used, messages)
         """
-        iteration = 0
         final_content: str | None = None
         tools_used: list[str] = []
+        async with aclosing(self._agent_events(messages, log_prompt=log_prompt)) as events:
+            async for event in events:
+                if event.type == "tool_end":
+                    tools_used.append(event.tool)
+                elif event.type == "final":
+                    final_content = event.content
+        return final_content, tools_used, messages
+
+    async def _agent_events(
+        self,
+        messages: list[dict[str, Any]],
+        log_prompt: bool = False,
+        stream: bool = False,
+    ) -> AsyncIterator[AgentEvent]:
+        """The ReACT iteration loop as an event stream; *messages* is extended in place.
+
+        With *stream*, the provider is called through ``chat_stream`` and
+        content deltas are yielded as ``token`` events as they arrive. The
+        ``final`` event carries the unredacted final content (None if the
+        model gave none).
+        """
+        iteration = 0
+        schema_calls = 0
+        final_content: str | None = None
+        tools = self.tools.get_definitions()
+        view = self.budget.view(messages, tools)
+        turn = current_usage()
+        route = self.router.start()
 
         while iteration < self.max_iterations:
+            if turn is not None and turn.exhausted:
+                logger.warning("{} reached in session {}", turn.budget_label.capitalize(), turn.session)
+                final_content = (
+                    f"(Stopped: {turn.budget_label} is used up"
+                    + (f" after {iteration} LLM calls.)" if iteration else ".)")
+                )
+                break
             iteration += 1
 
             # Log the full prompt sent to the LLM on each call (chat mode only, no truncation)
@@ -196,16 +398,54 @@ class AgentLoop:
                     "\n---\n".join(_format_msg(m) for m in messages),
                 )
 
-            compact = self._compact_messages(messages)
-
-            response = await self.provider.chat(
-                messages=compact,
-                tools=self.tools.get_definitions(),
-                model=self.model,
+            request = dict(
+                messages=view.fit(),
+                tools=tools,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
             )
 
+            model = route.model
+            with tracing.span("llm.chat", iteration=iteration, stream=stream) as span:
+                served: list[LLMResponse] = []
+                # Only the primary model's text can reach the user, so fast-model calls are not streamed.
+                async for event in self._call_llm(request, model, iteration, served, stream and model == self.model):
+                    yield event
+                response = served[0]
+                escalated = route.escalation(response) if model != self.model else None
+                if escalated:
+                    charge(self.provider, model, response)
+                    route.served(model)
+                    logger.debug("Iteration {}: escalating from {} to {} ({})", iteration, model, self.model, escalated)
+                    model = self.model
+                    served.clear()
+                    async for event in self._call_llm(request, model, iteration, served, stream):
+                        yield event
+                    response = served[0]
+                route.served(model)
+                if span:
+                    span.set(
+                        model=model,
+                        finish_reason=response.finish_reason,
+                        tool_calls=len(response.tool_calls),
+                        ttft_ms=response.ttft_ms,
+                        **{k: v for k, v in response.usage.items() if k.endswith("_tokens")},
+                    )
+                    if escalated:
+                        span.set(escalated=escalated)
+
+            charge(self.provider, model, response)
+            if turn is not None:
+                turn.charge_tool_results()
+            if response.usage:
+                logger.debug(
+                    "LLM usage (iteration {}): prompt={} (cached={}), completion={}",
+                    iteration,
+                    response.usage.get("prompt_tokens", 0),
+                    response.usage.get("cached_tokens", 0),
+                    response.usage.get("completion_tokens", 0),
+                )
+
             if log_prompt:
                 if response.has_tool_calls:
                     calls_summary = ", ".join(
@@ -240,17 +480,26 @@ class AgentLoop:
                     assistant_msg["reasoning_content"] = ""
                 messages.append(assistant_msg)
 
+                schema_calls += sum(tc.name == "schema_inspect" for tc in response.tool_calls)
                 for tc in response.tool_calls:
                     logger.debug("Tool call: {}({})", tc.name, tc.arguments)
-                    result = await self.tools.execute(tc.name, tc.arguments)
-                    tools_used.append(tc.name)
-
+                    yield AgentEvent("tool_start", tool=tc.name, arguments=tc.arguments)
+                # Read-only calls run concurrently, bounded by free database connections.
+                results = await self.tools.execute_batch(
+                    [(tc.name, tc.arguments) for tc in response.tool_calls],
+                    max_concurrency=self.read_db.max_concurrency,
+                )
+                route.observe(results)
+                for tc, result in zip(response.tool_calls, results):
+                    if turn is not None:
+                        turn.add_tool_result(tc.name, self.budget.counter.text(result))
                     messages.append({
                         "role": "tool",
                         "tool_call_id": tc.id,
                         "name": tc.name,
                         "content": result,
                     })
+                    yield AgentEvent("tool_end", content=result, tool=tc.name, arguments=tc.arguments)
             else:
                 final_content = response.content
                 break
@@ -258,44 +507,47 @@ class AgentLoop:
         if final_content is None and iteration >= self.max_iterations:
             final_content = "(Reached maximum iterations without a final response.)"
 
-        return final_content, tools_used, messages
-
-    @staticmethod
-    def _compact_messages(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
-        """Return a token-efficient copy of *messages*.
+        self.turn_stats["turns"] += 1
+        self.turn_stats["iterations"] += iteration
+        self.turn_stats["schema_calls"] += schema_calls
+        tracing.annotate(iterations=iteration, schema_calls=schema_calls)
+        logger.debug("Turn took {} LLM iterations ({} schema_inspect calls)", iteration, schema_calls)
+        yield AgentEvent("final", content=final_content)
 
-        The last ``_COMPACT_KEEP_TAIL`` messages are kept intact so the LLM
-        has full context for the current iteration.  Older tool results and
-        assistant text messages are truncated to save tokens.
+    async def _call_llm(
+        self,
+        request: dict[str, Any],
+        model: str,
+        iteration: int,
+        out: list[LLMResponse],
+        stream: bool = False,
+    ) -> AsyncIterator[AgentEvent]:
+        """Call *model* with *request* and append its response to *out*.
+
+        With *stream*, content deltas are yielded as ``token`` events while
+        the response is generated.
         """
-        # +1 for system prompt at index 0
-        if len(messages) <= _COMPACT_KEEP_TAIL + 1:
-            return messages
-
-        cutoff = len(messages) - _COMPACT_KEEP_TAIL
-        result: list[dict[str, Any]] = [messages[0]]
-
-        for i in range(1, len(messages)):
-            msg = messages[i]
-            if i >= cutoff:
-                result.append(msg)
-                continue
-
-            role = msg.get("role")
-            content = msg.get("content") or ""
-
-            if role == "tool" and len(content) > _COMPACT_TOOL_MAX:
-                result.append({**msg, "content": content[:300] + "\n\n[... truncated ...]"})
-            elif role == "assistant" and "tool_calls" not in msg and len(content) > _COMPACT_ASST_MAX:
-                result.append({**msg, "content": content[:200] + "\n[... truncated ...]"})
-            else:
-                result.append(msg)
-
-        return result
+        if not stream:
+            out.append(await self.provider.chat(**request, model=model))
+            return
+        response = None
+        async with aclosing(self.provider.chat_stream(**request, model=model)) as chunks:
+            async for chunk in chunks:
+                if chunk.delta:
+                    yield AgentEvent("token", content=chunk.delta)
+                if chunk.response is not None:
+                    response = chunk.response
+        if response is None:
+            response = LLMResponse(content="Error calling LLM: stream ended without a response", finish_reason="error")
+        if response.ttft_ms is not None:
+            logger.debug("LLM time to first token (iteration {}): {:.0f}ms", iteration, response.ttft_ms)
+        out.append(response)
 
     def reset(self) -> None:
         """Clear conversation history and schema cache."""
         self.memory.clear()
+        self.results.clear()
+        self.schema_cache.invalidate()
         self.context.invalidate_schema_cache()
 
     async def run(self) -> None:
@@ -308,26 +560,94 @@ class AgentLoop:
         from queryclaw.bus.events import InboundMessage, OutboundMessage
 
         self._running = True
-        logger.info("Agent loop started (channel mode)")
-
-        while self._running:
-            try:
-                msg = await asyncio.wait_for(self.bus.consume_inbound(), timeout=1.0)
-            except asyncio.TimeoutError:
-                continue
-
-            task = asyncio.create_task(self._dispatch_message(msg))
-            try:
-                await task
-            except Exception as e:
-                logger.exception("Error processing message: {}", e)
-                await self.bus.publish_outbound(
-                    OutboundMessage(
-                        channel=msg.channel,
-                        chat_id=msg.chat_id,
-                        content="Sorry, I encountered an error.",
-                    )
-                )
+        logger.info(
+            "Agent loop started (channel mode, up to {} concurrent sessions)", self.max_concurrent_sessions,
+        )
+
+        try:
+            while self._running:
+                try:
+                    msg = await asyncio.wait_for(self.bus.consume_inbound(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    await self.sessions.evict_idle()
+                    continue
+                self._enqueue(msg)
+        finally:
+            workers = list(self._session_workers.values())
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            logger.info(
+                "Session store: {}; result store: {}; turns: {}; usage: {}; models: {}; llm: {}",
+                self.sessions.stats(), self.results.stats(), self.turn_stats, self.usage.stats(),
+                dict(self.router.stats), getattr(self.provider, "stats", dict)(),
+            )
+            await self.sessions.close()
+            await self.results.close()
+            await self.usage.close()
+
+    def _enqueue(self, msg: Any) -> None:
+        """Queue *msg* behind earlier messages of its session, starting a worker if needed."""
+        key = msg.session_key
+        queue = self._session_queues.get(key)
+        if queue is None:
+            queue = self._session_queues[key] = asyncio.Queue()
+        queue.put_nowait(msg)
+        if key not in self._session_workers:
+            self._session_workers[key] = asyncio.create_task(self._session_worker(key, queue))
+
+    async def _session_worker(self, key: str, queue: asyncio.Queue) -> None:
+        """Process one session's messages in order; exit after sitting idle.
+
+        Each session gets its own task, so pooled adapters pin its transaction
+        connection to it. A transaction still open when the worker goes idle
+        is rolled back first, since no later task could end it. At most
+        ``max_concurrent_sessions`` workers run a message at any time.
+        """
+        from queryclaw.bus.events import OutboundMessage
+
+        try:
+            while True:
+                try:
+                    msg = await asyncio.wait_for(queue.get(), timeout=_SESSION_IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    if queue.empty() and self.db.has_transaction():
+                        await self._rollback_abandoned(key)
+                    if queue.empty():
+                        return
+                    continue
+                async with self._session_slots:
+                    try:
+                        await self._dispatch_message(msg)
+                    except Exception as e:
+                        logger.exception("Error processing message: {}", e)
+                        await self.bus.publish_outbound(
+                            OutboundMessage(
+                                channel=msg.channel,
+                                chat_id=msg.chat_id,
+                                content="Sorry, I encountered an error.",
+                            )
+                        )
+        finally:
+            # No await between the emptiness check above and this cleanup, so a
+            # message queued meanwhile always finds either this worker or none.
+            if self._session_workers.get(key) is asyncio.current_task():
+                del self._session_workers[key]
+                if queue.empty():
+                    self._session_queues.pop(key, None)
+
+    async def _rollback_abandoned(self, key: str) -> None:
+        """Roll back the transaction an idle session left open, releasing its connection."""
+        logger.warning(
+            "Session {} left a transaction open for {:.0f}s; rolling it back", key, _SESSION_IDLE_TIMEOUT,
+        )
+        token = bind_session(key)
+        try:
+            await self.db.rollback()
+        except Exception as e:
+            logger.warning("Rollback of session {}'s abandoned transaction failed: {}", key, e)
+        finally:
+            reset_session(token)
 
     def stop(self) -> None:
         """Stop the agent loop."""
@@ -336,53 +656,53 @@ class AgentLoop:
 
     async def _dispatch_message(self, msg: Any) -> None:
         """Process a single inbound message and publish the response."""
-        from queryclaw.bus.events import OutboundMessage
-
         response = await self._process_message(msg)
         if response is not None:
             await self.bus.publish_outbound(response)
 
     async def _process_message(self, msg: Any) -> Any | None:
         """Process a single inbound message and return the outbound response."""
-        from queryclaw.bus.events import OutboundMessage
-
-        self._current_msg = msg
+        msg_token = _current_msg.set(msg)
+        token = bind_session(msg.session_key)
         try:
             return await self._process_message_impl(msg)
         finally:
-            self._current_msg = None
+            reset_session(token)
+            _current_msg.reset(msg_token)
 
     async def _process_message_impl(self, msg: Any) -> Any | None:
         """Implementation of message processing."""
         from queryclaw.bus.events import OutboundMessage
 
-        session_key = msg.session_key
-        memory = self._sessions.get(session_key)
-        if memory is None:
-            memory = MemoryStore()
-            self._sessions[session_key] = memory
-
         preview = msg.content[:80] + "..." if len(msg.content) > 80 else msg.content
         logger.info("Processing message from {}:{}: {}", msg.channel, msg.sender_id, preview)
 
-        messages = await self.context.build_messages(
-            history=memory.get_recent(),
-            current_message=msg.content,
-        )
+        with tracing.span("agent.turn", mode="channel", channel=msg.channel, session=msg.session_key):
+            job_budget = (getattr(msg, "metadata", None) or {}).get("token_budget", 0)
+            async with self._metered(msg.session_key, job_budget):
+                async with self.sessions.session(msg.session_key) as memory:
+                    messages = await self._build_turn_messages(memory, msg.content)
 
-        final_content, tools_used, updated_messages = await self._run_agent_loop(messages, log_prompt=False)
-
-        memory.add("user", msg.content)
-        if final_content:
-            memory.add("assistant", final_content)
-
-        if tools_used:
-            logger.debug("Tools used: {}", ", ".join(tools_used))
+                    final_content, tools_used, updated_messages = await self._run_agent_loop(
+                        messages, log_prompt=False,
+                    )
 
-        out = final_content or "(no response)"
-        return OutboundMessage(
-            channel=msg.channel,
-            chat_id=msg.chat_id,
-            content=redact_private_info(out),
-            metadata=getattr(msg, "metadata", None) or {},
-        )
+                    memory.add("user", msg.content)
+                    if final_content:
+                        memory.add("assistant", final_content)
+
+            if tools_used:
+                logger.debug("Tools used: {}", ", ".join(tools_used))
+
+            out = final_content or "(no response)"
+            metadata = getattr(msg, "metadata", None) or {}
+            trace_id = tracing.current_trace_id()
+            if trace_id:
+                # Lets the channel's send span join this request's trace.
+                metadata = {**metadata, "trace_id": trace_id}
+            return OutboundMessage(
+                channel=msg.channel,
+                chat_id=msg.chat_id,
+                content=redact_private_info(out),
+                metadata=metadata,
+            )
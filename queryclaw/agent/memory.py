@@ -17,6 +17,7 @@ class MemoryStore:
     def __init__(self, max_messages: int = 100) -> None:
         self._messages: list[dict[str, Any]] = []
         self._max_messages = max_messages
+        self.summary = ""  # LLM-written summary of messages folded out of history
 
     def add(self, role: str, content: str) -> None:
         """Add a message to history.
@@ -50,9 +51,26 @@ class MemoryStore:
             return list(self._messages)
         return list(self._messages[-n:])
 
+    def fold(self, count: int, summary: str) -> None:
+        """Replace the oldest *count* messages with an updated running *summary*."""
+        del self._messages[:count]
+        self.summary = summary
+
+    def dump(self) -> dict[str, Any]:
+        """Serializable state, restored by ``MemoryStore.load``."""
+        return {"messages": list(self._messages), "summary": self.summary, "max_messages": self._max_messages}
+
+    @classmethod
+    def load(cls, data: dict[str, Any]) -> MemoryStore:
+        memory = cls(max_messages=data.get("max_messages", 100))
+        memory._messages = list(data.get("messages", []))
+        memory.summary = data.get("summary", "")
+        return memory
+
     def clear(self) -> None:
         """Clear all history."""
         self._messages.clear()
+        self.summary = ""
 
     def _trim(self) -> None:
         """Keep only the most recent max_messages."""
@@ -0,0 +1,86 @@
+"""Tiered model routing: a fast model picks tools, the primary model answers and plans writes."""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Callable
+
+from queryclaw.providers.base import LLMResponse
+
+_DEFAULT_ESCALATE_AFTER_ERRORS = 2
+
+
+class ModelRouter:
+    """Chooses the model for each ReACT iteration.
+
+    Without a *fast* model (or when it equals *primary*) every call goes to
+    *primary*. Otherwise iterations start on *fast*, and its response is
+    thrown away and the iteration re-run on *primary* when it is the final
+    answer, calls a tool that is not read-only (a write or an outside
+    request), or fails. After *escalate_after_errors* tool errors in a row,
+    the rest of the turn stays on *primary*.
+
+    ``stats`` counts LLM calls served per model and escalations per reason,
+    across turns.
+    """
+
+    def __init__(
+        self,
+        primary: str,
+        fast: str | None = None,
+        is_read_only: Callable[[str], bool] = lambda name: False,
+        escalate_after_errors: int = _DEFAULT_ESCALATE_AFTER_ERRORS,
+    ) -> None:
+        self.primary = primary
+        self.fast = fast if fast and fast != primary else None
+        self.is_read_only = is_read_only
+        self.escalate_after_errors = escalate_after_errors
+        self.stats: Counter[str] = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.fast is not None
+
+    def start(self) -> TurnRoute:
+        """Routing state for one turn."""
+        return TurnRoute(self)
+
+
+class TurnRoute:
+    """A turn's routing state: which model the next iteration starts on."""
+
+    def __init__(self, router: ModelRouter) -> None:
+        self._router = router
+        self._errors = 0
+        self._pinned = not router.enabled
+
+    @property
+    def model(self) -> str:
+        """Model to try first for the next iteration."""
+        return self._router.primary if self._pinned else self._router.fast  # type: ignore[return-value]
+
+    def escalation(self, response: LLMResponse) -> str | None:
+        """Why a fast-model *response* must be redone on the primary model, or None to keep it."""
+        if self._pinned:
+            return None
+        if response.finish_reason == "error":
+            reason = "error"
+        elif not response.has_tool_calls:
+            reason = "final_answer"
+        elif not all(self._router.is_read_only(tc.name) for tc in response.tool_calls):
+            reason = "write"
+        else:
+            return None
+        self._router.stats[f"escalated_{reason}"] += 1
+        return reason
+
+    def served(self, model: str) -> None:
+        self._router.stats[model] += 1
+
+    def observe(self, results: list[str]) -> None:
+        """Track tool errors; pin the turn to the primary model after too many in a row."""
+        for result in results:
+            self._errors = self._errors + 1 if result.startswith("Error") else 0
+            if not self._pinned and self._errors >= self._router.escalate_after_errors > 0:
+                self._pinned = True
+                self._router.stats["escalated_tool_errors"] += 1
@@ -0,0 +1,189 @@
+"""Speculative schema prefetch: guess the tables a question is about and describe them up front."""
+
+from __future__ import annotations
+
+import difflib
+import re
+from typing import Callable
+
+from loguru import logger
+
+from queryclaw.db.base import ColumnInfo, TableInfo
+from queryclaw.db.schema_cache import SchemaCache
+
+_DEFAULT_MAX_TABLES = 3
+_DEFAULT_TOKEN_BUDGET = 800
+_TABLE_WEIGHT = 3.0  # a word naming a table counts more than one naming a column
+_COLUMN_WEIGHT = 1.0
+_FUZZY_CUTOFF = 0.85  # difflib ratio for near-miss spellings ("custmer" -> "customer")
+_FUZZY_DISCOUNT = 0.6
+_MIN_WORD = 2
+
+_WORD_RE = re.compile(r"[A-Za-z][a-z]*|[A-Z]+(?![a-z])|\d+")
+_CJK_RE = re.compile(r"[㐀-鿿]+")
+
+# Common business terms, so Chinese questions find English-named tables.
+_GLOSSARY: dict[str, tuple[str, ...]] = {
+    "用户": ("user", "account"),
+    "账户": ("account",),
+    "账号": ("account",),
+    "客户": ("customer", "client"),
+    "订单": ("order",),
+    "商品": ("product", "item", "goods"),
+    "产品": ("product",),
+    "库存": ("inventory", "stock"),
+    "价格": ("price",),
+    "金额": ("amount", "total"),
+    "支付": ("payment", "pay"),
+    "付款": ("payment",),
+    "发票": ("invoice",),
+    "员工": ("employee", "staff"),
+    "部门": ("department", "dept"),
+    "工资": ("salary",),
+    "薪资": ("salary",),
+    "学生": ("student",),
+    "课程": ("course",),
+    "成绩": ("score", "grade"),
+    "日志": ("log",),
+    "评论": ("comment", "review"),
+    "分类": ("category",),
+    "类别": ("category",),
+    "地址": ("address",),
+    "城市": ("city",),
+    "国家": ("country",),
+    "供应商": ("supplier", "vendor"),
+    "销售": ("sale", "sales"),
+    "日期": ("date",),
+    "时间": ("time", "date"),
+    "状态": ("status",),
+    "名称": ("name",),
+    "名字": ("name",),
+    "邮箱": ("email",),
+    "电话": ("phone",),
+}
+
+
+def _singular(word: str) -> str:
+    """Crude English singular form, enough to match 'orders' to 'order' and 'categories' to 'category'."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("ses", "xes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> set[str]:
+    """Normalised search terms in *text*.
+
+    Identifiers are split on underscores and camelCase, lower-cased and
+    singularised. Chinese runs yield their two-character words and any
+    glossary terms they contain, plus the glossary's English equivalents.
+    """
+    terms: set[str] = set()
+    for word in _WORD_RE.findall(text):
+        word = word.lower()
+        if len(word) >= _MIN_WORD and not word.isdigit():
+            terms.add(_singular(word))
+    for run in _CJK_RE.findall(text):
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+        if len(run) == 1:
+            terms.add(run)
+        for term, english in _GLOSSARY.items():
+            if term in run:
+                terms.add(term)
+                terms.update(english)
+    return terms
+
+
+class SchemaPrefetcher:
+    """Describes the tables a user message most likely needs, before the first LLM call.
+
+    The message is matched against table names and the columns already in
+    the schema cache; nothing is queried to build the catalog. The columns
+    of the best *max_tables* matches are then fetched in one bulk catalog
+    call (through the cache) and rendered as a compact block of at most *token_budget*
+    tokens. This saves the model the ``list_tables`` / ``describe_table``
+    round trips that most sessions open with.
+    """
+
+    def __init__(
+        self,
+        schema_cache: SchemaCache,
+        count_tokens: Callable[[str], int],
+        max_tables: int = _DEFAULT_MAX_TABLES,
+        token_budget: int = _DEFAULT_TOKEN_BUDGET,
+    ) -> None:
+        self._cache = schema_cache
+        self._count_tokens = count_tokens
+        self.max_tables = max_tables
+        self.token_budget = token_budget
+        self.prefetched = 0  # tables described so far, for stats
+
+    def rank(self, message: str, tables: list[TableInfo]) -> list[str]:
+        """Table names scored against *message*, best first; tables with no match are left out."""
+        words = tokenize(message)
+        if not words:
+            return []
+        cached = self._cache.cached_columns()
+        scores: dict[str, float] = {}
+        for table in tables:
+            score = _TABLE_WEIGHT * _overlap(words, tokenize(table.name))
+            for col in cached.get(table.name, ()):
+                score += _COLUMN_WEIGHT * _overlap(words, tokenize(col.name))
+            if score > 0:
+                scores[table.name] = score
+        return sorted(scores, key=lambda name: (-scores[name], name))
+
+    async def prefetch(self, message: str) -> str:
+        """Return the prefetched-columns block for *message*, or "" if no table matches."""
+        if self.max_tables <= 0 or self.token_budget <= 0:
+            return ""
+        try:
+            tables = [t for t in await self._cache.get_tables(row_counts=False) if not t.name.startswith("_queryclaw")]
+            names = self.rank(message, tables)[:self.max_tables]
+            if not names:
+                return ""
+            snapshot = await self._cache.get_schema_snapshot(names)
+            columns = [snapshot[name].columns if name in snapshot else [] for name in names]
+        except Exception as e:
+            logger.debug("Schema prefetch skipped: {}", e)
+            return ""
+
+        lines = ["Columns of the tables that most likely match the question "
+                 "(no need to `schema_inspect` these again):"]
+        used = self._count_tokens(lines[0])
+        shown: list[str] = []
+        for name, cols in zip(names, columns):
+            if not cols:
+                continue
+            line = f"  - {name}({', '.join(_format_column(c) for c in cols)})"
+            used += self._count_tokens(line)
+            if used > self.token_budget:
+                break
+            lines.append(line)
+            shown.append(name)
+        if not shown:
+            return ""
+        self.prefetched += len(shown)
+        logger.debug("Prefetched columns for {}", ", ".join(shown))
+        return "\n".join(lines)
+
+
+def _overlap(words: set[str], names: set[str]) -> float:
+    """Exact term matches count 1 each; close misspellings of longer words count less."""
+    score = 0.0
+    for name in names:
+        if name in words:
+            score += 1
+        elif len(name) >= 4 and difflib.get_close_matches(name, words, n=1, cutoff=_FUZZY_CUTOFF):
+            score += _FUZZY_DISCOUNT
+    return score
+
+
+def _format_column(col: ColumnInfo) -> str:
+    text = f"{col.name} {col.data_type}".rstrip()
+    if col.is_primary_key:
+        text += " PK"
+    return text
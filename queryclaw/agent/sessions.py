@@ -0,0 +1,147 @@
+"""Bounded per-session conversation memory for channel mode."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
+import aiosqlite
+from loguru import logger
+
+from queryclaw.agent.memory import MemoryStore
+
+_SPILL_TABLE = "sessions"
+
+
+class SessionStore:
+    """``MemoryStore`` per session key, with LRU and idle-TTL eviction.
+
+    At most *max_sessions* memories stay in RAM. A session unused for
+    *idle_ttl* seconds, or the least recently used one when the limit is
+    exceeded, is evicted. Its history spills to a SQLite file and is
+    reloaded the next time that session key is seen. Sessions in use by
+    ``session()`` are never evicted.
+
+    Without *spill_path*, spilled histories go to a temporary file that is
+    removed on ``close()``. A *spill_path* file is kept, so histories
+    spilled before a restart are reloaded when their session returns.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        idle_ttl: float = 86400.0,
+        spill_path: str | Path | None = None,
+    ) -> None:
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl = idle_ttl
+        self._spill_path = Path(spill_path).expanduser() if spill_path else None
+        self._temp_spill = self._spill_path is None
+        self._live: OrderedDict[str, MemoryStore] = OrderedDict()
+        self._last_used: dict[str, float] = {}
+        self._pinned: dict[str, int] = {}
+        self._lock = asyncio.Lock()
+        self._conn: aiosqlite.Connection | None = None
+        self.evictions = 0
+        self.reloads = 0
+
+    @property
+    def live(self) -> int:
+        return len(self._live)
+
+    def stats(self) -> dict[str, int]:
+        """Counters: sessions in memory, evictions to disk, reloads from disk."""
+        return {"live": self.live, "evictions": self.evictions, "reloads": self.reloads}
+
+    @asynccontextmanager
+    async def session(self, key: str) -> AsyncIterator[MemoryStore]:
+        """Yield the memory for *key*, loading it from disk if it was evicted."""
+        async with self._lock:
+            memory = self._live.get(key)
+            if memory is None:
+                memory = await self._reload(key) or MemoryStore()
+                self._live[key] = memory
+            self._live.move_to_end(key)
+            self._pinned[key] = self._pinned.get(key, 0) + 1
+        try:
+            yield memory
+        finally:
+            async with self._lock:
+                self._pinned[key] -= 1
+                if not self._pinned[key]:
+                    del self._pinned[key]
+                self._live.move_to_end(key)
+                self._last_used[key] = time.monotonic()
+                await self._evict()
+
+    async def evict_idle(self) -> None:
+        """Evict sessions idle longer than ``idle_ttl``; call periodically."""
+        async with self._lock:
+            await self._evict()
+
+    async def _evict(self) -> None:
+        now = time.monotonic()
+        for key in list(self._live):
+            over_limit = len(self._live) > self.max_sessions
+            idle = self.idle_ttl > 0 and now - self._last_used.get(key, now) > self.idle_ttl
+            if not (over_limit or idle):
+                break  # ordered least recently used first; the rest are newer
+            if key in self._pinned:
+                continue
+            await self._spill(key, self._live.pop(key))
+            self._last_used.pop(key, None)
+            self.evictions += 1
+            logger.debug("Session {} evicted to disk ({} live)", key, len(self._live))
+
+    async def _db(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            if self._spill_path is None:
+                fd, name = tempfile.mkstemp(prefix="queryclaw-sessions-", suffix=".db")
+                os.close(fd)
+                self._spill_path = Path(name)
+            self._spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = await aiosqlite.connect(str(self._spill_path))
+            await self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {_SPILL_TABLE} "
+                "(key TEXT PRIMARY KEY, data TEXT NOT NULL, spilled_at REAL NOT NULL)"
+            )
+            await self._conn.commit()
+        return self._conn
+
+    async def _spill(self, key: str, memory: MemoryStore) -> None:
+        conn = await self._db()
+        await conn.execute(
+            f"INSERT OR REPLACE INTO {_SPILL_TABLE} (key, data, spilled_at) VALUES (?, ?, ?)",
+            (key, json.dumps(memory.dump(), ensure_ascii=False), time.time()),
+        )
+        await conn.commit()
+
+    async def _reload(self, key: str) -> MemoryStore | None:
+        if self._conn is None and (self._temp_spill or not self._spill_path.exists()):
+            return None  # nothing has been spilled yet
+        conn = await self._db()
+        async with conn.execute(f"SELECT data FROM {_SPILL_TABLE} WHERE key = ?", (key,)) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        await conn.execute(f"DELETE FROM {_SPILL_TABLE} WHERE key = ?", (key,))
+        await conn.commit()
+        self.reloads += 1
+        logger.debug("Session {} reloaded from disk", key)
+        return MemoryStore.load(json.loads(row[0]))
+
+    async def close(self) -> None:
+        """Close the spill file, removing it if it was temporary."""
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+            if self._temp_spill and self._spill_path is not None:
+                self._spill_path.unlink(missing_ok=True)
+                self._spill_path = None
@@ -7,6 +7,7 @@ from typing import Any
 
 from loguru import logger
 
+from queryclaw.agent.usage import charge
 from queryclaw.db.base import SQLAdapter
 from queryclaw.providers.base import LLMProvider
 from queryclaw.tools.registry import ToolRegistry
@@ -35,6 +36,7 @@ class SubAgent:
         max_iterations: int = 10,
         temperature: float = 0.1,
         max_tokens: int = 4096,
+        query_timeout: float | None = None,
     ) -> None:
         self.name = name
         self.provider = provider
@@ -51,7 +53,7 @@ class SubAgent:
                 self.tool_registry.register(tool)
         else:
             self.tool_registry.register(SchemaInspectTool(db))
-            self.tool_registry.register(QueryExecuteTool(db))
+            self.tool_registry.register(QueryExecuteTool(db, timeout=query_timeout))
             self.tool_registry.register(ExplainPlanTool(db))
 
     async def run(self, task: str) -> str:
@@ -71,6 +73,7 @@ class SubAgent:
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
             )
+            charge(self.provider, self.model, response)
 
             if response.has_tool_calls:
                 assistant_msg: dict[str, Any] = {
@@ -93,7 +96,11 @@ class SubAgent:
 
                 for tc in response.tool_calls:
                     logger.debug("SubAgent[{}] tool: {}({})", self.name, tc.name, tc.arguments)
-                    result = await self.tool_registry.execute(tc.name, tc.arguments)
+                results = await self.tool_registry.execute_batch(
+                    [(tc.name, tc.arguments) for tc in response.tool_calls],
+                    max_concurrency=self.db.max_concurrency,
+                )
+                for tc, result in zip(response.tool_calls, results):
                     messages.append({
                         "role": "tool",
                         "tool_call_id": tc.id,
@@ -110,10 +117,17 @@ class SubAgent:
 class SubAgentSpawner:
     """Factory for creating subagents from the parent agent context."""
 
-    def __init__(self, provider: LLMProvider, db: SQLAdapter, model: str | None = None) -> None:
+    def __init__(
+        self,
+        provider: LLMProvider,
+        db: SQLAdapter,
+        model: str | None = None,
+        query_timeout: float | None = None,
+    ) -> None:
         self._provider = provider
         self._db = db
         self._model = model
+        self._query_timeout = query_timeout
 
     def spawn(
         self,
@@ -132,6 +146,7 @@ class SubAgentSpawner:
             system_prompt=system_prompt,
             tools=tools,
             max_iterations=max_iterations,
+            query_timeout=self._query_timeout,
         )
 
 
@@ -145,6 +160,10 @@ class SpawnSubAgentTool(Tool):
     def name(self) -> str:
         return "spawn_subagent"
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
         return (
@@ -0,0 +1,229 @@
+"""Token and cost accounting per turn, session, model and tool, with optional per-session budgets."""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+import aiosqlite
+from loguru import logger
+
+from queryclaw.providers.base import LLMProvider, LLMResponse
+
+_MODEL_TABLE = "usage"
+_TOOL_TABLE = "tool_usage"
+_COUNTERS = ("calls", "prompt_tokens", "completion_tokens", "cached_tokens", "cost_usd")
+_TOOL_COUNTERS = ("calls", "result_tokens", "prompt_tokens")
+GROUPS = ("session", "day", "model", "tool")
+
+# The turn whose LLM calls are being counted in the calling task, if any.
+_current: ContextVar[TurnUsage | None] = ContextVar("queryclaw_turn_usage", default=None)
+
+
+def today() -> str:
+    return time.strftime("%Y-%m-%d")
+
+
+@dataclass
+class TurnUsage:
+    """Tokens and cost of one agent turn.
+
+    ``models`` holds the counters of every LLM call made for the turn,
+    including history summaries and sub-agents, by model. ``tools`` holds,
+    per tool, the tokens of its results and the prompt tokens they cost:
+    a result is re-sent with every later LLM call of the turn, so each of
+    those calls is charged its size again. *budget* caps the turn's total
+    tokens (None = unlimited); *budget_label* names the limit it came from.
+    """
+
+    session: str
+    budget: int | None = None
+    budget_label: str = "the token budget"
+    models: dict[str, dict[str, float]] = field(default_factory=dict)
+    tools: dict[str, dict[str, int]] = field(default_factory=dict)
+    _carried: list[tuple[str, int]] = field(default_factory=list, repr=False)
+
+    @property
+    def tokens(self) -> int:
+        return int(sum(m["prompt_tokens"] + m["completion_tokens"] for m in self.models.values()))
+
+    @property
+    def cost_usd(self) -> float:
+        return sum(m["cost_usd"] for m in self.models.values())
+
+    @property
+    def exhausted(self) -> bool:
+        return self.budget is not None and self.tokens >= self.budget
+
+    def add(self, model: str, usage: dict[str, Any], cost_usd: float = 0.0) -> None:
+        counters = self.models.setdefault(model, dict.fromkeys(_COUNTERS, 0))
+        counters["calls"] += 1
+        for key in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+            counters[key] += usage.get(key) or 0
+        counters["cost_usd"] += cost_usd
+
+    def add_tool_result(self, tool: str, tokens: int) -> None:
+        """Count a tool result that now sits in the turn's transcript."""
+        counters = self.tools.setdefault(tool, dict.fromkeys(_TOOL_COUNTERS, 0))
+        counters["calls"] += 1
+        counters["result_tokens"] += tokens
+        self._carried.append((tool, tokens))
+
+    def charge_tool_results(self) -> None:
+        """Charge every result carried so far for one more LLM call's prompt."""
+        for tool, tokens in self._carried:
+            self.tools[tool]["prompt_tokens"] += tokens
+
+
+def charge(provider: LLMProvider, model: str, response: LLMResponse) -> None:
+    """Count *response*'s usage against the current turn, if one is being metered."""
+    turn = _current.get()
+    if turn is not None and response.usage:
+        turn.add(model, response.usage, provider.estimate_cost(response.usage, model))
+
+
+def current() -> TurnUsage | None:
+    return _current.get()
+
+
+def current_session() -> str:
+    """The session of the turn being metered, or "" outside one."""
+    turn = _current.get()
+    return turn.session if turn is not None else ""
+
+
+@contextmanager
+def metering(turn: TurnUsage) -> Iterator[TurnUsage]:
+    """Count the LLM calls made inside the block (see ``charge``) against *turn*."""
+    token = _current.set(turn)
+    try:
+        yield turn
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            pass  # closed from another context (e.g. an async generator finalized elsewhere)
+
+
+class UsageStore:
+    """Aggregates turn usage per day, session and model (and per tool).
+
+    Tokens spent per session and day are always kept in memory, for
+    budgets. With *path*, every turn is also added to a SQLite file that
+    outlives the process and backs ``report`` (``queryclaw usage``).
+    """
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path).expanduser() if path else None
+        self._conn: aiosqlite.Connection | None = None
+        self._spent: dict[tuple[str, str], int] = {}
+        self.turns = 0
+        self.tokens = 0
+        self.cost_usd = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {"turns": self.turns, "tokens": self.tokens, "cost_usd": round(self.cost_usd, 4)}
+
+    async def _db(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            assert self.path is not None
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = await aiosqlite.connect(str(self.path))
+            await self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {_MODEL_TABLE} (day TEXT NOT NULL, session TEXT NOT NULL, "
+                "model TEXT NOT NULL, turns INTEGER NOT NULL DEFAULT 0, calls INTEGER NOT NULL DEFAULT 0, "
+                "prompt_tokens INTEGER NOT NULL DEFAULT 0, completion_tokens INTEGER NOT NULL DEFAULT 0, "
+                "cached_tokens INTEGER NOT NULL DEFAULT 0, cost_usd REAL NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (day, session, model))"
+            )
+            await self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {_TOOL_TABLE} (day TEXT NOT NULL, session TEXT NOT NULL, "
+                "tool TEXT NOT NULL, calls INTEGER NOT NULL DEFAULT 0, result_tokens INTEGER NOT NULL DEFAULT 0, "
+                "prompt_tokens INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (day, session, tool))"
+            )
+            await self._conn.commit()
+        return self._conn
+
+    async def spent(self, session: str, day: str | None = None) -> int:
+        """Tokens *session* has used on *day* (default: today)."""
+        key = (day or today(), session)
+        if key not in self._spent:
+            total = 0
+            if self.path is not None:
+                try:
+                    conn = await self._db()
+                    async with conn.execute(
+                        f"SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM {_MODEL_TABLE} "
+                        "WHERE day = ? AND session = ?",
+                        key,
+                    ) as cursor:
+                        total = (await cursor.fetchone())[0]
+                except Exception as e:
+                    logger.warning("Could not read token usage from {}: {}", self.path, e)
+            self._spent[key] = total
+        return self._spent[key]
+
+    async def record(self, turn: TurnUsage) -> None:
+        """Add a finished turn to the aggregates."""
+        day = today()
+        await self.spent(turn.session, day)  # load the persisted total before adding to it
+        self._spent[(day, turn.session)] += turn.tokens
+        self.turns += 1
+        self.tokens += turn.tokens
+        self.cost_usd += turn.cost_usd
+        if self.path is None or not (turn.models or turn.tools):
+            return
+        try:
+            conn = await self._db()
+            for i, (model, c) in enumerate(turn.models.items()):
+                await conn.execute(
+                    f"INSERT INTO {_MODEL_TABLE} (day, session, model, turns, {', '.join(_COUNTERS)}) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (day, session, model) DO UPDATE SET "
+                    "turns = turns + excluded.turns, "
+                    + ", ".join(f"{k} = {k} + excluded.{k}" for k in _COUNTERS),
+                    # The turn counts once, against the first model it called.
+                    (day, turn.session, model, int(i == 0), *(c[k] for k in _COUNTERS)),
+                )
+            for tool, c in turn.tools.items():
+                await conn.execute(
+                    f"INSERT INTO {_TOOL_TABLE} (day, session, tool, {', '.join(_TOOL_COUNTERS)}) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (day, session, tool) DO UPDATE SET "
+                    + ", ".join(f"{k} = {k} + excluded.{k}" for k in _TOOL_COUNTERS),
+                    (day, turn.session, tool, *(c[k] for k in _TOOL_COUNTERS)),
+                )
+            await conn.commit()
+        except Exception as e:
+            logger.warning("Could not save token usage to {}: {}", self.path, e)
+
+    async def report(self, by: str = "session", days: int = 7) -> list[dict[str, Any]]:
+        """Persisted usage of the last *days* days grouped *by* session, day, model or tool."""
+        if by not in GROUPS:
+            raise ValueError(f"Unknown grouping {by!r}; use one of {', '.join(GROUPS)}")
+        if self.path is None or not self.path.exists():
+            return []
+        since = time.strftime("%Y-%m-%d", time.localtime(time.time() - (days - 1) * 86400))
+        if by == "tool":
+            sql = (
+                f"SELECT tool, SUM(calls), SUM(result_tokens), SUM(prompt_tokens) FROM {_TOOL_TABLE} "
+                "WHERE day >= ? GROUP BY tool ORDER BY SUM(prompt_tokens) DESC"
+            )
+            names = ("tool", *_TOOL_COUNTERS)
+        else:
+            sql = (
+                f"SELECT {by}, SUM(turns), " + ", ".join(f"SUM({k})" for k in _COUNTERS)
+                + f" FROM {_MODEL_TABLE} WHERE day >= ? GROUP BY {by} "
+                + ("ORDER BY day" if by == "day" else "ORDER BY SUM(prompt_tokens + completion_tokens) DESC")
+            )
+            names = (by, "turns", *_COUNTERS)
+        conn = await self._db()
+        async with conn.execute(sql, (since,)) as cursor:
+            return [dict(zip(names, row)) for row in await cursor.fetchall()]
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
@@ -7,6 +7,7 @@ from typing import Any
 
 from loguru import logger
 
+from queryclaw import tracing
 from queryclaw.bus.events import OutboundMessage
 from queryclaw.bus.queue import MessageBus
 from queryclaw.channels.base import BaseChannel
@@ -143,7 +144,8 @@ class ChannelManager:
                                 content=msg.content,
                                 metadata=meta,
                             )
-                            await channel.send(broadcast_msg)
+                            with tracing.span("channel.send", trace_id=meta.get("trace_id"), channel=ch_name):
+                                await channel.send(broadcast_msg)
                             sent = True
                         except Exception as e:
                             logger.error("Error broadcasting to {}: {}", ch_name, e)
@@ -157,7 +159,9 @@ class ChannelManager:
                     channel = self.channels.get(msg.channel)
                     if channel:
                         try:
-                            await channel.send(msg)
+                            with tracing.span("channel.send", trace_id=(msg.metadata or {}).get("trace_id"),
+                                              channel=msg.channel):
+                                await channel.send(msg)
                         except Exception as e:
                             logger.error("Error sending to {}: {}", msg.channel, e)
                     else:
@@ -0,0 +1,300 @@
+"""End-to-end benchmark of the agent loop: scripted scenarios against a seeded SQLite database."""
+
+from __future__ import annotations
+
+import itertools
+import math
+import platform
+import random
+import tempfile
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable
+
+from queryclaw import __version__
+from queryclaw.agent.loop import AgentLoop
+from queryclaw.db.sqlite import SQLiteAdapter
+from queryclaw.providers.base import LLMProvider, LLMResponse, LLMStreamChunk, ToolCallRequest
+from queryclaw.safety.policy import SafetyPolicy
+from queryclaw.tools.results import ResultStore
+
+_CUSTOMERS = 200
+_ORDERS = 5_000
+_SEED = 42
+_CITIES = ("Berlin", "Lisbon", "Osaka", "Austin", "Hangzhou", "Nairobi", "Lima", "Oslo")
+_STATUSES = ("paid", "paid", "paid", "open", "refunded")
+_call_ids = itertools.count(1)
+METRICS = (
+    "wall_ms", "llm_ms", "tool_ms", "local_ms", "cpu_ms",
+    "iterations", "tool_calls", "prompt_tokens", "completion_tokens",
+)
+
+
+def _call(name: str, **arguments: Any) -> LLMResponse:
+    call = ToolCallRequest(id=f"call_{next(_call_ids)}", name=name, arguments=arguments)
+    return LLMResponse(content=None, tool_calls=[call])
+
+
+@dataclass
+class Scenario:
+    """A benchmark question and the model turns that answer it when run scripted."""
+
+    name: str
+    question: str
+    script: list[LLMResponse] = field(default_factory=list)
+
+
+def _generate_rows_sql(count: int) -> str:
+    values = ", ".join(
+        f"('Test User {i}', 'test{i}@example.com', '{_CITIES[i % len(_CITIES)]}')" for i in range(count)
+    )
+    return f"INSERT INTO customers (name, email, city) VALUES {values}"
+
+
+SCENARIOS: tuple[Scenario, ...] = (
+    Scenario(
+        name="top_customers",
+        question="List the top 5 customers by total paid order value.",
+        script=[
+            _call("schema_inspect", action="describe_table", table="orders"),
+            _call(
+                "query_execute",
+                sql="SELECT c.name, c.city, SUM(o.amount) AS total FROM customers c "
+                    "JOIN orders o ON o.customer_id = c.id WHERE o.status = 'paid' "
+                    "GROUP BY c.id ORDER BY total DESC LIMIT 5",
+            ),
+            LLMResponse(content="The top 5 customers by paid order value are listed above."),
+        ],
+    ),
+    Scenario(
+        name="slow_query",
+        question="Why is this query slow? SELECT * FROM orders WHERE status = 'open' ORDER BY created_at",
+        script=[
+            _call("explain_plan", sql="SELECT * FROM orders WHERE status = 'open' ORDER BY created_at"),
+            _call("schema_inspect", action="list_indexes", table="orders"),
+            _call("query_execute", sql="SELECT status, COUNT(*) AS n FROM orders GROUP BY status"),
+            LLMResponse(
+                content="It scans every row of orders and sorts the matches: there is no index on "
+                        "(status, created_at). Add one to read only open orders, already in order."
+            ),
+        ],
+    ),
+    Scenario(
+        name="generate_rows",
+        question="Generate 100 test rows in the customers table.",
+        script=[
+            _call("schema_inspect", action="describe_table", table="customers"),
+            _call("data_modify", sql=_generate_rows_sql(100)),
+            _call("query_execute", sql="SELECT COUNT(*) AS n FROM customers WHERE email LIKE 'test%'"),
+            LLMResponse(content="Inserted 100 test customers."),
+        ],
+    ),
+)
+
+
+class ScriptedProvider(LLMProvider):
+    """Plays a scenario's script in order, reporting token usage as a local estimate."""
+
+    def __init__(self, script: list[LLMResponse]) -> None:
+        super().__init__()
+        self._script = list(script)
+        self._next = 0
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        step = self._script[min(self._next, len(self._script) - 1)]
+        self._next += 1
+        prompt = "".join(str(m.get("content") or "") + str(m.get("tool_calls") or "") for m in messages)
+        completion = (step.content or "") + "".join(str(tc.arguments) for tc in step.tool_calls)
+        usage = {
+            "prompt_tokens": self.count_tokens(prompt) + (self.count_tokens(str(tools)) if tools else 0),
+            "completion_tokens": self.count_tokens(completion),
+        }
+        return LLMResponse(content=step.content, tool_calls=step.tool_calls, usage=usage)
+
+    def get_default_model(self) -> str:
+        return "scripted"
+
+
+class _TimedProvider(LLMProvider):
+    """Wraps a provider to add up time spent waiting on it and the tokens it reports."""
+
+    def __init__(self, inner: LLMProvider) -> None:
+        super().__init__()
+        self.inner = inner
+        self.wait = 0.0
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def _count(self, response: LLMResponse, started: float) -> None:
+        self.wait += time.perf_counter() - started
+        self.calls += 1
+        self.prompt_tokens += response.usage.get("prompt_tokens", 0)
+        self.completion_tokens += response.usage.get("completion_tokens", 0)
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        started = time.perf_counter()
+        response = await self.inner.chat(messages, tools=tools, model=model, max_tokens=max_tokens,
+                                         temperature=temperature)
+        self._count(response, started)
+        return response
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        started = time.perf_counter()
+        stream = self.inner.chat_stream(messages, tools=tools, model=model, max_tokens=max_tokens,
+                                        temperature=temperature)
+        async with aclosing(stream) as chunks:
+            async for chunk in chunks:
+                if chunk.response is not None:
+                    self._count(chunk.response, started)
+                yield chunk
+
+    def count_tokens(self, text: str, model: str | None = None) -> int:
+        return self.inner.count_tokens(text, model)
+
+    def get_context_window(self, model: str | None = None) -> int | None:
+        return self.inner.get_context_window(model)
+
+    def estimate_cost(self, usage: dict[str, int], model: str | None = None) -> float:
+        return self.inner.estimate_cost(usage, model)
+
+    def get_default_model(self) -> str:
+        return self.inner.get_default_model()
+
+
+async def seed_database(path: Path) -> SQLiteAdapter:
+    """Create and connect a deterministic customers/orders database at *path*."""
+    rng = random.Random(_SEED)
+    db = SQLiteAdapter()
+    await db.connect(database=str(path))
+    await db.execute(
+        "CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT, city TEXT)"
+    )
+    await db.execute(
+        "CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL REFERENCES customers(id), "
+        "amount REAL NOT NULL, status TEXT NOT NULL, created_at TEXT NOT NULL)"
+    )
+    customers = ", ".join(
+        f"({i}, 'Customer {i}', 'customer{i}@example.com', '{rng.choice(_CITIES)}')"
+        for i in range(1, _CUSTOMERS + 1)
+    )
+    await db.execute(f"INSERT INTO customers VALUES {customers}")
+    for start in range(0, _ORDERS, 1_000):
+        orders = ", ".join(
+            f"({i}, {rng.randint(1, _CUSTOMERS)}, {rng.uniform(5, 500):.2f}, '{rng.choice(_STATUSES)}', "
+            f"'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}')"
+            for i in range(start + 1, min(start + 1_000, _ORDERS) + 1)
+        )
+        await db.execute(f"INSERT INTO orders VALUES {orders}")
+    return db
+
+
+async def run_scenario(scenario: Scenario, provider: LLMProvider, workdir: Path) -> dict[str, float]:
+    """Run *scenario* once on a freshly seeded database and return its measurements."""
+    db = await seed_database(workdir / f"{scenario.name}-{time.monotonic_ns()}.db")
+    timed = _TimedProvider(provider)
+    results = ResultStore()
+    agent = AgentLoop(
+        provider=timed,
+        db=db,
+        safety_policy=SafetyPolicy(read_only=False, require_confirmation=False),
+        enable_subagent=False,
+        result_store=results,
+    )
+    tool_time = 0.0
+    tool_calls = 0
+    try:
+        cpu_start = time.process_time()
+        start = last = time.perf_counter()
+        previous = ""
+        async with aclosing(agent.chat_stream(scenario.question)) as events:
+            async for event in events:
+                now = time.perf_counter()
+                # A batch of tool calls runs between its last tool_start and its first tool_end.
+                if event.type == "tool_end" and previous == "tool_start":
+                    tool_time += now - last
+                if event.type == "tool_end":
+                    tool_calls += 1
+                previous, last = event.type, now
+        wall = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+    finally:
+        await results.close()
+        await db.close()
+    return {
+        "wall_ms": wall * 1000,
+        "llm_ms": timed.wait * 1000,
+        "tool_ms": tool_time * 1000,
+        "local_ms": max(0.0, wall - timed.wait - tool_time) * 1000,
+        "cpu_ms": cpu * 1000,
+        "iterations": timed.calls,
+        "tool_calls": tool_calls,
+        "prompt_tokens": timed.prompt_tokens,
+        "completion_tokens": timed.completion_tokens,
+    }
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..1)."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+async def run_bench(
+    scenarios: list[Scenario],
+    runs: int,
+    make_provider: Callable[[Scenario], LLMProvider] | None = None,
+    provider_label: str = "scripted",
+) -> dict[str, Any]:
+    """Run each scenario *runs* times and summarise every metric as p50/p95.
+
+    *make_provider* returns the provider for one run (e.g. a replay of a
+    recorded session); by default each scenario plays its own script.
+    """
+    report: dict[str, Any] = {
+        "queryclaw_version": __version__,
+        "python": platform.python_version(),
+        "provider": provider_label,
+        "runs": runs,
+        "scenarios": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="queryclaw-bench-") as tmp:
+        for scenario in scenarios:
+            samples: list[dict[str, float]] = []
+            for _ in range(runs):
+                provider = make_provider(scenario) if make_provider else ScriptedProvider(scenario.script)
+                samples.append(await run_scenario(scenario, provider, Path(tmp)))
+            report["scenarios"][scenario.name] = {
+                "question": scenario.question,
+                **{
+                    metric: {
+                        "p50": round(percentile([s[metric] for s in samples], 0.5), 3),
+                        "p95": round(percentile([s[metric] for s in samples], 0.95), 3),
+                    }
+                    for metric in METRICS
+                },
+            }
+    return report
@@ -4,9 +4,11 @@ from __future__ import annotations
 
 import asyncio
 from pathlib import Path
+from typing import AsyncIterator
 
 import typer
 from rich.console import Console
+from rich.live import Live
 from rich.markdown import Markdown
 from rich.text import Text
 
@@ -15,16 +17,23 @@ from prompt_toolkit.formatted_text import HTML
 from prompt_toolkit.history import InMemoryHistory
 from prompt_toolkit.patch_stdout import patch_stdout
 
-from queryclaw import __version__
-from queryclaw.agent.loop import AgentLoop
+from queryclaw import __version__, tracing
+from queryclaw.agent.loop import AgentEvent, AgentLoop
+from queryclaw.agent.sessions import SessionStore
+from queryclaw.agent.usage import UsageStore, current_session
 from queryclaw.bus.events import OutboundMessage
 from queryclaw.bus.queue import MessageBus
 from queryclaw.channels.manager import ChannelManager
 from queryclaw.config.loader import get_config_path, load_config, save_config
 from queryclaw.config.schema import Config
 from queryclaw.db.registry import AdapterRegistry
+from queryclaw.providers.base import LLMProvider
 from queryclaw.providers.litellm_provider import LiteLLMProvider
+from queryclaw.providers.pool import ProviderPool
+from queryclaw.providers.replay import RecordingProvider, ReplayProvider
 from queryclaw.safety.policy import SafetyPolicy
+from queryclaw.safety.redact import redact_private_info
+from queryclaw.tools.results import ResultStore
 
 app = typer.Typer(
     name="queryclaw",
@@ -94,36 +103,123 @@ def onboard(
     console.print("- Or enable Feishu/DingTalk in `channels` and run: `queryclaw serve`")
 
 
-def _make_provider(config: Config) -> LiteLLMProvider:
-    """Create LLM provider from configuration."""
-    model = config.agent.model
-    provider_name = config.get_provider_name(model)
-    provider_cfg = config.get_provider(model)
+def _make_provider(config: Config, record: Path | None = None, replay: Path | None = None) -> LLMProvider:
+    """Create LLM provider from configuration.
 
-    if not provider_cfg or not provider_cfg.api_key:
+    With *replay*, responses come from a recorded transcript and no API key
+    is needed. With *record*, every LLM call is also appended to that file.
+    """
+    if replay is not None:
+        return ReplayProvider(replay)
+    model = config.agent.model
+    members = _pool_members(config, model, config.llm_pool.providers)
+    if not members:
         raise ValueError(
             "No LLM API key configured. "
             "Set one in ~/.queryclaw/config.json under providers."
         )
+    pool = config.llm_pool
+    fallback_model = pool.fallback_model if pool.fallback_model != model else ""
+    provider: LLMProvider = ProviderPool(
+        members,
+        fallback=_pool_members(config, fallback_model) if fallback_model else None,
+        fallback_model=fallback_model or None,
+        max_retries=pool.max_retries,
+        retry_base_delay=pool.retry_base_delay,
+        retry_max_delay=pool.retry_max_delay,
+        max_concurrency=pool.max_concurrency,
+        session_of=current_session,
+    )
+    if record is not None:
+        provider = RecordingProvider(provider, record)
+    return provider
+
+
+def _pool_members(config: Config, model: str, extra_providers: list[str] | None = None) -> list[LLMProvider]:
+    """One provider per API key that serves *model*: its matched provider's keys, then *extra_providers*'."""
+    sources = []
+    provider_cfg = config.get_provider(model)
+    if provider_cfg is not None:
+        sources.append((config.get_provider_name(model), provider_cfg))
+    for name in extra_providers or []:
+        cfg = getattr(config.providers, name, None)
+        if cfg is None:
+            raise ValueError(f"Unknown provider {name!r} in llm_pool.providers")
+        if cfg is not provider_cfg:
+            sources.append((name, cfg))
+    return [
+        LiteLLMProvider(
+            api_key=key,
+            api_base=cfg.api_base or None,
+            default_model=model,
+            extra_headers=cfg.extra_headers,
+            provider_name=name,
+        )
+        for name, cfg in sources
+        for key in cfg.all_keys()
+    ]
 
-    return LiteLLMProvider(
-        api_key=provider_cfg.api_key,
-        api_base=config.get_api_base(model),
-        default_model=model,
-        extra_headers=provider_cfg.extra_headers,
-        provider_name=provider_name,
+
+def _make_result_store(config: Config) -> ResultStore:
+    return ResultStore(
+        max_bytes=config.agent.result_store_max_bytes,
+        spill=config.agent.result_store_spill,
     )
 
 
+def _configure_tracing(config: Config) -> None:
+    if config.tracing.enabled:
+        tracing.configure(
+            path=config.tracing.path or None,
+            max_bytes=config.tracing.max_bytes,
+            backups=config.tracing.backups,
+            otlp_endpoint=config.tracing.otlp_endpoint,
+            otlp_headers=config.tracing.otlp_headers,
+        )
+
+
 def _is_exit_command(command: str) -> bool:
     return command.strip().lower() in EXIT_COMMANDS
 
 
-def _render_response(response: str, render_markdown: bool) -> None:
-    body = Markdown(response) if render_markdown else Text(response)
+async def _render_stream(events: AsyncIterator[AgentEvent], render_markdown: bool) -> None:
+    """Render an agent turn progressively as tokens arrive.
+
+    The live region is stopped around tool calls so confirmation prompts
+    can read from the terminal; text streamed before a tool call stays on
+    screen and the next segment starts fresh.
+    """
+    def _body(text: str) -> Markdown | Text:
+        return Markdown(text) if render_markdown else Text(text)
+
     console.print()
     console.print("[cyan]QueryClaw[/cyan]")
-    console.print(body)
+    live: Live | None = None
+    buffer = ""
+    try:
+        async for event in events:
+            if event.type == "token":
+                if live is None:
+                    live = Live(_body(""), console=console, refresh_per_second=12)
+                    live.start()
+                buffer += event.content or ""
+                live.update(_body(redact_private_info(buffer)))
+            elif event.type == "tool_start":
+                if live is not None:
+                    live.stop()
+                    live = None
+                buffer = ""
+                console.print(f"[dim]-> {event.tool}[/dim]")
+            elif event.type == "final":
+                text = event.content or ""
+                if live is not None:
+                    # Replace the raw stream with the final (redacted) answer.
+                    live.update(_body(text), refresh=True)
+                else:
+                    console.print(_body(text))
+    finally:
+        if live is not None:
+            live.stop()
     console.print()
 
 
@@ -145,9 +241,19 @@ async def _confirm_operation(sql: str, message: str) -> bool:
     return answer in ("y", "yes")
 
 
-async def _run_chat(config: Config, message: str | None, render_markdown: bool, debug: bool = False) -> int:
-    provider = _make_provider(config)
+async def _run_chat(
+    config: Config,
+    message: str | None,
+    render_markdown: bool,
+    debug: bool = False,
+    record: Path | None = None,
+    replay: Path | None = None,
+) -> int:
+    provider = _make_provider(config, record=record, replay=replay)
     adapter = await AdapterRegistry.create_and_connect(**config.database.model_dump())
+    results = _make_result_store(config)
+    usage = UsageStore(config.agent.usage_path or None)
+    _configure_tracing(config)
     try:
         safety = SafetyPolicy(
             read_only=config.safety.read_only,
@@ -156,6 +262,9 @@ async def _run_chat(config: Config, message: str | None, render_markdown: bool,
             allowed_tables=config.safety.allowed_tables,
             blocked_patterns=config.safety.blocked_patterns,
             audit_enabled=config.safety.audit_enabled,
+            query_timeout=config.safety.query_timeout,
+            dry_run_timeout=config.safety.dry_run_timeout,
+            snapshot_timeout=config.safety.snapshot_timeout,
         )
         agent = AgentLoop(
             provider=provider,
@@ -167,11 +276,18 @@ async def _run_chat(config: Config, message: str | None, render_markdown: bool,
             safety_policy=safety,
             confirmation_callback=_confirm_operation,
             external_access_config=config.external_access,
+            context_budget=config.agent.context_budget,
+            schema_prefetch_tables=config.agent.schema_prefetch_tables,
+            schema_prefetch_budget=config.agent.schema_prefetch_budget,
+            result_store=results,
+            usage_store=usage,
+            session_token_budget=config.agent.session_token_budget,
+            fast_model=config.agent.fast_model or None,
+            escalate_after_errors=config.agent.escalate_after_errors,
         )
 
         if message:
-            response = await agent.chat(message, debug=debug)
-            _render_response(response, render_markdown)
+            await _render_stream(agent.chat_stream(message, debug=debug), render_markdown)
             return 0
 
         console.print("[green]Interactive mode started.[/green] Type 'exit' to quit.")
@@ -189,9 +305,11 @@ async def _run_chat(config: Config, message: str | None, render_markdown: bool,
                 console.print("[dim]Bye.[/dim]")
                 return 0
 
-            response = await agent.chat(user_input, debug=debug)
-            _render_response(response, render_markdown)
+            await _render_stream(agent.chat_stream(user_input, debug=debug), render_markdown)
     finally:
+        tracing.shutdown()
+        await usage.close()
+        await results.close()
         await adapter.close()
 
 
@@ -220,12 +338,24 @@ def chat(
         "-d",
         help="Print LLM prompts to the console (for debugging).",
     ),
+    record: Path | None = typer.Option(
+        None,
+        "--record",
+        help="Append every LLM request and response to this JSONL file.",
+    ),
+    replay: Path | None = typer.Option(
+        None,
+        "--replay",
+        help="Answer from a transcript written by --record instead of calling the LLM.",
+    ),
 ) -> None:
     """Start a chat session with QueryClaw."""
     config = load_config(config_path)
 
     try:
-        exit_code = asyncio.run(_run_chat(config, message, render_markdown=not no_markdown, debug=debug))
+        exit_code = asyncio.run(_run_chat(
+            config, message, render_markdown=not no_markdown, debug=debug, record=record, replay=replay,
+        ))
     except ValueError as e:
         console.print(f"[red]Error:[/red] {e}")
         raise typer.Exit(code=1) from e
@@ -271,7 +401,7 @@ async def _channel_confirm_callback(
         return False
 
 
-async def _run_serve(config: Config) -> None:
+async def _run_serve(config: Config, record: Path | None = None) -> None:
     """Run the multi-channel serve mode."""
     bus = MessageBus()
     manager = ChannelManager(config, bus)
@@ -284,8 +414,9 @@ async def _run_serve(config: Config) -> None:
     if cron_or_heartbeat and not manager.enabled_channels:
         console.print("[yellow]Warning:[/yellow] Cron/heartbeat enabled but no channels. Output will be logged only.")
 
-    provider = _make_provider(config)
+    provider = _make_provider(config, record=record)
     adapter = await AdapterRegistry.create_and_connect(**config.database.model_dump())
+    _configure_tracing(config)
 
     try:
         safety = SafetyPolicy(
@@ -295,6 +426,9 @@ async def _run_serve(config: Config) -> None:
             allowed_tables=config.safety.allowed_tables,
             blocked_patterns=config.safety.blocked_patterns,
             audit_enabled=config.safety.audit_enabled,
+            query_timeout=config.safety.query_timeout,
+            dry_run_timeout=config.safety.dry_run_timeout,
+            snapshot_timeout=config.safety.snapshot_timeout,
         )
         agent_ref: list = [None]
 
@@ -312,6 +446,20 @@ async def _run_serve(config: Config) -> None:
             confirmation_callback=channel_confirm,
             bus=bus,
             external_access_config=config.external_access,
+            max_concurrent_sessions=config.agent.max_concurrent_sessions,
+            context_budget=config.agent.context_budget,
+            schema_prefetch_tables=config.agent.schema_prefetch_tables,
+            schema_prefetch_budget=config.agent.schema_prefetch_budget,
+            result_store=_make_result_store(config),
+            usage_store=UsageStore(config.agent.usage_path or None),
+            session_token_budget=config.agent.session_token_budget,
+            fast_model=config.agent.fast_model or None,
+            escalate_after_errors=config.agent.escalate_after_errors,
+            session_store=SessionStore(
+                max_sessions=config.agent.max_sessions,
+                idle_ttl=config.agent.session_idle_ttl,
+                spill_path=config.agent.session_spill_path or None,
+            ),
         )
         agent_ref[0] = agent
 
@@ -343,6 +491,7 @@ async def _run_serve(config: Config) -> None:
             agent.stop()
             await manager.stop_all()
     finally:
+        tracing.shutdown()
         await adapter.close()
 
 
@@ -354,12 +503,17 @@ def serve(
         "-c",
         help="Custom config path (default: ~/.queryclaw/config.json).",
     ),
+    record: Path | None = typer.Option(
+        None,
+        "--record",
+        help="Append every LLM request and response to this JSONL file (for replay and benchmarks).",
+    ),
 ) -> None:
     """Start QueryClaw in multi-channel mode (Feishu, DingTalk)."""
     config = load_config(config_path)
 
     try:
-        asyncio.run(_run_serve(config))
+        asyncio.run(_run_serve(config, record=record))
     except KeyboardInterrupt:
         console.print("\n[dim]Shutting down...[/dim]")
     except ValueError as e:
@@ -368,3 +522,132 @@ def serve(
     except Exception as e:
         console.print(f"[red]Unexpected error:[/red] {e}")
         raise typer.Exit(code=1) from e
+
+
+@app.command()
+def bench(
+    runs: int = typer.Option(5, "--runs", "-n", min=1, help="Runs per scenario."),
+    scenario: list[str] | None = typer.Option(
+        None,
+        "--scenario",
+        "-s",
+        help="Scenario to run (repeatable; default: all).",
+    ),
+    replay: Path | None = typer.Option(
+        None,
+        "--replay",
+        help="Answer from a transcript written by --record instead of the scripted model turns.",
+    ),
+    record: Path | None = typer.Option(
+        None,
+        "--record",
+        help="Call the configured LLM and append its requests and responses to this JSONL file.",
+    ),
+    config_path: Path | None = typer.Option(
+        None,
+        "--config",
+        "-c",
+        help="Config file for --record (default: ~/.queryclaw/config.json).",
+    ),
+    output: Path | None = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Write the JSON report to this file instead of stdout.",
+    ),
+) -> None:
+    """Benchmark the agent loop on a seeded SQLite database and report p50/p95 as JSON."""
+    import json
+
+    from loguru import logger
+
+    from queryclaw.cli.bench import SCENARIOS, run_bench
+
+    selected = [s for s in SCENARIOS if not scenario or s.name in scenario]
+    unknown = set(scenario or ()) - {s.name for s in SCENARIOS}
+    if unknown or not selected:
+        console.print(
+            f"[red]Error:[/red] unknown scenario {', '.join(sorted(unknown))}. "
+            f"Available: {', '.join(s.name for s in SCENARIOS)}"
+        )
+        raise typer.Exit(code=1)
+    if replay is not None and record is not None:
+        console.print("[red]Error:[/red] use either --replay or --record, not both.")
+        raise typer.Exit(code=1)
+
+    make_provider = None
+    label = "scripted"
+    if replay is not None:
+        make_provider, label = (lambda _: ReplayProvider(replay)), f"replay:{replay}"
+    elif record is not None:
+        config = load_config(config_path)
+        try:
+            live = _make_provider(config, record=record)
+        except ValueError as e:
+            console.print(f"[red]Error:[/red] {e}")
+            raise typer.Exit(code=1) from e
+        make_provider, label = (lambda _: live), f"live:{config.agent.model}"
+
+    logger.disable("queryclaw")  # keep stdout/stderr to the report
+    try:
+        report = asyncio.run(run_bench(selected, runs, make_provider, provider_label=label))
+    finally:
+        logger.enable("queryclaw")
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output is not None:
+        output.write_text(text + "\n", encoding="utf-8")
+        console.print(f"Wrote {output}")
+    else:
+        typer.echo(text)
+
+
+@app.command()
+def usage(
+    by: str = typer.Option("session", "--by", "-b", help="Group by session, day, model or tool."),
+    days: int = typer.Option(7, "--days", "-d", min=1, help="Days to include, counting today."),
+    as_json: bool = typer.Option(False, "--json", help="Print the rows as JSON."),
+    config_path: Path | None = typer.Option(
+        None,
+        "--config",
+        "-c",
+        help="Custom config path (default: ~/.queryclaw/config.json).",
+    ),
+) -> None:
+    """Show LLM token usage and estimated cost recorded by chat and serve."""
+    import json
+
+    from rich.table import Table
+
+    from queryclaw.agent.usage import GROUPS
+
+    if by not in GROUPS:
+        console.print(f"[red]Error:[/red] --by must be one of {', '.join(GROUPS)}.")
+        raise typer.Exit(code=1)
+    config = load_config(config_path)
+    if not config.agent.usage_path:
+        console.print(
+            "[red]Error:[/red] agent.usage_path is empty, so usage is not recorded. "
+            "Set it to a SQLite file, e.g. ~/.queryclaw/usage.db."
+        )
+        raise typer.Exit(code=1)
+
+    async def _report() -> list[dict]:
+        store = UsageStore(config.agent.usage_path)
+        try:
+            return await store.report(by=by, days=days)
+        finally:
+            await store.close()
+
+    rows = asyncio.run(_report())
+    if as_json:
+        typer.echo(json.dumps(rows, indent=2, ensure_ascii=False))
+        return
+    if not rows:
+        console.print(f"No usage recorded in the last {days} days.")
+        return
+    table = Table(title=f"Token usage by {by}, last {days} days")
+    for name in rows[0]:
+        table.add_column(name.replace("_", " "), justify="left" if name == by else "right")
+    for row in rows:
+        table.add_row(*(f"{v:.4f}" if isinstance(v, float) else str(v) for v in row.values()))
+    console.print(table)
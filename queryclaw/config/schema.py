@@ -14,6 +14,16 @@ class Base(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
 
+class ReplicaConfig(Base):
+    """A read replica. Empty / zero fields inherit the primary's value."""
+
+    host: str = ""
+    port: int = 0
+    database: str = ""
+    user: str = ""
+    password: str = ""
+
+
 class DatabaseConfig(Base):
     """Database connection configuration."""
 
@@ -23,6 +33,21 @@ class DatabaseConfig(Base):
     database: str = ""
     user: str = ""
     password: str = ""
+    # Connection pool (MySQL / SeekDB / PostgreSQL). Disabled by default: one shared connection.
+    pool_enabled: bool = False
+    pool_min_size: int = 1
+    pool_max_size: int = 10
+    pool_recycle: int = 3600  # Seconds before an idle connection is recycled; -1 disables
+    pool_acquire_timeout: float = 10.0  # Seconds to wait for a free pooled connection
+    statement_cache_size: int = 128  # Prepared statements cached per connection (PostgreSQL)
+    # Connection health (MySQL / SeekDB)
+    health_check_interval: float = 30.0  # Seconds idle before a liveness ping; 0 pings before every statement
+    keepalive_interval: float = 300.0  # Background ping for idle connections; 0 disables
+    # Read replicas for read-only tools (query_execute, explain_plan, schema_inspect, dry-run)
+    replicas: list[ReplicaConfig] = Field(default_factory=list)
+    replica_selection: Literal["round_robin", "least_latency"] = "round_robin"
+    replica_max_lag: float = 10.0  # Seconds behind the primary before a replica is skipped; 0 disables
+    read_your_writes: float = 0.0  # Seconds a session reads from the primary after writing; 0 disables
 
 
 class SafetyConfig(Base):
@@ -42,15 +67,23 @@ class SafetyConfig(Base):
         "GRANT ",
     ])
     audit_enabled: bool = True
+    query_timeout: float = 30.0  # seconds per statement; 0 disables
+    dry_run_timeout: float = 10.0
+    snapshot_timeout: float = 10.0
 
 
 class ProviderConfig(Base):
     """Single LLM provider configuration."""
 
     api_key: str = ""
+    api_keys: list[str] = Field(default_factory=list)  # more keys for the same account(s), load-balanced with api_key
     api_base: str = ""
     extra_headers: dict[str, str] = Field(default_factory=dict)
 
+    def all_keys(self) -> list[str]:
+        """``api_key`` followed by ``api_keys``, without blanks or repeats."""
+        return list(dict.fromkeys(k for k in [self.api_key, *self.api_keys] if k))
+
 
 class ProvidersConfig(Base):
     """All supported LLM providers."""
@@ -69,9 +102,22 @@ class AgentConfig(Base):
 
     model: str = "anthropic/claude-sonnet-4-5"
     provider: str = "auto"
+    fast_model: str = ""  # cheaper model for tool-selection iterations and subagents; empty = use `model` throughout
+    escalate_after_errors: int = 2  # consecutive tool errors after which a turn stays on `model`
     max_iterations: int = 30
     temperature: float = 0.1
     max_tokens: int = 4096
+    max_concurrent_sessions: int = 4  # channel sessions processed in parallel by `serve`
+    context_budget: int = 0  # prompt token budget; 0 = the model's context window minus max_tokens
+    schema_prefetch_tables: int = 3  # tables whose columns are put in the prompt when the question names them; 0 = off
+    schema_prefetch_budget: int = 800  # token budget for those prefetched columns
+    max_sessions: int = 1000  # chat histories kept in memory by `serve`; older ones spill to disk
+    session_idle_ttl: float = 86400.0  # seconds before an idle chat history spills to disk (0 = never)
+    session_spill_path: str = ""  # SQLite file for spilled histories; empty = temporary file
+    result_store_max_bytes: int = 50_000_000  # query results kept for the `query_result` tool
+    result_store_spill: bool = False  # write evicted query results to a temporary SQLite file
+    usage_path: str = ""  # SQLite file of token/cost totals for `queryclaw usage`; empty = keep in memory
+    session_token_budget: int = 0  # max tokens per chat session per day; 0 = unlimited
 
 
 class FeishuConfig(Base):
@@ -123,6 +169,7 @@ class CronJobConfig(Base):
     schedule: str = ""  # "at 09:00", "every 1h", "cron 0 9 * * 1"
     prompt: str = ""
     enabled: bool = True
+    token_budget: int = 0  # max tokens per run of this job; 0 = unlimited
 
 
 class CronConfig(Base):
@@ -145,6 +192,28 @@ class HeartbeatConfig(Base):
     default_chat_id: str = ""
 
 
+class LLMPoolConfig(Base):
+    """How LLM calls are spread over API keys, retried and failed over."""
+
+    providers: list[str] = Field(default_factory=list)  # more providers (e.g. "openrouter") that also serve agent.model
+    fallback_model: str = ""  # model to use once the primary one keeps failing; empty = none
+    max_retries: int = 3  # retries per model after a rate limit, timeout or server error
+    retry_base_delay: float = 1.0  # seconds; the backoff doubles per retry, with full jitter
+    retry_max_delay: float = 30.0  # longest wait before a retry; longer waits go to the fallback model
+    max_concurrency: int = 8  # LLM calls in flight; waiting calls take turns across sessions
+
+
+class TracingConfig(Base):
+    """Request tracing: spans for LLM calls, tool runs and SQL statements."""
+
+    enabled: bool = False
+    path: str = "~/.queryclaw/traces/traces.jsonl"  # "" to export only to OTLP
+    max_bytes: int = 10_000_000  # rotate the JSONL file at this size
+    backups: int = 5
+    otlp_endpoint: str = ""  # e.g. "http://localhost:4318"; empty disables OTLP export
+    otlp_headers: dict[str, str] = Field(default_factory=dict)
+
+
 class Config(BaseSettings):
     """Root configuration for QueryClaw."""
 
@@ -156,6 +225,8 @@ class Config(BaseSettings):
     external_access: ExternalAccessConfig = Field(default_factory=ExternalAccessConfig)
     cron: CronConfig = Field(default_factory=CronConfig)
     heartbeat: HeartbeatConfig = Field(default_factory=HeartbeatConfig)
+    llm_pool: LLMPoolConfig = Field(default_factory=LLMPoolConfig)
+    tracing: TracingConfig = Field(default_factory=TracingConfig)
 
     model_config = ConfigDict(env_prefix="QUERYCLAW_", env_nested_delimiter="__")
 
@@ -166,7 +237,7 @@ class Config(BaseSettings):
         forced = self.agent.provider
         if forced != "auto":
             p = getattr(self.providers, forced, None)
-            return p if p and p.api_key else None
+            return p if p and p.all_keys() else None
 
         model_lower = (model or self.agent.model).lower()
 
@@ -174,7 +245,7 @@ class Config(BaseSettings):
             if spec.is_gateway or spec.is_local:
                 continue
             p = getattr(self.providers, spec.name, None)
-            if p and p.api_key and any(kw in model_lower for kw in spec.keywords):
+            if p and p.all_keys() and any(kw in model_lower for kw in spec.keywords):
                 return p
 
         # Fallback: first provider with an api_key
@@ -182,7 +253,7 @@ class Config(BaseSettings):
             if spec.is_gateway or spec.is_local:
                 continue
             p = getattr(self.providers, spec.name, None)
-            if p and p.api_key:
+            if p and p.all_keys():
                 return p
         return None
 
@@ -193,7 +264,7 @@ class Config(BaseSettings):
         forced = self.agent.provider
         if forced != "auto":
             p = getattr(self.providers, forced, None)
-            return forced if p and p.api_key else None
+            return forced if p and p.all_keys() else None
 
         model_lower = (model or self.agent.model).lower()
 
@@ -201,21 +272,21 @@ class Config(BaseSettings):
             if spec.is_gateway or spec.is_local:
                 continue
             p = getattr(self.providers, spec.name, None)
-            if p and p.api_key and any(kw in model_lower for kw in spec.keywords):
+            if p and p.all_keys() and any(kw in model_lower for kw in spec.keywords):
                 return spec.name
 
         for spec in PROVIDERS:
             if spec.is_gateway or spec.is_local:
                 continue
             p = getattr(self.providers, spec.name, None)
-            if p and p.api_key:
+            if p and p.all_keys():
                 return spec.name
         return None
 
     def get_api_key(self, model: str | None = None) -> str | None:
         """Get API key for the given model."""
         p = self.get_provider(model)
-        return p.api_key if p else None
+        return p.all_keys()[0] if p else None
 
     def get_api_base(self, model: str | None = None) -> str | None:
         """Get API base URL for the given model."""
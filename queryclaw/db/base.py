@@ -2,12 +2,53 @@
 
 from __future__ import annotations
 
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any
+from typing import TYPE_CHECKING, Any, AsyncIterator
 
+from queryclaw import tracing
 from queryclaw.safety.redact import is_sensitive_column
 
+if TYPE_CHECKING:
+    from queryclaw.db.columnar import ColumnarResult
+
+DEFAULT_STREAM_BATCH_SIZE = 500
+
+
+class QueryTimeoutError(RuntimeError):
+    """A statement was cancelled because it exceeded its per-call timeout."""
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        super().__init__(
+            f"Query cancelled: exceeded the {timeout:g}s statement timeout. "
+            "Rewrite it to do less work (add selective WHERE filters, join on indexed keys, "
+            "avoid cartesian joins, aggregate before joining, or add a LIMIT) instead of retrying it unchanged."
+        )
+
+
+class ForeignTransactionError(RuntimeError):
+    """COMMIT/ROLLBACK from a task that did not BEGIN, while other tasks hold transactions."""
+
+    def __init__(self, statement: str, open_transactions: int) -> None:
+        super().__init__(
+            f"{statement} issued by a task without a transaction of its own while "
+            f"{open_transactions} transaction(s) are open in other tasks; "
+            "end a transaction from the task that began it"
+        )
+
+
+def estimate_row_bytes(row: tuple) -> int:
+    """Rough in-memory payload size of a row, used for streaming byte caps."""
+    size = 0
+    for v in row:
+        if isinstance(v, (str, bytes, bytearray, memoryview)):
+            size += len(v)
+        else:
+            size += 8
+    return size
+
 
 @dataclass
 class QueryResult:
@@ -17,6 +58,7 @@ class QueryResult:
     rows: list[tuple] = field(default_factory=list)
     affected_rows: int = 0
     execution_time_ms: float = 0
+    truncated: bool = False
 
     @property
     def row_count(self) -> int:
@@ -44,6 +86,12 @@ class QueryResult:
             lines.append(f"... ({len(self.rows) - max_rows} more rows)")
         return "\n".join(lines)
 
+    def to_summary_text(self, sample_rows: int = 5, top_k: int = 5) -> str:
+        """Per-column profile plus a few sample rows; see ``ColumnarResult.summary_text``."""
+        from queryclaw.db.columnar import ColumnarResult
+
+        return ColumnarResult.from_query_result(self).summary_text(sample_rows, top_k)
+
 
 @dataclass
 class ColumnInfo:
@@ -87,6 +135,16 @@ class ForeignKeyInfo:
     ref_columns: list[str] = field(default_factory=list)
 
 
+@dataclass
+class TableSchema:
+    """Columns, indexes and foreign keys of one table."""
+
+    name: str
+    columns: list[ColumnInfo] = field(default_factory=list)
+    indexes: list[IndexInfo] = field(default_factory=list)
+    foreign_keys: list[ForeignKeyInfo] = field(default_factory=list)
+
+
 class DatabaseAdapter(ABC):
     """Base adapter interface for all database types."""
 
@@ -99,8 +157,14 @@ class DatabaseAdapter(ABC):
         """Close the database connection."""
 
     @abstractmethod
-    async def execute(self, sql: str, params: tuple | None = None) -> QueryResult:
-        """Execute a SQL statement and return results."""
+    async def execute(
+        self, sql: str, params: tuple | None = None, timeout: float | None = None,
+    ) -> QueryResult:
+        """Execute a SQL statement and return results.
+
+        With *timeout* (seconds), the statement is cancelled on the server once
+        it runs longer than that and ``QueryTimeoutError`` is raised.
+        """
 
     @abstractmethod
     async def get_tables(self) -> list[TableInfo]:
@@ -139,6 +203,191 @@ class SQLAdapter(DatabaseAdapter):
     async def explain(self, sql: str) -> QueryResult:
         """Run EXPLAIN on a SQL statement and return the plan."""
 
+    async def get_schema_snapshot(self, tables: list[str] | None = None) -> dict[str, TableSchema]:
+        """Columns, indexes and foreign keys for all tables (or just *tables*), keyed by name.
+
+        Adapters override this to fetch each category for every table in one
+        catalog query. This default falls back to the per-table methods.
+        Requested tables that do not exist are left out.
+        """
+        if tables is None:
+            tables = [t.name for t in await self.get_tables()]
+        snapshot: dict[str, TableSchema] = {}
+        for table in tables:
+            columns = await self.get_columns(table)
+            if not columns:
+                continue
+            snapshot[table] = TableSchema(
+                name=table,
+                columns=columns,
+                indexes=await self.get_indexes(table),
+                foreign_keys=await self.get_foreign_keys(table),
+            )
+        return snapshot
+
+    async def get_schema_fingerprints(self) -> dict[str, str] | None:
+        """Cheap per-table change markers, ``{table: fingerprint}``.
+
+        A fingerprint changes whenever the table's definition (columns,
+        indexes, constraints) may have changed. ``SchemaCache`` uses this to
+        notice DDL run outside the agent. None means unsupported.
+        """
+        return None
+
+    def for_reads(self) -> SQLAdapter:
+        """Adapter to use for read-only work (a replica view when routing is configured)."""
+        return self
+
+    async def replication_lag(self) -> float | None:
+        """Seconds this server lags behind its primary; None if unknown or not a replica."""
+        return None
+
+    def max_concurrency(self) -> int:
+        """How many statements the calling task may usefully run at once.
+
+        1 for a single connection. Pooled adapters return the connections not
+        pinned to transactions, but 1 while the calling task holds one: a
+        statement issued from another task would not see its open transaction.
+        """
+        return 1
+
+    async def execute_stream(
+        self,
+        sql: str,
+        params: tuple | None = None,
+        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+        timeout: float | None = None,
+    ) -> AsyncIterator[QueryResult]:
+        """Execute a statement and yield its rows in batches of at most *batch_size*.
+
+        Every batch carries the column names; at least one (possibly empty)
+        batch is yielded. Adapters override this with a server-side cursor so
+        rows are only fetched as the caller consumes them. This default
+        materializes the full result through ``execute``. *timeout* bounds the
+        whole stream, as for ``execute``.
+        """
+        result = await self.execute(sql, params, timeout=timeout)
+        batch_size = max(1, batch_size)
+        for i in range(0, max(len(result.rows), 1), batch_size):
+            yield QueryResult(
+                columns=result.columns,
+                rows=result.rows[i : i + batch_size],
+                affected_rows=result.affected_rows,
+                execution_time_ms=result.execution_time_ms,
+            )
+
+    async def execute_limited(
+        self,
+        sql: str,
+        params: tuple | None = None,
+        max_rows: int | None = None,
+        max_bytes: int | None = None,
+        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+        timeout: float | None = None,
+    ) -> QueryResult:
+        """Execute via ``execute_stream``, stopping once *max_rows* or *max_bytes* is reached.
+
+        At most one row beyond the cap is fetched; the remaining rows are never
+        read from the server. ``truncated`` is set on the result when a cap cut
+        it short.
+        """
+        if max_rows is not None:
+            batch_size = min(batch_size, max_rows + 1)
+        start = time.monotonic()
+        columns: list[str] = []
+        rows: list[tuple] = []
+        affected_rows = 0
+        size = 0
+        truncated = False
+        with tracing.span("db.query", db=self.db_type) as span:
+            if span:
+                span.set(sql=tracing.sql_fingerprint(sql, self.db_type))
+            stream = self.execute_stream(sql, params, batch_size=batch_size, timeout=timeout)
+            try:
+                async for batch in stream:
+                    columns = batch.columns
+                    affected_rows = batch.affected_rows
+                    for row in batch.rows:
+                        if max_rows is not None and len(rows) >= max_rows:
+                            truncated = True
+                            break
+                        if max_bytes is not None:
+                            size += estimate_row_bytes(row)
+                            if size > max_bytes:
+                                truncated = True
+                                break
+                        rows.append(row)
+                    if truncated:
+                        break
+            finally:
+                await stream.aclose()
+            span.set(rows=len(rows), bytes=size, truncated=truncated)
+        elapsed = (time.monotonic() - start) * 1000
+        return QueryResult(
+            columns=columns,
+            rows=rows,
+            affected_rows=len(rows) if columns else affected_rows,
+            execution_time_ms=round(elapsed, 2),
+            truncated=truncated,
+        )
+
+    async def execute_columnar(
+        self,
+        sql: str,
+        params: tuple | None = None,
+        max_rows: int | None = None,
+        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+        timeout: float | None = None,
+    ) -> ColumnarResult:
+        """Execute via ``execute_stream``, accumulating rows straight into columns.
+
+        Driver row tuples only live for one batch; see ``ColumnarResult``.
+        """
+        from queryclaw.db.columnar import ColumnarBuilder
+
+        if max_rows is not None:
+            batch_size = min(batch_size, max_rows + 1)
+        start = time.monotonic()
+        builder: ColumnarBuilder | None = None
+        affected_rows = 0
+        truncated = False
+        with tracing.span("db.query", db=self.db_type, columnar=True) as span:
+            if span:
+                span.set(sql=tracing.sql_fingerprint(sql, self.db_type))
+            stream = self.execute_stream(sql, params, batch_size=batch_size, timeout=timeout)
+            try:
+                async for batch in stream:
+                    if builder is None:
+                        builder = ColumnarBuilder(batch.columns)
+                    affected_rows = batch.affected_rows
+                    rows = batch.rows
+                    if max_rows is not None and len(builder) + len(rows) > max_rows:
+                        rows = rows[: max_rows - len(builder)]
+                        truncated = True
+                    builder.extend(rows)
+                    if truncated:
+                        break
+            finally:
+                await stream.aclose()
+            span.set(rows=len(builder) if builder is not None else 0, truncated=truncated)
+        if builder is None:
+            builder = ColumnarBuilder([])
+        elapsed = (time.monotonic() - start) * 1000
+        return builder.build(
+            affected_rows=len(builder) if builder.columns else affected_rows,
+            execution_time_ms=round(elapsed, 2),
+            truncated=truncated,
+        )
+
+    def has_transaction(self) -> bool:
+        """Whether the calling task began an explicit transaction that is still open.
+
+        Pooled adapters track the connection pinned to each task, and
+        single-connection adapters track the task that began the transaction.
+        Adapters that track neither return False.
+        """
+        return False
+
     async def begin_transaction(self) -> None:
         """Begin an explicit transaction."""
         await self.execute("BEGIN")
@@ -0,0 +1,337 @@
+"""Column-oriented query results for large result sets."""
+
+from __future__ import annotations
+
+import math
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from decimal import Decimal
+from typing import Any, Iterator, overload
+
+from queryclaw.db.base import QueryResult
+from queryclaw.safety.redact import is_sensitive_column
+
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = 2 ** 63 - 1
+_QUANTILES = (0.25, 0.5, 0.75)
+_VALUE_CHARS = 40
+_RANGE_KEYS = ("min", "p25", "p50", "p75", "max", "mean")
+
+
+def _compact(values: list[Any]) -> Sequence[Any]:
+    """Pack a column into a typed ``array`` when every value is a plain int or float.
+
+    Columns with NULLs, mixed types or non-numeric values stay Python lists.
+    """
+    if not values:
+        return values
+    first = type(values[0])
+    if first is int:
+        if all(type(v) is int and _INT64_MIN <= v <= _INT64_MAX for v in values):
+            return array("q", values)
+    elif first is float:
+        if all(type(v) is float for v in values):
+            return array("d", values)
+    return values
+
+
+class RowView(Sequence):
+    """Read-only sequence of row tuples, built on access from column storage."""
+
+    def __init__(self, data: list[Sequence[Any]], length: int) -> None:
+        self._data = data
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> tuple: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[tuple]: ...
+
+    def __getitem__(self, index: int | slice) -> tuple | list[tuple]:
+        if isinstance(index, slice):
+            return list(zip(*(col[index] for col in self._data)))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("row index out of range")
+        return tuple(col[index] for col in self._data)
+
+    def __iter__(self) -> Iterator[tuple]:
+        return zip(*self._data)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, (str, bytes)):
+            return len(self) == len(other) and all(a == tuple(b) for a, b in zip(self, other))
+        return NotImplemented
+
+
+class ColumnarResult:
+    """Query result stored as one sequence per column.
+
+    Numeric columns without NULLs are packed into ``array('q')`` /
+    ``array('d')`` (8 bytes per value); other columns are lists. Compared to
+    ``QueryResult.rows`` this drops one tuple object per row. ``rows`` is a
+    lazy ``RowView`` and ``to_query_result`` wraps it so existing
+    ``QueryResult`` consumers keep working.
+    """
+
+    def __init__(
+        self,
+        columns: list[str],
+        data: list[Sequence[Any]],
+        affected_rows: int = 0,
+        execution_time_ms: float = 0,
+        truncated: bool = False,
+    ) -> None:
+        if len(data) != len(columns):
+            raise ValueError(f"expected {len(columns)} columns of data, got {len(data)}")
+        self.columns = columns
+        self.data = data
+        self.affected_rows = affected_rows
+        self.execution_time_ms = execution_time_ms
+        self.truncated = truncated
+        self._length = len(data[0]) if data else 0
+
+    @classmethod
+    def from_rows(cls, columns: list[str], rows: Sequence[Sequence[Any]], **kwargs: Any) -> ColumnarResult:
+        """Transpose row-oriented data into compact columns."""
+        builder = ColumnarBuilder(columns)
+        builder.extend(rows)
+        return builder.build(**kwargs)
+
+    @classmethod
+    def from_query_result(cls, result: QueryResult) -> ColumnarResult:
+        return cls.from_rows(
+            result.columns,
+            result.rows,
+            affected_rows=result.affected_rows,
+            execution_time_ms=result.execution_time_ms,
+            truncated=result.truncated,
+        )
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def row_count(self) -> int:
+        return self._length
+
+    @property
+    def rows(self) -> RowView:
+        return RowView(self.data, self._length)
+
+    def column(self, name: str) -> Sequence[Any]:
+        """Return the storage for one column (no copy)."""
+        try:
+            return self.data[self.columns.index(name)]
+        except ValueError:
+            raise KeyError(name) from None
+
+    def to_query_result(self) -> QueryResult:
+        """Row-oriented facade over the same storage; rows are built on access."""
+        return QueryResult(
+            columns=self.columns,
+            rows=self.rows,  # type: ignore[arg-type]
+            affected_rows=self.affected_rows,
+            execution_time_ms=self.execution_time_ms,
+            truncated=self.truncated,
+        )
+
+    def to_text(self, max_rows: int = 100) -> str:
+        """Same output as ``QueryResult.to_text``, formatted a column at a time.
+
+        Only the displayed rows are stringified, and sensitive columns are
+        redacted without formatting their values at all.
+        """
+        if not self.columns:
+            return f"(no columns, {self.affected_rows} rows affected)"
+        shown = min(self._length, max_rows)
+        cells: list[list[str]] = []
+        for name, col in zip(self.columns, self.data):
+            if is_sensitive_column(name):
+                cells.append(["[REDACTED]"] * shown)
+            else:
+                cells.append([str(v) for v in col[:shown]])
+        lines = [" | ".join(self.columns)]
+        lines.append("-+-".join("-" * max(len(c), 4) for c in self.columns))
+        lines.extend(" | ".join(row) for row in zip(*cells))
+        if self._length > max_rows:
+            lines.append(f"... ({self._length - max_rows} more rows)")
+        return "\n".join(lines)
+
+    def describe(self) -> dict[str, dict[str, Any]]:
+        """Per-column statistics: count and nulls, plus min/max/mean for numeric columns.
+
+        Typed-array columns are summarised without per-value type checks.
+        """
+        stats: dict[str, dict[str, Any]] = {}
+        for name, col in zip(self.columns, self.data):
+            if isinstance(col, array):
+                numeric: Sequence[Any] = col
+                nulls = 0
+            else:
+                non_null = [v for v in col if v is not None]
+                nulls = len(col) - len(non_null)
+                numeric = non_null if all(
+                    isinstance(v, (int, float)) and not isinstance(v, bool) for v in non_null
+                ) else []
+                if not numeric:
+                    entry: dict[str, Any] = {"count": len(non_null), "nulls": nulls}
+                    try:
+                        entry["distinct"] = len(set(non_null))
+                    except TypeError:
+                        pass
+                    stats[name] = entry
+                    continue
+            entry = {"count": len(numeric), "nulls": nulls}
+            if numeric:
+                entry["min"] = min(numeric)
+                entry["max"] = max(numeric)
+                entry["mean"] = math.fsum(numeric) / len(numeric)
+            stats[name] = entry
+        return stats
+
+    def to_numpy(self) -> dict[str, Any]:
+        """Return ``{column: numpy.ndarray}``; typed-array columns are shared, not copied."""
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("numpy is required for to_numpy(). Install with: pip install numpy") from None
+        out: dict[str, Any] = {}
+        for name, col in zip(self.columns, self.data):
+            if isinstance(col, array):
+                out[name] = np.frombuffer(col, dtype=np.int64 if col.typecode == "q" else np.float64)
+            else:
+                out[name] = np.array(col, dtype=object)
+        return out
+
+    def profile(self, top_k: int = 5) -> dict[str, dict[str, Any]]:
+        """Per-column profile of the whole result, for summarising large results.
+
+        Every column gets count, nulls, distinct values and its *top_k* most
+        frequent values (when any value repeats). Numeric columns add
+        min/max, mean and quartiles; other comparable columns add min/max.
+        Sensitive columns only report count and nulls.
+
+        Work is done in bulk per column (C-level counting and sorting, or
+        numpy when it is installed), so a million-row result is profiled in
+        on the order of a second.
+        """
+        stats: dict[str, dict[str, Any]] = {}
+        for name, col in zip(self.columns, self.data):
+            if isinstance(col, array):
+                values: Sequence[Any] = col
+            else:
+                values = [v for v in col if v is not None]
+            entry: dict[str, Any] = {"count": len(values), "nulls": len(col) - len(values)}
+            stats[name] = entry
+            if not values or is_sensitive_column(name):
+                continue
+            try:
+                counts = Counter(values)
+            except TypeError:  # unhashable cells, e.g. JSON arrays
+                counts = None
+            if counts is not None:
+                entry["distinct"] = len(counts)
+                top = [(v, n) for v, n in counts.most_common(top_k) if n > 1]
+                if top:
+                    entry["top"] = top
+            if isinstance(col, array) or all(
+                isinstance(v, (int, float, Decimal)) and not isinstance(v, bool) for v in values
+            ):
+                entry.update(_numeric_profile(values))
+            else:
+                try:
+                    entry["min"] = min(values)
+                    entry["max"] = max(values)
+                except TypeError:
+                    pass
+        return stats
+
+    def summary_text(self, sample_rows: int = 5, top_k: int = 5) -> str:
+        """Column profile plus a few evenly spaced sample rows, instead of a long table."""
+        step = max(1, -(-self._length // sample_rows)) if sample_rows > 0 else self._length + 1
+        sample = [self.rows[i] for i in range(0, self._length, step)]
+        text = format_profile(self.profile(top_k), self._length)
+        if sample:
+            table = QueryResult(columns=self.columns, rows=sample).to_text(max_rows=len(sample))
+            text += f"\n\nSample of {len(sample)} rows (evenly spaced):\n{table}"
+        return text
+
+
+def _numeric_profile(values: Sequence[Any]) -> dict[str, Any]:
+    """min, max, mean and nearest-rank quartiles of non-null numbers."""
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        if isinstance(values, array):
+            arr = np.frombuffer(values, dtype=np.int64 if values.typecode == "q" else np.float64)
+        else:
+            arr = np.asarray(values, dtype=np.float64)
+        quantiles = np.quantile(arr, _QUANTILES, method="nearest")
+        out = {"min": arr.min().item(), "max": arr.max().item(), "mean": float(arr.mean())}
+        out.update(zip(("p25", "p50", "p75"), (q.item() for q in quantiles)))
+        return out
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    out = {"min": ordered[0], "max": ordered[-1], "mean": math.fsum(ordered) / len(ordered)}
+    out.update(zip(("p25", "p50", "p75"), (ordered[round(q * last)] for q in _QUANTILES)))
+    return out
+
+
+def _format_value(v: Any) -> str:
+    if isinstance(v, float):
+        return f"{v:.6g}"
+    if isinstance(v, str):
+        return repr(v if len(v) <= _VALUE_CHARS else v[:_VALUE_CHARS] + "...")
+    return str(v)
+
+
+def format_profile(profile: dict[str, dict[str, Any]], row_count: int) -> str:
+    """Render ``ColumnarResult.profile()`` output, one line per column."""
+    lines = [f"Column profile ({row_count} rows):"]
+    for name, entry in profile.items():
+        parts = [f"{entry['count']} values", f"{entry['nulls']} nulls"]
+        if "distinct" in entry:
+            parts.append(f"{entry['distinct']} distinct")
+        line = f"- {name}: {', '.join(parts)}"
+        if "top" in entry:
+            line += "; top: " + ", ".join(f"{_format_value(v)} ({n})" for v, n in entry["top"])
+        ranges = [f"{key} {_format_value(entry[key])}" for key in _RANGE_KEYS if key in entry]
+        if ranges:
+            line += "; " + ", ".join(ranges)
+        if entry["count"] and is_sensitive_column(name):
+            line += " [values redacted]"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class ColumnarBuilder:
+    """Accumulates row batches straight into per-column lists."""
+
+    def __init__(self, columns: list[str]) -> None:
+        self.columns = columns
+        self._data: list[list[Any]] = [[] for _ in columns]
+
+    def __len__(self) -> int:
+        return len(self._data[0]) if self._data else 0
+
+    def append(self, row: Sequence[Any]) -> None:
+        for col, v in zip(self._data, row):
+            col.append(v)
+
+    def extend(self, rows: Sequence[Sequence[Any]]) -> None:
+        if not rows:
+            return
+        for col, values in zip(self._data, zip(*rows)):
+            col.extend(values)
+
+    def build(self, **kwargs: Any) -> ColumnarResult:
+        return ColumnarResult(self.columns, [_compact(col) for col in self._data], **kwargs)
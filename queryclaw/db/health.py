@@ -0,0 +1,65 @@
+"""Connection health helpers shared by network database adapters."""
+
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when the circuit breaker refuses a connection attempt."""
+
+
+class CircuitBreaker:
+    """Stops hammering a database server that is down.
+
+    After ``failure_threshold`` consecutive connection failures the circuit
+    opens and every attempt fails fast until the backoff expires. The next
+    attempt after that is a trial (half-open): success closes the circuit,
+    failure re-opens it with the backoff doubled, up to ``max_backoff``.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._failure_threshold = max(1, failure_threshold)
+        self._base_backoff = base_backoff
+        self._max_backoff = max_backoff
+        self._clock = clock
+        self._failures = 0
+        self._open_until = 0.0
+
+    @property
+    def state(self) -> str:
+        """One of ``closed``, ``open`` or ``half_open``."""
+        if self._failures < self._failure_threshold:
+            return "closed"
+        return "open" if self._clock() < self._open_until else "half_open"
+
+    @property
+    def failures(self) -> int:
+        return self._failures
+
+    def check(self, what: str = "database") -> None:
+        """Raise ``CircuitOpenError`` if attempts are currently refused."""
+        if self.state == "open":
+            remaining = self._open_until - self._clock()
+            raise CircuitOpenError(
+                f"{what} is unavailable after {self._failures} failed connection attempts; "
+                f"retrying in {remaining:.1f}s"
+            )
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._open_until = 0.0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self._failure_threshold:
+            exponent = self._failures - self._failure_threshold
+            backoff = min(self._base_backoff * (2 ** exponent), self._max_backoff)
+            self._open_until = self._clock() + backoff
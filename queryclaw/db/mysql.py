@@ -3,22 +3,40 @@
 from __future__ import annotations
 
 import asyncio
+import re
 import time
-from typing import Any
+import weakref
+from contextlib import aclosing
+from typing import Any, AsyncIterator
 
 from loguru import logger
 
+from queryclaw import tracing
 from queryclaw.db.base import (
+    DEFAULT_STREAM_BATCH_SIZE,
     ColumnInfo,
     ForeignKeyInfo,
+    ForeignTransactionError,
     IndexInfo,
     QueryResult,
+    QueryTimeoutError,
     SQLAdapter,
     TableInfo,
+    TableSchema,
 )
+from queryclaw.db.health import CircuitBreaker
 
 _MAX_RECONNECT_ATTEMPTS = 2
 
+_DEFAULT_POOL_MIN_SIZE = 1
+_DEFAULT_POOL_MAX_SIZE = 10
+_DEFAULT_POOL_RECYCLE = 3600  # seconds; -1 disables idle recycling
+_DEFAULT_POOL_ACQUIRE_TIMEOUT = 10.0  # seconds
+_DEFAULT_HEALTH_CHECK_INTERVAL = 30.0  # seconds idle before a COM_PING probe
+_DEFAULT_KEEPALIVE_INTERVAL = 300.0  # seconds; 0 disables the background keepalive
+_KILL_GRACE = 1.0  # seconds past a statement timeout before the client sends KILL QUERY
+_KILL_CONNECT_TIMEOUT = 5.0  # seconds to open the side connection that sends KILL QUERY
+
 # MySQL CR_* error codes that indicate the TCP connection is broken.
 # Only these should trigger a close + reconnect; SQL/schema errors should not.
 _MYSQL_CONNECTION_ERROR_CODES = frozenset({
@@ -28,9 +46,34 @@ _MYSQL_CONNECTION_ERROR_CODES = frozenset({
     2055,  # CR_SERVER_LOST_EXTENDED
 })
 
+# Errors raised while (re)connecting; these feed the circuit breaker.
+_MYSQL_CONNECT_ERROR_CODES = frozenset({
+    2002,  # CR_CONNECTION_ERROR – local socket unavailable
+    2003,  # CR_CONN_HOST_ERROR – can't connect to server
+    1040,  # ER_CON_COUNT_ERROR – too many connections
+})
+
+
+# Server errors raised when a statement is stopped for running too long.
+_MYSQL_TIMEOUT_ERROR_CODES = frozenset({
+    3024,  # ER_QUERY_TIMEOUT – MAX_EXECUTION_TIME exceeded
+    1317,  # ER_QUERY_INTERRUPTED – KILL QUERY
+    4012,  # OceanBase OB_TIMEOUT – QUERY_TIMEOUT exceeded (SeekDB)
+})
+
+_LEADING_SELECT = re.compile(r"\s*SELECT\b", re.IGNORECASE)
+
+
+def _is_timeout_error(exc: BaseException) -> bool:
+    errno = exc.args[0] if exc.args else None
+    return isinstance(errno, int) and errno in _MYSQL_TIMEOUT_ERROR_CODES
+
 
-def _is_connection_error(exc: Exception) -> bool:
+def _is_connection_error(exc: BaseException) -> bool:
     """Return True only if *exc* signals a broken TCP/MySQL connection."""
+    # Socket-level failures surface as OSError subclasses before the driver wraps them.
+    if isinstance(exc, (ConnectionError, asyncio.IncompleteReadError)):
+        return True
     errno = getattr(exc, "args", (None,))[0] if exc.args else None
     if isinstance(errno, int) and errno in _MYSQL_CONNECTION_ERROR_CODES:
         return True
@@ -41,13 +84,93 @@ def _is_connection_error(exc: Exception) -> bool:
     return False
 
 
+def _is_connect_error(exc: BaseException) -> bool:
+    """Return True if *exc* means the server could not be reached at all."""
+    if isinstance(exc, OSError) or _is_connection_error(exc):
+        return True
+    errno = exc.args[0] if exc.args else None
+    return isinstance(errno, int) and errno in _MYSQL_CONNECT_ERROR_CODES
+
+
+def _group_by_table(rows: list[tuple]) -> dict[str, list[tuple]]:
+    """Split catalog rows whose first column is the table name, preserving order."""
+    grouped: dict[str, list[tuple]] = {}
+    for row in rows:
+        grouped.setdefault(row[0], []).append(row[1:])
+    return grouped
+
+
+def _columns_from_rows(rows: list[tuple]) -> list[ColumnInfo]:
+    return [
+        ColumnInfo(
+            name=row[0],
+            data_type=row[1],
+            nullable=row[2] == "YES",
+            default=row[3],
+            is_primary_key=row[4] == "PRI",
+            extra=row[5] or "",
+        )
+        for row in rows
+    ]
+
+
+def _indexes_from_rows(rows: list[tuple]) -> list[IndexInfo]:
+    idx_map: dict[str, IndexInfo] = {}
+    for row in rows:
+        idx_name = row[0]
+        if idx_name not in idx_map:
+            idx_map[idx_name] = IndexInfo(
+                name=idx_name,
+                unique=not bool(row[2]),
+                type=row[3] or "BTREE",
+            )
+        idx_map[idx_name].columns.append(row[1])
+    return list(idx_map.values())
+
+
+def _foreign_keys_from_rows(rows: list[tuple]) -> list[ForeignKeyInfo]:
+    fk_map: dict[str, ForeignKeyInfo] = {}
+    for row in rows:
+        fk_name = row[0]
+        if fk_name not in fk_map:
+            fk_map[fk_name] = ForeignKeyInfo(name=fk_name, ref_table=row[2])
+        fk_map[fk_name].columns.append(row[1])
+        fk_map[fk_name].ref_columns.append(row[3])
+    return list(fk_map.values())
+
 class MySQLAdapter(SQLAdapter):
-    """Async MySQL adapter using aiomysql."""
+    """Async MySQL adapter using aiomysql.
+
+    By default a single connection is used. When connected with
+    ``pool_enabled=True`` the adapter keeps an ``aiomysql`` pool instead, so
+    concurrent sessions no longer queue behind one socket. Explicit
+    transactions pin one pooled connection to the calling task until
+    COMMIT/ROLLBACK.
+
+    Liveness is checked lazily: a COM_PING probe is sent only when the
+    connection has been idle longer than ``health_check_interval``, an
+    optional background task pings idle connections every
+    ``keepalive_interval``, and broken sockets are otherwise detected from
+    driver errors. Reconnect attempts go through a circuit breaker so a
+    down server is retried with exponential backoff instead of per call.
+    """
 
     def __init__(self) -> None:
         self._conn: Any = None
+        self._pool: Any = None
+        self._pool_acquire_timeout: float = _DEFAULT_POOL_ACQUIRE_TIMEOUT
+        self._tx_conns: dict[asyncio.Task, Any] = {}
+        self._tx_owner: asyncio.Task | None = None  # task that began the single connection's transaction
+        self._session_ready: weakref.WeakSet = weakref.WeakSet()
         self._database: str = ""
         self._connect_kwargs: dict[str, Any] = {}
+        self._conn_kwargs: dict[str, Any] = {}
+        self._lock = asyncio.Lock()  # serializes use of the single connection
+        self._last_used: float = 0.0
+        self._health_check_interval: float = _DEFAULT_HEALTH_CHECK_INTERVAL
+        self._keepalive_interval: float = _DEFAULT_KEEPALIVE_INTERVAL
+        self._keepalive_task: asyncio.Task | None = None
+        self._breaker = CircuitBreaker()
 
     @property
     def db_type(self) -> str:
@@ -55,14 +178,42 @@ class MySQLAdapter(SQLAdapter):
 
     @property
     def is_connected(self) -> bool:
+        if self._pool is not None:
+            return not self._pool.closed
         return self._conn is not None and not self._conn.closed
 
+    @property
+    def is_pooled(self) -> bool:
+        """Whether the adapter was connected in pooled mode."""
+        return bool(self._connect_kwargs.get("pool_enabled"))
+
+    def max_concurrency(self) -> int:
+        if self._pool is None or self._current_tx_conn() is not None:
+            return 1
+        return max(1, self._pool.maxsize - len(self._tx_conns))
+
+    def pool_stats(self) -> dict[str, int]:
+        """Return pool size counters (empty dict in single-connection mode)."""
+        if self._pool is None:
+            return {}
+        return {
+            "size": self._pool.size,
+            "free": self._pool.freesize,
+            "min_size": self._pool.minsize,
+            "max_size": self._pool.maxsize,
+            "in_transaction": len(self._tx_conns),
+        }
+
     async def connect(self, **kwargs: Any) -> None:
         import aiomysql
 
         self._connect_kwargs = kwargs.copy()
         self._database = kwargs.get("database", "")
-        self._conn = await aiomysql.connect(
+        self._health_check_interval = float(
+            kwargs.get("health_check_interval", _DEFAULT_HEALTH_CHECK_INTERVAL)
+        )
+        self._keepalive_interval = float(kwargs.get("keepalive_interval", _DEFAULT_KEEPALIVE_INTERVAL))
+        conn_kwargs: dict[str, Any] = dict(
             host=kwargs.get("host", "localhost"),
             port=kwargs.get("port", 3306),
             user=kwargs.get("user", "root"),
@@ -73,19 +224,55 @@ class MySQLAdapter(SQLAdapter):
             use_unicode=True,
             init_command="SET NAMES utf8mb4 COLLATE utf8mb4_unicode_ci",
         )
+        self._conn_kwargs = conn_kwargs
+
+        if kwargs.get("pool_enabled"):
+            self._pool_acquire_timeout = float(
+                kwargs.get("pool_acquire_timeout", _DEFAULT_POOL_ACQUIRE_TIMEOUT)
+            )
+            self._pool = await aiomysql.create_pool(
+                minsize=kwargs.get("pool_min_size", _DEFAULT_POOL_MIN_SIZE),
+                maxsize=kwargs.get("pool_max_size", _DEFAULT_POOL_MAX_SIZE),
+                pool_recycle=kwargs.get("pool_recycle", _DEFAULT_POOL_RECYCLE),
+                **conn_kwargs,
+            )
+            return
+
+        self._conn = await aiomysql.connect(**conn_kwargs)
+        await self._init_session(self._conn)
+        self._last_used = time.monotonic()
+        if self._keepalive_interval > 0 and self._keepalive_task is None:
+            self._keepalive_task = asyncio.create_task(self._keepalive_loop())
+
+    async def _init_session(self, conn: Any) -> None:
+        """Apply per-connection session settings once."""
+        if conn in self._session_ready:
+            return
         # Increase packet size for long SQL (e.g. bulk UPDATE with Chinese text)
         try:
-            async with self._conn.cursor() as cur:
+            async with conn.cursor() as cur:
                 await cur.execute("SET SESSION max_allowed_packet=67108864")
         except Exception:
             pass
+        self._session_ready.add(conn)
 
     async def _ensure_connected(self) -> None:
-        """Reconnect if the connection is lost."""
-        if self.is_connected:
+        """Reconnect if the connection is lost.
+
+        A recently used connection is trusted without a round trip; after
+        ``health_check_interval`` seconds idle it is probed with COM_PING.
+        In pooled mode the pool validates connections on acquire, so only a
+        closed pool (e.g. after a forced ``close()``) needs to be recreated.
+        """
+        if self.is_pooled:
+            if self.is_connected:
+                return
+        elif self.is_connected:
+            if time.monotonic() - self._last_used < self._health_check_interval:
+                return
             try:
-                async with self._conn.cursor() as cur:
-                    await cur.execute("SELECT 1")
+                await self._conn.ping(reconnect=False)
+                self._last_used = time.monotonic()
                 return
             except Exception:
                 logger.warning("MySQL connection health check failed, reconnecting...")
@@ -93,13 +280,51 @@ class MySQLAdapter(SQLAdapter):
         if not self._connect_kwargs:
             raise RuntimeError("Not connected and no stored connection parameters")
 
+        self._breaker.check("MySQL server")
         self._close_conn()
+        await self._close_pool()
 
         logger.info("Reconnecting to MySQL...")
-        await self.connect(**self._connect_kwargs)
+        try:
+            await self.connect(**self._connect_kwargs)
+        except Exception:
+            self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
+
+    async def _keepalive_loop(self) -> None:
+        """Ping the single connection when idle so server-side timeouts never fire."""
+        while True:
+            await asyncio.sleep(self._keepalive_interval)
+            if self._conn is None or self._lock.locked():
+                continue
+            if time.monotonic() - self._last_used < self._keepalive_interval:
+                continue
+            async with self._lock:
+                if self._conn is None:
+                    continue
+                try:
+                    await self._conn.ping(reconnect=False)
+                    self._last_used = time.monotonic()
+                except Exception as e:
+                    logger.warning("MySQL keepalive ping failed, reconnecting on next use: {}", e)
+                    self._close_conn()
 
     async def close(self) -> None:
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
         self._close_conn()
+        await self._close_pool()
+
+    async def _close_pool(self) -> None:
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            for conn in self._tx_conns.values():
+                pool.release(conn)
+            self._tx_conns.clear()
+            pool.close()
+            await pool.wait_closed()
 
     def _close_conn(self) -> None:
         """Close connection and clear reference."""
@@ -109,13 +334,127 @@ class MySQLAdapter(SQLAdapter):
             except Exception:
                 pass
             self._conn = None
+        self._tx_owner = None  # a transaction does not survive its connection
+
+    def _discard(self, conn: Any) -> None:
+        """Close a connection whose protocol state can no longer be trusted."""
+        if conn is self._conn:
+            self._close_conn()
+        else:
+            conn.close()  # closed connections are discarded by the pool on release
+
+    def _execution_hint(self, timeout: float) -> str:
+        """Optimizer hint that makes the server abort a SELECT after *timeout* seconds."""
+        return f"/*+ MAX_EXECUTION_TIME({max(1, round(timeout * 1000))}) */"
+
+    def _with_timeout_hint(self, sql: str, timeout: float | None) -> str:
+        """Insert the execution-time hint after a leading SELECT keyword.
+
+        The server-side limit only covers top-level SELECTs; other statements
+        rely on the client-side watchdog in ``_guarded``.
+        """
+        if not timeout or timeout <= 0 or "/*+" in sql:
+            return sql
+        match = _LEADING_SELECT.match(sql)
+        if match is None:
+            return sql
+        return f"{sql[:match.end()]} {self._execution_hint(timeout)}{sql[match.end():]}"
+
+    async def _kill_query(self, conn: Any) -> None:
+        """Stop the statement running on *conn* from a separate connection."""
+        import aiomysql
+
+        try:
+            thread_id = conn.thread_id()
+        except Exception:
+            return
+        try:
+            killer = await asyncio.wait_for(
+                aiomysql.connect(**self._conn_kwargs), timeout=_KILL_CONNECT_TIMEOUT,
+            )
+        except Exception as e:
+            logger.warning("Could not connect to send KILL QUERY {}: {}", thread_id, e)
+            return
+        try:
+            async with killer.cursor() as cur:
+                await cur.execute(f"KILL QUERY {int(thread_id)}")
+        except Exception as e:
+            logger.warning("KILL QUERY {} failed: {}", thread_id, e)
+        finally:
+            killer.close()
+
+    async def _guarded(self, conn: Any, aw: Any, timeout: float | None, deadline: float | None) -> Any:
+        """Await a driver call on *conn*, enforcing the statement *deadline*.
+
+        The server normally stops a hinted SELECT itself. If the call is still
+        running ``_KILL_GRACE`` seconds past the deadline (DML, or a server
+        that ignores the hint), the statement is killed server-side and the
+        connection discarded, since it is mid-result.
+        """
+        if deadline is None:
+            return await aw
+        try:
+            return await asyncio.wait_for(aw, max(deadline - time.monotonic(), 0) + _KILL_GRACE)
+        except asyncio.TimeoutError:
+            await self._kill_query(conn)
+            self._discard(conn)
+            raise QueryTimeoutError(timeout) from None
+        except Exception as e:
+            if _is_timeout_error(e):
+                raise QueryTimeoutError(timeout) from e
+            raise
+
+    async def _acquire(self) -> Any:
+        """Acquire a pooled connection, bounded by the acquire timeout."""
+        self._breaker.check("MySQL server")
+        try:
+            conn = await asyncio.wait_for(self._pool.acquire(), timeout=self._pool_acquire_timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(
+                f"Timed out after {self._pool_acquire_timeout}s waiting for a MySQL pool connection "
+                f"({self._pool.size}/{self._pool.maxsize} in use)"
+            ) from None
+        except Exception as e:
+            if _is_connect_error(e):
+                self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
+        await self._init_session(conn)
+        return conn
+
+    def has_transaction(self) -> bool:
+        if self.is_pooled:
+            return self._current_tx_conn() is not None
+        return self._tx_owner is not None and self._tx_owner is asyncio.current_task()
+
+    def _current_tx_conn(self) -> Any:
+        """Return the connection pinned to the current task by begin_transaction, if any."""
+        task = asyncio.current_task()
+        return self._tx_conns.get(task) if task is not None else None
+
+    async def execute(
+        self, sql: str, params: tuple | None = None, timeout: float | None = None,
+    ) -> QueryResult:
+        with tracing.span("db.execute", db=self.db_type) as span:
+            if span:
+                span.set(sql=tracing.sql_fingerprint(sql, self.db_type))
+            result = await self._execute_with_retry(sql, params, timeout)
+            span.set(rows=len(result.rows), affected=result.affected_rows)
+            return result
+
+    async def _execute_with_retry(
+        self, sql: str, params: tuple | None = None, timeout: float | None = None,
+    ) -> QueryResult:
+        """Execute, reconnecting and retrying after connection-level errors."""
+        if self.is_pooled:
+            return await self._execute_pooled(sql, params, timeout)
 
-    async def execute(self, sql: str, params: tuple | None = None) -> QueryResult:
         last_error: Exception | None = None
         for attempt in range(_MAX_RECONNECT_ATTEMPTS):
             try:
-                await self._ensure_connected()
-                return await self._execute_once(sql, params)
+                async with self._lock:
+                    await self._ensure_connected()
+                    return await self._execute_once(sql, params, timeout=timeout)
             except RuntimeError:
                 raise
             except UnicodeDecodeError as e:
@@ -137,18 +476,59 @@ class MySQLAdapter(SQLAdapter):
                 self._close_conn()
         raise last_error  # type: ignore[misc]
 
-    async def _execute_once(self, sql: str, params: tuple | None = None) -> QueryResult:
+    async def _execute_pooled(
+        self, sql: str, params: tuple | None = None, timeout: float | None = None,
+    ) -> QueryResult:
+        """Execute on a pooled connection with per-connection reconnect semantics."""
+        tx_conn = self._current_tx_conn()
+        if tx_conn is not None:
+            # Never retry inside a transaction: a fresh connection would silently
+            # drop the statements executed so far.
+            return await self._execute_once(sql, params, conn=tx_conn, timeout=timeout)
+
+        await self._ensure_connected()
+        last_error: Exception | None = None
+        for attempt in range(_MAX_RECONNECT_ATTEMPTS):
+            conn = await self._acquire()
+            try:
+                return await self._execute_once(sql, params, conn=conn, timeout=timeout)
+            except UnicodeDecodeError as e:
+                last_error = e
+                logger.warning(
+                    "MySQL execute failed (attempt {}/{}): UTF-8 decode error - connection may be corrupted: {}",
+                    attempt + 1, _MAX_RECONNECT_ATTEMPTS, e,
+                )
+                conn.close()  # closed connections are discarded by the pool on release
+                await asyncio.sleep(0.5)
+            except Exception as e:
+                last_error = e
+                if not _is_connection_error(e):
+                    raise
+                logger.warning("MySQL execute failed (attempt {}/{}): {}", attempt + 1, _MAX_RECONNECT_ATTEMPTS, e)
+                conn.close()
+            finally:
+                self._pool.release(conn)
+        raise last_error  # type: ignore[misc]
+
+    async def _execute_once(
+        self, sql: str, params: tuple | None = None, conn: Any = None, timeout: float | None = None,
+    ) -> QueryResult:
         # When no params: escape literal % (e.g. in LIKE '%x%') to %% so the driver
         # does not treat them as format placeholders ("not enough arguments" error).
         if not params:
             sql = sql.replace("%", "%%")
+        sql = self._with_timeout_hint(sql, timeout)
+        conn = conn or self._conn
         start = time.monotonic()
-        async with self._conn.cursor() as cur:
-            await cur.execute(sql, params or ())
+        deadline = start + timeout if timeout and timeout > 0 else None
+        async with conn.cursor() as cur:
+            # The default cursor reads the whole result inside execute().
+            await self._guarded(conn, cur.execute(sql, params or ()), timeout, deadline)
             description = cur.description
             columns = [d[0] for d in description] if description else []
             rows = [tuple(r) for r in await cur.fetchall()] if description else []
-            elapsed = (time.monotonic() - start) * 1000
+            self._last_used = time.monotonic()
+            elapsed = (self._last_used - start) * 1000
             return QueryResult(
                 columns=columns,
                 rows=rows,
@@ -156,8 +536,85 @@ class MySQLAdapter(SQLAdapter):
                 execution_time_ms=round(elapsed, 2),
             )
 
-    async def get_tables(self) -> list[TableInfo]:
+    async def execute_stream(
+        self,
+        sql: str,
+        params: tuple | None = None,
+        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+        timeout: float | None = None,
+    ) -> AsyncIterator[QueryResult]:
+        """Stream rows through an unbuffered ``SSCursor``.
+
+        In single-connection mode the connection is held for the whole stream.
+        If the caller stops before the result is exhausted, the connection is
+        closed instead of draining the remaining rows from the server (the
+        pool discards it; single mode reconnects on the next statement). A
+        connection pinned to a transaction is drained instead.
+        """
+        if not self.is_pooled:
+            async with self._lock:
+                await self._ensure_connected()
+                async with aclosing(self._stream_on(self._conn, sql, params, batch_size, timeout)) as stream:
+                    async for batch in stream:
+                        yield batch
+            return
+
         await self._ensure_connected()
+        tx_conn = self._current_tx_conn()
+        conn = tx_conn if tx_conn is not None else await self._acquire()
+        try:
+            async with aclosing(self._stream_on(conn, sql, params, batch_size, timeout)) as stream:
+                async for batch in stream:
+                    yield batch
+        finally:
+            if tx_conn is None:
+                self._pool.release(conn)
+
+    async def _stream_on(
+        self, conn: Any, sql: str, params: tuple | None, batch_size: int, timeout: float | None = None,
+    ) -> AsyncIterator[QueryResult]:
+        import aiomysql
+
+        if not params:
+            sql = sql.replace("%", "%%")
+        sql = self._with_timeout_hint(sql, timeout)
+        batch_size = max(1, batch_size)
+        # A pinned transaction connection must survive an abandoned stream.
+        pinned = conn is self._current_tx_conn()
+        drain = True
+        start = time.monotonic()
+        deadline = start + timeout if timeout and timeout > 0 else None
+        cur = aiomysql.SSCursor(conn)
+        try:
+            await self._guarded(conn, cur.execute(sql, params or ()), timeout, deadline)
+            description = cur.description
+            columns = [d[0] for d in description] if description else []
+            affected_rows = cur.rowcount if not description and cur.rowcount >= 0 else 0
+            while True:
+                rows = [
+                    tuple(r) for r in await self._guarded(conn, cur.fetchmany(batch_size), timeout, deadline)
+                ] if description else []
+                self._last_used = time.monotonic()
+                exhausted = len(rows) < batch_size
+                drain = exhausted or pinned
+                yield QueryResult(
+                    columns=columns,
+                    rows=rows,
+                    affected_rows=affected_rows,
+                    execution_time_ms=round((self._last_used - start) * 1000, 2),
+                )
+                if exhausted:
+                    break
+        finally:
+            if drain:
+                try:
+                    await cur.close()
+                except Exception:
+                    drain = False
+            if not drain:
+                self._discard(conn)
+
+    async def get_tables(self) -> list[TableInfo]:
         result = await self.execute(
             "SELECT TABLE_NAME, TABLE_ROWS, ENGINE "
             "FROM INFORMATION_SCHEMA.TABLES "
@@ -176,7 +633,6 @@ class MySQLAdapter(SQLAdapter):
         ]
 
     async def get_columns(self, table: str) -> list[ColumnInfo]:
-        await self._ensure_connected()
         result = await self.execute(
             "SELECT COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_DEFAULT, COLUMN_KEY, EXTRA "
             "FROM INFORMATION_SCHEMA.COLUMNS "
@@ -184,20 +640,9 @@ class MySQLAdapter(SQLAdapter):
             "ORDER BY ORDINAL_POSITION",
             (self._database, table),
         )
-        return [
-            ColumnInfo(
-                name=row[0],
-                data_type=row[1],
-                nullable=row[2] == "YES",
-                default=row[3],
-                is_primary_key=row[4] == "PRI",
-                extra=row[5] or "",
-            )
-            for row in result.rows
-        ]
+        return _columns_from_rows(result.rows)
 
     async def get_indexes(self, table: str) -> list[IndexInfo]:
-        await self._ensure_connected()
         result = await self.execute(
             "SELECT INDEX_NAME, COLUMN_NAME, NON_UNIQUE, INDEX_TYPE "
             "FROM INFORMATION_SCHEMA.STATISTICS "
@@ -205,20 +650,9 @@ class MySQLAdapter(SQLAdapter):
             "ORDER BY INDEX_NAME, SEQ_IN_INDEX",
             (self._database, table),
         )
-        idx_map: dict[str, IndexInfo] = {}
-        for row in result.rows:
-            idx_name = row[0]
-            if idx_name not in idx_map:
-                idx_map[idx_name] = IndexInfo(
-                    name=idx_name,
-                    unique=not bool(row[2]),
-                    type=row[3] or "BTREE",
-                )
-            idx_map[idx_name].columns.append(row[1])
-        return list(idx_map.values())
+        return _indexes_from_rows(result.rows)
 
     async def get_foreign_keys(self, table: str) -> list[ForeignKeyInfo]:
-        await self._ensure_connected()
         result = await self.execute(
             "SELECT CONSTRAINT_NAME, COLUMN_NAME, "
             "REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME "
@@ -228,31 +662,129 @@ class MySQLAdapter(SQLAdapter):
             "ORDER BY CONSTRAINT_NAME, ORDINAL_POSITION",
             (self._database, table),
         )
-        fk_map: dict[str, ForeignKeyInfo] = {}
-        for row in result.rows:
-            fk_name = row[0]
-            if fk_name not in fk_map:
-                fk_map[fk_name] = ForeignKeyInfo(name=fk_name, ref_table=row[2])
-            fk_map[fk_name].columns.append(row[1])
-            fk_map[fk_name].ref_columns.append(row[3])
-        return list(fk_map.values())
+        return _foreign_keys_from_rows(result.rows)
+
+    async def get_schema_snapshot(self, tables: list[str] | None = None) -> dict[str, TableSchema]:
+        """Whole-schema introspection in three INFORMATION_SCHEMA queries."""
+        if tables is None:
+            table_filter = (
+                "TABLE_NAME IN (SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES "
+                "WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE')"
+            )
+            params: tuple = (self._database, self._database)
+        elif not tables:
+            return {}
+        else:
+            table_filter = f"TABLE_NAME IN ({', '.join(['%s'] * len(tables))})"
+            params = (self._database, *tables)
+
+        columns = await self.execute(
+            "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_DEFAULT, COLUMN_KEY, EXTRA "
+            "FROM INFORMATION_SCHEMA.COLUMNS "
+            f"WHERE TABLE_SCHEMA = %s AND {table_filter} "
+            "ORDER BY TABLE_NAME, ORDINAL_POSITION",
+            params,
+        )
+        indexes = await self.execute(
+            "SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME, NON_UNIQUE, INDEX_TYPE "
+            "FROM INFORMATION_SCHEMA.STATISTICS "
+            f"WHERE TABLE_SCHEMA = %s AND {table_filter} "
+            "ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX",
+            params,
+        )
+        fks = await self.execute(
+            "SELECT TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME, "
+            "REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME "
+            "FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE "
+            f"WHERE TABLE_SCHEMA = %s AND {table_filter} "
+            "AND REFERENCED_TABLE_NAME IS NOT NULL "
+            "ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION",
+            params,
+        )
+        index_rows = _group_by_table(indexes.rows)
+        fk_rows = _group_by_table(fks.rows)
+        return {
+            name: TableSchema(
+                name=name,
+                columns=_columns_from_rows(rows),
+                indexes=_indexes_from_rows(index_rows.get(name, [])),
+                foreign_keys=_foreign_keys_from_rows(fk_rows.get(name, [])),
+            )
+            for name, rows in _group_by_table(columns.rows).items()
+        }
+
+    async def get_schema_fingerprints(self) -> dict[str, str] | None:
+        """``CREATE_TIME``/``UPDATE_TIME`` per table from ``INFORMATION_SCHEMA.TABLES``.
+
+        UPDATE_TIME also moves on writes, which only costs an extra refresh.
+        """
+        result = await self.execute(
+            "SELECT TABLE_NAME, CONCAT_WS('/', CREATE_TIME, UPDATE_TIME) "
+            "FROM INFORMATION_SCHEMA.TABLES "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'",
+            (self._database,),
+        )
+        return {row[0]: str(row[1]) for row in result.rows}
+
+    async def replication_lag(self) -> float | None:
+        """``Seconds_Behind_Source`` from ``SHOW REPLICA STATUS`` (``SHOW SLAVE STATUS`` before 8.0.22)."""
+        try:
+            result = await self.execute("SHOW REPLICA STATUS")
+        except Exception:
+            result = await self.execute("SHOW SLAVE STATUS")
+        if not result.rows:
+            return None
+        row = dict(zip(result.columns, result.rows[0]))
+        lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+        if lag is None:
+            # Replication threads are stopped: treat as infinitely behind.
+            return float("inf")
+        return float(lag)
 
     async def explain(self, sql: str) -> QueryResult:
-        await self._ensure_connected()
         return await self.execute(f"EXPLAIN {sql}")
 
     async def begin_transaction(self) -> None:
-        await self._ensure_connected()
-        await self._conn.begin()
+        if self.is_pooled:
+            await self._ensure_connected()
+            task = asyncio.current_task()
+            if task in self._tx_conns:
+                raise RuntimeError("A transaction is already active for this task")
+            conn = await self._acquire()
+            try:
+                await conn.begin()
+            except Exception:
+                self._pool.release(conn)
+                raise
+            self._tx_conns[task] = conn
+            return
+        async with self._lock:
+            await self._ensure_connected()
+            await self._conn.begin()
+            self._tx_owner = asyncio.current_task()
 
     async def commit(self) -> None:
-        if not self.is_connected:
-            raise RuntimeError("Not connected")
-        async with self._conn.cursor() as cur:
-            await cur.execute("COMMIT")
+        await self._end_transaction("COMMIT")
 
     async def rollback(self) -> None:
+        await self._end_transaction("ROLLBACK")
+
+    async def _end_transaction(self, statement: str) -> None:
+        if self.is_pooled:
+            conn = self._tx_conns.pop(asyncio.current_task(), None)
+            if conn is None:
+                if self._tx_conns:
+                    raise ForeignTransactionError(statement, len(self._tx_conns))
+                return  # like a bare COMMIT/ROLLBACK outside a transaction
+            try:
+                async with conn.cursor() as cur:
+                    await cur.execute(statement)
+            finally:
+                self._pool.release(conn)
+            return
         if not self.is_connected:
             raise RuntimeError("Not connected")
-        async with self._conn.cursor() as cur:
-            await cur.execute("ROLLBACK")
+        async with self._lock:
+            self._tx_owner = None
+            async with self._conn.cursor() as cur:
+                await cur.execute(statement)
@@ -2,25 +2,219 @@
 
 from __future__ import annotations
 
+import asyncio
+import re
 import time
-from typing import Any
+from contextlib import aclosing, contextmanager, nullcontext
+from typing import Any, AsyncIterator, Iterator
 
+from queryclaw import tracing
 from queryclaw.db.base import (
+    DEFAULT_STREAM_BATCH_SIZE,
     ColumnInfo,
     ForeignKeyInfo,
+    ForeignTransactionError,
     IndexInfo,
     QueryResult,
+    QueryTimeoutError,
     SQLAdapter,
     TableInfo,
+    TableSchema,
 )
 
+_DEFAULT_POOL_MIN_SIZE = 1
+_DEFAULT_POOL_MAX_SIZE = 10
+_DEFAULT_POOL_RECYCLE = 3600  # seconds; -1 disables idle recycling
+_DEFAULT_POOL_ACQUIRE_TIMEOUT = 10.0  # seconds
+_DEFAULT_STATEMENT_CACHE_SIZE = 128
+
+# Leading keywords of statements that never return rows (unless they carry a
+# RETURNING clause). These run via ``Connection.execute``: one round trip, and
+# the command status string (e.g. ``UPDATE 3``) gives the affected rows.
+_NO_ROWS_KEYWORDS = frozenset({
+    "INSERT", "UPDATE", "DELETE", "MERGE",
+    "CREATE", "ALTER", "DROP", "TRUNCATE", "COMMENT", "GRANT", "REVOKE",
+    "BEGIN", "START", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "END", "ABORT",
+    "SET", "RESET", "VACUUM", "ANALYZE", "REINDEX", "CLUSTER", "LOCK",
+})
+
+# Statements that can back a server-side cursor (``DECLARE ... CURSOR FOR``).
+_CURSOR_KEYWORDS = frozenset({"SELECT", "WITH", "VALUES", "TABLE"})
+# String literals, quoted identifiers and dollar-quoted bodies, which may contain any word.
+_QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|(\$\w*\$).*?\1", re.DOTALL)
+_RETURNING = re.compile(r"\bRETURNING\b")
+
+_BASE_TABLES_SQL = (
+    "SELECT c.relname FROM pg_class c "
+    "JOIN pg_namespace n ON n.oid = c.relnamespace "
+    "WHERE n.nspname = 'public' AND c.relkind = 'r'"
+)
+
+# Catalog queries shared by the per-table methods and get_schema_snapshot;
+# {filter} selects one table, a list of tables, or every table.
+_COLUMNS_SQL = (
+    "SELECT c.table_name, c.column_name, c.data_type, c.is_nullable, c.column_default, "
+    "       CASE WHEN tc.constraint_type = 'PRIMARY KEY' THEN true ELSE false END AS is_pk, "
+    "       COALESCE(c.character_maximum_length::text, '') AS extra "
+    "FROM information_schema.columns c "
+    "LEFT JOIN information_schema.key_column_usage kcu "
+    "  ON kcu.table_schema = c.table_schema "
+    "  AND kcu.table_name = c.table_name "
+    "  AND kcu.column_name = c.column_name "
+    "LEFT JOIN information_schema.table_constraints tc "
+    "  ON tc.constraint_name = kcu.constraint_name "
+    "  AND tc.table_schema = kcu.table_schema "
+    "  AND tc.constraint_type = 'PRIMARY KEY' "
+    "WHERE c.table_schema = 'public' AND {filter} "
+    "ORDER BY c.table_name, c.ordinal_position"
+)
+
+_INDEXES_SQL = (
+    "SELECT t.relname AS table_name, "
+    "       i.relname AS index_name, "
+    "       a.attname AS column_name, "
+    "       ix.indisunique AS is_unique, "
+    "       am.amname AS index_type "
+    "FROM pg_index ix "
+    "JOIN pg_class t ON t.oid = ix.indrelid "
+    "JOIN pg_class i ON i.oid = ix.indexrelid "
+    "JOIN pg_namespace n ON n.oid = t.relnamespace "
+    "JOIN pg_am am ON am.oid = i.relam "
+    "JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = ANY(ix.indkey) "
+    "WHERE n.nspname = 'public' AND {filter} "
+    "ORDER BY t.relname, i.relname, a.attnum"
+)
+
+_FOREIGN_KEYS_SQL = (
+    "SELECT tc.table_name, tc.constraint_name, kcu.column_name, "
+    "       ccu.table_name AS ref_table, ccu.column_name AS ref_column "
+    "FROM information_schema.table_constraints tc "
+    "JOIN information_schema.key_column_usage kcu "
+    "  ON kcu.constraint_name = tc.constraint_name "
+    "  AND kcu.table_schema = tc.table_schema "
+    "JOIN information_schema.constraint_column_usage ccu "
+    "  ON ccu.constraint_name = tc.constraint_name "
+    "  AND ccu.table_schema = tc.table_schema "
+    "WHERE tc.constraint_type = 'FOREIGN KEY' "
+    "  AND tc.table_schema = 'public' AND {filter} "
+    "ORDER BY tc.table_name, tc.constraint_name, kcu.ordinal_position"
+)
+
+
+def _returns_rows(sql: str) -> bool:
+    """Best-effort guess whether *sql* can produce a result set."""
+    upper = sql.lstrip().upper()
+    keyword = upper.split(None, 1)[0] if upper else ""
+    if keyword not in _NO_ROWS_KEYWORDS:
+        return True
+    return _RETURNING.search(_QUOTED.sub(" ", upper)) is not None
+
+
+def _remaining(deadline: float | None) -> float | None:
+    """Seconds left before *deadline*, for asyncpg's per-call ``timeout``."""
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.001)
+
+
+@contextmanager
+def _timeout_errors(timeout: float | None) -> Iterator[None]:
+    """Report a timed-out or server-cancelled statement as ``QueryTimeoutError``.
+
+    When a call's ``timeout`` expires asyncpg sends a cancel request for the
+    running statement and raises ``asyncio.TimeoutError``; a server-side
+    ``statement_timeout`` surfaces as SQLSTATE 57014 (query_canceled).
+    """
+    if timeout is None:
+        yield
+        return
+    try:
+        yield
+    except asyncio.TimeoutError:
+        raise QueryTimeoutError(timeout) from None
+    except Exception as e:
+        if getattr(e, "sqlstate", None) == "57014":
+            raise QueryTimeoutError(timeout) from e
+        raise
+
+
+def _parse_status(status: str | None) -> int:
+    """Extract the row count from a command status like ``UPDATE 3``."""
+    try:
+        return int(status.split()[-1])  # type: ignore[union-attr]
+    except (ValueError, IndexError, AttributeError):
+        return 0
+
+
+def _group_by_table(records: list[Any]) -> dict[str, list[Any]]:
+    """Split catalog records by their ``table_name`` field, preserving order."""
+    grouped: dict[str, list[Any]] = {}
+    for r in records:
+        grouped.setdefault(r["table_name"], []).append(r)
+    return grouped
+
+
+def _columns_from_records(records: list[Any]) -> list[ColumnInfo]:
+    return [
+        ColumnInfo(
+            name=r["column_name"],
+            data_type=r["data_type"],
+            nullable=r["is_nullable"] == "YES",
+            default=r["column_default"],
+            is_primary_key=bool(r["is_pk"]),
+            extra=r["extra"] or "",
+        )
+        for r in records
+    ]
+
+
+def _indexes_from_records(records: list[Any]) -> list[IndexInfo]:
+    idx_map: dict[str, IndexInfo] = {}
+    for r in records:
+        idx_name = r["index_name"]
+        if idx_name not in idx_map:
+            idx_map[idx_name] = IndexInfo(
+                name=idx_name,
+                unique=bool(r["is_unique"]),
+                type=r["index_type"] or "btree",
+            )
+        idx_map[idx_name].columns.append(r["column_name"])
+    return list(idx_map.values())
+
+
+def _foreign_keys_from_records(records: list[Any]) -> list[ForeignKeyInfo]:
+    fk_map: dict[str, ForeignKeyInfo] = {}
+    for r in records:
+        fk_name = r["constraint_name"]
+        if fk_name not in fk_map:
+            fk_map[fk_name] = ForeignKeyInfo(name=fk_name, ref_table=r["ref_table"])
+        fk_map[fk_name].columns.append(r["column_name"])
+        fk_map[fk_name].ref_columns.append(r["ref_column"])
+    return list(fk_map.values())
+
 
 class PostgreSQLAdapter(SQLAdapter):
-    """Async PostgreSQL adapter using asyncpg."""
+    """Async PostgreSQL adapter using asyncpg.
+
+    By default a single connection is used, one statement (or stream) at a
+    time, since asyncpg rejects overlapping operations on a connection.
+    When connected with ``pool_enabled=True`` an ``asyncpg`` pool is used
+    so sessions can run concurrently; explicit transactions pin one pooled
+    connection to the calling task until COMMIT/ROLLBACK.
+
+    Statements go through asyncpg's per-connection prepared-statement LRU
+    (keyed by SQL text, sized by ``statement_cache_size``), which survives
+    pool release, so a repeated statement costs one round trip.
+    """
 
     def __init__(self) -> None:
         self._conn: Any = None
+        self._pool: Any = None
         self._database: str = ""
+        self._pool_acquire_timeout: float = _DEFAULT_POOL_ACQUIRE_TIMEOUT
+        self._tx_conns: dict[asyncio.Task, Any] = {}
+        self._tx_owner: asyncio.Task | None = None  # task that began the single connection's transaction
+        self._lock = asyncio.Lock()  # serializes use of the single connection
 
     @property
     def db_type(self) -> str:
@@ -28,43 +222,138 @@ class PostgreSQLAdapter(SQLAdapter):
 
     @property
     def is_connected(self) -> bool:
+        if self._pool is not None:
+            return not self._pool.is_closing()
         return self._conn is not None and not self._conn.is_closed()
 
+    @property
+    def is_pooled(self) -> bool:
+        """Whether the adapter runs in pooled mode."""
+        return self._pool is not None
+
+    def max_concurrency(self) -> int:
+        if self._pool is None or self._current_tx_conn() is not None:
+            return 1
+        return max(1, self._pool.get_max_size() - len(self._tx_conns))
+
+    def pool_stats(self) -> dict[str, int]:
+        """Return pool size counters (empty dict in single-connection mode)."""
+        if self._pool is None:
+            return {}
+        return {
+            "size": self._pool.get_size(),
+            "free": self._pool.get_idle_size(),
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+            "in_transaction": len(self._tx_conns),
+        }
+
     async def connect(self, **kwargs: Any) -> None:
         import asyncpg
 
         self._database = kwargs.get("database", "")
-        self._conn = await asyncpg.connect(
+        conn_kwargs: dict[str, Any] = dict(
             host=kwargs.get("host", "localhost"),
             port=kwargs.get("port", 5432),
             user=kwargs.get("user", "postgres"),
             password=kwargs.get("password", ""),
             database=self._database,
+            statement_cache_size=kwargs.get("statement_cache_size", _DEFAULT_STATEMENT_CACHE_SIZE),
         )
 
+        if kwargs.get("pool_enabled"):
+            self._pool_acquire_timeout = float(
+                kwargs.get("pool_acquire_timeout", _DEFAULT_POOL_ACQUIRE_TIMEOUT)
+            )
+            recycle = kwargs.get("pool_recycle", _DEFAULT_POOL_RECYCLE)
+            self._pool = await asyncpg.create_pool(
+                min_size=kwargs.get("pool_min_size", _DEFAULT_POOL_MIN_SIZE),
+                max_size=kwargs.get("pool_max_size", _DEFAULT_POOL_MAX_SIZE),
+                max_inactive_connection_lifetime=max(recycle, 0),
+                **conn_kwargs,
+            )
+            return
+
+        self._conn = await asyncpg.connect(**conn_kwargs)
+
     async def close(self) -> None:
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            for conn in self._tx_conns.values():
+                await pool.release(conn)
+            self._tx_conns.clear()
+            await pool.close()
         if self._conn:
             await self._conn.close()
             self._conn = None
+        self._tx_owner = None
+
+    def has_transaction(self) -> bool:
+        if self._pool is not None:
+            return self._current_tx_conn() is not None
+        return self._tx_owner is not None and self._tx_owner is asyncio.current_task()
+
+    def _current_tx_conn(self) -> Any:
+        """Return the connection pinned to the current task by begin_transaction, if any."""
+        task = asyncio.current_task()
+        return self._tx_conns.get(task) if task is not None else None
+
+    async def _acquire(self) -> Any:
+        try:
+            return await self._pool.acquire(timeout=self._pool_acquire_timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(
+                f"Timed out after {self._pool_acquire_timeout}s waiting for a PostgreSQL pool connection "
+                f"({self._pool.get_size()}/{self._pool.get_max_size()} in use)"
+            ) from None
+
+    async def _with_conn(self, fn: Any) -> Any:
+        """Run ``fn(conn)`` on the pinned transaction connection, a pooled one, or the single one."""
+        if self._pool is None:
+            if not self._conn:
+                raise RuntimeError("Not connected")
+            async with self._lock:
+                return await fn(self._conn)
+        tx_conn = self._current_tx_conn()
+        if tx_conn is not None:
+            return await fn(tx_conn)
+        conn = await self._acquire()
+        try:
+            return await fn(conn)
+        finally:
+            await self._pool.release(conn)
 
-    async def execute(self, sql: str, params: tuple | None = None) -> QueryResult:
-        if not self._conn:
-            raise RuntimeError("Not connected")
+    async def _fetch(self, sql: str, *args: Any) -> list[Any]:
+        return await self._with_conn(lambda conn: conn.fetch(sql, *args))
+
+    async def _execute_on(
+        self, conn: Any, sql: str, params: tuple | None, timeout: float | None = None,
+    ) -> QueryResult:
         start = time.monotonic()
-        stmt = await self._conn.prepare(sql)
-        columns = [attr.name for attr in stmt.get_attributes()] if stmt.get_attributes() else []
-
-        if columns:
-            records = await stmt.fetch(*(params or ()))
-            rows = [tuple(r) for r in records]
-            affected_rows = len(rows)
-        else:
-            result_status = await self._conn.execute(sql, *(params or ()))
-            rows = []
-            try:
-                affected_rows = int(result_status.split()[-1])
-            except (ValueError, IndexError, AttributeError):
-                affected_rows = 0
+        args = params or ()
+        timeout = timeout if timeout and timeout > 0 else None
+        deadline = start + timeout if timeout is not None else None
+
+        with _timeout_errors(timeout):
+            if not _returns_rows(sql):
+                # Without parameters this uses the simple query protocol (no prepare);
+                # with parameters asyncpg reuses its cached prepared statement.
+                status = await conn.execute(sql, *args, timeout=timeout)
+                columns: list[str] = []
+                rows: list[tuple] = []
+                affected_rows = _parse_status(status)
+            else:
+                records = await conn.fetch(sql, *args, timeout=timeout)
+                if records:
+                    columns = list(records[0].keys())
+                else:
+                    # Empty result: column names are only available from the statement,
+                    # which fetch() just put in asyncpg's statement cache, so this is a lookup.
+                    stmt = await conn._prepare(sql, timeout=_remaining(deadline), use_cache=True)
+                    attrs = stmt.get_attributes()
+                    columns = [attr.name for attr in attrs] if attrs else []
+                rows = [tuple(r) for r in records]
+                affected_rows = len(rows)
 
         elapsed = (time.monotonic() - start) * 1000
         return QueryResult(
@@ -74,10 +363,81 @@ class PostgreSQLAdapter(SQLAdapter):
             execution_time_ms=round(elapsed, 2),
         )
 
+    async def execute(
+        self, sql: str, params: tuple | None = None, timeout: float | None = None,
+    ) -> QueryResult:
+        with tracing.span("db.execute", db="postgresql") as span:
+            if span:
+                span.set(sql=tracing.sql_fingerprint(sql, "postgresql"))
+            result = await self._with_conn(lambda conn: self._execute_on(conn, sql, params, timeout))
+            span.set(rows=len(result.rows), affected=result.affected_rows)
+            return result
+
+    async def execute_stream(
+        self,
+        sql: str,
+        params: tuple | None = None,
+        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+        timeout: float | None = None,
+    ) -> AsyncIterator[QueryResult]:
+        """Stream query rows through an asyncpg cursor.
+
+        Cursors only live inside a transaction, so one is opened for the
+        stream unless the connection is already in one. Statements that cannot
+        back a cursor (DML, DDL, ``RETURNING``) fall back to ``execute``.
+        """
+        keyword = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+        if keyword not in _CURSOR_KEYWORDS:
+            async with aclosing(super().execute_stream(sql, params, batch_size, timeout)) as stream:
+                async for batch in stream:
+                    yield batch
+            return
+
+        if self._pool is None:
+            if not self._conn:
+                raise RuntimeError("Not connected")
+            async with self._lock:
+                async with aclosing(self._stream_on(self._conn, sql, params, batch_size, timeout)) as stream:
+                    async for batch in stream:
+                        yield batch
+            return
+
+        conn = self._current_tx_conn()
+        release = conn is None
+        if release:
+            conn = await self._acquire()
+        try:
+            async with aclosing(self._stream_on(conn, sql, params, batch_size, timeout)) as stream:
+                async for batch in stream:
+                    yield batch
+        finally:
+            if release:
+                await self._pool.release(conn)
+
+    async def _stream_on(
+        self, conn: Any, sql: str, params: tuple | None, batch_size: int, timeout: float | None = None,
+    ) -> AsyncIterator[QueryResult]:
+        batch_size = max(1, batch_size)
+        start = time.monotonic()
+        timeout = timeout if timeout and timeout > 0 else None
+        deadline = start + timeout if timeout is not None else None
+        tx = nullcontext() if conn.is_in_transaction() else conn.transaction()
+        async with tx:
+            with _timeout_errors(timeout):
+                stmt = await conn.prepare(sql, timeout=_remaining(deadline))
+                attrs = stmt.get_attributes()
+                columns = [attr.name for attr in attrs] if attrs else []
+                cursor = await stmt.cursor(*(params or ()), timeout=_remaining(deadline))
+            while True:
+                with _timeout_errors(timeout):
+                    rows = [tuple(r) for r in await cursor.fetch(batch_size, timeout=_remaining(deadline))]
+                elapsed = (time.monotonic() - start) * 1000
+                yield QueryResult(columns=columns, rows=rows, execution_time_ms=round(elapsed, 2))
+                if len(rows) < batch_size:
+                    break
+
     async def get_tables(self) -> list[TableInfo]:
-        if not self._conn:
-            raise RuntimeError("Not connected")
-        records = await self._conn.fetch(
+        records = await self._fetch(
             "SELECT c.relname AS table_name, "
             "       c.reltuples::bigint AS row_estimate "
             "FROM pg_class c "
@@ -96,113 +456,138 @@ class PostgreSQLAdapter(SQLAdapter):
         ]
 
     async def get_columns(self, table: str) -> list[ColumnInfo]:
-        if not self._conn:
-            raise RuntimeError("Not connected")
-        records = await self._conn.fetch(
-            "SELECT c.column_name, c.data_type, c.is_nullable, c.column_default, "
-            "       CASE WHEN tc.constraint_type = 'PRIMARY KEY' THEN true ELSE false END AS is_pk, "
-            "       COALESCE(c.character_maximum_length::text, '') AS extra "
-            "FROM information_schema.columns c "
-            "LEFT JOIN information_schema.key_column_usage kcu "
-            "  ON kcu.table_schema = c.table_schema "
-            "  AND kcu.table_name = c.table_name "
-            "  AND kcu.column_name = c.column_name "
-            "LEFT JOIN information_schema.table_constraints tc "
-            "  ON tc.constraint_name = kcu.constraint_name "
-            "  AND tc.table_schema = kcu.table_schema "
-            "  AND tc.constraint_type = 'PRIMARY KEY' "
-            "WHERE c.table_schema = 'public' AND c.table_name = $1 "
-            "ORDER BY c.ordinal_position",
+        records = await self._fetch(
+            _COLUMNS_SQL.format(filter="c.table_name = $1"),
             table,
         )
-        return [
-            ColumnInfo(
-                name=r["column_name"],
-                data_type=r["data_type"],
-                nullable=r["is_nullable"] == "YES",
-                default=r["column_default"],
-                is_primary_key=bool(r["is_pk"]),
-                extra=r["extra"] or "",
-            )
-            for r in records
-        ]
+        return _columns_from_records(records)
 
     async def get_indexes(self, table: str) -> list[IndexInfo]:
-        if not self._conn:
-            raise RuntimeError("Not connected")
-        records = await self._conn.fetch(
-            "SELECT i.relname AS index_name, "
-            "       a.attname AS column_name, "
-            "       ix.indisunique AS is_unique, "
-            "       am.amname AS index_type "
-            "FROM pg_index ix "
-            "JOIN pg_class t ON t.oid = ix.indrelid "
-            "JOIN pg_class i ON i.oid = ix.indexrelid "
-            "JOIN pg_namespace n ON n.oid = t.relnamespace "
-            "JOIN pg_am am ON am.oid = i.relam "
-            "JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = ANY(ix.indkey) "
-            "WHERE n.nspname = 'public' AND t.relname = $1 "
-            "ORDER BY i.relname, a.attnum",
+        records = await self._fetch(
+            _INDEXES_SQL.format(filter="t.relname = $1"),
             table,
         )
-        idx_map: dict[str, IndexInfo] = {}
-        for r in records:
-            idx_name = r["index_name"]
-            if idx_name not in idx_map:
-                idx_map[idx_name] = IndexInfo(
-                    name=idx_name,
-                    unique=bool(r["is_unique"]),
-                    type=r["index_type"] or "btree",
-                )
-            idx_map[idx_name].columns.append(r["column_name"])
-        return list(idx_map.values())
+        return _indexes_from_records(records)
 
     async def get_foreign_keys(self, table: str) -> list[ForeignKeyInfo]:
-        if not self._conn:
-            raise RuntimeError("Not connected")
-        records = await self._conn.fetch(
-            "SELECT tc.constraint_name, kcu.column_name, "
-            "       ccu.table_name AS ref_table, ccu.column_name AS ref_column "
-            "FROM information_schema.table_constraints tc "
-            "JOIN information_schema.key_column_usage kcu "
-            "  ON kcu.constraint_name = tc.constraint_name "
-            "  AND kcu.table_schema = tc.table_schema "
-            "JOIN information_schema.constraint_column_usage ccu "
-            "  ON ccu.constraint_name = tc.constraint_name "
-            "  AND ccu.table_schema = tc.table_schema "
-            "WHERE tc.constraint_type = 'FOREIGN KEY' "
-            "  AND tc.table_schema = 'public' AND tc.table_name = $1 "
-            "ORDER BY tc.constraint_name, kcu.ordinal_position",
+        records = await self._fetch(
+            _FOREIGN_KEYS_SQL.format(filter="tc.table_name = $1"),
             table,
         )
-        fk_map: dict[str, ForeignKeyInfo] = {}
-        for r in records:
-            fk_name = r["constraint_name"]
-            if fk_name not in fk_map:
-                fk_map[fk_name] = ForeignKeyInfo(name=fk_name, ref_table=r["ref_table"])
-            fk_map[fk_name].columns.append(r["column_name"])
-            fk_map[fk_name].ref_columns.append(r["ref_column"])
-        return list(fk_map.values())
+        return _foreign_keys_from_records(records)
+
+    async def get_schema_snapshot(self, tables: list[str] | None = None) -> dict[str, TableSchema]:
+        """Whole-schema introspection in three catalog queries on one connection."""
+        if tables is not None and not tables:
+            return {}
+
+        async def fetch_all(conn: Any) -> tuple[list[Any], list[Any], list[Any]]:
+            if tables is None:
+                args: tuple = ()
+                col_filter = f"c.table_name IN ({_BASE_TABLES_SQL})"
+                idx_filter = "t.relkind = 'r'"
+                fk_filter = "TRUE"
+            else:
+                args = (list(tables),)
+                col_filter = "c.table_name = ANY($1::text[])"
+                idx_filter = "t.relname = ANY($1::text[])"
+                fk_filter = "tc.table_name = ANY($1::text[])"
+            return (
+                await conn.fetch(_COLUMNS_SQL.format(filter=col_filter), *args),
+                await conn.fetch(_INDEXES_SQL.format(filter=idx_filter), *args),
+                await conn.fetch(_FOREIGN_KEYS_SQL.format(filter=fk_filter), *args),
+            )
+
+        columns, indexes, fks = await self._with_conn(fetch_all)
+        column_records = _group_by_table(columns)
+        index_records = _group_by_table(indexes)
+        fk_records = _group_by_table(fks)
+        return {
+            name: TableSchema(
+                name=name,
+                columns=_columns_from_records(records),
+                indexes=_indexes_from_records(index_records.get(name, [])),
+                foreign_keys=_foreign_keys_from_records(fk_records.get(name, [])),
+            )
+            for name, records in column_records.items()
+        }
+
+    async def get_schema_fingerprints(self) -> dict[str, str] | None:
+        """``pg_class`` xmin/relfilenode plus index and constraint signatures per table.
+
+        Column DDL rewrites the ``pg_class`` row (new xmin) and table rewrites
+        change relfilenode; index and constraint changes can be in-place
+        updates, so their OIDs are folded in as well.
+        """
+        records = await self._fetch(
+            "SELECT c.relname, "
+            "       c.xmin::text || ':' || c.relfilenode::text || ':' || "
+            "       (SELECT COALESCE(string_agg(ix.indexrelid::text, ',' ORDER BY ix.indexrelid), '') "
+            "          FROM pg_index ix WHERE ix.indrelid = c.oid) || ':' || "
+            "       (SELECT COALESCE(string_agg(co.oid::text, ',' ORDER BY co.oid), '') "
+            "          FROM pg_constraint co WHERE co.conrelid = c.oid) AS fingerprint "
+            "FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = 'public' AND c.relkind = 'r'"
+        )
+        return {r["relname"]: r["fingerprint"] for r in records}
+
+    async def replication_lag(self) -> float | None:
+        """Age of the last replayed transaction on a hot standby; None on a primary."""
+        records = await self._fetch(
+            "SELECT pg_is_in_recovery() AS standby, "
+            "       EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) AS lag"
+        )
+        if not records or not records[0]["standby"]:
+            return None
+        lag = records[0]["lag"]
+        return float(lag) if lag is not None else 0.0
 
     async def explain(self, sql: str) -> QueryResult:
-        if not self._conn:
-            raise RuntimeError("Not connected")
-        records = await self._conn.fetch(f"EXPLAIN {sql}")
+        records = await self._fetch(f"EXPLAIN {sql}")
         columns = ["QUERY PLAN"]
         rows = [tuple(r) for r in records]
         return QueryResult(columns=columns, rows=rows)
 
     async def begin_transaction(self) -> None:
-        if not self._conn:
-            raise RuntimeError("Not connected")
-        await self._conn.execute("BEGIN")
+        if self._pool is None:
+            if not self._conn:
+                raise RuntimeError("Not connected")
+            async with self._lock:
+                await self._conn.execute("BEGIN")
+                self._tx_owner = asyncio.current_task()
+            return
+        task = asyncio.current_task()
+        if task in self._tx_conns:
+            raise RuntimeError("A transaction is already active for this task")
+        conn = await self._acquire()
+        try:
+            await conn.execute("BEGIN")
+        except Exception:
+            await self._pool.release(conn)
+            raise
+        self._tx_conns[task] = conn
 
     async def commit(self) -> None:
-        if not self._conn:
-            raise RuntimeError("Not connected")
-        await self._conn.execute("COMMIT")
+        await self._end_transaction("COMMIT")
 
     async def rollback(self) -> None:
-        if not self._conn:
-            raise RuntimeError("Not connected")
-        await self._conn.execute("ROLLBACK")
+        await self._end_transaction("ROLLBACK")
+
+    async def _end_transaction(self, statement: str) -> None:
+        if self._pool is None:
+            if not self._conn:
+                raise RuntimeError("Not connected")
+            async with self._lock:
+                self._tx_owner = None
+                await self._conn.execute(statement)
+            return
+        conn = self._tx_conns.pop(asyncio.current_task(), None)
+        if conn is None:
+            if self._tx_conns:
+                raise ForeignTransactionError(statement, len(self._tx_conns))
+            return  # like a bare COMMIT/ROLLBACK outside a transaction
+        try:
+            await conn.execute(statement)
+        finally:
+            await self._pool.release(conn)
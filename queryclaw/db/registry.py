@@ -51,13 +51,43 @@ class AdapterRegistry:
         """Create an adapter and connect using the provided kwargs.
 
         kwargs must include 'type' (the db type) plus connection params.
+        Replica settings (``replicas``, ``replica_selection``, ``replica_max_lag``,
+        ``read_your_writes``) wrap the primary in a ``RoutingAdapter``.
         """
         db_type = kwargs.pop("type", None)
         if not db_type:
             raise ValueError("Missing 'type' in connection config")
+        replicas = kwargs.pop("replicas", None) or []
+        selection = kwargs.pop("replica_selection", "round_robin")
+        max_lag = kwargs.pop("replica_max_lag", 10.0)
+        read_your_writes = kwargs.pop("read_your_writes", 0.0)
+
         adapter = cls.create(db_type)
         await adapter.connect(**kwargs)
-        return adapter
+        if not replicas:
+            return adapter
+
+        from queryclaw.db.routing import RoutingAdapter
+
+        replica_adapters = []
+        try:
+            for replica in replicas:
+                overrides = {k: v for k, v in dict(replica).items() if v}
+                replica_adapter = cls.create(db_type)
+                await replica_adapter.connect(**{**kwargs, **overrides})
+                replica_adapters.append(replica_adapter)
+        except Exception:
+            for replica_adapter in replica_adapters:
+                await replica_adapter.close()
+            await adapter.close()
+            raise
+        return RoutingAdapter(
+            adapter,
+            replica_adapters,
+            selection=selection,
+            max_lag=max_lag,
+            read_your_writes=read_your_writes,
+        )
 
 
 def _register_defaults() -> None:
@@ -0,0 +1,385 @@
+"""Primary/replica routing adapter."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import itertools
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
+
+from loguru import logger
+
+from queryclaw.db.base import (
+    DEFAULT_STREAM_BATCH_SIZE,
+    ColumnInfo,
+    ForeignKeyInfo,
+    IndexInfo,
+    QueryResult,
+    SQLAdapter,
+    TableInfo,
+    TableSchema,
+)
+
+_DEFAULT_MAX_LAG = 10.0  # seconds behind the primary before a replica is skipped
+_DEFAULT_LAG_CHECK_INTERVAL = 5.0  # seconds between replica lag probes
+_LAG_PROBE_TIMEOUT = 2.0  # seconds a replica may take to answer a lag probe
+_LATENCY_EWMA_ALPHA = 0.3
+
+_READ_PREFIXES = ("SELECT", "WITH", "EXPLAIN", "SHOW", "DESCRIBE", "DESC", "PRAGMA")
+_QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`")
+_WRITE_VERBS = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE)\b")
+
+# Identifies the conversation a database call belongs to, for read-your-writes
+# pinning. AgentLoop binds it per inbound message; unbound calls share "".
+_session: contextvars.ContextVar[str] = contextvars.ContextVar("queryclaw_db_session", default="")
+
+
+def bind_session(session_key: str) -> contextvars.Token:
+    """Associate database calls in the current context with *session_key*."""
+    return _session.set(session_key)
+
+
+def reset_session(token: contextvars.Token) -> None:
+    _session.reset(token)
+
+
+def current_session() -> str:
+    """The session key bound in the current context ("" if none)."""
+    return _session.get()
+
+
+def _is_read(sql: str) -> bool:
+    upper = sql.lstrip().upper()
+    if not upper.startswith(_READ_PREFIXES):
+        return False
+    # WITH may lead into UPDATE/DELETE, and PostgreSQL allows data-modifying CTEs.
+    return not upper.startswith("WITH") or not _WRITE_VERBS.search(_QUOTED.sub("", upper))
+
+
+@dataclass
+class _Replica:
+    name: str
+    adapter: SQLAdapter
+    healthy: bool = True
+    lag: float | None = None
+    latency_ms: float | None = None
+
+
+class RoutingAdapter(SQLAdapter):
+    """Sends writes to the primary and read-only work to replicas.
+
+    Used directly, this adapter behaves like the primary (every call goes
+    there); ``for_reads()`` returns a view that spreads reads over healthy
+    replicas by round robin or lowest observed latency. Replicas are probed
+    concurrently with ``replication_lag()`` every ``lag_check_interval``
+    seconds and skipped while they lag more than ``max_lag`` seconds, fail
+    the probe or leave it unanswered for ``_LAG_PROBE_TIMEOUT`` seconds.
+    Reads are routed by their leading verb; a ``WITH`` statement that
+    inserts, updates or deletes counts as a write.
+    With no usable replica, reads fall back to the primary.
+
+    With ``read_your_writes`` > 0, a session that wrote through the primary
+    (or has a transaction open) reads from the primary for that many seconds
+    afterwards, so it sees its own changes.
+    """
+
+    def __init__(
+        self,
+        primary: SQLAdapter,
+        replicas: list[SQLAdapter],
+        selection: str = "round_robin",
+        max_lag: float = _DEFAULT_MAX_LAG,
+        lag_check_interval: float = _DEFAULT_LAG_CHECK_INTERVAL,
+        read_your_writes: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if selection not in ("round_robin", "least_latency"):
+            raise ValueError(f"Unknown replica selection: {selection!r}")
+        self._primary = primary
+        self._replicas = [_Replica(name=f"replica{i}", adapter=r) for i, r in enumerate(replicas)]
+        self._selection = selection
+        self._max_lag = max_lag
+        self._lag_check_interval = lag_check_interval
+        self._read_your_writes = read_your_writes
+        self._clock = clock
+        self._rr = itertools.count()
+        self._last_lag_check: float | None = None
+        self._pinned_until: dict[str, float] = {}
+        self._in_transaction: set[str] = set()
+        self._reader = _ReplicaReader(self)
+
+    @property
+    def primary(self) -> SQLAdapter:
+        return self._primary
+
+    @property
+    def db_type(self) -> str:
+        return self._primary.db_type
+
+    @property
+    def is_connected(self) -> bool:
+        return self._primary.is_connected
+
+    @property
+    def is_pooled(self) -> bool:
+        return bool(getattr(self._primary, "is_pooled", False))
+
+    def for_reads(self) -> SQLAdapter:
+        return self._reader
+
+    def max_concurrency(self) -> int:
+        return self._primary.max_concurrency()
+
+    def has_transaction(self) -> bool:
+        return self._primary.has_transaction()
+
+    def replica_stats(self) -> list[dict[str, Any]]:
+        return [
+            {"name": r.name, "healthy": r.healthy, "lag": r.lag, "latency_ms": r.latency_ms}
+            for r in self._replicas
+        ]
+
+    async def connect(self, **kwargs: Any) -> None:
+        await self._primary.connect(**kwargs)
+
+    async def close(self) -> None:
+        await self._primary.close()
+        for r in self._replicas:
+            try:
+                await r.adapter.close()
+            except Exception as e:
+                logger.warning("Closing {} failed: {}", r.name, e)
+
+    # -- write side: everything goes to the primary ---------------------------
+
+    def _mark_write(self) -> None:
+        if self._read_your_writes > 0:
+            now = self._clock()
+            # Drop expired pins of other sessions, so sessions that never read again don't pile up.
+            for session in [s for s, until in self._pinned_until.items() if until <= now]:
+                del self._pinned_until[session]
+            self._pinned_until[_session.get()] = now + self._read_your_writes
+
+    async def execute(
+        self, sql: str, params: tuple | None = None, timeout: float | None = None,
+    ) -> QueryResult:
+        result = await self._primary.execute(sql, params, timeout=timeout)
+        if not _is_read(sql):
+            self._mark_write()
+        return result
+
+    def execute_stream(
+        self,
+        sql: str,
+        params: tuple | None = None,
+        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+        timeout: float | None = None,
+    ) -> AsyncIterator[QueryResult]:
+        if not _is_read(sql):
+            self._mark_write()
+        return self._primary.execute_stream(sql, params, batch_size, timeout)
+
+    async def get_tables(self) -> list[TableInfo]:
+        return await self._primary.get_tables()
+
+    async def get_columns(self, table: str) -> list[ColumnInfo]:
+        return await self._primary.get_columns(table)
+
+    async def get_indexes(self, table: str) -> list[IndexInfo]:
+        return await self._primary.get_indexes(table)
+
+    async def get_foreign_keys(self, table: str) -> list[ForeignKeyInfo]:
+        return await self._primary.get_foreign_keys(table)
+
+    async def get_schema_snapshot(self, tables: list[str] | None = None) -> dict[str, TableSchema]:
+        return await self._primary.get_schema_snapshot(tables)
+
+    async def get_schema_fingerprints(self) -> dict[str, str] | None:
+        return await self._primary.get_schema_fingerprints()
+
+    async def explain(self, sql: str) -> QueryResult:
+        return await self._primary.explain(sql)
+
+    async def begin_transaction(self) -> None:
+        await self._primary.begin_transaction()
+        self._in_transaction.add(_session.get())
+
+    async def commit(self) -> None:
+        try:
+            await self._primary.commit()
+        finally:
+            self._in_transaction.discard(_session.get())
+            self._mark_write()
+
+    async def rollback(self) -> None:
+        try:
+            await self._primary.rollback()
+        finally:
+            self._in_transaction.discard(_session.get())
+
+    # -- read side --------------------------------------------------------------
+
+    async def _refresh_lag(self) -> None:
+        now = self._clock()
+        if self._last_lag_check is not None and now - self._last_lag_check < self._lag_check_interval:
+            return
+        self._last_lag_check = now
+        await asyncio.gather(*(self._probe(r) for r in self._replicas))
+
+    async def _probe(self, r: _Replica) -> None:
+        """Update *r*'s lag and health; a probe that hangs marks it unhealthy."""
+        try:
+            r.lag = await asyncio.wait_for(r.adapter.replication_lag(), _LAG_PROBE_TIMEOUT)
+        except Exception as e:
+            if r.healthy:
+                reason = f"no answer in {_LAG_PROBE_TIMEOUT}s" if isinstance(e, asyncio.TimeoutError) else e
+                logger.warning("{} lag probe failed, routing reads elsewhere: {}", r.name, reason)
+            r.healthy = False
+            return
+        healthy = r.lag is None or self._max_lag <= 0 or r.lag <= self._max_lag
+        if r.healthy and not healthy:
+            logger.warning("{} is {:.1f}s behind the primary; skipping it", r.name, r.lag)
+        r.healthy = healthy
+
+    def _reads_on_primary(self, session: str) -> bool:
+        """Whether *session* must read from the primary (open transaction or recent write)."""
+        if session in self._in_transaction:
+            return True
+        pinned = self._pinned_until.get(session)
+        if pinned is not None:
+            if self._clock() < pinned:
+                return True
+            del self._pinned_until[session]
+        return False
+
+    @staticmethod
+    def _fastest(healthy: list[_Replica]) -> _Replica:
+        # Untried replicas first, so every replica gets a latency sample.
+        return min(healthy, key=lambda r: -1.0 if r.latency_ms is None else r.latency_ms)
+
+    async def _pick_reader(self) -> tuple[SQLAdapter, _Replica | None]:
+        if self._reads_on_primary(_session.get()) or not self._replicas:
+            return self._primary, None
+        await self._refresh_lag()
+        healthy = [r for r in self._replicas if r.healthy]
+        if not healthy:
+            return self._primary, None
+        if self._selection == "least_latency":
+            replica = self._fastest(healthy)
+        else:
+            replica = healthy[next(self._rr) % len(healthy)]
+        return replica.adapter, replica
+
+    def _record_latency(self, replica: _Replica | None, started: float) -> None:
+        if replica is None:
+            return
+        sample = (time.monotonic() - started) * 1000
+        if replica.latency_ms is None:
+            replica.latency_ms = sample
+        else:
+            replica.latency_ms += _LATENCY_EWMA_ALPHA * (sample - replica.latency_ms)
+
+    async def _read(self, call: Callable[[SQLAdapter], Any]) -> Any:
+        adapter, replica = await self._pick_reader()
+        started = time.monotonic()
+        try:
+            return await call(adapter)
+        finally:
+            self._record_latency(replica, started)
+
+
+class _ReplicaReader(SQLAdapter):
+    """Read-only view of a ``RoutingAdapter``; see ``RoutingAdapter.for_reads``."""
+
+    def __init__(self, router: RoutingAdapter) -> None:
+        self._router = router
+
+    @property
+    def db_type(self) -> str:
+        return self._router.db_type
+
+    @property
+    def is_connected(self) -> bool:
+        return self._router.is_connected
+
+    def for_reads(self) -> SQLAdapter:
+        return self
+
+    def max_concurrency(self) -> int:
+        router = self._router
+        healthy = [r for r in router._replicas if r.healthy]
+        if not healthy or router._reads_on_primary(_session.get()):
+            return router._primary.max_concurrency()
+        if router._selection == "least_latency":
+            # Concurrent reads all go to the same (fastest) replica.
+            return router._fastest(healthy).adapter.max_concurrency()
+        # Round robin spreads them evenly, so the smallest replica sets the pace.
+        return len(healthy) * min(r.adapter.max_concurrency() for r in healthy)
+
+    def has_transaction(self) -> bool:
+        return self._router.has_transaction()
+
+    async def connect(self, **kwargs: Any) -> None:
+        raise RuntimeError("Connect the RoutingAdapter, not its read view")
+
+    async def close(self) -> None:
+        await self._router.close()
+
+    async def execute(
+        self, sql: str, params: tuple | None = None, timeout: float | None = None,
+    ) -> QueryResult:
+        if not _is_read(sql):
+            return await self._router.execute(sql, params, timeout)
+        return await self._router._read(lambda db: db.execute(sql, params, timeout=timeout))
+
+    async def execute_stream(
+        self,
+        sql: str,
+        params: tuple | None = None,
+        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+        timeout: float | None = None,
+    ) -> AsyncIterator[QueryResult]:
+        if not _is_read(sql):
+            stream = self._router.execute_stream(sql, params, batch_size, timeout)
+        else:
+            adapter, _ = await self._router._pick_reader()
+            stream = adapter.execute_stream(sql, params, batch_size, timeout)
+        try:
+            async for batch in stream:
+                yield batch
+        finally:
+            await stream.aclose()
+
+    async def get_tables(self) -> list[TableInfo]:
+        return await self._router._read(lambda db: db.get_tables())
+
+    async def get_columns(self, table: str) -> list[ColumnInfo]:
+        return await self._router._read(lambda db: db.get_columns(table))
+
+    async def get_indexes(self, table: str) -> list[IndexInfo]:
+        return await self._router._read(lambda db: db.get_indexes(table))
+
+    async def get_foreign_keys(self, table: str) -> list[ForeignKeyInfo]:
+        return await self._router._read(lambda db: db.get_foreign_keys(table))
+
+    async def get_schema_snapshot(self, tables: list[str] | None = None) -> dict[str, TableSchema]:
+        return await self._router._read(lambda db: db.get_schema_snapshot(tables))
+
+    async def get_schema_fingerprints(self) -> dict[str, str] | None:
+        # Always the primary: a lagging replica would report stale DDL.
+        return await self._router.get_schema_fingerprints()
+
+    async def explain(self, sql: str) -> QueryResult:
+        return await self._router._read(lambda db: db.explain(sql))
+
+    async def begin_transaction(self) -> None:
+        await self._router.begin_transaction()
+
+    async def commit(self) -> None:
+        await self._router.commit()
+
+    async def rollback(self) -> None:
+        await self._router.rollback()
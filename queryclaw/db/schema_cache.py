@@ -0,0 +1,183 @@
+"""Shared, per-table schema metadata cache with change detection."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from queryclaw.db.base import (
+    ColumnInfo,
+    ForeignKeyInfo,
+    IndexInfo,
+    SQLAdapter,
+    TableInfo,
+    TableSchema,
+)
+
+_DEFAULT_CHECK_INTERVAL = 1.0  # seconds between fingerprint queries
+
+
+@dataclass
+class _Entry:
+    columns: list[ColumnInfo] | None = None
+    indexes: list[IndexInfo] | None = None
+    foreign_keys: list[ForeignKeyInfo] | None = None
+
+
+class SchemaCache:
+    """Caches table lists and per-table columns, indexes and foreign keys.
+
+    Row counts change with every write, which fingerprints do not see, so
+    ``get_tables`` re-reads the table list (and its counts) from the
+    adapter unless the caller only needs names (``row_counts=False``).
+
+    Entries are dropped explicitly via ``invalidate`` (e.g. by the DDL tool
+    for the tables it touched) or when the adapter's per-table fingerprints
+    (``SQLAdapter.get_schema_fingerprints``) change, which catches DDL run
+    outside the agent. Fingerprints are re-read at most once per
+    ``check_interval`` seconds. Adapters without fingerprint support rely on
+    explicit invalidation only.
+    """
+
+    def __init__(
+        self,
+        db: SQLAdapter,
+        check_interval: float = _DEFAULT_CHECK_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._db = db
+        self._check_interval = check_interval
+        self._clock = clock
+        self._tables: list[TableInfo] | None = None
+        self._entries: dict[str, _Entry] = {}
+        self._fingerprints: dict[str, str] | None = None
+        self._last_check: float | None = None
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def db(self) -> SQLAdapter:
+        return self._db
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "tables_cached": len(self._entries),
+            "version": self.version,
+        }
+
+    def invalidate(self, tables: list[str] | None = None) -> None:
+        """Drop cached metadata for *tables*, or everything when None.
+
+        The table list is always dropped, since DDL can add, remove or rename tables.
+        """
+        self.invalidations += 1
+        self.version += 1
+        self._tables = None
+        if tables is None:
+            self._entries.clear()
+            return
+        for table in tables:
+            self._entries.pop(table, None)
+
+    async def _sync(self) -> None:
+        """Drop entries whose fingerprint changed since the last check."""
+        now = self._clock()
+        if self._last_check is not None and now - self._last_check < self._check_interval:
+            return
+        self._last_check = now
+        fingerprints = await self._db.get_schema_fingerprints()
+        if fingerprints is None:
+            return
+        previous, self._fingerprints = self._fingerprints, fingerprints
+        if previous is None or previous == fingerprints:
+            return
+        changed = [t for t in previous.keys() | fingerprints.keys() if previous.get(t) != fingerprints.get(t)]
+        self.invalidate(changed)
+
+    async def get_tables(self, row_counts: bool = True) -> list[TableInfo]:
+        """The tables with current row counts.
+
+        With *row_counts* False the cached list is served; its counts date
+        from when it was fetched.
+        """
+        await self._sync()
+        if self._tables is not None and not row_counts:
+            self.hits += 1
+            return self._tables
+        self.misses += 1
+        self._tables = await self._db.get_tables()
+        return self._tables
+
+    def cached_columns(self) -> dict[str, list[ColumnInfo]]:
+        """Columns of the tables described so far, without touching the database."""
+        return {name: e.columns for name, e in self._entries.items() if e.columns is not None}
+
+    async def get_columns(self, table: str) -> list[ColumnInfo]:
+        await self._sync()
+        entry = self._entries.get(table)
+        if entry is not None and entry.columns is not None:
+            self.hits += 1
+            return entry.columns
+        self.misses += 1
+        columns = await self._db.get_columns(table)
+        if columns:
+            self._entries.setdefault(table, _Entry()).columns = columns
+        return columns
+
+    async def get_indexes(self, table: str) -> list[IndexInfo]:
+        await self._sync()
+        entry = self._entries.get(table)
+        if entry is not None and entry.indexes is not None:
+            self.hits += 1
+            return entry.indexes
+        self.misses += 1
+        indexes = await self._db.get_indexes(table)
+        self._entries.setdefault(table, _Entry()).indexes = indexes
+        return indexes
+
+    async def get_foreign_keys(self, table: str) -> list[ForeignKeyInfo]:
+        await self._sync()
+        entry = self._entries.get(table)
+        if entry is not None and entry.foreign_keys is not None:
+            self.hits += 1
+            return entry.foreign_keys
+        self.misses += 1
+        fks = await self._db.get_foreign_keys(table)
+        self._entries.setdefault(table, _Entry()).foreign_keys = fks
+        return fks
+
+    async def get_schema_snapshot(self, tables: list[str] | None = None) -> dict[str, TableSchema]:
+        """Serve complete entries from the cache; fetch the rest in one bulk call."""
+        if tables is None:
+            tables = [t.name for t in await self.get_tables(row_counts=False)]
+        else:
+            await self._sync()
+        missing: list[str] = []
+        for table in tables:
+            entry = self._entries.get(table)
+            if entry is None or None in (entry.columns, entry.indexes, entry.foreign_keys):
+                missing.append(table)
+        self.hits += len(tables) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            fetched = await self._db.get_schema_snapshot(missing)
+            for name, ts in fetched.items():
+                self._entries[name] = _Entry(ts.columns, ts.indexes, ts.foreign_keys)
+        snapshot: dict[str, TableSchema] = {}
+        for table in tables:
+            entry = self._entries.get(table)
+            if entry is None or entry.columns is None:
+                continue
+            snapshot[table] = TableSchema(
+                name=table,
+                columns=entry.columns,
+                indexes=entry.indexes or [],
+                foreign_keys=entry.foreign_keys or [],
+            )
+        return snapshot
@@ -23,7 +23,10 @@ class SeekDBAdapter(MySQLAdapter):
         kwargs.setdefault("port", 2881)
         await super().connect(**kwargs)
 
+    def _execution_hint(self, timeout: float) -> str:
+        # OceanBase takes its statement timeout hint in microseconds.
+        return f"/*+ QUERY_TIMEOUT({max(1, round(timeout * 1_000_000))}) */"
+
     async def explain(self, sql: str) -> QueryResult:
         """Run EXPLAIN on SQL. SeekDB may return different format; raw result is passed through."""
-        await self._ensure_connected()
         return await self.execute(f"EXPLAIN {sql}")
@@ -2,27 +2,104 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import hashlib
+import sqlite3
 import time
-from typing import Any
+from typing import Any, AsyncIterator
 
 import aiosqlite
 
+from queryclaw import tracing
 from queryclaw.db.base import (
+    DEFAULT_STREAM_BATCH_SIZE,
     ColumnInfo,
     ForeignKeyInfo,
     IndexInfo,
     QueryResult,
+    QueryTimeoutError,
     SQLAdapter,
     TableInfo,
+    TableSchema,
 )
 
+# SQLite VM instructions between deadline checks while a timed statement runs.
+_PROGRESS_HANDLER_OPS = 1000
+
+
+def _group_by_table(rows: list[Any]) -> dict[str, list[tuple]]:
+    """Split catalog rows whose first column is the table name, preserving order."""
+    grouped: dict[str, list[tuple]] = {}
+    for row in rows:
+        grouped.setdefault(row[0], []).append(tuple(row[1:]))
+    return grouped
+
+
+def _columns_from_rows(rows: list[Any]) -> list[ColumnInfo]:
+    """Rows shaped like ``PRAGMA table_info``: cid, name, type, notnull, dflt_value, pk."""
+    return [
+        ColumnInfo(
+            name=row[1],
+            data_type=row[2] or "TEXT",
+            nullable=not row[3],
+            default=row[4],
+            is_primary_key=bool(row[5]),
+        )
+        for row in rows
+    ]
+
+
+def _indexes_from_rows(rows: list[Any]) -> list[IndexInfo]:
+    """Rows of (index name, unique, column name), one per indexed column."""
+    idx_map: dict[str, IndexInfo] = {}
+    for idx_name, unique, column in rows:
+        if idx_name not in idx_map:
+            idx_map[idx_name] = IndexInfo(name=idx_name, unique=bool(unique), type="BTREE")
+        if column is not None:
+            idx_map[idx_name].columns.append(column)
+    return list(idx_map.values())
+
+
+def _foreign_keys_from_rows(table: str, rows: list[Any]) -> list[ForeignKeyInfo]:
+    """Rows shaped like ``PRAGMA foreign_key_list``: id, seq, table, from, to, ..."""
+    fk_map: dict[int, ForeignKeyInfo] = {}
+    for row in rows:
+        fk_id = row[0]
+        if fk_id not in fk_map:
+            fk_map[fk_id] = ForeignKeyInfo(
+                name=f"fk_{table}_{fk_id}",
+                ref_table=row[2],
+            )
+        fk_map[fk_id].columns.append(row[3])
+        fk_map[fk_id].ref_columns.append(row[4])
+    return list(fk_map.values())
 
 class SQLiteAdapter(SQLAdapter):
-    """Async SQLite adapter using aiosqlite."""
+    """Async SQLite adapter using aiosqlite.
+
+    ``get_tables`` avoids a full-table ``COUNT(*)`` per table: it reports a
+    cached exact count when one is still valid, else the ``sqlite_stat1``
+    estimate (written by ``ANALYZE``), else ``max(rowid)``. Cached counts are
+    dropped whenever ``PRAGMA data_version`` (writes by other connections) or
+    ``total_changes`` (writes by this connection) moves. Use ``count_rows``
+    for an exact count.
+
+    Every call that runs SQL, introspection and transaction control
+    included, holds the connection for the whole statement or stream, so a
+    statement timeout (a progress handler, which SQLite installs per
+    connection) never lands on another session's statement.
+    """
 
     def __init__(self) -> None:
         self._conn: aiosqlite.Connection | None = None
+        self._statement_lock = asyncio.Lock()
+        self._statement_owner: asyncio.Task | None = None
         self._db_path: str = ""
+        self._exact_counts: dict[str, int] = {}
+        self._counts_version: tuple[int, int] | None = None
+        self._fingerprints: dict[str, str] | None = None
+        self._fingerprints_version: int | None = None
 
     @property
     def db_type(self) -> str:
@@ -45,85 +122,271 @@ class SQLiteAdapter(SQLAdapter):
         if self._conn:
             await self._conn.close()
             self._conn = None
+        self._exact_counts.clear()
+        self._counts_version = None
+        self._fingerprints = None
 
-    async def execute(self, sql: str, params: tuple | None = None) -> QueryResult:
+    @contextlib.asynccontextmanager
+    async def _deadline(self, timeout: float | None) -> AsyncIterator[None]:
+        """Run the block's statements alone on the connection, interrupted after *timeout* seconds.
+
+        A progress handler is installed only for the duration of the block, so
+        untimed statements pay nothing for it.
+        """
+        task = asyncio.current_task()
+        if self._statement_owner is task:  # a statement issued while this task's stream is open
+            yield
+            return
+        async with self._statement_lock:
+            self._statement_owner = task
+            try:
+                async with self._interrupt_after(timeout):
+                    yield
+            finally:
+                self._statement_owner = None
+
+    @contextlib.asynccontextmanager
+    async def _interrupt_after(self, timeout: float | None) -> AsyncIterator[None]:
+        if not timeout or timeout <= 0:
+            yield
+            return
+        deadline = time.monotonic() + timeout
+        await self._conn.set_progress_handler(lambda: time.monotonic() > deadline, _PROGRESS_HANDLER_OPS)
+        try:
+            yield
+        except sqlite3.OperationalError as e:
+            if "interrupted" in str(e):
+                raise QueryTimeoutError(timeout) from e
+            raise
+        finally:
+            if self._conn:
+                await self._conn.set_progress_handler(None, 0)
+
+    async def execute(
+        self, sql: str, params: tuple | None = None, timeout: float | None = None,
+    ) -> QueryResult:
+        if not self._conn:
+            raise RuntimeError("Not connected")
+        with tracing.span("db.execute", db="sqlite") as span:
+            if span:
+                span.set(sql=tracing.sql_fingerprint(sql, "sqlite"))
+            start = time.monotonic()
+            async with self._deadline(timeout):
+                cursor = await self._conn.execute(sql, params or ())
+                description = cursor.description
+                columns = [d[0] for d in description] if description else []
+                rows = [tuple(r) for r in await cursor.fetchall()]
+            elapsed = (time.monotonic() - start) * 1000
+            result = QueryResult(
+                columns=columns,
+                rows=rows,
+                affected_rows=cursor.rowcount if cursor.rowcount >= 0 else 0,
+                execution_time_ms=round(elapsed, 2),
+            )
+            span.set(rows=len(rows), affected=result.affected_rows)
+            return result
+
+    async def execute_stream(
+        self,
+        sql: str,
+        params: tuple | None = None,
+        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+        timeout: float | None = None,
+    ) -> AsyncIterator[QueryResult]:
         if not self._conn:
             raise RuntimeError("Not connected")
+        batch_size = max(1, batch_size)
         start = time.monotonic()
-        cursor = await self._conn.execute(sql, params or ())
-        description = cursor.description
-        columns = [d[0] for d in description] if description else []
-        rows = [tuple(r) for r in await cursor.fetchall()]
-        elapsed = (time.monotonic() - start) * 1000
-        return QueryResult(
-            columns=columns,
-            rows=rows,
-            affected_rows=cursor.rowcount if cursor.rowcount >= 0 else 0,
-            execution_time_ms=round(elapsed, 2),
-        )
+        async with self._deadline(timeout):
+            cursor = await self._conn.execute(sql, params or ())
+            try:
+                description = cursor.description
+                columns = [d[0] for d in description] if description else []
+                affected_rows = cursor.rowcount if cursor.rowcount >= 0 else 0
+                first = True
+                while True:
+                    rows = [tuple(r) for r in await cursor.fetchmany(batch_size)]
+                    if not rows and not first:
+                        break
+                    first = False
+                    elapsed = (time.monotonic() - start) * 1000
+                    yield QueryResult(
+                        columns=columns,
+                        rows=rows,
+                        affected_rows=affected_rows,
+                        execution_time_ms=round(elapsed, 2),
+                    )
+                    if len(rows) < batch_size:
+                        break
+            finally:
+                await cursor.close()
 
     async def get_tables(self) -> list[TableInfo]:
         if not self._conn:
             raise RuntimeError("Not connected")
-        cursor = await self._conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
-        )
-        rows = await cursor.fetchall()
-        tables: list[TableInfo] = []
-        for row in rows:
-            name = row[0]
-            count_cursor = await self._conn.execute(f"SELECT COUNT(*) FROM [{name}]")
-            count_row = await count_cursor.fetchone()
-            tables.append(TableInfo(name=name, row_count=count_row[0] if count_row else 0))
-        return tables
+        async with self._deadline(None):
+            cursor = await self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            )
+            rows = await cursor.fetchall()
+            await self._validate_count_cache()
+            stat_counts = await self._stat1_row_counts()
+            tables: list[TableInfo] = []
+            for row in rows:
+                name = row[0]
+                count = self._exact_counts.get(name)
+                if count is None:
+                    count = stat_counts.get(name)
+                if count is None:
+                    count = await self._max_rowid(name)
+                if count is None:
+                    count = await self.count_rows(name)
+                tables.append(TableInfo(name=name, row_count=count))
+            return tables
+
+    async def count_rows(self, table: str) -> int:
+        """Exact ``COUNT(*)`` for *table*, cached until the database changes."""
+        if not self._conn:
+            raise RuntimeError("Not connected")
+        async with self._deadline(None):
+            await self._validate_count_cache()
+            if table in self._exact_counts:
+                return self._exact_counts[table]
+            cursor = await self._conn.execute(f"SELECT COUNT(*) FROM [{table}]")
+            row = await cursor.fetchone()
+            count = row[0] if row else 0
+            self._exact_counts[table] = count
+            return count
+
+    async def _validate_count_cache(self) -> None:
+        """Drop cached exact counts if any connection has written since they were taken."""
+        cursor = await self._conn.execute("PRAGMA data_version")
+        row = await cursor.fetchone()
+        version = (row[0] if row else 0, self._conn.total_changes)
+        if version != self._counts_version:
+            self._exact_counts.clear()
+            self._counts_version = version
+
+    async def _stat1_row_counts(self) -> dict[str, int]:
+        """Row estimates from ``sqlite_stat1`` (empty if ANALYZE was never run)."""
+        try:
+            cursor = await self._conn.execute("SELECT tbl, stat FROM sqlite_stat1")
+            rows = await cursor.fetchall()
+        except aiosqlite.OperationalError:
+            return {}
+        counts: dict[str, int] = {}
+        for tbl, stat in rows:
+            try:
+                n = int(str(stat).split()[0])
+            except (ValueError, IndexError):
+                continue
+            counts[tbl] = max(counts.get(tbl, 0), n)
+        return counts
+
+    async def _max_rowid(self, table: str) -> int | None:
+        """``max(rowid)`` as an upper-bound estimate; None for WITHOUT ROWID tables."""
+        try:
+            cursor = await self._conn.execute(f"SELECT max(rowid) FROM [{table}]")
+            row = await cursor.fetchone()
+        except aiosqlite.OperationalError:
+            return None
+        return int(row[0]) if row and row[0] is not None else 0
 
     async def get_columns(self, table: str) -> list[ColumnInfo]:
         if not self._conn:
             raise RuntimeError("Not connected")
-        cursor = await self._conn.execute(f"PRAGMA table_info([{table}])")
-        rows = await cursor.fetchall()
-        return [
-            ColumnInfo(
-                name=row[1],
-                data_type=row[2] or "TEXT",
-                nullable=not row[3],
-                default=row[4],
-                is_primary_key=bool(row[5]),
-            )
-            for row in rows
-        ]
+        async with self._deadline(None):
+            cursor = await self._conn.execute(f"PRAGMA table_info([{table}])")
+            return _columns_from_rows(await cursor.fetchall())
 
     async def get_indexes(self, table: str) -> list[IndexInfo]:
         if not self._conn:
             raise RuntimeError("Not connected")
-        cursor = await self._conn.execute(f"PRAGMA index_list([{table}])")
-        index_rows = await cursor.fetchall()
-        indexes: list[IndexInfo] = []
-        for row in index_rows:
-            idx_name = row[1]
-            unique = bool(row[2])
-            col_cursor = await self._conn.execute(f"PRAGMA index_info([{idx_name}])")
-            col_rows = await col_cursor.fetchall()
-            columns = [cr[2] for cr in col_rows]
-            indexes.append(IndexInfo(name=idx_name, columns=columns, unique=unique, type="BTREE"))
-        return indexes
+        async with self._deadline(None):
+            # One query instead of PRAGMA index_list plus one PRAGMA index_info per index.
+            cursor = await self._conn.execute(
+                "SELECT il.name, il.\"unique\", ii.name "
+                "FROM pragma_index_list(?) AS il "
+                "LEFT JOIN pragma_index_info(il.name) AS ii "
+                "ORDER BY il.seq, ii.seqno",
+                (table,),
+            )
+            return _indexes_from_rows(await cursor.fetchall())
 
     async def get_foreign_keys(self, table: str) -> list[ForeignKeyInfo]:
         if not self._conn:
             raise RuntimeError("Not connected")
-        cursor = await self._conn.execute(f"PRAGMA foreign_key_list([{table}])")
-        rows = await cursor.fetchall()
-        fk_map: dict[int, ForeignKeyInfo] = {}
-        for row in rows:
-            fk_id = row[0]
-            if fk_id not in fk_map:
-                fk_map[fk_id] = ForeignKeyInfo(
-                    name=f"fk_{table}_{fk_id}",
-                    ref_table=row[2],
+        async with self._deadline(None):
+            cursor = await self._conn.execute(f"PRAGMA foreign_key_list([{table}])")
+            return _foreign_keys_from_rows(table, await cursor.fetchall())
+
+    async def get_schema_snapshot(self, tables: list[str] | None = None) -> dict[str, TableSchema]:
+        """Whole-schema introspection in three queries using table-valued pragmas."""
+        if not self._conn:
+            raise RuntimeError("Not connected")
+        async with self._deadline(None):
+            where = "m.type = 'table' AND m.name NOT LIKE 'sqlite_%'"
+            params: tuple = ()
+            if tables is not None:
+                if not tables:
+                    return {}
+                where += f" AND m.name IN ({', '.join('?' * len(tables))})"
+                params = tuple(tables)
+
+            cursor = await self._conn.execute(
+                "SELECT m.name, p.cid, p.name, p.type, p.\"notnull\", p.dflt_value, p.pk "
+                "FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p "
+                f"WHERE {where} ORDER BY m.name, p.cid",
+                params,
+            )
+            column_rows = _group_by_table(await cursor.fetchall())
+            cursor = await self._conn.execute(
+                "SELECT m.name, il.name, il.\"unique\", ii.name "
+                "FROM sqlite_master AS m "
+                "JOIN pragma_index_list(m.name) AS il "
+                "LEFT JOIN pragma_index_info(il.name) AS ii "
+                f"WHERE {where} ORDER BY m.name, il.seq, ii.seqno",
+                params,
+            )
+            index_rows = _group_by_table(await cursor.fetchall())
+            cursor = await self._conn.execute(
+                "SELECT m.name, f.id, f.seq, f.\"table\", f.\"from\", f.\"to\" "
+                "FROM sqlite_master AS m JOIN pragma_foreign_key_list(m.name) AS f "
+                f"WHERE {where} ORDER BY m.name, f.id, f.seq",
+                params,
+            )
+            fk_rows = _group_by_table(await cursor.fetchall())
+
+            return {
+                name: TableSchema(
+                    name=name,
+                    columns=_columns_from_rows(rows),
+                    indexes=_indexes_from_rows(index_rows.get(name, [])),
+                    foreign_keys=_foreign_keys_from_rows(name, fk_rows.get(name, [])),
                 )
-            fk_map[fk_id].columns.append(row[3])
-            fk_map[fk_id].ref_columns.append(row[4])
-        return list(fk_map.values())
+                for name, rows in column_rows.items()
+            }
+
+    async def get_schema_fingerprints(self) -> dict[str, str] | None:
+        """Per-table hash of the ``sqlite_master`` DDL, recomputed only when ``PRAGMA schema_version`` moves."""
+        if not self._conn:
+            raise RuntimeError("Not connected")
+        async with self._deadline(None):
+            cursor = await self._conn.execute("PRAGMA schema_version")
+            row = await cursor.fetchone()
+            version = row[0] if row else 0
+            if self._fingerprints is not None and version == self._fingerprints_version:
+                return self._fingerprints
+            cursor = await self._conn.execute(
+                "SELECT tbl_name, group_concat(COALESCE(sql, name), ';') FROM "
+                "(SELECT tbl_name, name, sql FROM sqlite_master ORDER BY tbl_name, type, name) "
+                "WHERE tbl_name NOT LIKE 'sqlite_%' GROUP BY tbl_name"
+            )
+            self._fingerprints = {
+                name: hashlib.sha1(ddl.encode()).hexdigest() for name, ddl in await cursor.fetchall()
+            }
+            self._fingerprints_version = version
+            return self._fingerprints
 
     async def explain(self, sql: str) -> QueryResult:
         if not self._conn:
@@ -133,20 +396,23 @@ class SQLiteAdapter(SQLAdapter):
     async def begin_transaction(self) -> None:
         if not self._conn:
             raise RuntimeError("Not connected")
-        # aiosqlite uses deferred transactions by default;
-        # commit any implicit transaction first, then start a new one.
-        try:
-            await self._conn.commit()
-        except Exception:
-            pass
-        await self._conn.execute("BEGIN")
+        async with self._deadline(None):
+            # aiosqlite uses deferred transactions by default;
+            # commit any implicit transaction first, then start a new one.
+            try:
+                await self._conn.commit()
+            except Exception:
+                pass
+            await self._conn.execute("BEGIN")
 
     async def commit(self) -> None:
         if not self._conn:
             raise RuntimeError("Not connected")
-        await self._conn.commit()
+        async with self._deadline(None):
+            await self._conn.commit()
 
     async def rollback(self) -> None:
         if not self._conn:
             raise RuntimeError("Not connected")
-        await self._conn.rollback()
+        async with self._deadline(None):
+            await self._conn.rollback()
@@ -1,8 +1,9 @@
 """Base LLM provider interface."""
 
+import json
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, AsyncIterator
 
 
 @dataclass
@@ -23,6 +24,7 @@ class LLMResponse:
     finish_reason: str = "stop"
     usage: dict[str, int] = field(default_factory=dict)
     reasoning_content: str | None = None
+    ttft_ms: float | None = None  # time to first streamed token; None when not streamed
 
     @property
     def has_tool_calls(self) -> bool:
@@ -30,6 +32,59 @@ class LLMResponse:
         return len(self.tool_calls) > 0
 
 
+@dataclass
+class LLMStreamChunk:
+    """One step of a streamed completion.
+
+    ``delta`` is newly generated content text. The last chunk of a stream
+    carries the fully assembled ``response`` (content, tool calls, usage).
+    """
+
+    delta: str = ""
+    response: LLMResponse | None = None
+
+
+def _field(obj: Any, name: str) -> Any:
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+class ToolCallAccumulator:
+    """Assembles OpenAI-style streamed tool-call deltas into ``ToolCallRequest``s.
+
+    Each delta names its call by ``index``; the id and function name arrive
+    once, the JSON arguments in fragments.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[int, dict[str, str]] = {}
+
+    def add(self, delta: Any) -> None:
+        """Merge one tool-call delta (litellm object or plain dict)."""
+        index = _field(delta, "index")
+        if index is None:
+            # No index: a delta with an id starts a new call, others continue the last one.
+            last = max(self._calls, default=-1)
+            index = last + 1 if _field(delta, "id") or last < 0 else last
+        call = self._calls.setdefault(index, {"id": "", "name": "", "arguments": ""})
+        if _field(delta, "id"):
+            call["id"] = _field(delta, "id")
+        function = _field(delta, "function")
+        if function is not None:
+            call["name"] += _field(function, "name") or ""
+            call["arguments"] += _field(function, "arguments") or ""
+
+    def build(self) -> list[ToolCallRequest]:
+        calls: list[ToolCallRequest] = []
+        for index in sorted(self._calls):
+            call = self._calls[index]
+            try:
+                arguments = json.loads(call["arguments"]) if call["arguments"] else {}
+            except json.JSONDecodeError:
+                arguments = {}
+            calls.append(ToolCallRequest(id=call["id"] or f"call_{index}", name=call["name"], arguments=arguments))
+        return calls
+
+
 class LLMProvider(ABC):
     """Abstract base class for LLM providers.
 
@@ -81,6 +136,42 @@ class LLMProvider(ABC):
             LLMResponse with content and/or tool calls.
         """
 
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """Stream a chat completion as content deltas, ending with the assembled response.
+
+        Same arguments as ``chat``. This default is for providers without
+        streaming support: it awaits ``chat`` and yields its content as a
+        single delta.
+        """
+        response = await self.chat(messages, tools=tools, model=model, max_tokens=max_tokens, temperature=temperature)
+        if response.content and response.finish_reason != "error":
+            yield LLMStreamChunk(delta=response.content)
+        yield LLMStreamChunk(response=response)
+
+    def count_tokens(self, text: str, model: str | None = None) -> int:
+        """Estimate the number of tokens in *text* for *model*.
+
+        This default needs no tokenizer: about four characters per token for
+        ASCII text and one token per character otherwise (e.g. CJK).
+        """
+        non_ascii = (len(text.encode("utf-8")) - len(text)) // 2
+        return (len(text) - non_ascii) // 4 + non_ascii + 1
+
+    def get_context_window(self, model: str | None = None) -> int | None:
+        """Maximum input tokens for *model*, or None if unknown."""
+        return None
+
+    def estimate_cost(self, usage: dict[str, int], model: str | None = None) -> float:
+        """Price in USD of a call that used *usage* tokens, or 0.0 if unknown."""
+        return 0.0
+
     @abstractmethod
     def get_default_model(self) -> str:
         """Get the default model for this provider."""
@@ -4,12 +4,21 @@ from __future__ import annotations
 
 import json
 import os
-from typing import Any
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator
 
 import litellm
 from litellm import acompletion
 
-from queryclaw.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from queryclaw.providers.base import (
+    LLMProvider,
+    LLMResponse,
+    LLMStreamChunk,
+    ToolCallAccumulator,
+    ToolCallRequest,
+)
+from queryclaw.providers.ratelimit import RateLimits, error_headers
 from queryclaw.providers.registry import find_by_model, find_gateway
 
 
@@ -17,9 +26,22 @@ _ALLOWED_MSG_KEYS = frozenset({
     "role", "content", "tool_calls", "tool_call_id", "name", "reasoning_content",
 })
 
+_CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def _response_headers(response: Any) -> dict[str, Any] | None:
+    hidden = getattr(response, "_hidden_params", None) or {}
+    return hidden.get("additional_headers")
+
 
 class LiteLLMProvider(LLMProvider):
-    """LLM provider using LiteLLM for multi-provider support."""
+    """LLM provider using LiteLLM for multi-provider support.
+
+    ``chat`` and ``chat_stream`` turn failures into error responses;
+    ``complete`` and ``stream`` raise LiteLLM's exception instead, for
+    callers that retry (see ``ProviderPool``). ``limits`` holds the
+    rate limits reported by the last response for this API key.
+    """
 
     def __init__(
         self,
@@ -32,6 +54,8 @@ class LiteLLMProvider(LLMProvider):
         super().__init__(api_key, api_base)
         self.default_model = default_model
         self.extra_headers = extra_headers or {}
+        self._unpriced: set[str] = set()
+        self.limits = RateLimits()
 
         self._gateway = find_gateway(provider_name, api_key, api_base)
 
@@ -93,21 +117,57 @@ class LiteLLMProvider(LLMProvider):
             sanitized.append(clean)
         return sanitized
 
-    async def chat(
+    def _supports_prompt_caching(self, model: str) -> bool:
+        spec = self._gateway or find_by_model(model)
+        return bool(spec and spec.supports_prompt_caching)
+
+    @staticmethod
+    def _mark_cache_breakpoint(msg: dict[str, Any]) -> dict[str, Any]:
+        content = msg["content"]
+        blocks = [{"type": "text", "text": content}] if isinstance(content, str) else [dict(b) for b in content]
+        blocks[-1]["cache_control"] = _CACHE_CONTROL
+        return {**msg, "content": blocks}
+
+    @classmethod
+    def _apply_cache_control(cls, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Add ``cache_control`` breakpoints for providers with explicit prompt caching.
+
+        One breakpoint closes the stable system prompt (the first message);
+        a second sits on the newest message with text content, so each ReACT
+        iteration reads the previous iteration's transcript from cache.
+        Anything between the two (session context, history) is cached as
+        part of the transcript once it has been sent.
+        """
+        if not messages:
+            return messages
+        result = list(messages)
+        if result[0].get("role") == "system" and result[0].get("content"):
+            result[0] = cls._mark_cache_breakpoint(result[0])
+        for i in range(len(result) - 1, 0, -1):
+            if result[i].get("content"):
+                result[i] = cls._mark_cache_breakpoint(result[i])
+                break
+        return result
+
+    def _build_kwargs(
         self,
         messages: list[dict[str, Any]],
-        tools: list[dict[str, Any]] | None = None,
-        model: str | None = None,
-        max_tokens: int = 4096,
-        temperature: float = 0.7,
-    ) -> LLMResponse:
+        tools: list[dict[str, Any]] | None,
+        model: str | None,
+        max_tokens: int,
+        temperature: float,
+    ) -> dict[str, Any]:
         original_model = model or self.default_model
         resolved_model = self._resolve_model(original_model)
         max_tokens = max(1, max_tokens)
 
+        messages = self._sanitize_messages(self._sanitize_empty_content(messages))
+        if self._supports_prompt_caching(original_model):
+            messages = self._apply_cache_control(messages)
+
         kwargs: dict[str, Any] = {
             "model": resolved_model,
-            "messages": self._sanitize_messages(self._sanitize_empty_content(messages)),
+            "messages": messages,
             "max_tokens": max_tokens,
             "temperature": temperature,
         }
@@ -123,16 +183,131 @@ class LiteLLMProvider(LLMProvider):
         if tools:
             kwargs["tools"] = tools
             kwargs["tool_choice"] = "auto"
+        return kwargs
 
+    async def complete(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        """Like ``chat``, but raise on failure."""
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
         try:
             response = await acompletion(**kwargs)
-            return self._parse_response(response)
+        except Exception as e:
+            self.limits.update(error_headers(e))
+            raise
+        self.limits.update(_response_headers(response))
+        return self._parse_response(response)
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        try:
+            return await self.complete(messages, tools, model, max_tokens, temperature)
         except Exception as e:
             return LLMResponse(
                 content=f"Error calling LLM: {str(e)}",
                 finish_reason="error",
             )
 
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        chunks = self.stream(messages, tools, model, max_tokens, temperature)
+        try:
+            async with aclosing(chunks):
+                async for chunk in chunks:
+                    yield chunk
+        except Exception as e:
+            yield LLMStreamChunk(response=LLMResponse(
+                content=f"Error calling LLM: {str(e)}",
+                finish_reason="error",
+            ))
+
+    async def stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """Like ``chat_stream``, but raise on failure (possibly after some deltas)."""
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
+        kwargs["stream"] = True
+        kwargs["stream_options"] = {"include_usage": True}
+
+        start = time.monotonic()
+        ttft_ms: float | None = None
+        content: list[str] = []
+        reasoning: list[str] = []
+        tool_calls = ToolCallAccumulator()
+        finish_reason = "stop"
+        usage: dict[str, int] = {}
+        try:
+            stream = await acompletion(**kwargs)
+        except Exception as e:
+            self.limits.update(error_headers(e))
+            raise
+        self.limits.update(_response_headers(stream))
+        async for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage = self._parse_usage(chunk.usage)
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+            delta = choice.delta
+            if delta is None:
+                continue
+            if ttft_ms is None and (delta.content or getattr(delta, "tool_calls", None)):
+                ttft_ms = round((time.monotonic() - start) * 1000, 2)
+            for tc in getattr(delta, "tool_calls", None) or []:
+                tool_calls.add(tc)
+            if getattr(delta, "reasoning_content", None):
+                reasoning.append(delta.reasoning_content)
+            if delta.content:
+                content.append(delta.content)
+                yield LLMStreamChunk(delta=delta.content)
+
+        yield LLMStreamChunk(response=LLMResponse(
+            content="".join(content) or None,
+            tool_calls=tool_calls.build(),
+            finish_reason=finish_reason,
+            usage=usage,
+            reasoning_content="".join(reasoning) or None,
+            ttft_ms=ttft_ms,
+        ))
+
+    @staticmethod
+    def _parse_usage(usage: Any) -> dict[str, int]:
+        # LiteLLM reports cache reads as prompt_tokens_details.cached_tokens
+        # (OpenAI style); Anthropic responses also carry their native fields.
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or getattr(usage, "cache_read_input_tokens", None)
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "cached_tokens": cached or 0,
+            "cache_creation_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+        }
+
     def _parse_response(self, response: Any) -> LLMResponse:
         choice = response.choices[0]
         message = choice.message
@@ -154,11 +329,7 @@ class LiteLLMProvider(LLMProvider):
 
         usage = {}
         if hasattr(response, "usage") and response.usage:
-            usage = {
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens,
-            }
+            usage = self._parse_usage(response.usage)
 
         reasoning_content = getattr(message, "reasoning_content", None) or None
 
@@ -170,5 +341,35 @@ class LiteLLMProvider(LLMProvider):
             reasoning_content=reasoning_content,
         )
 
+    def count_tokens(self, text: str, model: str | None = None) -> int:
+        try:
+            return len(litellm.encode(model=self._resolve_model(model or self.default_model), text=text))
+        except Exception:
+            return super().count_tokens(text, model)
+
+    def get_context_window(self, model: str | None = None) -> int | None:
+        try:
+            info = litellm.get_model_info(self._resolve_model(model or self.default_model))
+        except Exception:
+            return None
+        return info.get("max_input_tokens") or info.get("max_tokens")
+
+    def estimate_cost(self, usage: dict[str, int], model: str | None = None) -> float:
+        resolved = self._resolve_model(model or self.default_model)
+        if resolved in self._unpriced:
+            return 0.0
+        try:
+            prompt, completion = litellm.cost_per_token(
+                model=resolved,
+                prompt_tokens=usage.get("prompt_tokens", 0),
+                completion_tokens=usage.get("completion_tokens", 0),
+                cache_read_input_tokens=usage.get("cached_tokens", 0),
+                cache_creation_input_tokens=usage.get("cache_creation_tokens", 0),
+            )
+        except Exception:
+            self._unpriced.add(resolved)  # not in LiteLLM's price list; don't look it up again
+            return 0.0
+        return prompt + completion
+
     def get_default_model(self) -> str:
         return self.default_model
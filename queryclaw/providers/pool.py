@@ -0,0 +1,329 @@
+"""Load balancing, retries and fallback across several LLM API keys and providers."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import time
+from collections import OrderedDict, deque
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable
+
+from loguru import logger
+
+from queryclaw import tracing
+from queryclaw.providers.base import LLMProvider, LLMResponse, LLMStreamChunk
+from queryclaw.providers.ratelimit import RateLimits, classify_error
+
+_DEFAULT_MAX_RETRIES = 3
+_DEFAULT_RETRY_BASE_DELAY = 1.0
+_DEFAULT_RETRY_MAX_DELAY = 30.0
+_DEFAULT_MAX_CONCURRENCY = 8
+
+
+class FairLimiter:
+    """Caps concurrent calls; waiting callers are admitted round-robin by session.
+
+    A session that fires many calls at once (e.g. several sub-agents) gets
+    one of every N freed slots while N sessions are waiting, instead of
+    starving the others.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = max(1, limit)
+        self.active = 0
+        self._waiting: OrderedDict[str, deque[asyncio.Future[None]]] = OrderedDict()
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._waiting.values())
+
+    async def acquire(self, session: str = "") -> None:
+        if self.active < self.limit and not self._waiting:
+            self.active += 1
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(session, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # the slot was handed over just as we were cancelled
+            else:
+                self._discard(session, future)
+            raise
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the next session in turn."""
+        while self._waiting:
+            session, queue = next(iter(self._waiting.items()))
+            future = queue.popleft()
+            if queue:
+                self._waiting.move_to_end(session)
+            else:
+                del self._waiting[session]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def _discard(self, session: str, future: asyncio.Future[None]) -> None:
+        queue = self._waiting.get(session)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            if not queue:
+                del self._waiting[session]
+
+
+@dataclass
+class _Member:
+    provider: Any  # offers complete(), stream() and limits, like LiteLLMProvider
+    label: str
+    in_flight: int = 0
+    calls: int = 0
+    errors: int = 0
+
+    @property
+    def limits(self) -> RateLimits:
+        return self.provider.limits
+
+
+@dataclass
+class _Tier:
+    model: str | None  # None = the model the caller asked for
+    members: list[_Member]
+    turn: int = field(default=0)
+
+
+def _headroom(remaining: int | None) -> float:
+    return math.inf if remaining is None else remaining
+
+
+class _Call:
+    """Which member serves the next attempt of one pooled call."""
+
+    def __init__(self, pool: ProviderPool, model: str | None) -> None:
+        self.pool = pool
+        self.model = model
+        self.error: BaseException | None = None
+        self._tier = 0
+        self._retries = 0
+        self._total_retries = 0
+
+    async def next(self) -> tuple[_Member, str | None] | None:
+        """The member and model for the next attempt, after any cooldown; None when all are used up."""
+        pool = self.pool
+        while self._tier < len(pool.tiers):
+            tier = pool.tiers[self._tier]
+            if self._retries <= pool.max_retries:
+                member, wait = pool._pick(tier)
+                if member is not None:
+                    return member, tier.model or self.model
+                if wait is not None and wait <= pool.retry_max_delay:
+                    await asyncio.sleep(wait)
+                    continue
+            self._tier += 1
+            self._retries = 0
+            if self._tier < len(pool.tiers):
+                pool.fallbacks += 1
+                tracing.annotate(fallback_model=pool.tiers[self._tier].model)
+                logger.warning("LLM calls to {} keep failing ({}); falling back to {}",
+                               tier.model or self.model, self.error, pool.tiers[self._tier].model)
+        return None
+
+    def failed(self, member: _Member, error: BaseException) -> bool:
+        """Note a failed attempt; False when the call should not be retried at all."""
+        self.error = error
+        member.errors += 1
+        kind = classify_error(error)
+        if kind == "fatal":
+            return False
+        if kind == "auth":
+            member.limits.disabled = type(error).__name__
+            logger.warning("LLM key {} was rejected and is taken out of the pool: {}", member.label, error)
+            return True
+        self._retries += 1
+        self._total_retries += 1
+        self.pool.retries += 1
+        tracing.annotate(retries=self._total_retries)
+        if member.limits.cooldown_until <= time.monotonic():  # the provider did not say how long to wait
+            member.limits.cool_down(self.pool._backoff(self._retries))
+        return True
+
+    def error_response(self) -> LLMResponse:
+        self.pool.errors += 1
+        reason = self.error if self.error is not None else "no usable API key left"
+        return LLMResponse(content=f"Error calling LLM: {reason}", finish_reason="error")
+
+
+class ProviderPool(LLMProvider):
+    """Spreads LLM calls over several API keys, retrying and falling back on failure.
+
+    *members* serve the caller's model, typically one ``LiteLLMProvider``
+    per API key or provider; *fallback* members serve *fallback_model*.
+    Each call goes to the member with the fewest calls in flight, then
+    the most requests and tokens left in its rate-limit window, skipping
+    members that are cooling down.
+
+    A rate limit, timeout or server error cools the member down for as
+    long as the provider asked (``retry-after``) or for a jittered
+    exponential backoff, and the call moves to another member, or waits
+    for the first to cool down. A rejected API key takes its member out
+    of the pool. After *max_retries* retries, or when the wait would be
+    longer than *retry_max_delay*, the call moves on to the fallback
+    members, and when they fail too an error response is returned, as
+    from ``LiteLLMProvider.chat``. Bad requests are not retried. A stream
+    is only retried until its first delta.
+
+    At most *max_concurrency* calls are in flight; waiting calls are
+    admitted round-robin across sessions (see ``FairLimiter``).
+    *session_of* names the session a call is made for; without it all
+    calls wait in one queue.
+    """
+
+    def __init__(
+        self,
+        members: list[LLMProvider],
+        fallback: list[LLMProvider] | None = None,
+        fallback_model: str | None = None,
+        max_retries: int = _DEFAULT_MAX_RETRIES,
+        retry_base_delay: float = _DEFAULT_RETRY_BASE_DELAY,
+        retry_max_delay: float = _DEFAULT_RETRY_MAX_DELAY,
+        max_concurrency: int = _DEFAULT_MAX_CONCURRENCY,
+        session_of: Callable[[], str] | None = None,
+    ) -> None:
+        if not members:
+            raise ValueError("ProviderPool needs at least one provider")
+        super().__init__(api_key=members[0].api_key, api_base=members[0].api_base)
+        self.tiers = [_Tier(None, [_Member(p, f"primary#{i}") for i, p in enumerate(members)])]
+        if fallback and fallback_model:
+            self.tiers.append(_Tier(fallback_model, [_Member(p, f"fallback#{i}") for i, p in enumerate(fallback)]))
+        self.max_retries = max(0, max_retries)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.limiter = FairLimiter(max_concurrency)
+        self.session_of = session_of or (lambda: "")
+        self.calls = 0
+        self.retries = 0
+        self.fallbacks = 0
+        self.errors = 0
+
+    @property
+    def primary(self) -> LLMProvider:
+        return self.tiers[0].members[0].provider
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "fallbacks": self.fallbacks,
+            "errors": self.errors,
+            "queued": self.limiter.queued,
+            "keys": {
+                m.label: {
+                    "calls": m.calls,
+                    "errors": m.errors,
+                    "remaining_requests": m.limits.remaining_requests,
+                    "remaining_tokens": m.limits.remaining_tokens,
+                    **({"disabled": m.limits.disabled} if m.limits.disabled else {}),
+                }
+                for tier in self.tiers
+                for m in tier.members
+            },
+        }
+
+    def _backoff(self, retries: int) -> float:
+        """Full-jitter exponential backoff before retry number *retries*."""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (retries - 1)))
+
+    def _pick(self, tier: _Tier) -> tuple[_Member | None, float | None]:
+        """The member to call now, or None and the seconds until one is ready (None if none is left)."""
+        live = [m for m in tier.members if not m.limits.disabled]
+        if not live:
+            return None, None
+        now = time.monotonic()
+        ready = [m for m in live if m.limits.ready_at() <= now]
+        if not ready:
+            return None, min(m.limits.ready_at() for m in live) - now
+        # Rotate the start so members that tie take turns.
+        start = tier.turn % len(ready)
+        tier.turn += 1
+        ready = ready[start:] + ready[:start]
+        member = min(ready, key=lambda m: (
+            m.in_flight, -_headroom(m.limits.remaining_requests), -_headroom(m.limits.remaining_tokens),
+        ))
+        return member, None
+
+    @asynccontextmanager
+    async def _slot(self, member: _Member) -> AsyncIterator[None]:
+        await self.limiter.acquire(self.session_of())
+        member.in_flight += 1
+        member.calls += 1
+        try:
+            yield
+        finally:
+            member.in_flight -= 1
+            self.limiter.release()
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        self.calls += 1
+        call = _Call(self, model)
+        while (target := await call.next()) is not None:
+            member, target_model = target
+            async with self._slot(member):
+                try:
+                    return await member.provider.complete(messages, tools, target_model, max_tokens, temperature)
+                except Exception as e:
+                    if not call.failed(member, e):
+                        break
+        return call.error_response()
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        self.calls += 1
+        call = _Call(self, model)
+        while (target := await call.next()) is not None:
+            member, target_model = target
+            started = False
+            async with self._slot(member):
+                chunks = member.provider.stream(messages, tools, target_model, max_tokens, temperature)
+                try:
+                    async with aclosing(chunks):
+                        async for chunk in chunks:
+                            started = started or bool(chunk.delta)
+                            yield chunk
+                    return
+                except Exception as e:
+                    if not call.failed(member, e) or started:
+                        break
+        yield LLMStreamChunk(response=call.error_response())
+
+    def count_tokens(self, text: str, model: str | None = None) -> int:
+        return self.primary.count_tokens(text, model)
+
+    def get_context_window(self, model: str | None = None) -> int | None:
+        return self.primary.get_context_window(model)
+
+    def estimate_cost(self, usage: dict[str, int], model: str | None = None) -> float:
+        for tier in self.tiers[1:]:
+            if model == tier.model:
+                return tier.members[0].provider.estimate_cost(usage, model)
+        return self.primary.estimate_cost(usage, model)
+
+    def get_default_model(self) -> str:
+        return self.primary.get_default_model()
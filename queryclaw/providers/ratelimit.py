@@ -0,0 +1,161 @@
+"""Provider rate-limit state read from response headers, and classification of LLM call errors."""
+
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Mapping
+
+# LiteLLM passes the provider's raw headers on with this prefix.
+_RAW_PREFIX = "llm_provider-"
+_REMAINING_REQUESTS = ("x-ratelimit-remaining-requests", "anthropic-ratelimit-requests-remaining")
+_REMAINING_TOKENS = ("x-ratelimit-remaining-tokens", "anthropic-ratelimit-tokens-remaining")
+_RESET_REQUESTS = ("x-ratelimit-reset-requests", "anthropic-ratelimit-requests-reset")
+_RESET_TOKENS = ("x-ratelimit-reset-tokens", "anthropic-ratelimit-tokens-reset")
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+# Statuses worth retrying: timeouts, conflicts, rate limits and server errors.
+_RETRY_STATUSES = frozenset({408, 409, 425, 429})
+_AUTH_STATUSES = frozenset({401, 403})
+
+
+def _normalize(headers: Mapping[str, Any] | None) -> dict[str, str]:
+    normalized: dict[str, str] = {}
+    for key, value in (headers or {}).items():
+        key = str(key).lower()
+        normalized.setdefault(key.removeprefix(_RAW_PREFIX), str(value))
+    return normalized
+
+
+def _first(headers: dict[str, str], names: tuple[str, ...]) -> str | None:
+    for name in names:
+        if name in headers:
+            return headers[name]
+    return None
+
+
+def _int(value: str | None) -> int | None:
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def parse_delay(value: str | None) -> float | None:
+    """Seconds until *value*: plain seconds, an OpenAI duration ("6m0s", "20ms") or a timestamp."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if when.tzinfo is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def retry_after(headers: Mapping[str, Any] | None) -> float | None:
+    """The delay a provider asked for in ``retry-after-ms`` / ``retry-after``, in seconds."""
+    normalized = _normalize(headers)
+    if "retry-after-ms" in normalized:
+        ms = parse_delay(normalized["retry-after-ms"])
+        return ms / 1000 if ms is not None else None
+    return parse_delay(normalized.get("retry-after"))
+
+
+def error_headers(error: BaseException) -> Mapping[str, Any]:
+    """Response headers attached to an LLM call error, if any."""
+    headers = getattr(error, "headers", None)
+    if not headers:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        headers = getattr(error, "litellm_response_headers", None)
+    return headers or {}
+
+
+def classify_error(error: BaseException) -> str:
+    """"retry" for transient failures, "auth" for a rejected key, "fatal" for everything else."""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        if status in _AUTH_STATUSES:
+            return "auth"
+        if status in _RETRY_STATUSES or status >= 500:
+            return "retry"
+        return "fatal"
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return "retry"
+    return "fatal"
+
+
+@dataclass
+class RateLimits:
+    """What one API key has left, as last reported by the provider.
+
+    Counts are None until a response carries rate-limit headers. Times are
+    ``time.monotonic()`` values; ``reset_at`` and ``tokens_reset_at`` are when
+    the request and token windows refill.
+    """
+
+    remaining_requests: int | None = None
+    remaining_tokens: int | None = None
+    reset_at: float = 0.0
+    tokens_reset_at: float = 0.0
+    cooldown_until: float = 0.0
+    disabled: str | None = None
+
+    def update(self, headers: Mapping[str, Any] | None) -> None:
+        """Take the limits reported in a response's (or error's) *headers*."""
+        normalized = _normalize(headers)
+        if not normalized:
+            return
+        now = time.monotonic()
+        requests = _int(_first(normalized, _REMAINING_REQUESTS))
+        if requests is not None:
+            self.remaining_requests = requests
+        tokens = _int(_first(normalized, _REMAINING_TOKENS))
+        if tokens is not None:
+            self.remaining_tokens = tokens
+        reset = parse_delay(_first(normalized, _RESET_REQUESTS))
+        if reset is not None:
+            self.reset_at = now + reset
+        tokens_reset = parse_delay(_first(normalized, _RESET_TOKENS))
+        if tokens_reset is not None:
+            self.tokens_reset_at = now + tokens_reset
+        wait = retry_after(normalized)
+        if wait is not None:
+            self.cooldown_until = max(self.cooldown_until, now + wait)
+
+    def cool_down(self, seconds: float) -> None:
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+    def ready_at(self) -> float:
+        """When this key may take the next request.
+
+        That is after any cooldown, and after the window refills when its
+        requests or its tokens are used up.
+        """
+        now = time.monotonic()
+        ready = self.cooldown_until
+        if self.remaining_requests == 0 and self.reset_at > now:
+            ready = max(ready, self.reset_at)
+        if self.remaining_tokens == 0:
+            # Without a token reset header, assume the token window refills with the request window.
+            tokens_reset_at = self.tokens_reset_at or self.reset_at
+            if tokens_reset_at > now:
+                ready = max(ready, tokens_reset_at)
+        return ready
@@ -0,0 +1,239 @@
+"""Record LLM traffic to JSONL and replay it offline, for deterministic tests and profiling."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import deque
+from contextlib import aclosing
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from loguru import logger
+
+from queryclaw.providers.base import LLMProvider, LLMResponse, LLMStreamChunk, ToolCallRequest
+
+# Text that differs between a recording and its replay without changing the question.
+_VOLATILE = (
+    (re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?( \(\w+\))?"), "<time>"),
+    (re.compile(r"\d+(\.\d+)?\s?ms\b"), "<ms>"),
+)
+
+
+def _normalize_text(content: Any) -> str:
+    text = content if isinstance(content, str) else json.dumps(content, ensure_ascii=False, sort_keys=True)
+    for pattern, placeholder in _VOLATILE:
+        text = pattern.sub(placeholder, text)
+    return " ".join(text.split())
+
+
+def request_key(messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None) -> str:
+    """Hash of a chat request, stable across runs.
+
+    Timestamps, query timings, tool-call ids, reasoning text and whitespace
+    are ignored, so the same conversation recorded on one day matches its
+    replay on another.
+    """
+    normalized = []
+    for msg in messages:
+        entry: dict[str, Any] = {"role": msg.get("role"), "content": _normalize_text(msg.get("content") or "")}
+        if msg.get("name"):
+            entry["name"] = msg["name"]
+        if msg.get("tool_calls"):
+            entry["tool_calls"] = [
+                [tc.get("function", {}).get("name"), _normalize_text(tc.get("function", {}).get("arguments") or "")]
+                for tc in msg["tool_calls"]
+            ]
+        normalized.append(entry)
+    tool_names = sorted(t.get("function", {}).get("name", "") for t in tools or [])
+    payload = json.dumps({"messages": normalized, "tools": tool_names}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _response_to_dict(response: LLMResponse) -> dict[str, Any]:
+    data = asdict(response)
+    data.pop("ttft_ms", None)
+    return data
+
+
+def _response_from_dict(data: dict[str, Any]) -> LLMResponse:
+    return LLMResponse(
+        content=data.get("content"),
+        tool_calls=[ToolCallRequest(**tc) for tc in data.get("tool_calls") or []],
+        finish_reason=data.get("finish_reason", "stop"),
+        usage=data.get("usage") or {},
+        reasoning_content=data.get("reasoning_content"),
+    )
+
+
+class RecordingProvider(LLMProvider):
+    """Wraps a provider and appends every request and response to a JSONL file.
+
+    Each line holds the request key (see ``request_key``), the messages,
+    the tool names, the response and its wall-clock latency. Transcripts
+    contain prompts and query results as sent to the model; treat them as
+    sensitive as the database itself. API keys are not written.
+    """
+
+    def __init__(self, inner: LLMProvider, path: str | Path) -> None:
+        super().__init__(api_key=inner.api_key, api_base=inner.api_base)
+        self.inner = inner
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.recorded = 0
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        start = time.monotonic()
+        response = await self.inner.chat(messages, tools=tools, model=model, max_tokens=max_tokens,
+                                         temperature=temperature)
+        self._record(messages, tools, model, response, time.monotonic() - start)
+        return response
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        start = time.monotonic()
+        stream = self.inner.chat_stream(messages, tools=tools, model=model, max_tokens=max_tokens,
+                                        temperature=temperature)
+        async with aclosing(stream) as chunks:
+            async for chunk in chunks:
+                if chunk.response is not None:
+                    self._record(messages, tools, model, chunk.response, time.monotonic() - start)
+                yield chunk
+
+    def _record(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str | None,
+        response: LLMResponse,
+        elapsed: float,
+    ) -> None:
+        entry = {
+            "key": request_key(messages, tools),
+            "model": model or self.inner.get_default_model(),
+            "messages": messages,
+            "tools": [t.get("function", {}).get("name", "") for t in tools or []],
+            "response": _response_to_dict(response),
+            "latency_ms": round(elapsed * 1000, 2),
+            "ttft_ms": response.ttft_ms,
+        }
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self.recorded += 1
+
+    def count_tokens(self, text: str, model: str | None = None) -> int:
+        return self.inner.count_tokens(text, model)
+
+    def get_context_window(self, model: str | None = None) -> int | None:
+        return self.inner.get_context_window(model)
+
+    def estimate_cost(self, usage: dict[str, int], model: str | None = None) -> float:
+        return self.inner.estimate_cost(usage, model)
+
+    def get_default_model(self) -> str:
+        return self.inner.get_default_model()
+
+
+class ReplayProvider(LLMProvider):
+    """Serves responses from a ``RecordingProvider`` transcript instead of calling an LLM.
+
+    A request is answered by the oldest unused recording with the same
+    ``request_key``. When the replayed conversation drifts from the
+    recording (e.g. a local database returns different rows), the next
+    unused recording in file order is served instead, unless *strict*,
+    in which case an error response is returned. Each call waits
+    *latency* seconds plus *latency_scale* times the recorded latency,
+    so runs can be instant or approximate real network timing.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        latency: float = 0.0,
+        latency_scale: float = 0.0,
+        strict: bool = False,
+    ) -> None:
+        super().__init__()
+        self.path = Path(path).expanduser()
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self._entries: list[dict[str, Any]] = []
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._entries.append(json.loads(line))
+        self._by_key: dict[str, deque[int]] = {}
+        for i, entry in enumerate(self._entries):
+            self._by_key.setdefault(entry["key"], deque()).append(i)
+        self._used: set[int] = set()
+        self._next = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        return {"recorded": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        index = self._match(request_key(messages, tools))
+        if index is None:
+            return LLMResponse(
+                content=f"Error calling LLM: no recorded response for this request in {self.path}",
+                finish_reason="error",
+            )
+        entry = self._entries[index]
+        delay = self.latency + self.latency_scale * entry.get("latency_ms", 0) / 1000
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return _response_from_dict(entry["response"])
+
+    def _match(self, key: str) -> int | None:
+        queue = self._by_key.get(key)
+        while queue:
+            index = queue.popleft()
+            if index not in self._used:
+                self._used.add(index)
+                self.hits += 1
+                return index
+        self.misses += 1
+        if self.strict:
+            logger.warning("Replay miss for request {}", key)
+            return None
+        while self._next < len(self._entries) and self._next in self._used:
+            self._next += 1
+        if self._next >= len(self._entries):
+            logger.warning("Replay transcript {} exhausted", self.path)
+            return None
+        self._used.add(self._next)
+        logger.debug("Replay miss for request {}; serving recording #{} in order", key, self._next)
+        return self._next
+
+    def get_default_model(self) -> str:
+        return self._entries[0].get("model", "replay") if self._entries else "replay"
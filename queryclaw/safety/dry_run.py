@@ -5,7 +5,7 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass, field
 
-from queryclaw.db.base import SQLAdapter
+from queryclaw.db.base import QueryTimeoutError, SQLAdapter
 
 
 @dataclass
@@ -15,13 +15,15 @@ class DryRunResult:
     estimated_rows: int = 0
     explain_plan: str = ""
     warnings: list[str] = field(default_factory=list)
+    timed_out: bool = False  # the COUNT estimate hit its timeout; impact is unknown
 
 
 class DryRunEngine:
     """Estimates the impact of write SQL by running EXPLAIN and COUNT queries."""
 
-    def __init__(self, db: SQLAdapter) -> None:
+    def __init__(self, db: SQLAdapter, timeout: float | None = None) -> None:
         self._db = db
+        self._timeout = timeout
 
     async def analyze(self, sql: str) -> DryRunResult:
         """Analyze a write statement without executing it."""
@@ -36,7 +38,14 @@ class DryRunEngine:
             result.warnings.append(f"EXPLAIN failed: {e}")
 
         if upper.startswith("UPDATE") or upper.startswith("DELETE"):
-            count = await self._estimate_affected_rows(sql)
+            try:
+                count = await self._estimate_affected_rows(sql)
+            except QueryTimeoutError as e:
+                result.timed_out = True
+                result.warnings.append(
+                    f"Impact estimate timed out after {e.timeout:g}s; the number of affected rows is unknown"
+                )
+                return result
             result.estimated_rows = count
             if count > 1000:
                 result.warnings.append(f"High impact: {count} rows will be affected")
@@ -61,9 +70,11 @@ class DryRunEngine:
                 return 0
 
             if count_sql:
-                result = await self._db.execute(count_sql)
+                result = await self._db.execute(count_sql, timeout=self._timeout)
                 if result.rows:
                     return int(result.rows[0][0])
+        except QueryTimeoutError:
+            raise
         except Exception:
             pass
         return 0
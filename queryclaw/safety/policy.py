@@ -28,6 +28,10 @@ class SafetyPolicy:
         "GRANT ",
     ])
     audit_enabled: bool = True
+    # Statement timeouts in seconds, enforced by the database; 0 disables.
+    query_timeout: float = 30.0
+    dry_run_timeout: float = 10.0
+    snapshot_timeout: float = 10.0
 
     def allows_write(self) -> bool:
         return not self.read_only
@@ -41,8 +41,9 @@ def _serialize_value(v: Any) -> Any:
 class SnapshotHelper:
     """Captures before/after row snapshots for DML audit logging."""
 
-    def __init__(self, db: SQLAdapter) -> None:
+    def __init__(self, db: SQLAdapter, timeout: float | None = None) -> None:
         self._db = db
+        self._timeout = timeout
 
     async def get_before_snapshot(self, sql: str) -> str:
         """Get row snapshot before UPDATE or DELETE. Returns empty string for INSERT."""
@@ -60,7 +61,10 @@ class SnapshotHelper:
             return ""
 
         try:
-            result = await self._db.execute(select_sql)
+            result = await self._db.execute_limited(
+                select_sql, max_rows=MAX_SNAPSHOT_ROWS, max_bytes=MAX_SNAPSHOT_BYTES,
+                timeout=self._timeout,
+            )
             return _rows_to_json(result.columns, result.rows)
         except Exception:
             return ""
@@ -79,7 +83,10 @@ class SnapshotHelper:
             return ""
         if upper.startswith("UPDATE") and before_select_sql:
             try:
-                result = await self._db.execute(before_select_sql)
+                result = await self._db.execute_limited(
+                    before_select_sql, max_rows=MAX_SNAPSHOT_ROWS, max_bytes=MAX_SNAPSHOT_BYTES,
+                    timeout=self._timeout,
+                )
                 return _rows_to_json(result.columns, result.rows)
             except Exception:
                 return ""
@@ -48,7 +48,7 @@ class CronService:
                     chat_id=job.id,
                     content=job.prompt,
                     session_key_override=f"cron:{job.id}",
-                    metadata={"job_id": job.id, "schedule": job.schedule},
+                    metadata={"job_id": job.id, "schedule": job.schedule, "token_budget": job.token_budget},
                 )
                 await self._bus.publish_inbound(msg)
             except Exception as e:
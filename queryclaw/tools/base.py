@@ -35,6 +35,14 @@ class Tool(ABC):
     def parameters(self) -> dict[str, Any]:
         """JSON Schema for tool parameters."""
 
+    @property
+    def read_only(self) -> bool:
+        """Whether the tool only reads, so it may run concurrently with other read-only calls.
+
+        Defaults to False: a mutating tool always runs on its own, in call order.
+        """
+        return False
+
     @abstractmethod
     async def execute(self, **kwargs: Any) -> str:
         """Execute the tool with given parameters.
@@ -5,7 +5,9 @@ from __future__ import annotations
 import time
 from typing import Any, Callable, Awaitable
 
+from queryclaw import tracing
 from queryclaw.db.base import SQLAdapter
+from queryclaw.db.schema_cache import SchemaCache
 from queryclaw.safety.audit import AuditEntry, AuditLogger
 from queryclaw.safety.policy import SafetyPolicy
 from queryclaw.safety.validator import QueryValidator
@@ -29,6 +31,7 @@ class DDLExecuteTool(Tool):
         audit: AuditLogger | None = None,
         confirmation_callback: ConfirmationCallback | None = None,
         on_schema_change: Callable[[], None] | None = None,
+        schema_cache: SchemaCache | None = None,
     ) -> None:
         self._db = db
         self._policy = policy
@@ -36,6 +39,7 @@ class DDLExecuteTool(Tool):
         self._audit = audit or AuditLogger(db)
         self._confirm = confirmation_callback
         self._on_schema_change = on_schema_change
+        self._schema_cache = schema_cache
 
     @property
     def name(self) -> str:
@@ -101,7 +105,9 @@ class DDLExecuteTool(Tool):
                 f"Type: {validation.operation_type}\n"
                 f"Warnings: {'; '.join(validation.warnings)}"
             )
-            confirmed = await self._confirm(sql_stripped, confirm_msg)
+            with tracing.span("confirmation", operation=validation.operation_type) as span:
+                confirmed = await self._confirm(sql_stripped, confirm_msg)
+                span.set(confirmed=confirmed)
             if not confirmed:
                 await self._audit.log(AuditEntry(
                     operation_type=validation.operation_type,
@@ -143,6 +149,9 @@ class DDLExecuteTool(Tool):
         except Exception:
             pass
 
+        if self._schema_cache is not None:
+            # Only the touched tables; fall back to everything if none were parsed.
+            self._schema_cache.invalidate(validation.tables_affected or None)
         if self._on_schema_change:
             self._on_schema_change()
 
@@ -18,6 +18,10 @@ class ExplainPlanTool(Tool):
     def name(self) -> str:
         return "explain_plan"
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
         return (
@@ -5,6 +5,7 @@ from __future__ import annotations
 import time
 from typing import Any, Callable, Awaitable
 
+from queryclaw import tracing
 from queryclaw.db.base import SQLAdapter
 from queryclaw.safety.audit import AuditEntry, AuditLogger
 from queryclaw.safety.dry_run import DryRunEngine
@@ -29,13 +30,15 @@ class DataModifyTool(Tool):
         validator: QueryValidator | None = None,
         audit: AuditLogger | None = None,
         confirmation_callback: ConfirmationCallback | None = None,
+        read_db: SQLAdapter | None = None,
     ) -> None:
         self._db = db
         self._policy = policy
         self._validator = validator or QueryValidator(blocked_patterns=policy.blocked_patterns)
-        self._dry_run = DryRunEngine(db)
+        # Impact estimates (EXPLAIN / COUNT) may run on a replica; the write itself never does.
+        self._dry_run = DryRunEngine(read_db or db, timeout=policy.dry_run_timeout)
         self._audit = audit or AuditLogger(db)
-        self._snapshot = SnapshotHelper(db)
+        self._snapshot = SnapshotHelper(db, timeout=policy.snapshot_timeout)
         self._confirm = confirmation_callback
 
     @property
@@ -92,6 +95,7 @@ class DataModifyTool(Tool):
 
         needs_confirm = self._policy.require_confirmation and (
             validation.requires_confirmation
+            or dry_result.timed_out
             or self._policy.requires_confirmation_for(dry_result.estimated_rows)
         )
 
@@ -107,7 +111,9 @@ class DataModifyTool(Tool):
                 return f"Error: {summary}"
 
             confirm_msg = self._build_confirm_message(sql_stripped, dry_result, validation.warnings)
-            confirmed = await self._confirm(sql_stripped, confirm_msg)
+            with tracing.span("confirmation", operation=validation.operation_type) as span:
+                confirmed = await self._confirm(sql_stripped, confirm_msg)
+                span.set(confirmed=confirmed)
             if not confirmed:
                 await self._audit.log(AuditEntry(
                     operation_type=validation.operation_type,
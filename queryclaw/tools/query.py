@@ -6,6 +6,15 @@ from typing import Any
 
 from queryclaw.db.base import SQLAdapter
 from queryclaw.tools.base import Tool
+from queryclaw.tools.results import (
+    DEFAULT_PREVIEW_ROWS,
+    DEFAULT_PROFILE_THRESHOLD,
+    ResultStore,
+    format_stored,
+    profile_stored,
+)
+
+DEFAULT_MAX_RESULT_BYTES = 1_000_000
 
 _DISALLOWED_PREFIXES = (
     "INSERT", "UPDATE", "DELETE", "DROP", "ALTER", "CREATE",
@@ -14,21 +23,58 @@ _DISALLOWED_PREFIXES = (
 
 
 class QueryExecuteTool(Tool):
-    """Execute a read-only SQL query (SELECT only) and return results."""
-
-    def __init__(self, db: SQLAdapter, max_rows: int = 100) -> None:
+    """Execute a read-only SQL query (SELECT only) and return results.
+
+    With a ``ResultStore``, the rows (up to *max_rows*) are kept under a
+    handle and only a preview is returned; the agent reads the rest through
+    the ``query_result`` tool instead of re-running the query.
+
+    Results longer than *profile_threshold* rows are summarised by a
+    per-column profile computed locally, so the model sees the shape of the
+    data without reading every row.
+    """
+
+    def __init__(
+        self,
+        db: SQLAdapter,
+        max_rows: int = 100,
+        max_bytes: int = DEFAULT_MAX_RESULT_BYTES,
+        timeout: float | None = None,
+        result_store: ResultStore | None = None,
+        preview_rows: int = DEFAULT_PREVIEW_ROWS,
+        profile_threshold: int = DEFAULT_PROFILE_THRESHOLD,
+    ) -> None:
         self._db = db
+        self._store = result_store
         self._max_rows = max_rows
+        self._max_bytes = max_bytes
+        self._timeout = timeout
+        self._preview_rows = preview_rows
+        self._profile_threshold = profile_threshold
 
     @property
     def name(self) -> str:
         return "query_execute"
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
+        if self._store is not None:
+            return (
+                "Execute a read-only SQL query (SELECT statements only). "
+                f"Up to {self._max_rows} rows are stored under a handle and the first "
+                f"{self._preview_rows} are shown, with a column profile for larger results; "
+                "use query_result with the handle to page, filter, sort, aggregate or profile them "
+                "instead of re-running the query. "
+                "Use this to explore data, run aggregations, or verify hypotheses."
+            )
         return (
             "Execute a read-only SQL query (SELECT statements only). "
-            f"Results are limited to {self._max_rows} rows. "
+            f"Results are limited to {self._max_rows} rows; results over {self._profile_threshold} rows "
+            "are summarised as a column profile with sample rows. "
             "Use this to explore data, run aggregations, or verify hypotheses."
         )
 
@@ -55,11 +101,28 @@ class QueryExecuteTool(Tool):
         limited_sql = self._apply_limit(sql_stripped)
 
         try:
-            result = await self._db.execute(limited_sql)
+            # Stream with hard caps: a user-supplied LIMIT may still be huge.
+            result = await self._db.execute_limited(
+                limited_sql, max_rows=self._max_rows, max_bytes=self._max_bytes, timeout=self._timeout,
+            )
             header = f"Query returned {result.row_count} row(s) in {result.execution_time_ms:.1f}ms"
+            if result.truncated:
+                header += (
+                    f" (truncated: result exceeds {self._max_rows} rows or "
+                    f"{self._max_bytes} bytes; add filters or a smaller LIMIT)"
+                )
             if result.row_count == 0:
                 return f"{header}\n(no rows)"
-            table = result.to_text(max_rows=self._max_rows)
+            if self._store is not None:
+                stored = await self._store.put(result.columns, result.rows, sql_stripped, truncated=result.truncated)
+                text = f"{header}\n{format_stored(stored, limit=self._preview_rows)}"
+                if result.row_count > self._profile_threshold:
+                    text += f"\n\n{profile_stored(stored)}"
+                return text
+            if result.row_count > self._profile_threshold:
+                table = result.to_summary_text()
+            else:
+                table = result.to_text(max_rows=self._max_rows)
             return f"{header}\n\n{table}"
         except Exception as e:
             return f"Error: {e}"
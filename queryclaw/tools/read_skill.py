@@ -19,6 +19,10 @@ class ReadSkillTool(Tool):
     def name(self) -> str:
         return "read_skill"
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
         return (
@@ -1,7 +1,9 @@
 """Tool registry for dynamic tool management."""
 
-from typing import Any
+import asyncio
+from typing import Any, Awaitable, Callable
 
+from queryclaw import tracing
 from queryclaw.safety.redact import redact_private_info
 from queryclaw.tools.base import Tool
 
@@ -37,6 +39,12 @@ class ToolRegistry:
 
     async def execute(self, name: str, params: dict[str, Any]) -> str:
         """Execute a tool by name with given parameters."""
+        with tracing.span("tool.execute", tool=name) as span:
+            result = await self._execute(name, params)
+            span.set(result_chars=len(result), error=result.startswith("Error"))
+            return result
+
+    async def _execute(self, name: str, params: dict[str, Any]) -> str:
         _HINT = "\n\n[Analyze the error above and try a different approach.]"
 
         tool = self._tools.get(name)
@@ -56,6 +64,43 @@ class ToolRegistry:
         except Exception as e:
             return redact_private_info(f"Error executing {name}: {str(e)}" + _HINT)
 
+    async def execute_batch(
+        self,
+        calls: list[tuple[str, dict[str, Any]]],
+        max_concurrency: int | Callable[[], int] = 1,
+    ) -> list[str]:
+        """Execute several tool calls and return their results in call order.
+
+        Consecutive read-only calls run concurrently, at most *max_concurrency*
+        at a time. Any other call waits for the calls before it and runs alone.
+        A callable *max_concurrency* is re-evaluated for every group, so a
+        transaction opened by an earlier call can drop the limit back to 1.
+        """
+        results: list[str] = [""] * len(calls)
+        group: list[int] = []
+
+        async def run(i: int) -> None:
+            name, params = calls[i]
+            results[i] = await self.execute(name, params)
+
+        async def flush() -> None:
+            if len(group) == 1:
+                await run(group[0])
+            elif group:
+                limit = max_concurrency() if callable(max_concurrency) else max_concurrency
+                await _gather_bounded([run(i) for i in group], limit)
+            group.clear()
+
+        for i, (name, _) in enumerate(calls):
+            tool = self._tools.get(name)
+            if tool is not None and tool.read_only:
+                group.append(i)
+                continue
+            await flush()
+            await run(i)
+        await flush()
+        return results
+
     @property
     def tool_names(self) -> list[str]:
         """Get list of registered tool names."""
@@ -66,3 +111,18 @@ class ToolRegistry:
 
     def __contains__(self, name: str) -> bool:
         return name in self._tools
+
+
+async def _gather_bounded(coros: list[Awaitable[None]], limit: int) -> None:
+    """Await *coros* with at most *limit* running at once; sequentially (same task) when limit is 1."""
+    if limit <= 1:
+        for coro in coros:
+            await coro
+        return
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(coro: Awaitable[None]) -> None:
+        async with semaphore:
+            await coro
+
+    await asyncio.gather(*(bounded(c) for c in coros))
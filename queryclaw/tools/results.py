@@ -0,0 +1,410 @@
+"""Stored query results: a per-session result store and the query_result tool."""
+
+from __future__ import annotations
+
+import itertools
+import os
+import pickle
+import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import aiosqlite
+from loguru import logger
+
+from queryclaw.db.base import QueryResult
+from queryclaw.db.columnar import ColumnarResult, format_profile
+from queryclaw.db.routing import current_session
+from queryclaw.tools.base import Tool
+
+DEFAULT_STORE_MAX_BYTES = 50_000_000
+DEFAULT_PREVIEW_ROWS = 10
+DEFAULT_PROFILE_THRESHOLD = 50  # results with more rows are summarised by a column profile
+_PAGE_ROWS = 20
+_MAX_PAGE_ROWS = 200
+_ROW_OVERHEAD = 16  # rough per-row bookkeeping, on top of the cell text
+_SPILL_TABLE = "results"
+
+
+@dataclass
+class StoredResult:
+    """Rows kept from a query so they can be re-read without the database."""
+
+    handle: str
+    session: str
+    source: str  # the SQL, or how this result was derived from another one
+    columns: list[str]
+    rows: list[tuple]
+    truncated: bool = False
+    nbytes: int = 0
+
+    def shape(self) -> str:
+        return f"{len(self.rows)} rows x {len(self.columns)} columns ({', '.join(self.columns)})"
+
+
+def _estimate_bytes(rows: list[tuple]) -> int:
+    return sum(_ROW_OVERHEAD + sum(len(str(v)) for v in row) for row in rows)
+
+
+class ResultStore:
+    """Query results by handle, per session, bounded by total size.
+
+    Results are kept least-recently-used first. When their estimated size
+    passes *max_bytes*, the oldest are evicted: written to a SQLite spill
+    file when *spill* is on (and read back on access), dropped otherwise.
+    Handles are only visible to the session that created them (see
+    ``queryclaw.db.routing.bind_session``).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_STORE_MAX_BYTES,
+        spill: bool = False,
+        spill_path: str | Path | None = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self._spill = spill
+        self._spill_path = Path(spill_path).expanduser() if spill_path else None
+        self._temp_spill = self._spill_path is None
+        self._results: OrderedDict[str, StoredResult] = OrderedDict()
+        self._bytes = 0
+        self._ids = itertools.count(1)
+        self._conn: aiosqlite.Connection | None = None
+        self.evictions = 0
+        self.spill_reads = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "results": len(self._results),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "spill_reads": self.spill_reads,
+        }
+
+    async def put(self, columns: list[str], rows: list[tuple], source: str, truncated: bool = False) -> StoredResult:
+        """Store *rows* for the current session and return the new entry."""
+        result = StoredResult(
+            handle=f"r{next(self._ids)}",
+            session=current_session(),
+            source=source,
+            columns=list(columns),
+            rows=rows,
+            truncated=truncated,
+            nbytes=_estimate_bytes(rows),
+        )
+        self._results[result.handle] = result
+        self._bytes += result.nbytes
+        await self._evict(keep=result.handle)
+        return result
+
+    async def get(self, handle: str) -> StoredResult | None:
+        """Return the result for *handle* if it belongs to the current session."""
+        result = self._results.get(handle)
+        if result is None:
+            result = await self._unspill(handle)
+            if result is None:
+                return None
+            self._results[handle] = result
+            self._bytes += result.nbytes
+            await self._evict(keep=handle)
+        if result.session != current_session():
+            return None
+        self._results.move_to_end(handle)
+        return result
+
+    def clear(self) -> None:
+        """Forget the current session's results held in memory."""
+        session = current_session()
+        for handle in [h for h, r in self._results.items() if r.session == session]:
+            self._bytes -= self._results.pop(handle).nbytes
+
+    async def _evict(self, keep: str) -> None:
+        while self._bytes > self.max_bytes and len(self._results) > 1:
+            handle, result = next(iter(self._results.items()))
+            if handle == keep:
+                break
+            del self._results[handle]
+            self._bytes -= result.nbytes
+            self.evictions += 1
+            if self._spill:
+                await self._write_spill(result)
+            logger.debug("Result {} evicted ({} bytes, spilled={})", handle, result.nbytes, self._spill)
+
+    async def _db(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            if self._spill_path is None:
+                fd, name = tempfile.mkstemp(prefix="queryclaw-results-", suffix=".db")
+                os.close(fd)
+                self._spill_path = Path(name)
+            self._spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = await aiosqlite.connect(str(self._spill_path))
+            await self._conn.execute(f"DROP TABLE IF EXISTS {_SPILL_TABLE}")
+            await self._conn.execute(
+                f"CREATE TABLE {_SPILL_TABLE} "
+                "(handle TEXT PRIMARY KEY, session TEXT NOT NULL, data BLOB NOT NULL, spilled_at REAL NOT NULL)"
+            )
+            await self._conn.commit()
+        return self._conn
+
+    async def _write_spill(self, result: StoredResult) -> None:
+        # pickle keeps cell types (Decimal, datetime, bytes) intact; the file is private to this process.
+        conn = await self._db()
+        await conn.execute(
+            f"INSERT OR REPLACE INTO {_SPILL_TABLE} (handle, session, data, spilled_at) VALUES (?, ?, ?, ?)",
+            (result.handle, result.session, pickle.dumps(result), time.time()),
+        )
+        await conn.commit()
+
+    async def _unspill(self, handle: str) -> StoredResult | None:
+        if self._conn is None:
+            return None
+        async with self._conn.execute(
+            f"SELECT data FROM {_SPILL_TABLE} WHERE handle = ? AND session = ?", (handle, current_session()),
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        await self._conn.execute(f"DELETE FROM {_SPILL_TABLE} WHERE handle = ?", (handle,))
+        await self._conn.commit()
+        self.spill_reads += 1
+        return pickle.loads(row[0])
+
+    async def close(self) -> None:
+        """Close the spill file, removing it if it was temporary."""
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+            if self._temp_spill and self._spill_path is not None:
+                self._spill_path.unlink(missing_ok=True)
+                self._spill_path = None
+
+
+def format_stored(result: StoredResult, offset: int = 0, limit: int = _PAGE_ROWS, note: str = "") -> str:
+    """Render a page of *result* with its handle and shape."""
+    total = len(result.rows)
+    page = result.rows[offset:offset + limit]
+    header = f"Result `{result.handle}`: {result.shape()}"
+    if result.truncated:
+        header += " [incomplete: the query hit the row/byte cap]"
+    if note:
+        header += f"\n{note}"
+    if not page:
+        return f"{header}\n(no rows at offset {offset})"
+    header += f"\nRows {offset + 1}-{offset + len(page)} of {total}:"
+    return f"{header}\n\n{QueryResult(columns=result.columns, rows=page).to_text(max_rows=limit)}"
+
+
+def profile_stored(result: StoredResult) -> str:
+    """Render the per-column profile of all of *result*'s rows."""
+    columnar = ColumnarResult.from_rows(result.columns, result.rows)
+    return format_profile(columnar.profile(), len(result.rows))
+
+
+_FILTER_OPS = ("=", "!=", ">", ">=", "<", "<=", "contains", "is_null", "not_null")
+_AGGREGATES = ("count", "sum", "avg", "min", "max")
+
+
+class QueryResultTool(Tool):
+    """Page through, filter, sort or aggregate a result stored by query_execute."""
+
+    def __init__(self, store: ResultStore) -> None:
+        self._store = store
+
+    @property
+    def name(self) -> str:
+        return "query_result"
+
+    @property
+    def read_only(self) -> bool:
+        return True
+
+    @property
+    def description(self) -> str:
+        return (
+            "Work with a result stored by query_execute (by its handle, e.g. 'r3') without re-running the query. "
+            "Actions: page (rows at offset/limit), "
+            "filter (keep rows where column op value), "
+            "sort (by column, optionally descending), "
+            "aggregate (metrics such as 'count', 'sum:amount', 'avg:price', optionally per group_by columns), "
+            "profile (per-column counts, nulls, distinct and top values, min/max, mean and quartiles). "
+            "filter, sort and aggregate store their output under a new handle."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "handle": {"type": "string", "description": "Result handle returned by query_execute."},
+                "action": {
+                    "type": "string",
+                    "enum": ["page", "filter", "sort", "aggregate", "profile"],
+                    "description": "What to do with the stored result.",
+                },
+                "offset": {"type": "integer", "minimum": 0, "description": "First row to show (page)."},
+                "limit": {
+                    "type": "integer", "minimum": 1, "maximum": _MAX_PAGE_ROWS,
+                    "description": f"Rows to show (default {_PAGE_ROWS}).",
+                },
+                "column": {"type": "string", "description": "Column to filter or sort on."},
+                "op": {"type": "string", "enum": list(_FILTER_OPS), "description": "Filter operator."},
+                "value": {"type": "string", "description": "Filter operand (numbers compare numerically)."},
+                "descending": {"type": "boolean", "description": "Sort descending (sort)."},
+                "group_by": {
+                    "type": "array", "items": {"type": "string"},
+                    "description": "Columns to group by (aggregate).",
+                },
+                "metrics": {
+                    "type": "array", "items": {"type": "string"},
+                    "description": "Aggregates: 'count' or '<fn>:<column>' with fn in sum, avg, min, max.",
+                },
+            },
+            "required": ["handle", "action"],
+        }
+
+    async def execute(
+        self,
+        handle: str,
+        action: str,
+        offset: int = 0,
+        limit: int = _PAGE_ROWS,
+        column: str = "",
+        op: str = "=",
+        value: Any = None,
+        descending: bool = False,
+        group_by: list[str] | None = None,
+        metrics: list[str] | None = None,
+        **kwargs: Any,
+    ) -> str:
+        result = await self._store.get(handle)
+        if result is None:
+            return f"Error: no stored result '{handle}' (it may have expired). Re-run the query with query_execute."
+        limit = min(limit, _MAX_PAGE_ROWS)
+        try:
+            match action:
+                case "page":
+                    return format_stored(result, offset, limit)
+                case "profile":
+                    return f"Result `{result.handle}`: {result.shape()}\n{profile_stored(result)}"
+                case "filter":
+                    idx = self._column(result, column)
+                    rows = [row for row in result.rows if _matches(row[idx], op, value)]
+                    source = f"{result.handle} where {column} {op} {value!r}"
+                    return await self._derived(result, result.columns, rows, source, limit)
+                case "sort":
+                    idx = self._column(result, column)
+                    rows = _sorted(result.rows, idx, descending)
+                    source = f"{result.handle} sorted by {column}{' desc' if descending else ''}"
+                    return await self._derived(result, result.columns, rows, source, limit)
+                case "aggregate":
+                    columns, rows = self._aggregate(result, group_by or [], metrics or ["count"])
+                    return await self._derived(result, columns, rows, f"aggregate of {result.handle}", limit)
+                case _:
+                    return f"Error: unknown action '{action}'."
+        except ValueError as e:
+            return f"Error: {e}"
+
+    async def _derived(
+        self, parent: StoredResult, columns: list[str], rows: list[tuple], source: str, limit: int,
+    ) -> str:
+        stored = await self._store.put(columns, rows, source, truncated=parent.truncated)
+        return format_stored(stored, 0, limit, note=f"Derived: {source}")
+
+    @staticmethod
+    def _column(result: StoredResult, column: str) -> int:
+        if column not in result.columns:
+            raise ValueError(f"unknown column '{column}'. Columns: {', '.join(result.columns)}")
+        return result.columns.index(column)
+
+    def _aggregate(
+        self, result: StoredResult, group_by: list[str], metrics: list[str],
+    ) -> tuple[list[str], list[tuple]]:
+        keys = [self._column(result, c) for c in group_by]
+        specs: list[tuple[str, int | None, str]] = []
+        for metric in metrics:
+            fn, _, col = metric.partition(":")
+            fn = fn.strip().lower()
+            if fn not in _AGGREGATES:
+                raise ValueError(f"unknown aggregate '{fn}'; use one of {', '.join(_AGGREGATES)}")
+            if fn != "count" and not col:
+                raise ValueError(f"'{fn}' needs a column, e.g. '{fn}:amount'")
+            specs.append((fn, self._column(result, col) if col else None, metric))
+
+        groups: dict[tuple, list[tuple]] = {}
+        for row in result.rows:
+            groups.setdefault(tuple(row[i] for i in keys), []).append(row)
+        out = [
+            key + tuple(_aggregate([r[idx] for r in rows] if idx is not None else rows, fn) for fn, idx, _ in specs)
+            for key, rows in groups.items()
+        ]
+        return group_by + [m for _, _, m in specs], out
+
+
+def _number(v: Any) -> float | None:
+    if isinstance(v, bool) or v is None:
+        return None
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _matches(cell: Any, op: str, value: Any) -> bool:
+    if op == "is_null":
+        return cell is None
+    if op == "not_null":
+        return cell is not None
+    if cell is None:
+        return False
+    if op == "contains":
+        return str(value).lower() in str(cell).lower()
+    a, b = _number(cell), _number(value)
+    if a is None or b is None:
+        a, b = str(cell), str(value)
+    match op:
+        case "=":
+            return a == b
+        case "!=":
+            return a != b
+        case ">":
+            return a > b
+        case ">=":
+            return a >= b
+        case "<":
+            return a < b
+        case "<=":
+            return a <= b
+    raise ValueError(f"unknown operator '{op}'")
+
+
+def _sorted(rows: list[tuple], idx: int, descending: bool) -> list[tuple]:
+    present = [r for r in rows if r[idx] is not None]
+    missing = [r for r in rows if r[idx] is None]
+    try:
+        present.sort(key=lambda r: r[idx], reverse=descending)
+    except TypeError:  # mixed types: fall back to text order
+        present.sort(key=lambda r: str(r[idx]), reverse=descending)
+    return present + missing  # NULLs last either way
+
+
+def _aggregate(values: list[Any], fn: str) -> Any:
+    if fn == "count":
+        return len(values)
+    present = [v for v in values if v is not None]
+    if fn in ("min", "max"):
+        if not present:
+            return None
+        try:
+            return min(present) if fn == "min" else max(present)
+        except TypeError:
+            return (min if fn == "min" else max)(present, key=str)
+    numbers = [_number(v) for v in present]
+    if any(n is None for n in numbers):
+        raise ValueError(f"'{fn}' needs numeric values")
+    if not numbers:
+        return None
+    total = sum(numbers)
+    return round(total / len(numbers), 6) if fn == "avg" else total
@@ -4,26 +4,37 @@ from __future__ import annotations
 
 from typing import Any
 
-from queryclaw.db.base import SQLAdapter
+from queryclaw.db.base import ColumnInfo, ForeignKeyInfo, IndexInfo, SQLAdapter
+from queryclaw.db.schema_cache import SchemaCache
 from queryclaw.tools.base import Tool
 
+MAX_DESCRIBE_TABLES = 50
+
 
 class SchemaInspectTool(Tool):
     """Inspect database schema: list tables, describe columns, indexes, foreign keys."""
 
-    def __init__(self, db: SQLAdapter) -> None:
+    def __init__(self, db: SQLAdapter, schema_cache: SchemaCache | None = None) -> None:
         self._db = db
+        # Metadata lookups go through the shared cache when one is provided.
+        self._meta: SQLAdapter | SchemaCache = schema_cache or db
 
     @property
     def name(self) -> str:
         return "schema_inspect"
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
         return (
             "Inspect the database schema. Actions: "
             "list_tables (show all tables with row counts), "
             "describe_table (show columns for a table), "
+            "describe_tables (columns, indexes and foreign keys for several tables in one call; "
+            "pass 'tables', or omit it for every table), "
             "list_indexes (show indexes for a table), "
             "list_foreign_keys (show foreign keys for a table)."
         )
@@ -35,18 +46,31 @@ class SchemaInspectTool(Tool):
             "properties": {
                 "action": {
                     "type": "string",
-                    "enum": ["list_tables", "describe_table", "list_indexes", "list_foreign_keys"],
+                    "enum": [
+                        "list_tables", "describe_table", "describe_tables",
+                        "list_indexes", "list_foreign_keys",
+                    ],
                     "description": "The inspection action to perform.",
                 },
                 "table": {
                     "type": "string",
                     "description": "Table name (required for describe_table, list_indexes, list_foreign_keys).",
                 },
+                "tables": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": (
+                        f"Table names for describe_tables (at most {MAX_DESCRIBE_TABLES}). "
+                        "Omit to describe every table."
+                    ),
+                },
             },
             "required": ["action"],
         }
 
-    async def execute(self, action: str, table: str = "", **kwargs: Any) -> str:
+    async def execute(
+        self, action: str, table: str = "", tables: list[str] | None = None, **kwargs: Any,
+    ) -> str:
         try:
             match action:
                 case "list_tables":
@@ -55,6 +79,8 @@ class SchemaInspectTool(Tool):
                     if not table:
                         return "Error: 'table' parameter is required for describe_table."
                     return await self._describe_table(table)
+                case "describe_tables":
+                    return await self._describe_tables(tables)
                 case "list_indexes":
                     if not table:
                         return "Error: 'table' parameter is required for list_indexes."
@@ -69,7 +95,7 @@ class SchemaInspectTool(Tool):
             return f"Error: {e}"
 
     async def _list_tables(self) -> str:
-        tables = await self._db.get_tables()
+        tables = await self._meta.get_tables()
         if not tables:
             return "No tables found in the database."
         lines = [f"Tables in database ({len(tables)}):"]
@@ -83,42 +109,81 @@ class SchemaInspectTool(Tool):
         return "\n".join(lines)
 
     async def _describe_table(self, table: str) -> str:
-        columns = await self._db.get_columns(table)
+        columns = await self._meta.get_columns(table)
         if not columns:
             return f"No columns found for table '{table}' (table may not exist)."
-        lines = [f"Columns in '{table}' ({len(columns)}):"]
-        lines.append("")
-        lines.append(f"{'Column':<25} {'Type':<20} {'Null':>5} {'Key':>5} {'Default':<15} {'Extra':<15}")
-        lines.append("-" * 90)
-        for c in columns:
-            null = "YES" if c.nullable else "NO"
-            key = "PRI" if c.is_primary_key else ""
-            default = str(c.default) if c.default is not None else ""
-            lines.append(f"{c.name:<25} {c.data_type:<20} {null:>5} {key:>5} {default:<15} {c.extra:<15}")
-        return "\n".join(lines)
+        return _format_columns(table, columns)
+
+    async def _describe_tables(self, tables: list[str] | None) -> str:
+        if tables is not None and len(tables) > MAX_DESCRIBE_TABLES:
+            return (
+                f"Error: describe_tables accepts at most {MAX_DESCRIBE_TABLES} tables "
+                f"({len(tables)} given); split the request."
+            )
+        snapshot = await self._meta.get_schema_snapshot(tables)
+        if not snapshot:
+            return "No matching tables found."
+        if tables is None and len(snapshot) > MAX_DESCRIBE_TABLES:
+            return (
+                f"Error: the database has {len(snapshot)} tables; pass at most "
+                f"{MAX_DESCRIBE_TABLES} names in 'tables'."
+            )
+        sections: list[str] = []
+        for name, ts in snapshot.items():
+            section = [_format_columns(name, ts.columns)]
+            if ts.indexes:
+                section.append(_format_indexes(name, ts.indexes))
+            if ts.foreign_keys:
+                section.append(_format_foreign_keys(name, ts.foreign_keys))
+            sections.append("\n\n".join(section))
+        missing = [t for t in tables or [] if t not in snapshot]
+        if missing:
+            sections.append(f"Not found: {', '.join(missing)}")
+        return "\n\n\n".join(sections)
 
     async def _list_indexes(self, table: str) -> str:
-        indexes = await self._db.get_indexes(table)
+        indexes = await self._meta.get_indexes(table)
         if not indexes:
             return f"No indexes found for table '{table}'."
-        lines = [f"Indexes on '{table}' ({len(indexes)}):"]
-        lines.append("")
-        lines.append(f"{'Index':<30} {'Columns':<30} {'Unique':>6} {'Type':<10}")
-        lines.append("-" * 80)
-        for idx in indexes:
-            cols = ", ".join(idx.columns)
-            unique = "YES" if idx.unique else "NO"
-            lines.append(f"{idx.name:<30} {cols:<30} {unique:>6} {idx.type:<10}")
-        return "\n".join(lines)
+        return _format_indexes(table, indexes)
 
     async def _list_foreign_keys(self, table: str) -> str:
-        fks = await self._db.get_foreign_keys(table)
+        fks = await self._meta.get_foreign_keys(table)
         if not fks:
             return f"No foreign keys found for table '{table}'."
-        lines = [f"Foreign keys on '{table}' ({len(fks)}):"]
-        lines.append("")
-        for fk in fks:
-            cols = ", ".join(fk.columns)
-            ref_cols = ", ".join(fk.ref_columns)
-            lines.append(f"  {fk.name}: ({cols}) -> {fk.ref_table}({ref_cols})")
-        return "\n".join(lines)
+        return _format_foreign_keys(table, fks)
+
+
+def _format_columns(table: str, columns: list[ColumnInfo]) -> str:
+    lines = [f"Columns in '{table}' ({len(columns)}):"]
+    lines.append("")
+    lines.append(f"{'Column':<25} {'Type':<20} {'Null':>5} {'Key':>5} {'Default':<15} {'Extra':<15}")
+    lines.append("-" * 90)
+    for c in columns:
+        null = "YES" if c.nullable else "NO"
+        key = "PRI" if c.is_primary_key else ""
+        default = str(c.default) if c.default is not None else ""
+        lines.append(f"{c.name:<25} {c.data_type:<20} {null:>5} {key:>5} {default:<15} {c.extra:<15}")
+    return "\n".join(lines)
+
+
+def _format_indexes(table: str, indexes: list[IndexInfo]) -> str:
+    lines = [f"Indexes on '{table}' ({len(indexes)}):"]
+    lines.append("")
+    lines.append(f"{'Index':<30} {'Columns':<30} {'Unique':>6} {'Type':<10}")
+    lines.append("-" * 80)
+    for idx in indexes:
+        cols = ", ".join(idx.columns)
+        unique = "YES" if idx.unique else "NO"
+        lines.append(f"{idx.name:<30} {cols:<30} {unique:>6} {idx.type:<10}")
+    return "\n".join(lines)
+
+
+def _format_foreign_keys(table: str, fks: list[ForeignKeyInfo]) -> str:
+    lines = [f"Foreign keys on '{table}' ({len(fks)}):"]
+    lines.append("")
+    for fk in fks:
+        cols = ", ".join(fk.columns)
+        ref_cols = ", ".join(fk.ref_columns)
+        lines.append(f"  {fk.name}: ({cols}) -> {fk.ref_table}({ref_cols})")
+    return "\n".join(lines)
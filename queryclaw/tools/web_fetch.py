@@ -34,6 +34,10 @@ class WebFetchTool(Tool):
     def name(self) -> str:
         return "web_fetch"
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
         return (
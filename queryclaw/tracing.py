@@ -0,0 +1,359 @@
+"""Request tracing: nested, timed spans exported to a rotating JSONL file and optionally OTLP.
+
+Tracing is off until ``configure()`` is called. While off, ``span()``
+returns a shared no-op object, so instrumented code pays one global
+lookup per span. Attributes that cost something to compute should be set
+behind ``if span:`` (the no-op span is falsy).
+
+A span opened with no parent starts a new trace; spans opened inside it,
+including in tasks it spawns, share its trace id.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import Any
+
+import httpx
+from loguru import logger
+
+DEFAULT_TRACE_PATH = "~/.queryclaw/traces/traces.jsonl"
+_OTLP_BATCH = 256
+_OTLP_INTERVAL = 5.0
+_OTLP_TIMEOUT = 10.0
+_SQL_CHARS = 300
+_JSONL_BATCH = 256
+
+_current: ContextVar[Span | None] = ContextVar("queryclaw_span", default=None)
+_tracer: Tracer | None = None
+
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+_SQL_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SQL_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def sql_fingerprint(sql: str, dialect: str = "") -> str:
+    """*sql* with literals replaced by ``?``, so statements group by shape and carry no data.
+
+    Double-quoted text is a string in MySQL (and may be one in SQLite), so
+    it is masked too, except for PostgreSQL, where it quotes identifiers.
+    """
+    strings = _SQL_STRING if dialect == "postgresql" else _SQL_QUOTED
+    text = _SQL_NUMBER.sub("?", strings.sub("?", sql))
+    text = _SQL_LIST.sub("(?+)", " ".join(text.split()))
+    return text if len(text) <= _SQL_CHARS else text[:_SQL_CHARS] + "..."
+
+
+class Span:
+    """One timed operation. Use as a context manager; add attributes with ``set``."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attrs", "start_ns", "duration_ms",
+                 "status", "_tracer", "_t0", "_token")
+
+    def __init__(self, tracer: Tracer, name: str, trace_id: str, parent_id: str | None, attrs: dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.start_ns = 0
+        self.duration_ms = 0.0
+        self.status = "ok"
+        self._tracer = tracer
+        self._t0 = 0
+        self._token: Token | None = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> Span:
+        self.start_ns = time.time_ns()
+        self._t0 = time.perf_counter_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.duration_ms = round((time.perf_counter_ns() - self._t0) / 1e6, 3)
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            pass  # closed from another context (e.g. an async generator finalized elsewhere)
+        if exc_type is not None:
+            self.status = "cancelled" if exc_type.__name__ == "CancelledError" else "error"
+            self.attrs.setdefault("error", f"{exc_type.__name__}: {exc}"[:300])
+        self._tracer.export(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attrs": self.attrs,
+        }
+
+
+class _NoopSpan:
+    """Returned by ``span()`` while tracing is off."""
+
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, trace_id: str | None = None, **attrs: Any) -> Span | _NoopSpan:
+    """Open a span under the current one; *trace_id* joins an existing trace from elsewhere."""
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP
+    parent = _current.get()
+    if trace_id is None:
+        trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+    parent_id = parent.span_id if parent is not None and parent.trace_id == trace_id else None
+    return Span(tracer, name, trace_id, parent_id, attrs)
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def annotate(**attrs: Any) -> None:
+    """Add attributes to the innermost open span, if tracing is on."""
+    current = _current.get() if _tracer is not None else None
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def current_trace_id() -> str | None:
+    current = _current.get()
+    return current.trace_id if current is not None else None
+
+
+class JsonlExporter:
+    """Appends one JSON object per span, rotating to ``.1`` ... ``.N`` at *max_bytes*.
+
+    Spans are written and flushed in batches on a background thread, so
+    exporting never blocks the event loop on disk I/O.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int = 10_000_000, backups: int = 5) -> None:
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = self.path.open("a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._queue: queue.Queue[dict[str, Any] | None] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="queryclaw-jsonl", daemon=True)
+        self._thread.start()
+
+    def export(self, record: dict[str, Any]) -> None:
+        self._queue.put(record)
+
+    def flush(self) -> None:
+        """Wait until every span exported so far is on disk."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while len(batch) < _JSONL_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for record in batch:
+                    if record is None:
+                        stop = True
+                        break
+                    self._write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                self._file.flush()
+            except Exception as e:
+                logger.warning("Writing {} spans to {} failed: {}", len(batch), self.path, e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, line: str) -> None:
+        if self._size and self._size + len(line) > self.max_bytes:
+            self._rotate()
+        self._file.write(line)
+        self._size += len(line)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{i}")
+            if older.exists():
+                older.replace(self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups > 0:
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink(missing_ok=True)
+        self._file = self.path.open("a", encoding="utf-8")
+        self._size = 0
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpExporter:
+    """Sends spans to an OTLP/HTTP collector as JSON, batched on a background thread.
+
+    Needs no OpenTelemetry SDK. Export errors are logged and the batch is
+    dropped, so a collector outage never slows requests down.
+    """
+
+    def __init__(self, endpoint: str, headers: dict[str, str] | None = None, service: str = "queryclaw") -> None:
+        self.endpoint = endpoint if endpoint.rstrip("/").endswith("/v1/traces") else endpoint.rstrip("/") + "/v1/traces"
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.service = service
+        self._queue: queue.Queue[dict[str, Any] | None] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="queryclaw-otlp", daemon=True)
+        self._thread.start()
+
+    def export(self, record: dict[str, Any]) -> None:
+        self._queue.put(record)
+
+    def _run(self) -> None:
+        with httpx.Client(timeout=_OTLP_TIMEOUT) as client:
+            stop = False
+            while not stop:
+                batch: list[dict[str, Any]] = []
+                deadline = time.monotonic() + _OTLP_INTERVAL
+                while len(batch) < _OTLP_BATCH:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                if batch:
+                    self._post(client, batch)
+
+    def _post(self, client: httpx.Client, batch: list[dict[str, Any]]) -> None:
+        spans = [
+            {
+                "traceId": r["trace_id"],
+                "spanId": r["span_id"],
+                **({"parentSpanId": r["parent_id"]} if r["parent_id"] else {}),
+                "name": r["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(int(r["start"] * 1e9)),
+                "endTimeUnixNano": str(int(r["start"] * 1e9 + r["duration_ms"] * 1e6)),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in r["attrs"].items()],
+                "status": {"code": 1 if r["status"] == "ok" else 2},
+            }
+            for r in batch
+        ]
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service}}]},
+                "scopeSpans": [{"scope": {"name": "queryclaw"}, "spans": spans}],
+            }],
+        }
+        try:
+            client.post(self.endpoint, json=payload, headers=self.headers).raise_for_status()
+        except Exception as e:
+            logger.warning("OTLP export of {} spans failed: {}", len(spans), e)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=_OTLP_TIMEOUT)
+
+
+class Tracer:
+    """Hands finished spans to the exporters."""
+
+    def __init__(self, exporters: list[Any]) -> None:
+        self.exporters = exporters
+
+    def export(self, finished: Span) -> None:
+        record = finished.to_dict()
+        for exporter in self.exporters:
+            try:
+                exporter.export(record)
+            except Exception as e:
+                logger.debug("Span export failed: {}", e)
+
+    def flush(self) -> None:
+        for exporter in self.exporters:
+            if hasattr(exporter, "flush"):
+                exporter.flush()
+
+    def close(self) -> None:
+        for exporter in self.exporters:
+            exporter.close()
+
+
+def configure(
+    path: str | Path | None = DEFAULT_TRACE_PATH,
+    max_bytes: int = 10_000_000,
+    backups: int = 5,
+    otlp_endpoint: str = "",
+    otlp_headers: dict[str, str] | None = None,
+) -> Tracer:
+    """Turn tracing on, replacing any previous configuration."""
+    global _tracer
+    shutdown()
+    exporters: list[Any] = []
+    if path:
+        exporters.append(JsonlExporter(path, max_bytes=max_bytes, backups=backups))
+    if otlp_endpoint:
+        exporters.append(OtlpExporter(otlp_endpoint, otlp_headers))
+    _tracer = Tracer(exporters)
+    return _tracer
+
+
+def flush() -> None:
+    """Wait until the spans finished so far are written to the JSONL file."""
+    if _tracer is not None:
+        _tracer.flush()
+
+
+def shutdown() -> None:
+    """Turn tracing off and flush and close the exporters."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()
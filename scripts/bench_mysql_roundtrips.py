@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Benchmark: MySQL protocol round trips per tool call, before/after idle-aware health checks.
+
+Runs without a MySQL server: aiomysql.connect and aiomysql.SSCursor are replaced
+by a fake connection and cursor that count COM_QUERY and COM_PING packets. "before" replays the previous
+behaviour (a `SELECT 1` probe before every statement, plus an extra probe in
+the introspection methods); "after" is the current MySQLAdapter.
+
+Usage: python scripts/bench_mysql_roundtrips.py
+"""
+import asyncio
+import json
+import sys
+from unittest import mock
+
+from queryclaw.db.mysql import MySQLAdapter
+from queryclaw.tools.explain import ExplainPlanTool
+from queryclaw.tools.query import QueryExecuteTool
+from queryclaw.tools.schema import SchemaInspectTool
+
+
+class CountingCursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self.description = None
+        self.rowcount = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    async def execute(self, sql, params=()):
+        self._conn.round_trips += 1
+        self.description = (("c1",), ("c2",), ("c3",), ("c4",), ("c5",), ("c6",))
+
+    async def fetchall(self):
+        return [("t", 1, "InnoDB", None, "", "")]
+
+    async def fetchmany(self, size):
+        return (await self.fetchall())[:size]
+
+    async def close(self):
+        return None
+
+
+class CountingConn:
+    def __init__(self):
+        self.closed = False
+        self.round_trips = 0
+
+    def cursor(self):
+        return CountingCursor(self)
+
+    async def ping(self, reconnect=True):
+        self.round_trips += 1
+
+    def close(self):
+        self.closed = True
+
+
+class LegacyProbeAdapter(MySQLAdapter):
+    """Reproduces the old `SELECT 1` before every statement."""
+
+    async def _ensure_connected(self) -> None:
+        async with self._conn.cursor() as cur:
+            await cur.execute("SELECT 1")
+
+    async def execute(self, sql, params=None):
+        await self._ensure_connected()
+        return await self._execute_once(sql, params)
+
+    async def get_tables(self):
+        await self._ensure_connected()
+        return await super().get_tables()
+
+    async def get_columns(self, table):
+        await self._ensure_connected()
+        return await super().get_columns(table)
+
+    async def explain(self, sql):
+        await self._ensure_connected()
+        return await super().explain(sql)
+
+
+TOOL_CALLS = [
+    ("schema_inspect", {"action": "list_tables"}),
+    ("schema_inspect", {"action": "describe_table", "table": "t"}),
+    ("query_execute", {"sql": "SELECT * FROM t"}),
+    ("explain_plan", {"sql": "SELECT * FROM t WHERE id = 1"}),
+]
+
+
+async def measure(adapter_cls) -> dict:
+    conn = CountingConn()
+
+    async def fake_connect(**kwargs):
+        return conn
+
+    with mock.patch("aiomysql.connect", fake_connect):
+        adapter = adapter_cls()
+        await adapter.connect(database="bench", keepalive_interval=0)
+    tools = {
+        "schema_inspect": SchemaInspectTool(adapter),
+        "query_execute": QueryExecuteTool(adapter),
+        "explain_plan": ExplainPlanTool(adapter),
+    }
+    per_call = {}
+    with mock.patch("aiomysql.SSCursor", CountingCursor):
+        for name, args in TOOL_CALLS:
+            before = conn.round_trips
+            result = await tools[name].execute(**args)
+            label = f"{name}:{args.get('action', 'sql')}"
+            if result.startswith("Error"):
+                # A failed call makes fewer round trips; counting it would skew the numbers.
+                raise RuntimeError(f"{adapter_cls.__name__} {label} failed: {result}")
+            per_call[label] = conn.round_trips - before
+    await adapter.close()
+    total = sum(per_call.values())
+    return {"per_tool_call": per_call, "total": total, "mean": round(total / len(TOOL_CALLS), 2)}
+
+
+async def main() -> int:
+    report = {
+        "before": await measure(LegacyProbeAdapter),
+        "after": await measure(MySQLAdapter),
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,16 +1,27 @@
 """Tests for agent core: memory, context, and loop."""
 
+import asyncio
+
 import pytest
 import pytest_asyncio
 from typing import Any
 from unittest.mock import AsyncMock
 
+from queryclaw.agent.budget import ContextBudget, TokenCounter, TranscriptView
 from queryclaw.agent.memory import MemoryStore
+from queryclaw.agent.model_routing import ModelRouter
+from queryclaw.agent.sessions import SessionStore
 from queryclaw.agent.context import ContextBuilder
+from queryclaw.agent.prefetch import SchemaPrefetcher, tokenize
 from queryclaw.agent.loop import AgentLoop
 from queryclaw.agent.skills import SkillsLoader
+from queryclaw.agent.usage import TurnUsage, UsageStore
+from queryclaw.bus.events import InboundMessage
+from queryclaw.bus.queue import MessageBus
+from queryclaw.db.schema_cache import SchemaCache
 from queryclaw.db.sqlite import SQLiteAdapter
-from queryclaw.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from queryclaw.providers.base import LLMProvider, LLMResponse, LLMStreamChunk, ToolCallRequest
+from queryclaw.safety.policy import SafetyPolicy
 
 
 # -- Memory -------------------------------------------------------------------
@@ -119,11 +130,83 @@ class TestContextBuilder:
         history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
         messages = await ctx.build_messages(history, "show me all products")
         assert messages[0]["role"] == "system"
-        assert messages[1]["role"] == "user"
-        assert messages[1]["content"] == "hi"
+        assert messages[1]["role"] == "system"
+        assert "products" in messages[1]["content"]
+        assert messages[2]["role"] == "user"
+        assert messages[2]["content"] == "hi"
         assert messages[-1]["role"] == "user"
         assert messages[-1]["content"] == "show me all products"
 
+    async def test_stable_prompt_has_no_volatile_parts(self, db_with_data):
+        ctx = ContextBuilder(db_with_data)
+        stable = ctx.build_stable_prompt()
+        assert "Current time" not in stable
+        assert "products" not in stable
+        ctx.invalidate_schema_cache()
+        assert ctx.build_stable_prompt() == stable
+        assert "Current time" in await ctx.build_session_context()
+
+    async def test_summary_message(self, db_with_data):
+        ctx = ContextBuilder(db_with_data)
+        messages = await ctx.build_messages([], "next", summary="user asked about products")
+        assert messages[2]["role"] == "system"
+        assert "user asked about products" in messages[2]["content"]
+        assert messages[3] == {"role": "user", "content": "next"}
+
+    async def test_schema_token_budget(self, db_with_data):
+        for i in range(20):
+            await db_with_data.execute(f"CREATE TABLE t{i} (id INTEGER)")
+        ctx = ContextBuilder(db_with_data, schema_token_budget=50, count_tokens=lambda s: 10)
+        summary = await ctx.build_session_context()
+        assert "more tables" in summary
+        assert summary.count("\n  - ") == 6
+
+    async def test_schema_prefetch(self, db_with_data):
+        await db_with_data.execute("CREATE TABLE order_items (id INTEGER PRIMARY KEY, qty INTEGER)")
+        await db_with_data.execute("CREATE TABLE audit_log (id INTEGER PRIMARY KEY, note TEXT)")
+        cache = SchemaCache(db_with_data)
+        ctx = ContextBuilder(db_with_data, schema_cache=cache, prefetcher=SchemaPrefetcher(cache, len))
+
+        english = await ctx.build_session_context("What are our most expensive products?")
+        assert "products(id INTEGER PK, name TEXT, price REAL)" in english
+        assert "order_items(" not in english and "audit_log(" not in english
+
+        chinese = await ctx.build_session_context("每个订单有多少件商品？")
+        assert "products(" in chinese and "order_items(" in chinese
+
+        assert "products(" in await ctx.build_session_context("list all prodcts")
+        assert "(no need to `schema_inspect`" not in await ctx.build_session_context("hello there")
+
+    async def test_schema_prefetch_token_budget(self, db_with_data):
+        cache = SchemaCache(db_with_data)
+        prefetcher = SchemaPrefetcher(cache, len, token_budget=100)
+        assert await prefetcher.prefetch("product prices") == ""
+        prefetcher.token_budget = 500
+        assert "products(" in await prefetcher.prefetch("product prices")
+        assert prefetcher.prefetched == 1
+
+    async def test_schema_prefetch_uses_one_bulk_call(self, db_with_data, monkeypatch):
+        await db_with_data.execute("CREATE TABLE product_tags (id INTEGER PRIMARY KEY, tag TEXT)")
+        snapshots: list[list[str]] = []
+        bulk = db_with_data.get_schema_snapshot
+
+        async def get_schema_snapshot(tables=None):
+            snapshots.append(tables)
+            return await bulk(tables)
+
+        async def no_per_table_calls(table):
+            raise AssertionError("per-table column lookups would share the single connection")
+
+        monkeypatch.setattr(db_with_data, "get_schema_snapshot", get_schema_snapshot)
+        monkeypatch.setattr(db_with_data, "get_columns", no_per_table_calls)
+        block = await SchemaPrefetcher(SchemaCache(db_with_data), len).prefetch("product tags")
+        assert "product_tags(" in block and "products(" in block
+        assert len(snapshots) == 1 and set(snapshots[0]) == {"product_tags", "products"}
+
+    async def test_tokenize(self):
+        assert tokenize("orderItems and user_categories") == {"order", "item", "and", "user", "category"}
+        assert {"用户", "user", "订单", "order"} <= tokenize("用户订单")
+
     async def test_skills_in_prompt(self, db_with_data):
         ctx = ContextBuilder(db_with_data)
         prompt = await ctx.build_system_prompt()
@@ -132,6 +215,152 @@ class TestContextBuilder:
         assert "read_file" not in prompt
 
 
+# -- Session store --------------------------------------------------------------
+
+@pytest.mark.asyncio
+class TestSessionStore:
+    async def test_lru_eviction_spills_and_reloads(self, tmp_path):
+        store = SessionStore(max_sessions=2, spill_path=tmp_path / "spill.db")
+        for key in ("a", "b", "c"):
+            async with store.session(key) as memory:
+                memory.add("user", f"hello from {key}")
+        assert store.stats() == {"live": 2, "evictions": 1, "reloads": 0}
+
+        async with store.session("a") as memory:
+            assert memory.get_recent() == [{"role": "user", "content": "hello from a"}]
+        assert store.stats() == {"live": 2, "evictions": 2, "reloads": 1}
+        await store.close()
+        assert (tmp_path / "spill.db").exists()
+
+    async def test_persistent_spill_survives_restart(self, tmp_path):
+        store = SessionStore(max_sessions=1, spill_path=tmp_path / "spill.db")
+        for key in ("a", "b"):
+            async with store.session(key) as memory:
+                memory.add("user", f"hello from {key}")
+        await store.close()
+
+        restarted = SessionStore(spill_path=tmp_path / "spill.db")
+        async with restarted.session("a") as memory:
+            assert memory.get_recent() == [{"role": "user", "content": "hello from a"}]
+        assert restarted.stats()["reloads"] == 1
+        await restarted.close()
+
+    async def test_idle_ttl(self):
+        store = SessionStore(idle_ttl=0.01)
+        async with store.session("a") as memory:
+            memory.add("user", "hi")
+            memory.summary = "earlier"
+        await asyncio.sleep(0.03)
+        await store.evict_idle()
+        assert store.live == 0
+        async with store.session("a") as memory:
+            assert memory.message_count == 1
+            assert memory.summary == "earlier"
+        spill = store._spill_path
+        await store.close()
+        assert not spill.exists()
+
+    async def test_session_in_use_is_not_evicted(self):
+        store = SessionStore(max_sessions=1)
+        async with store.session("busy") as busy:
+            async with store.session("other"):
+                pass
+            busy.add("user", "still here")
+            assert store.live == 1
+        async with store.session("busy") as memory:
+            assert memory.message_count == 1
+        assert store.reloads == 0
+        await store.close()
+
+
+# -- Token budget ---------------------------------------------------------------
+
+def _chars(n: int) -> str:
+    return "x" * n
+
+
+class TestTranscriptView:
+    counter = TokenCounter(len)  # one token per character keeps the arithmetic obvious
+
+    def _run(self, n_tools: int, budget: int) -> tuple[list[dict], TranscriptView]:
+        """A turn with one earlier exchange in history and *n_tools* tool rounds."""
+        messages = [
+            {"role": "system", "content": "sys"},
+            {"role": "user", "content": "old question"},
+            {"role": "assistant", "content": _chars(1000)},
+            {"role": "user", "content": "now"},
+        ]
+        view = TranscriptView(messages, budget, self.counter)
+        for i in range(n_tools):
+            messages.append({"role": "assistant", "content": None, "reasoning_content": _chars(200),
+                             "tool_calls": [{"id": str(i)}]})
+            messages.append({"role": "tool", "tool_call_id": str(i), "name": "q", "content": _chars(2000)})
+        return messages, view
+
+    def test_under_budget_untouched(self):
+        messages, view = self._run(2, 100_000)
+        assert view.fit() == messages
+
+    def test_compacts_oldest_first_and_keeps_tail(self):
+        messages, view = self._run(6, 9_000)
+        fitted = view.fit()
+        assert view.tokens <= 9_000
+        assert fitted[-6:] == messages[-6:]
+        assert fitted[2]["content"].endswith("[... truncated ...]")
+        assert fitted[4]["reasoning_content"] == ""
+        assert messages[2]["content"] == _chars(1000)  # source is not modified
+
+    def test_incremental_fit_reuses_view(self):
+        messages, view = self._run(6, 9_000)
+        first = view.fit()
+        compacted = first[5]
+        messages.append({"role": "assistant", "content": "done"})
+        second = view.fit()
+        assert second is first
+        assert second[5] is compacted
+        assert second[-1]["content"] == "done"
+
+    def test_drops_history_when_compaction_is_not_enough(self):
+        messages, view = self._run(3, 6_500)
+        fitted = view.fit()
+        assert fitted[0]["role"] == "system"
+        assert fitted[1] == {"role": "user", "content": "now"}
+
+
+@pytest.mark.asyncio
+class TestContextBudget:
+    async def test_budget_from_window_and_cap(self):
+        provider = MockProvider([LLMResponse(content="ok")])
+        assert ContextBudget(provider, "m", max_tokens=4_000).total == 28_000
+        assert ContextBudget(provider, "m", max_tokens=4_000, budget=10_000).total == 10_000
+
+    async def test_summarize_folds_oldest_turns(self):
+        provider = MockProvider([LLMResponse(content="User looked at products.")])
+        budget = ContextBudget(provider, "m", max_tokens=1_000, budget=5_000)
+        memory = MemoryStore()
+        for i in range(6):
+            memory.add("user", f"question {i} " + _chars(3_000))
+            memory.add("assistant", f"answer {i}")
+        assert await budget.summarize_history(memory)
+        assert memory.summary == "User looked at products."
+        recent = memory.get_recent()
+        assert recent[0]["role"] == "user"
+        assert recent[-1]["content"] == "answer 5"
+        assert len(recent) < 12
+        assert not await budget.summarize_history(memory)
+
+    async def test_summary_error_keeps_history(self):
+        provider = MockProvider([LLMResponse(content="Error calling LLM: down", finish_reason="error")])
+        budget = ContextBudget(provider, "m", max_tokens=1_000, budget=5_000)
+        memory = MemoryStore()
+        for i in range(6):
+            memory.add("user", _chars(3_000))
+            memory.add("assistant", "ok")
+        assert not await budget.summarize_history(memory)
+        assert memory.message_count == 12
+        assert memory.summary == ""
+
+
 # -- Agent loop (with mock provider) -----------------------------------------
 
 class MockProvider(LLMProvider):
@@ -223,6 +452,7 @@ class TestAgentLoop:
         agent = AgentLoop(provider=provider, db=agent_db)
         result = await agent.chat("What items are in the database?")
         assert "Apple" in result or "items" in result
+        assert agent.turn_stats == {"turns": 1, "iterations": 3, "schema_calls": 1}
 
     async def test_max_iterations(self, agent_db):
         """Agent stops after max_iterations even if LLM keeps calling tools."""
@@ -270,7 +500,8 @@ class TestAgentLoop:
         assert agent.tools.has("query_execute")
         assert agent.tools.has("explain_plan")
         assert agent.tools.has("spawn_subagent")
-        assert len(agent.tools) == 5
+        assert agent.tools.has("query_result")
+        assert len(agent.tools) == 6
 
     async def test_tool_names_without_subagent(self, agent_db):
         provider = MockProvider([LLMResponse(content="ok")])
@@ -280,7 +511,7 @@ class TestAgentLoop:
         assert agent.tools.has("query_execute")
         assert agent.tools.has("explain_plan")
         assert not agent.tools.has("spawn_subagent")
-        assert len(agent.tools) == 4
+        assert len(agent.tools) == 5
 
     async def test_explain_tool_integration(self, agent_db):
         """LLM calls explain_plan and gets a result."""
@@ -300,3 +531,343 @@ class TestAgentLoop:
         agent = AgentLoop(provider=provider, db=agent_db)
         result = await agent.chat("Explain this query")
         assert "efficient" in result.lower() or "primary" in result.lower()
+
+
+class StreamingProvider(MockProvider):
+    """MockProvider that streams text responses word by word."""
+
+    async def chat_stream(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        response = await self.chat(messages, tools=tools, model=model)
+        for word in response.content.split(" ") if response.content else []:
+            yield LLMStreamChunk(delta=word + " ")
+        yield LLMStreamChunk(response=response)
+
+
+@pytest.mark.asyncio
+class TestAgentLoopStream:
+    async def test_event_order(self, agent_db):
+        provider = StreamingProvider([
+            LLMResponse(
+                content=None,
+                tool_calls=[ToolCallRequest(id="c1", name="schema_inspect", arguments={"action": "list_tables"})],
+            ),
+            LLMResponse(content="Found the items table"),
+        ])
+        agent = AgentLoop(provider=provider, db=agent_db)
+        events = [e async for e in agent.chat_stream("tables?")]
+        types = [e.type for e in events]
+        assert types[:2] == ["tool_start", "tool_end"]
+        assert types[-1] == "final"
+        assert set(types[2:-1]) == {"token"}
+        assert "".join(e.content for e in events if e.type == "token").strip() == "Found the items table"
+        assert "items" in events[1].content
+        assert events[-1].content == "Found the items table"
+        assert events[-1].ttft_ms is not None
+        assert agent.memory.message_count == 2
+
+    async def test_final_is_redacted(self, agent_db):
+        provider = StreamingProvider([LLMResponse(content="connect to 192.168.1.20 now")])
+        agent = AgentLoop(provider=provider, db=agent_db)
+        events = [e async for e in agent.chat_stream("hi")]
+        assert "192.168" not in events[-1].content
+        assert "[REDACTED]" in events[-1].content
+
+
+# -- Usage accounting ---------------------------------------------------------
+
+def _tool_turn(usage: dict[str, int]) -> list[LLMResponse]:
+    return [
+        LLMResponse(
+            content=None,
+            tool_calls=[ToolCallRequest(id="c1", name="query_execute", arguments={"sql": "SELECT * FROM items"})],
+            usage=usage,
+        ),
+        LLMResponse(content="Two items.", usage=usage),
+    ]
+
+
+@pytest.mark.asyncio
+class TestUsage:
+    async def test_turn_usage_is_recorded(self, agent_db, tmp_path):
+        store = UsageStore(tmp_path / "usage.db")
+        provider = MockProvider(_tool_turn({"prompt_tokens": 100, "completion_tokens": 10, "cached_tokens": 40}))
+        agent = AgentLoop(provider=provider, db=agent_db, enable_subagent=False, usage_store=store)
+        await agent.chat("list items")
+        assert await store.spent("cli") == 220
+        (row,) = await store.report(by="session")
+        assert row["session"] == "cli"
+        assert (row["turns"], row["calls"], row["cached_tokens"]) == (1, 2, 80)
+        (tool,) = await store.report(by="tool")
+        assert tool["tool"] == "query_execute"
+        assert tool["result_tokens"] > 0
+        # The result was sent again with the second LLM call.
+        assert tool["prompt_tokens"] == tool["result_tokens"]
+        await store.close()
+
+        reopened = UsageStore(tmp_path / "usage.db")
+        assert await reopened.spent("cli") == 220
+        assert (await reopened.report(by="model"))[0]["model"] == "mock-model"
+        await reopened.close()
+
+    async def test_session_budget_stops_loop(self, agent_db):
+        provider = MockProvider(_tool_turn({"prompt_tokens": 100, "completion_tokens": 10}))
+        agent = AgentLoop(provider=provider, db=agent_db, enable_subagent=False, session_token_budget=50)
+        result = await agent.chat("list items")
+        assert "session's daily token budget of 50 tokens" in result
+        assert provider._call_count == 1
+        assert agent.usage.tokens == 110
+
+        result = await agent.chat("again")
+        assert "session's daily token budget of 50 tokens" in result
+        assert provider._call_count == 1
+
+    async def test_cron_job_budget_from_metadata(self, agent_db):
+        provider = MockProvider(_tool_turn({"prompt_tokens": 100, "completion_tokens": 10}))
+        agent = AgentLoop(provider=provider, db=agent_db, enable_subagent=False)
+        msg = InboundMessage(
+            channel="cron", sender_id="cron", chat_id="job", content="check",
+            session_key_override="cron:job", metadata={"job_id": "job", "token_budget": 100},
+        )
+        out = await agent._process_message(msg)
+        assert "job's token budget of 100 tokens per run" in out.content
+        assert await agent.usage.spent("cron:job") == 110
+
+    async def test_stop_message_names_the_tighter_budget(self, agent_db):
+        provider = MockProvider(_tool_turn({"prompt_tokens": 100, "completion_tokens": 10}))
+        agent = AgentLoop(provider=provider, db=agent_db, enable_subagent=False, session_token_budget=1000)
+        msg = InboundMessage(
+            channel="cron", sender_id="cron", chat_id="job", content="check",
+            session_key_override="cron:job", metadata={"job_id": "job", "token_budget": 100},
+        )
+        out = await agent._process_message(msg)
+        assert "job's token budget" in out.content
+        assert "daily" not in out.content
+
+    async def test_turn_usage_budget(self):
+        turn = TurnUsage("s", budget=150)
+        turn.add("m", {"prompt_tokens": 100, "completion_tokens": 20})
+        assert not turn.exhausted
+        turn.add("m", {"prompt_tokens": 30})
+        assert turn.exhausted
+        assert turn.models["m"]["calls"] == 2
+
+
+# -- Model routing ------------------------------------------------------------
+
+class ModelScriptProvider(LLMProvider):
+    """Answers from a separate script per model and records which model served each call."""
+
+    def __init__(self, scripts: dict[str, list[LLMResponse]]) -> None:
+        super().__init__()
+        self.scripts = {model: list(script) for model, script in scripts.items()}
+        self.calls: list[str] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        self.calls.append(model)
+        script = self.scripts[model]
+        return script.pop(0) if len(script) > 1 else script[0]
+
+    def get_default_model(self) -> str:
+        return "strong"
+
+
+def _call(name: str, **arguments) -> LLMResponse:
+    return LLMResponse(content=None, tool_calls=[ToolCallRequest(id=f"c_{name}", name=name, arguments=arguments)])
+
+
+@pytest.mark.asyncio
+class TestModelRouting:
+    async def test_fast_model_explores_primary_answers(self, agent_db):
+        provider = ModelScriptProvider({
+            "fast": [_call("schema_inspect", action="list_tables"), LLMResponse(content="draft")],
+            "strong": [LLMResponse(content="Final answer.")],
+        })
+        agent = AgentLoop(provider=provider, db=agent_db, fast_model="fast", enable_subagent=False)
+        assert await agent.chat("tables?") == "Final answer."
+        assert provider.calls == ["fast", "fast", "strong"]
+        assert agent.router.stats == {"fast": 2, "strong": 1, "escalated_final_answer": 1}
+        assert agent.subagent_spawner._model == "fast"
+
+    async def test_only_primary_answer_is_streamed(self, agent_db):
+        provider = ModelScriptProvider({
+            "fast": [_call("schema_inspect", action="list_tables"), LLMResponse(content="draft")],
+            "strong": [LLMResponse(content="Final answer.")],
+        })
+        agent = AgentLoop(provider=provider, db=agent_db, fast_model="fast", enable_subagent=False)
+        events = [e async for e in agent.chat_stream("tables?")]
+        assert "".join(e.content for e in events if e.type == "token") == "Final answer."
+        assert events[-1].content == "Final answer."
+
+    async def test_write_planning_escalates(self, agent_db):
+        insert = _call("data_modify", sql="INSERT INTO items VALUES (3, 'Cherry', 2.0)")
+        provider = ModelScriptProvider({
+            "fast": [insert, LLMResponse(content="draft")],
+            "strong": [insert, LLMResponse(content="Inserted.")],
+        })
+        agent = AgentLoop(
+            provider=provider, db=agent_db, fast_model="fast", enable_subagent=False,
+            safety_policy=SafetyPolicy(read_only=False, require_confirmation=False),
+        )
+        assert await agent.chat("add a cherry") == "Inserted."
+        assert provider.calls == ["fast", "strong", "fast", "strong"]
+        assert agent.router.stats["escalated_write"] == 1
+
+    async def test_repeated_tool_errors_pin_primary(self, agent_db):
+        bad = _call("query_execute", sql="SELECT * FROM nope")
+        provider = ModelScriptProvider({
+            "fast": [bad],
+            "strong": [bad, LLMResponse(content="That table does not exist.")],
+        })
+        agent = AgentLoop(provider=provider, db=agent_db, fast_model="fast", enable_subagent=False)
+        await agent.chat("query nope")
+        assert provider.calls == ["fast", "fast", "strong", "strong"]
+        assert agent.router.stats["escalated_tool_errors"] == 1
+
+    async def test_disabled_without_fast_model(self, agent_db):
+        provider = ModelScriptProvider({"strong": [_call("schema_inspect", action="list_tables"),
+                                                   LLMResponse(content="done")]})
+        agent = AgentLoop(provider=provider, db=agent_db, enable_subagent=False)
+        await agent.chat("tables?")
+        assert provider.calls == ["strong", "strong"]
+        assert not ModelRouter("strong", "strong").enabled
+
+
+# -- Channel mode (run) -------------------------------------------------------
+
+class GatedProvider(LLMProvider):
+    """Answers each user message only once its gate is opened; records call order."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.gates: dict[str, asyncio.Event] = {}
+        self.started: list[str] = []
+
+    def gate(self, content: str) -> asyncio.Event:
+        return self.gates.setdefault(content, asyncio.Event())
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        content = messages[-1]["content"]
+        self.started.append(content)
+        await self.gate(content).wait()
+        return LLMResponse(content=f"re: {content}")
+
+    def get_default_model(self) -> str:
+        return "mock-model"
+
+
+def _inbound(chat_id: str, content: str) -> InboundMessage:
+    return InboundMessage(channel="test", sender_id="u", chat_id=chat_id, content=content)
+
+
+async def _wait_until(predicate, timeout: float = 2.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+class TestAgentLoopRun:
+    @pytest_asyncio.fixture
+    async def running(self, agent_db):
+        started: list[AgentLoop] = []
+        tasks: list[asyncio.Task] = []
+
+        def start(**kwargs) -> tuple[AgentLoop, GatedProvider, MessageBus]:
+            provider, bus = GatedProvider(), MessageBus()
+            agent = AgentLoop(provider=provider, db=agent_db, bus=bus, enable_subagent=False, **kwargs)
+            started.append(agent)
+            tasks.append(asyncio.create_task(agent.run()))
+            return agent, provider, bus
+
+        yield start
+        for agent in started:
+            agent.stop()
+        await asyncio.gather(*tasks)
+
+    async def test_sessions_run_in_parallel(self, running):
+        agent, provider, bus = running()
+        await bus.publish_inbound(_inbound("a", "slow"))
+        await bus.publish_inbound(_inbound("b", "fast"))
+        await _wait_until(lambda: len(provider.started) == 2)
+        provider.gate("fast").set()
+        first = await asyncio.wait_for(bus.consume_outbound(), 2)
+        assert (first.chat_id, first.content) == ("b", "re: fast")
+        provider.gate("slow").set()
+        second = await asyncio.wait_for(bus.consume_outbound(), 2)
+        assert second.chat_id == "a"
+
+    async def test_messages_in_one_session_stay_ordered(self, running):
+        agent, provider, bus = running()
+        await bus.publish_inbound(_inbound("a", "one"))
+        await bus.publish_inbound(_inbound("a", "two"))
+        await _wait_until(lambda: provider.started == ["one"])
+        provider.gate("two").set()
+        await asyncio.sleep(0.05)
+        assert provider.started == ["one"]
+        provider.gate("one").set()
+        replies = [await asyncio.wait_for(bus.consume_outbound(), 2) for _ in range(2)]
+        assert [r.content for r in replies] == ["re: one", "re: two"]
+
+    async def test_concurrency_limit(self, running):
+        agent, provider, bus = running(max_concurrent_sessions=1)
+        await bus.publish_inbound(_inbound("a", "first"))
+        await bus.publish_inbound(_inbound("b", "second"))
+        await _wait_until(lambda: provider.started == ["first"])
+        await asyncio.sleep(0.05)
+        assert provider.started == ["first"]
+        provider.gate("first").set()
+        provider.gate("second").set()
+        replies = [await asyncio.wait_for(bus.consume_outbound(), 2) for _ in range(2)]
+        assert [r.chat_id for r in replies] == ["a", "b"]
+
+    async def test_current_msg_is_per_session(self, running):
+        agent, provider, bus = running()
+        seen: dict[str, str] = {}
+
+        async def chat(messages, **kwargs):
+            await asyncio.sleep(0.02)
+            seen[messages[-1]["content"]] = agent._current_msg.chat_id
+            return LLMResponse(content="ok")
+
+        provider.chat = chat
+        await bus.publish_inbound(_inbound("a", "from a"))
+        await bus.publish_inbound(_inbound("b", "from b"))
+        for _ in range(2):
+            await asyncio.wait_for(bus.consume_outbound(), 2)
+        assert seen == {"from a": "a", "from b": "b"}
+        assert agent._current_msg is None
+
+    async def test_idle_worker_rolls_back_open_transaction(self, running, agent_db, monkeypatch):
+        monkeypatch.setattr("queryclaw.agent.loop._SESSION_IDLE_TIMEOUT", 0.05)
+        pinned: set[asyncio.Task] = set()  # tasks holding a connection, as a pooled adapter tracks them
+
+        async def begin_transaction():
+            pinned.add(asyncio.current_task())
+
+        async def rollback():
+            pinned.discard(asyncio.current_task())
+
+        monkeypatch.setattr(agent_db, "begin_transaction", begin_transaction)
+        monkeypatch.setattr(agent_db, "rollback", rollback)
+        monkeypatch.setattr(agent_db, "has_transaction", lambda: asyncio.current_task() in pinned)
+        agent, provider, bus = running()
+
+        async def chat(messages, **kwargs):
+            await agent_db.begin_transaction()
+            return LLMResponse(content="left it open")
+
+        provider.chat = chat
+        await bus.publish_inbound(_inbound("a", "begin"))
+        await asyncio.wait_for(bus.consume_outbound(), 2)
+        assert len(pinned) == 1
+        await _wait_until(lambda: not agent._session_workers)
+        assert pinned == set()
+
+    async def test_single_connection_write_mode_serializes(self, agent_db):
+        agent = AgentLoop(
+            provider=GatedProvider(), db=agent_db,
+            safety_policy=SafetyPolicy(read_only=False), max_concurrent_sessions=8,
+        )
+        assert agent.max_concurrent_sessions == 1
@@ -2,22 +2,27 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 from pathlib import Path
 from typing import Any
 
 from typer.testing import CliRunner
 
-from queryclaw.cli.commands import app
+from queryclaw.cli.bench import SCENARIOS, ScriptedProvider, run_bench
+from queryclaw.cli.commands import _make_provider, app
 from queryclaw.config.loader import load_config, save_config
 from queryclaw.config.schema import (
     ChannelsConfig,
     Config,
     FeishuConfig,
+    LLMPoolConfig,
     ProviderConfig,
     ProvidersConfig,
 )
 from queryclaw.db.base import QueryResult, SQLAdapter, TableInfo, ColumnInfo, IndexInfo, ForeignKeyInfo
 from queryclaw.providers.base import LLMProvider, LLMResponse
+from queryclaw.providers.replay import RecordingProvider
 
 runner = CliRunner()
 
@@ -116,6 +121,7 @@ def test_chat_single_turn(monkeypatch, tmp_path: Path) -> None:
     cfg = Config(
         providers=ProvidersConfig(anthropic=ProviderConfig(api_key="sk-test")),
     )
+    cfg.agent.usage_path = str(tmp_path / "usage.db")
     save_config(cfg, config_path)
 
     async def _fake_create_and_connect(**kwargs: Any) -> SQLAdapter:
@@ -127,7 +133,7 @@ def test_chat_single_turn(monkeypatch, tmp_path: Path) -> None:
         "queryclaw.cli.commands.AdapterRegistry.create_and_connect",
         _fake_create_and_connect,
     )
-    monkeypatch.setattr("queryclaw.cli.commands._make_provider", lambda config: FakeProvider())
+    monkeypatch.setattr("queryclaw.cli.commands._make_provider", lambda config, **kwargs: FakeProvider())
 
     result = runner.invoke(
         app,
@@ -145,6 +151,25 @@ def test_chat_missing_provider_key(tmp_path: Path) -> None:
     assert "No LLM API key configured" in result.stdout
 
 
+def test_provider_pool_from_config(monkeypatch) -> None:
+    for env_key in ("ANTHROPIC_API_KEY", "OPENROUTER_API_KEY", "DEEPSEEK_API_KEY"):
+        monkeypatch.setenv(env_key, "unused")  # restored after the test, whatever the providers set
+    config = Config(
+        providers=ProvidersConfig(
+            anthropic=ProviderConfig(api_key="sk-ant-1", api_keys=["sk-ant-2", "sk-ant-1"]),
+            openrouter=ProviderConfig(api_key="sk-or-1"),
+            deepseek=ProviderConfig(api_key="sk-ds-1"),
+        ),
+        llm_pool=LLMPoolConfig(providers=["openrouter"], fallback_model="deepseek/deepseek-chat", max_retries=5),
+    )
+    pool = _make_provider(config)
+    primary, fallback = pool.tiers
+    assert [m.provider.api_key for m in primary.members] == ["sk-ant-1", "sk-ant-2", "sk-or-1"]
+    assert fallback.model == "deepseek/deepseek-chat"
+    assert [m.provider.api_key for m in fallback.members] == ["sk-ds-1"]
+    assert pool.max_retries == 5
+
+
 def test_version_flag() -> None:
     result = runner.invoke(app, ["--version"])
     assert result.exit_code == 0
@@ -170,3 +195,72 @@ def test_serve_command_exists() -> None:
     result = runner.invoke(app, ["serve", "--help"])
     assert result.exit_code == 0
     assert "multi-channel" in result.stdout or "Feishu" in result.stdout
+
+
+def test_bench_reports_percentiles_as_json() -> None:
+    result = runner.invoke(app, ["bench", "-n", "2", "-s", "generate_rows"])
+    assert result.exit_code == 0
+    report = json.loads(result.stdout)
+    assert report["provider"] == "scripted" and report["runs"] == 2
+    metrics = report["scenarios"]["generate_rows"]
+    assert metrics["iterations"] == {"p50": 4, "p95": 4}
+    assert metrics["tool_calls"]["p50"] == 3
+    assert metrics["prompt_tokens"]["p50"] > 0
+    assert metrics["wall_ms"]["p50"] >= metrics["tool_ms"]["p50"] > 0
+
+
+def test_bench_replays_recorded_session(tmp_path: Path) -> None:
+    scenario = next(s for s in SCENARIOS if s.name == "top_customers")
+    transcript = tmp_path / "llm.jsonl"
+    asyncio.run(run_bench([scenario], 1, lambda s: RecordingProvider(ScriptedProvider(s.script), transcript)))
+    assert len(transcript.read_text().splitlines()) == 3
+
+    result = runner.invoke(app, ["bench", "-n", "1", "-s", "top_customers", "--replay", str(transcript)])
+    assert result.exit_code == 0
+    report = json.loads(result.stdout)
+    assert report["provider"].startswith("replay:")
+    assert report["scenarios"]["top_customers"]["iterations"]["p50"] == 3
+
+
+def test_bench_unknown_scenario() -> None:
+    result = runner.invoke(app, ["bench", "-s", "nope"])
+    assert result.exit_code == 1
+    assert "unknown scenario" in result.stdout
+
+
+def test_usage_reports_recorded_turns(tmp_path: Path) -> None:
+    from queryclaw.agent.usage import TurnUsage, UsageStore
+
+    config_path = tmp_path / "cfg.json"
+    cfg = Config()
+    cfg.agent.usage_path = str(tmp_path / "usage.db")
+    save_config(cfg, config_path)
+
+    async def _record() -> None:
+        store = UsageStore(cfg.agent.usage_path)
+        turn = TurnUsage("feishu:chat1")
+        turn.add("gpt-4o", {"prompt_tokens": 1200, "completion_tokens": 80}, cost_usd=0.004)
+        await store.record(turn)
+        await store.close()
+
+    asyncio.run(_record())
+    result = runner.invoke(app, ["usage", "-c", str(config_path), "--json"])
+    assert result.exit_code == 0
+    (row,) = json.loads(result.stdout)
+    assert row["session"] == "feishu:chat1"
+    assert (row["prompt_tokens"], row["completion_tokens"], row["turns"]) == (1200, 80, 1)
+
+    result = runner.invoke(app, ["usage", "-c", str(config_path), "--by", "model"])
+    assert result.exit_code == 0
+    assert "gpt-4o" in result.stdout
+
+    result = runner.invoke(app, ["usage", "-c", str(config_path), "--by", "nope"])
+    assert result.exit_code == 1
+
+
+def test_usage_is_not_recorded_by_default(tmp_path: Path) -> None:
+    config_path = tmp_path / "cfg.json"
+    save_config(Config(), config_path)
+    result = runner.invoke(app, ["usage", "-c", str(config_path)])
+    assert result.exit_code == 1
+    assert "agent.usage_path is empty" in result.stdout
@@ -52,6 +52,26 @@ class TestDatabaseConfig:
         with pytest.raises(Exception):
             DatabaseConfig(type="oracle")
 
+    def test_pool_defaults(self):
+        cfg = DatabaseConfig()
+        assert cfg.pool_enabled is False
+        assert cfg.pool_min_size == 1
+        assert cfg.pool_max_size == 10
+        assert cfg.pool_recycle == 3600
+        assert cfg.pool_acquire_timeout == 10.0
+        assert cfg.statement_cache_size == 128
+        assert cfg.health_check_interval == 30.0
+        assert cfg.keepalive_interval == 300.0
+
+    def test_replica_config(self):
+        cfg = DatabaseConfig()
+        assert cfg.replicas == []
+        assert cfg.replica_selection == "round_robin"
+        assert cfg.read_your_writes == 0.0
+        cfg = DatabaseConfig(replicas=[{"host": "replica-1"}], replica_selection="least_latency")
+        assert cfg.replicas[0].host == "replica-1"
+        assert cfg.replicas[0].port == 0
+
 
 class TestProviderConfig:
     def test_defaults(self):
@@ -73,6 +93,11 @@ class TestAgentConfig:
         assert cfg.max_iterations == 30
         assert cfg.temperature == 0.1
         assert cfg.max_tokens == 4096
+        assert cfg.context_budget == 0
+        assert cfg.schema_prefetch_tables == 3
+        assert cfg.schema_prefetch_budget == 800
+        assert cfg.max_sessions == 1000
+        assert cfg.session_idle_ttl == 86400.0
 
 
 class TestSafetyConfig:
@@ -82,6 +107,9 @@ class TestSafetyConfig:
         assert cfg.max_affected_rows == 1000
         assert cfg.require_confirmation is True
         assert cfg.audit_enabled is True
+        assert cfg.query_timeout == 30.0
+        assert cfg.dry_run_timeout == 10.0
+        assert cfg.snapshot_timeout == 10.0
 
     def test_custom(self):
         cfg = SafetyConfig(read_only=False, max_affected_rows=500)
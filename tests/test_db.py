@@ -1,6 +1,9 @@
 """Tests for database adapter layer."""
 
+import asyncio
 import os
+import time
+from array import array
 
 import pytest
 import pytest_asyncio
@@ -8,11 +11,20 @@ import pytest_asyncio
 from queryclaw.db.base import (
     ColumnInfo,
     ForeignKeyInfo,
+    ForeignTransactionError,
     IndexInfo,
     QueryResult,
+    QueryTimeoutError,
     TableInfo,
 )
+from queryclaw.db.columnar import ColumnarResult
+from queryclaw.db.health import CircuitBreaker, CircuitOpenError
+from queryclaw.db.mysql import MySQLAdapter
+from queryclaw.db.postgresql import PostgreSQLAdapter
+from queryclaw.db import routing
 from queryclaw.db.registry import AdapterRegistry
+from queryclaw.db.routing import RoutingAdapter, bind_session, reset_session
+from queryclaw.db.schema_cache import SchemaCache
 from queryclaw.db.seekdb import SeekDBAdapter
 from queryclaw.db.sqlite import SQLiteAdapter
 
@@ -177,6 +189,108 @@ class TestSQLiteAdapter:
         t1 = next(t for t in tables if t.name == "t1")
         assert t1.row_count == 1
 
+    async def test_get_tables_does_not_count_rowid_tables(self, adapter):
+        await adapter.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+        await adapter.execute("INSERT INTO t VALUES (1), (2), (3)")
+        seen: list[str] = []
+        await adapter._conn.set_trace_callback(seen.append)
+        tables = await adapter.get_tables()
+        assert tables[0].row_count == 3
+        assert not any("COUNT(*)" in s for s in seen)
+
+    async def test_get_tables_uses_sqlite_stat1(self, adapter):
+        await adapter.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+        await adapter.execute("CREATE INDEX t_v ON t (v)")
+        await adapter.execute("INSERT INTO t VALUES (10, 'a'), (20, 'b')")
+        await adapter.execute("ANALYZE")
+        tables = await adapter.get_tables()
+        assert next(t for t in tables if t.name == "t").row_count == 2
+
+    async def test_get_tables_without_rowid_uses_exact_count(self, adapter):
+        await adapter.execute("CREATE TABLE kv (k TEXT PRIMARY KEY, v TEXT) WITHOUT ROWID")
+        await adapter.execute("INSERT INTO kv VALUES ('a', '1'), ('b', '2')")
+        tables = await adapter.get_tables()
+        assert tables[0].row_count == 2
+
+    async def test_count_rows_exact_and_invalidated(self, adapter):
+        await adapter.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+        await adapter.execute("INSERT INTO t VALUES (1), (100)")
+        assert await adapter.count_rows("t") == 2
+        tables = await adapter.get_tables()
+        assert tables[0].row_count == 2  # cached exact count beats max(rowid)
+        await adapter.execute("DELETE FROM t WHERE id = 1")
+        assert await adapter.count_rows("t") == 1
+
+    async def test_execute_stream_batches(self, adapter):
+        await adapter.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+        await adapter.execute("INSERT INTO t VALUES (1), (2), (3), (4), (5)")
+        batches = [b async for b in adapter.execute_stream("SELECT id FROM t ORDER BY id", batch_size=2)]
+        assert [b.rows for b in batches] == [[(1,), (2,)], [(3,), (4,)], [(5,)]]
+        assert all(b.columns == ["id"] for b in batches)
+
+    async def test_execute_stream_empty_keeps_columns(self, adapter):
+        await adapter.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+        batches = [b async for b in adapter.execute_stream("SELECT * FROM t")]
+        assert len(batches) == 1
+        assert batches[0].columns == ["id", "name"]
+        assert batches[0].rows == []
+
+    async def test_execute_limited_row_cap(self, adapter):
+        await adapter.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+        await adapter.execute("INSERT INTO t VALUES (1), (2), (3), (4), (5)")
+        result = await adapter.execute_limited("SELECT id FROM t ORDER BY id", max_rows=3)
+        assert result.rows == [(1,), (2,), (3,)]
+        assert result.truncated is True
+        result = await adapter.execute_limited("SELECT id FROM t ORDER BY id", max_rows=5)
+        assert result.row_count == 5
+        assert result.truncated is False
+
+    async def test_execute_limited_byte_cap(self, adapter):
+        await adapter.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, body TEXT)")
+        await adapter.execute("INSERT INTO t VALUES (1, ?), (2, ?), (3, ?)", ("x" * 100,) * 3)
+        result = await adapter.execute_limited("SELECT body FROM t ORDER BY id", max_bytes=250)
+        assert result.row_count == 2
+        assert result.truncated is True
+
+    async def test_execute_timeout_interrupts(self, adapter):
+        endless = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+        with pytest.raises(QueryTimeoutError, match="0.1s statement timeout"):
+            await adapter.execute(endless, timeout=0.1)
+        with pytest.raises(QueryTimeoutError):
+            await adapter.execute_limited(endless, max_rows=10, timeout=0.1)
+        # The handler is removed afterwards; the connection stays usable.
+        result = await adapter.execute("SELECT 1", timeout=5)
+        assert result.rows == [(1,)]
+
+    async def test_timed_stream_does_not_interrupt_other_statements(self, adapter):
+        rows = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c LIMIT 1000) SELECT x FROM c"
+        stream = adapter.execute_stream(rows, batch_size=10, timeout=0.05)
+        await stream.__anext__()
+        other = asyncio.create_task(adapter.execute("SELECT 1"))
+        await asyncio.sleep(0.1)  # past the stream's deadline
+        assert not other.done()  # waits for the stream instead of running under its progress handler
+        await stream.aclose()
+        assert (await other).rows == [(1,)]
+
+    async def test_timed_stream_does_not_interrupt_introspection(self, adapter):
+        await adapter.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+        rows = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c LIMIT 1000) SELECT x FROM c"
+        stream = adapter.execute_stream(rows, batch_size=10, timeout=0.05)
+        await stream.__anext__()
+        calls = [
+            asyncio.create_task(adapter.get_tables()),
+            asyncio.create_task(adapter.get_columns("items")),
+            asyncio.create_task(adapter.get_schema_snapshot()),
+            asyncio.create_task(adapter.get_schema_fingerprints()),
+        ]
+        await asyncio.sleep(0.1)
+        assert not any(call.done() for call in calls)
+        await stream.aclose()
+        tables, columns, snapshot, fingerprints = await asyncio.gather(*calls)
+        assert [t.name for t in tables] == ["items"]
+        assert [c.name for c in columns] == ["id"]
+        assert set(snapshot) == set(fingerprints) == {"items"}
+
     async def test_get_columns(self, adapter):
         await adapter.execute(
             "CREATE TABLE items ("
@@ -208,6 +322,30 @@ class TestSQLiteAdapter:
         assert idx.unique is True
         assert "email" in idx.columns
 
+    async def test_get_schema_snapshot_matches_per_table_methods(self, adapter):
+        await adapter.execute("CREATE TABLE parent (id INTEGER PRIMARY KEY, code TEXT UNIQUE)")
+        await adapter.execute(
+            "CREATE TABLE child (id INTEGER PRIMARY KEY, parent_id INTEGER REFERENCES parent(id), "
+            "a TEXT, b TEXT)"
+        )
+        await adapter.execute("CREATE INDEX idx_child_ab ON child (a, b)")
+        snapshot = await adapter.get_schema_snapshot()
+        assert list(snapshot) == ["child", "parent"]
+        for name, ts in snapshot.items():
+            assert ts.columns == await adapter.get_columns(name)
+            assert ts.indexes == await adapter.get_indexes(name)
+            assert ts.foreign_keys == await adapter.get_foreign_keys(name)
+        assert snapshot["child"].foreign_keys[0].ref_table == "parent"
+        ab = next(i for i in snapshot["child"].indexes if i.name == "idx_child_ab")
+        assert ab.columns == ["a", "b"]
+
+    async def test_get_schema_snapshot_subset(self, adapter):
+        await adapter.execute("CREATE TABLE t1 (id INTEGER PRIMARY KEY)")
+        await adapter.execute("CREATE TABLE t2 (id INTEGER PRIMARY KEY)")
+        snapshot = await adapter.get_schema_snapshot(["t2", "missing"])
+        assert list(snapshot) == ["t2"]
+        assert await adapter.get_schema_snapshot([]) == {}
+
     async def test_get_foreign_keys(self, adapter):
         await adapter.execute("CREATE TABLE parents (id INTEGER PRIMARY KEY)")
         await adapter.execute(
@@ -231,6 +369,600 @@ class TestSQLiteAdapter:
         assert adapter.db_type == "sqlite"
 
 
+class _FakeCursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self.description = None
+        self.rowcount = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    async def execute(self, sql, params=()):
+        self._conn.executed.append(sql)
+        if self._conn.hang and not sql.startswith("KILL"):
+            await asyncio.sleep(3600)
+        if self._conn.fail_with is not None:
+            exc, self._conn.fail_with = self._conn.fail_with, None
+            raise exc
+        if sql.upper().startswith("SELECT"):
+            self.description = (("val",),)
+            self.rowcount = 1
+        else:
+            self.rowcount = 1
+
+    async def fetchall(self):
+        return [(1,)]
+
+
+class _FakeConn:
+    def __init__(self):
+        self.closed = False
+        self.executed: list[str] = []
+        self.fail_with: Exception | None = None
+        self.hang = False
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def thread_id(self):
+        return 42
+
+    async def begin(self):
+        self.executed.append("BEGIN")
+
+    async def ping(self, reconnect=True):
+        self.executed.append("PING")
+        if self.fail_with is not None:
+            exc, self.fail_with = self.fail_with, None
+            raise exc
+
+    def close(self):
+        self.closed = True
+
+
+class _FakePool:
+    def __init__(self, maxsize=2):
+        self.minsize = 1
+        self.maxsize = maxsize
+        self.closed = False
+        self.created: list[_FakeConn] = []
+        self._free: list[_FakeConn] = []
+        self._used: list[_FakeConn] = []
+
+    @property
+    def size(self):
+        return len(self._free) + len(self._used)
+
+    @property
+    def freesize(self):
+        return len(self._free)
+
+    async def acquire(self):
+        if not self._free:
+            if self.size >= self.maxsize:
+                await asyncio.sleep(3600)
+            conn = _FakeConn()
+            self.created.append(conn)
+            self._free.append(conn)
+        conn = self._free.pop()
+        self._used.append(conn)
+        return conn
+
+    def release(self, conn):
+        self._used.remove(conn)
+        if not conn.closed:
+            self._free.append(conn)
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        return None
+
+
+@pytest.mark.asyncio
+class TestMySQLAdapterPool:
+    """Pooled mode of MySQLAdapter, exercised against an in-memory fake pool."""
+
+    @pytest_asyncio.fixture
+    async def pooled(self, monkeypatch):
+        import aiomysql
+
+        pool = _FakePool()
+
+        async def fake_create_pool(**kwargs):
+            pool.kwargs = kwargs
+            return pool
+
+        monkeypatch.setattr(aiomysql, "create_pool", fake_create_pool)
+        a = MySQLAdapter()
+        await a.connect(
+            database="app", pool_enabled=True, pool_min_size=1, pool_max_size=2,
+            pool_recycle=60, pool_acquire_timeout=0.05,
+        )
+        yield a, pool
+        await a.close()
+
+    async def test_connect_creates_pool(self, pooled):
+        a, pool = pooled
+        assert a.is_pooled is True
+        assert a.is_connected is True
+        assert pool.kwargs["maxsize"] == 2
+        assert pool.kwargs["pool_recycle"] == 60
+
+    async def test_execute_releases_connection(self, pooled):
+        a, pool = pooled
+        result = await a.execute("SELECT 1")
+        assert result.rows == [(1,)]
+        assert a.pool_stats()["free"] == pool.size
+
+    async def test_connection_error_discards_and_retries(self, pooled):
+        a, pool = pooled
+        await a.execute("SELECT 1")
+        broken = pool.created[0]
+        broken.fail_with = Exception(2006, "MySQL server has gone away")
+        result = await a.execute("SELECT 1")
+        assert result.rows == [(1,)]
+        assert broken.closed is True
+        assert len(pool.created) == 2
+
+    async def test_sql_error_not_retried(self, pooled):
+        a, pool = pooled
+        await a.execute("SELECT 1")
+        pool.created[0].fail_with = Exception(1054, "Unknown column")
+        with pytest.raises(Exception, match="Unknown column"):
+            await a.execute("SELECT 1")
+        assert len(pool.created) == 1
+
+    async def test_acquire_timeout(self, pooled):
+        a, pool = pooled
+        await pool.acquire()
+        await pool.acquire()
+        with pytest.raises(RuntimeError, match="Timed out"):
+            await a.execute("SELECT 1")
+
+    async def test_transaction_pins_connection(self, pooled):
+        a, pool = pooled
+        await a.begin_transaction()
+        await a.execute("UPDATE t SET x = 1")
+        tx_conn = pool.created[0]
+        assert a.pool_stats()["in_transaction"] == 1
+        assert tx_conn.executed[-2:] == ["BEGIN", "UPDATE t SET x = 1"]
+        await a.commit()
+        assert tx_conn.executed[-1] == "COMMIT"
+        assert a.pool_stats()["in_transaction"] == 0
+
+    async def test_max_concurrency(self, pooled):
+        a, _ = pooled
+        assert a.max_concurrency() == 2
+        await a.begin_transaction()
+        # The task holding a transaction must keep its statements on that connection.
+        assert a.max_concurrency() == 1
+        await a.rollback()
+        assert a.max_concurrency() == 2
+        assert MySQLAdapter().max_concurrency() == 1
+
+    async def test_rollback_without_transaction_is_noop(self, pooled):
+        a, _ = pooled
+        await a.rollback()
+        assert a.is_connected is True
+
+    async def test_commit_from_other_task_raises(self, pooled):
+        a, pool = pooled
+        await a.begin_transaction()
+        with pytest.raises(ForeignTransactionError, match="without a transaction of its own"):
+            await asyncio.create_task(a.commit())
+        assert a.pool_stats()["in_transaction"] == 1
+        await a.commit()
+        assert pool.created[0].executed[-1] == "COMMIT"
+
+    async def test_reconnects_after_close(self, pooled):
+        a, _ = pooled
+        await a.close()
+        assert a.is_connected is False
+        result = await a.execute("SELECT 1")
+        assert result.rows == [(1,)]
+
+
+class _FakeSSCursor:
+    """Unbuffered cursor over ``conn.stream_rows``; records how many rows were read."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._rows = list(conn.stream_rows)
+        self.description = (("id",),)
+        self.rowcount = -1
+
+    async def execute(self, sql, params=()):
+        self._conn.executed.append(sql)
+
+    async def fetchmany(self, size):
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        self._conn.rows_read += len(batch)
+        return batch
+
+    async def close(self):
+        self._conn.rows_read += len(self._rows)  # draining reads the rest
+        self._rows = []
+
+
+@pytest.mark.asyncio
+class TestMySQLAdapterStream:
+    @pytest_asyncio.fixture
+    async def pooled(self, monkeypatch):
+        import aiomysql
+
+        pool = _FakePool()
+
+        async def fake_create_pool(**kwargs):
+            return pool
+
+        monkeypatch.setattr(aiomysql, "create_pool", fake_create_pool)
+        monkeypatch.setattr(aiomysql, "SSCursor", _FakeSSCursor)
+        monkeypatch.setattr(_FakeConn, "stream_rows", [(i,) for i in range(10)], raising=False)
+        monkeypatch.setattr(_FakeConn, "rows_read", 0, raising=False)
+        a = MySQLAdapter()
+        await a.connect(database="app", pool_enabled=True, pool_max_size=2)
+        yield a, pool
+        await a.close()
+
+    async def test_stream_exhausted_keeps_connection(self, pooled):
+        a, pool = pooled
+        batches = [b async for b in a.execute_stream("SELECT id FROM t", batch_size=4)]
+        assert [len(b.rows) for b in batches] == [4, 4, 2]
+        assert pool.freesize == 1
+        assert pool.created[0].closed is False
+
+    async def test_limited_stops_early_and_discards_connection(self, pooled):
+        a, pool = pooled
+        result = await a.execute_limited("SELECT id FROM t", max_rows=3)
+        assert result.rows == [(0,), (1,), (2,)]
+        assert result.truncated is True
+        conn = pool.created[0]
+        assert conn.rows_read == 4
+        assert conn.closed is True
+        assert pool.freesize == 0
+
+    async def test_abandoned_stream_in_transaction_drains(self, pooled):
+        a, pool = pooled
+        await a.begin_transaction()
+        result = await a.execute_limited("SELECT id FROM t", max_rows=3)
+        assert result.truncated is True
+        conn = pool.created[0]
+        assert conn.closed is False
+        assert conn.rows_read == 10
+        await a.rollback()
+
+
+class TestCircuitBreaker:
+    def _breaker(self, **kw):
+        self.now = 100.0
+        return CircuitBreaker(clock=lambda: self.now, **kw)
+
+    def test_opens_after_threshold(self):
+        b = self._breaker(failure_threshold=2, base_backoff=1.0)
+        b.record_failure()
+        assert b.state == "closed"
+        b.check()
+        b.record_failure()
+        assert b.state == "open"
+        with pytest.raises(CircuitOpenError, match="retrying in"):
+            b.check()
+
+    def test_half_open_after_backoff_then_doubles(self):
+        b = self._breaker(failure_threshold=1, base_backoff=1.0, max_backoff=3.0)
+        b.record_failure()
+        self.now += 1.0
+        assert b.state == "half_open"
+        b.check()
+        b.record_failure()
+        self.now += 1.5
+        assert b.state == "open"
+        self.now += 0.5
+        assert b.state == "half_open"
+        b.record_failure()
+        b.record_failure()
+        self.now += 3.0
+        assert b.state == "half_open"
+
+    def test_success_closes(self):
+        b = self._breaker(failure_threshold=1)
+        b.record_failure()
+        b.record_success()
+        assert b.state == "closed"
+        assert b.failures == 0
+
+
+@pytest.mark.asyncio
+class TestMySQLAdapterHealth:
+    """Idle-aware liveness checks of the single-connection MySQLAdapter."""
+
+    @pytest_asyncio.fixture
+    async def single(self, monkeypatch):
+        import aiomysql
+
+        conns: list[_FakeConn] = []
+
+        async def fake_connect(**kwargs):
+            if getattr(fake_connect, "down", False):
+                raise OSError(2003, "Can't connect to MySQL server")
+            conn = _FakeConn()
+            conns.append(conn)
+            return conn
+
+        monkeypatch.setattr(aiomysql, "connect", fake_connect)
+        a = MySQLAdapter()
+        await a.connect(database="app", health_check_interval=30, keepalive_interval=0)
+        yield a, conns, fake_connect
+        await a.close()
+
+    async def test_no_probe_while_recently_used(self, single):
+        a, conns, _ = single
+        conns[0].executed.clear()
+        await a.execute("SELECT 1")
+        await a.explain("SELECT 1")
+        assert "PING" not in conns[0].executed
+        assert len(conns[0].executed) == 2
+
+    async def test_probe_after_idle(self, single):
+        a, conns, _ = single
+        a._last_used -= 60
+        await a.execute("SELECT 1")
+        assert conns[0].executed[-2:] == ["PING", "SELECT 1"]
+
+    async def test_single_connection_reports_transaction(self, single):
+        a, _, _ = single
+        await a.begin_transaction()
+        assert a.has_transaction()
+        assert not await _has_tx_in_new_task(a)  # another session's task
+        await a.rollback()
+        assert not a.has_transaction()
+
+    async def test_failed_probe_reconnects(self, single):
+        a, conns, _ = single
+        a._last_used -= 60
+        conns[0].fail_with = ConnectionResetError("reset by peer")
+        result = await a.execute("SELECT 1")
+        assert result.rows == [(1,)]
+        assert len(conns) == 2
+
+    async def test_broken_socket_error_retries(self, single):
+        a, conns, _ = single
+        conns[0].fail_with = BrokenPipeError("broken pipe")
+        result = await a.execute("SELECT 1")
+        assert result.rows == [(1,)]
+        assert conns[0].closed is True
+
+    async def test_circuit_opens_when_server_down(self, single):
+        a, conns, fake_connect = single
+        fake_connect.down = True
+        a._close_conn()
+        for _ in range(3):
+            with pytest.raises(OSError):
+                await a.execute("SELECT 1")
+        with pytest.raises(CircuitOpenError):
+            await a.execute("SELECT 1")
+
+
+@pytest.mark.asyncio
+class TestMySQLAdapterTimeout:
+    """Statement timeouts: execution hints, server errors and the KILL QUERY watchdog."""
+
+    @pytest_asyncio.fixture
+    async def single(self, monkeypatch):
+        import aiomysql
+
+        conns: list[_FakeConn] = []
+
+        async def fake_connect(**kwargs):
+            conn = _FakeConn()
+            conns.append(conn)
+            return conn
+
+        monkeypatch.setattr(aiomysql, "connect", fake_connect)
+        monkeypatch.setattr("queryclaw.db.mysql._KILL_GRACE", 0.0)
+        a = MySQLAdapter()
+        await a.connect(database="app", keepalive_interval=0)
+        conns[0].executed.clear()
+        yield a, conns
+        await a.close()
+
+    async def test_select_gets_execution_hint(self, single):
+        a, conns = single
+        await a.execute("select * FROM t", timeout=2.5)
+        assert conns[0].executed == ["select /*+ MAX_EXECUTION_TIME(2500) */ * FROM t"]
+
+    async def test_no_hint_without_timeout_or_for_dml(self, single):
+        a, conns = single
+        await a.execute("SELECT 1")
+        await a.execute("UPDATE t SET x = 1", timeout=1)
+        assert conns[0].executed == ["SELECT 1", "UPDATE t SET x = 1"]
+
+    async def test_seekdb_uses_query_timeout_hint(self):
+        assert SeekDBAdapter()._with_timeout_hint("SELECT 1", 0.5) == "SELECT /*+ QUERY_TIMEOUT(500000) */ 1"
+
+    async def test_server_timeout_error_is_mapped(self, single):
+        import pymysql
+
+        a, conns = single
+        conns[0].fail_with = pymysql.err.OperationalError(3024, "Query execution was interrupted")
+        with pytest.raises(QueryTimeoutError, match="2s statement timeout"):
+            await a.execute("SELECT 1", timeout=2)
+        assert conns[0].closed is False
+
+    async def test_watchdog_kills_hung_statement(self, single):
+        a, conns = single
+        conns[0].hang = True
+        with pytest.raises(QueryTimeoutError):
+            await a.execute("UPDATE t SET x = 1", timeout=0.05)
+        assert conns[1].executed == ["KILL QUERY 42"]
+        assert conns[0].closed is True
+        # The next statement reconnects instead of reusing the mid-result connection.
+        result = await a.execute("SELECT 1")
+        assert result.rows == [(1,)]
+
+
+async def _has_tx_in_new_task(adapter) -> bool:
+    async def check() -> bool:
+        return adapter.has_transaction()
+
+    return await asyncio.create_task(check())
+
+
+class _FakePgRecord(tuple):
+    def __new__(cls, mapping):
+        rec = super().__new__(cls, mapping.values())
+        rec._keys = list(mapping)
+        return rec
+
+    def keys(self):
+        return self._keys
+
+
+class _FakePgConn:
+    def __init__(self, rows=None, status="UPDATE 3"):
+        self.calls: list[tuple[str, str]] = []
+        self.timeouts: list[float | None] = []
+        self.fail_with: Exception | None = None
+        self._rows = rows or []
+        self._status = status
+        self._cached: set[str] = set()  # statements in the fake statement cache
+
+    def is_closed(self):
+        return False
+
+    def _call(self, kind, sql, timeout):
+        self.calls.append((kind, sql))
+        self.timeouts.append(timeout)
+        if self.fail_with is not None:
+            exc, self.fail_with = self.fail_with, None
+            raise exc
+
+    async def execute(self, sql, *args, timeout=None):
+        self._call("execute", sql, timeout)
+        return self._status
+
+    async def fetch(self, sql, *args, timeout=None):
+        self._call("fetch", sql, timeout)
+        self._cached.add(sql)
+        return [_FakePgRecord(r) for r in self._rows]
+
+    async def prepare(self, sql, timeout=None):
+        return await self._prepare(sql, timeout=timeout)
+
+    async def _prepare(self, sql, timeout=None, use_cache=False):
+        if not (use_cache and sql in self._cached):
+            self.calls.append(("prepare", sql))
+        attr = type("Attr", (), {"name": "id"})
+        return type("Stmt", (), {"get_attributes": lambda self: (attr,)})()
+
+    async def close(self):
+        return None
+
+
+@pytest.mark.asyncio
+class TestPostgreSQLAdapterExecute:
+    """Round trips issued by PostgreSQLAdapter.execute, against a fake asyncpg connection."""
+
+    @staticmethod
+    def _adapter(conn):
+        a = PostgreSQLAdapter()
+        a._conn = conn
+        return a
+
+    async def test_dml_single_round_trip(self):
+        conn = _FakePgConn(status="UPDATE 3")
+        result = await self._adapter(conn).execute("UPDATE t SET x = 1")
+        assert result.affected_rows == 3
+        assert result.columns == []
+        assert conn.calls == [("execute", "UPDATE t SET x = 1")]
+
+    async def test_parameterized_insert_uses_status(self):
+        conn = _FakePgConn(status="INSERT 0 1")
+        result = await self._adapter(conn).execute("INSERT INTO t VALUES ($1)", (1,))
+        assert result.affected_rows == 1
+        assert [c[0] for c in conn.calls] == ["execute"]
+
+    async def test_select_single_round_trip(self):
+        conn = _FakePgConn(rows=[{"id": 1, "name": "a"}])
+        result = await self._adapter(conn).execute("SELECT id, name FROM t")
+        assert result.columns == ["id", "name"]
+        assert result.rows == [(1, "a")]
+        assert [c[0] for c in conn.calls] == ["fetch"]
+
+    async def test_empty_select_keeps_columns(self):
+        conn = _FakePgConn(rows=[])
+        result = await self._adapter(conn).execute("SELECT id FROM t WHERE false")
+        assert result.columns == ["id"]
+        assert result.row_count == 0
+        assert [c[0] for c in conn.calls] == ["fetch"]  # columns from the cached statement
+
+    async def test_returning_inside_quotes_is_not_a_result(self):
+        conn = _FakePgConn(status="INSERT 0 1")
+        sql = "INSERT INTO t (note, \"returning\") VALUES ('returning', $$ RETURNING $$)"
+        result = await self._adapter(conn).execute(sql)
+        assert result.affected_rows == 1
+        assert [c[0] for c in conn.calls] == ["execute"]
+
+    async def test_returning_fetches_rows(self):
+        conn = _FakePgConn(rows=[{"id": 7}])
+        result = await self._adapter(conn).execute("INSERT INTO t DEFAULT VALUES RETURNING id")
+        assert result.rows == [(7,)]
+
+    async def test_single_connection_serializes_statements(self):
+        class BusyConn(_FakePgConn):
+            busy = False
+
+            async def execute(self, sql, *args, timeout=None):
+                if self.busy:
+                    raise RuntimeError("another operation is in progress")
+                self.busy = True
+                await asyncio.sleep(0.01)
+                self.busy = False
+                return await super().execute(sql, *args, timeout=timeout)
+
+        conn = BusyConn()
+        a = self._adapter(conn)
+        await asyncio.gather(*(a.execute(f"UPDATE t SET x = {i}") for i in range(3)))
+        assert len(conn.calls) == 3
+
+    async def test_single_connection_reports_transaction(self):
+        a = self._adapter(_FakePgConn())
+        await a.begin_transaction()
+        assert a.has_transaction()
+        assert not await _has_tx_in_new_task(a)
+        await a.commit()
+        assert not a.has_transaction()
+
+    async def test_not_connected_raises(self):
+        with pytest.raises(RuntimeError, match="Not connected"):
+            await PostgreSQLAdapter().execute("SELECT 1")
+
+    async def test_pool_stats_empty_without_pool(self):
+        assert PostgreSQLAdapter().pool_stats() == {}
+
+    async def test_timeout_passed_to_driver(self):
+        conn = _FakePgConn(rows=[{"id": 1}])
+        await self._adapter(conn).execute("SELECT id FROM t", timeout=3)
+        assert conn.timeouts == [3]
+
+    async def test_driver_timeout_is_mapped(self):
+        conn = _FakePgConn()
+        conn.fail_with = asyncio.TimeoutError()
+        with pytest.raises(QueryTimeoutError):
+            await self._adapter(conn).execute("UPDATE t SET x = 1", timeout=1)
+
+    async def test_query_canceled_is_mapped(self):
+        conn = _FakePgConn()
+        conn.fail_with = type("QueryCanceledError", (Exception,), {"sqlstate": "57014"})()
+        with pytest.raises(QueryTimeoutError):
+            await self._adapter(conn).execute("SELECT 1", timeout=1)
+
+
 class TestSeekDBAdapter:
     """Unit tests for SeekDBAdapter. Integration tests require SEEKDB_AVAILABLE=1."""
 
@@ -267,3 +999,301 @@ class TestSeekDBAdapterIntegration:
             assert result.rows == [(1,)]
         finally:
             await a.close()
+
+
+class TestColumnarResult:
+    def _result(self):
+        return ColumnarResult.from_rows(
+            ["id", "score", "name", "password"],
+            [(1, 1.5, "a", "x"), (2, 2.5, None, "y"), (3, 4.0, "c", "z")],
+        )
+
+    def test_numeric_columns_are_packed(self):
+        r = self._result()
+        assert isinstance(r.column("id"), array)
+        assert r.column("id").typecode == "q"
+        assert r.column("score").typecode == "d"
+        assert isinstance(r.column("name"), list)
+
+    def test_lazy_rows(self):
+        r = self._result()
+        assert len(r.rows) == 3
+        assert r.rows[1] == (2, 2.5, None, "y")
+        assert r.rows[-1][0] == 3
+        assert r.rows[:2] == [(1, 1.5, "a", "x"), (2, 2.5, None, "y")]
+        assert list(r.rows)[2] == (3, 4.0, "c", "z")
+
+    def test_to_text_matches_query_result(self):
+        r = self._result()
+        legacy = QueryResult(columns=r.columns, rows=list(r.rows))
+        assert r.to_text(max_rows=2) == legacy.to_text(max_rows=2)
+        assert "[REDACTED]" in r.to_text()
+
+    def test_query_result_facade(self):
+        qr = self._result().to_query_result()
+        assert qr.row_count == 3
+        assert qr.rows[0] == (1, 1.5, "a", "x")
+        assert "more rows" in qr.to_text(max_rows=1)
+
+    def test_describe(self):
+        stats = self._result().describe()
+        assert stats["id"] == {"count": 3, "nulls": 0, "min": 1, "max": 3, "mean": 2.0}
+        assert stats["name"] == {"count": 2, "nulls": 1, "distinct": 2}
+
+    def test_profile(self):
+        r = ColumnarResult.from_rows(
+            ["n", "status", "password"],
+            [(i, "paid" if i % 4 else None, "pw") for i in range(1, 101)],
+        )
+        profile = r.profile(top_k=2)
+        assert profile["n"]["min"] == 1 and profile["n"]["max"] == 100
+        assert profile["n"]["p25"] == 26 and profile["n"]["p50"] == 51 and profile["n"]["p75"] == 75
+        assert profile["n"]["mean"] == 50.5
+        assert profile["n"]["distinct"] == 100 and "top" not in profile["n"]
+        assert profile["status"]["nulls"] == 25
+        assert profile["status"]["top"] == [("paid", 75)]
+        assert profile["password"] == {"count": 100, "nulls": 0}
+
+    def test_summary_text(self):
+        r = ColumnarResult.from_rows(["n", "password"], [(i, "secret") for i in range(10)])
+        text = r.summary_text(sample_rows=3)
+        assert "Column profile (10 rows):" in text
+        assert "- n: 10 values, 0 nulls, 10 distinct; min 0" in text
+        assert "[values redacted]" in text and "secret" not in text
+        assert "Sample of 3 rows" in text
+        assert "\n0 | [REDACTED]\n4 | [REDACTED]\n8 | [REDACTED]" in text
+
+    def test_unknown_column_raises(self):
+        with pytest.raises(KeyError):
+            self._result().column("missing")
+
+    @pytest.mark.asyncio
+    async def test_execute_columnar(self, tmp_path):
+        a = SQLiteAdapter()
+        await a.connect(database=str(tmp_path / "c.db"))
+        await a.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v REAL)")
+        await a.execute("INSERT INTO t VALUES (1, 0.5), (2, 1.5), (3, 2.5)")
+        r = await a.execute_columnar("SELECT id, v FROM t ORDER BY id", batch_size=2)
+        assert list(r.column("id")) == [1, 2, 3]
+        assert r.truncated is False
+        r = await a.execute_columnar("SELECT id FROM t ORDER BY id", max_rows=2)
+        assert list(r.rows) == [(1,), (2,)]
+        assert r.truncated is True
+        await a.close()
+
+
+@pytest.mark.asyncio
+class TestSchemaCache:
+    @pytest_asyncio.fixture
+    async def adapter(self, tmp_path):
+        a = SQLiteAdapter()
+        await a.connect(database=str(tmp_path / "cache.db"))
+        await a.execute("CREATE TABLE t1 (id INTEGER PRIMARY KEY)")
+        await a.execute("CREATE TABLE t2 (id INTEGER PRIMARY KEY, name TEXT)")
+        yield a
+        await a.close()
+
+    async def test_hits_and_misses(self, adapter):
+        cache = SchemaCache(adapter)
+        await cache.get_columns("t1")
+        await cache.get_columns("t1")
+        await cache.get_tables(row_counts=False)
+        await cache.get_tables(row_counts=False)
+        assert cache.stats()["hits"] == 2
+        assert cache.stats()["misses"] == 2
+
+    async def test_row_counts_follow_writes(self, adapter):
+        cache = SchemaCache(adapter, check_interval=0)
+        await adapter.execute("INSERT INTO t1 VALUES (1)")
+        assert {t.name: t.row_count for t in await cache.get_tables()}["t1"] == 1
+        for i in range(2, 50):
+            await adapter.execute(f"INSERT INTO t1 VALUES ({i})")
+        assert {t.name: t.row_count for t in await cache.get_tables()}["t1"] == 49
+
+    async def test_invalidate_single_table(self, adapter):
+        cache = SchemaCache(adapter)
+        await cache.get_columns("t1")
+        await cache.get_columns("t2")
+        cache.invalidate(["t1"])
+        await cache.get_columns("t2")
+        assert cache.hits == 1
+        await cache.get_columns("t1")
+        assert cache.misses == 3
+
+    async def test_detects_external_ddl(self, adapter, tmp_path):
+        cache = SchemaCache(adapter, check_interval=0)
+        await cache.get_columns("t1")
+        await cache.get_columns("t2")
+        other = SQLiteAdapter()
+        await other.connect(database=str(tmp_path / "cache.db"))
+        await other.execute("ALTER TABLE t2 ADD COLUMN extra TEXT")
+        await other.close()
+        assert "extra" in [c.name for c in await cache.get_columns("t2")]
+        hits = cache.hits
+        await cache.get_columns("t1")
+        assert cache.hits == hits + 1  # untouched table stays cached
+
+    async def test_dml_keeps_entries(self, adapter):
+        cache = SchemaCache(adapter, check_interval=0)
+        await cache.get_columns("t1")
+        await adapter.execute("INSERT INTO t1 VALUES (1)")
+        await cache.get_columns("t1")
+        assert cache.hits == 1
+
+    async def test_snapshot_fetches_only_missing(self, adapter):
+        cache = SchemaCache(adapter)
+        first = await cache.get_schema_snapshot(["t1", "t2"])
+        second = await cache.get_schema_snapshot(["t1", "t2"])
+        assert first == second
+        assert cache.misses == 2
+        assert cache.hits == 2
+
+    async def test_fingerprints_change_only_for_altered_table(self, adapter):
+        before = await adapter.get_schema_fingerprints()
+        await adapter.execute("CREATE INDEX idx_t2_name ON t2 (name)")
+        after = await adapter.get_schema_fingerprints()
+        assert before["t1"] == after["t1"]
+        assert before["t2"] != after["t2"]
+
+
+class _LaggingSQLite(SQLiteAdapter):
+    lag: float | None = None
+    hang = False
+
+    async def replication_lag(self):
+        if self.hang:
+            await asyncio.sleep(3600)
+        if isinstance(self.lag, Exception):
+            raise self.lag
+        return self.lag
+
+
+@pytest.mark.asyncio
+class TestRoutingAdapter:
+    @pytest_asyncio.fixture
+    async def dbs(self, tmp_path):
+        adapters = []
+        for name in ("primary", "r0", "r1"):
+            a = _LaggingSQLite()
+            await a.connect(database=str(tmp_path / f"{name}.db"))
+            await a.execute("CREATE TABLE whoami (name TEXT)")
+            await a.execute("INSERT INTO whoami VALUES (?)", (name,))
+            adapters.append(a)
+        yield adapters
+        for a in adapters:
+            await a.close()
+
+    def _router(self, dbs, **kw):
+        self.now = 0.0
+        kw.setdefault("clock", lambda: self.now)
+        return RoutingAdapter(dbs[0], dbs[1:], **kw)
+
+    @staticmethod
+    async def _who(db):
+        return (await db.execute("SELECT name FROM whoami")).rows[0][0]
+
+    async def test_round_robin_reads_and_primary_writes(self, dbs):
+        router = self._router(dbs)
+        reader = router.for_reads()
+        assert [await self._who(reader) for _ in range(4)] == ["r0", "r1", "r0", "r1"]
+        assert await self._who(router) == "primary"
+        await reader.execute("INSERT INTO whoami VALUES ('x')")
+        assert (await dbs[0].execute("SELECT COUNT(*) FROM whoami")).rows[0][0] == 2
+
+    async def test_lagging_replica_skipped(self, dbs):
+        dbs[1].lag = 60.0
+        dbs[2].lag = 1.0
+        router = self._router(dbs, max_lag=10.0)
+        reader = router.for_reads()
+        assert {await self._who(reader) for _ in range(3)} == {"r1"}
+        dbs[2].lag = RuntimeError("replica down")
+        self.now = 100.0
+        assert await self._who(reader) == "primary"
+
+    async def test_hung_lag_probe_marks_replica_unhealthy(self, dbs, monkeypatch):
+        monkeypatch.setattr(routing, "_LAG_PROBE_TIMEOUT", 0.05)
+        dbs[1].hang = True
+        router = self._router(dbs)
+        reader = router.for_reads()
+        started = time.monotonic()
+        assert {await self._who(reader) for _ in range(2)} == {"r1"}
+        assert time.monotonic() - started < 1.0
+
+    async def test_data_modifying_cte_goes_to_primary(self, dbs):
+        router = self._router(dbs, read_your_writes=5.0)
+        reader = router.for_reads()
+        await reader.execute("WITH n AS (SELECT 'w' AS name) INSERT INTO whoami SELECT name FROM n")
+        assert (await dbs[0].execute("SELECT COUNT(*) FROM whoami")).rows[0][0] == 2
+        assert await self._who(reader) == "primary"  # the write pinned the session
+        self.now = 10.0
+        quoted = await reader.execute("WITH u AS (SELECT 'delete' AS s) SELECT name FROM whoami, u")
+        assert quoted.rows[0][0] in ("r0", "r1")
+
+    async def test_read_your_writes_pins_session(self, dbs):
+        router = self._router(dbs, read_your_writes=5.0)
+        reader = router.for_reads()
+        token = bind_session("alice")
+        try:
+            await router.execute("INSERT INTO whoami VALUES ('y')")
+            assert await self._who(reader) == "primary"
+        finally:
+            reset_session(token)
+        assert await self._who(reader) in ("r0", "r1")  # other sessions are unaffected
+        token = bind_session("alice")
+        try:
+            self.now = 6.0
+            assert await self._who(reader) in ("r0", "r1")
+        finally:
+            reset_session(token)
+
+    async def test_transaction_reads_from_primary(self, dbs):
+        router = self._router(dbs)
+        reader = router.for_reads()
+        await router.begin_transaction()
+        assert await self._who(reader) == "primary"
+        await router.rollback()
+        assert await self._who(reader) in ("r0", "r1")
+
+    async def test_least_latency_tries_each_then_prefers_fastest(self, dbs):
+        router = self._router(dbs, selection="least_latency")
+        reader = router.for_reads()
+        assert {await self._who(reader), await self._who(reader)} == {"r0", "r1"}
+        router._replicas[0].latency_ms = 50.0
+        router._replicas[1].latency_ms = 5.0
+        assert await self._who(reader) == "r1"
+
+    async def test_reader_concurrency_follows_selection(self, dbs):
+        dbs[1].max_concurrency = lambda: 4
+        router = self._router(dbs, selection="least_latency", read_your_writes=5.0)
+        router._replicas[0].latency_ms = 50.0
+        router._replicas[1].latency_ms = 5.0
+        assert router.for_reads().max_concurrency() == 1  # every read goes to r1
+        router._selection = "round_robin"
+        assert router.for_reads().max_concurrency() == 2
+        await router.execute("INSERT INTO whoami VALUES ('z')")
+        assert router.for_reads().max_concurrency() == dbs[0].max_concurrency()
+
+    async def test_expired_pins_are_pruned(self, dbs):
+        router = self._router(dbs, read_your_writes=5.0)
+        for session in ("a", "b"):
+            token = bind_session(session)
+            try:
+                await router.execute("INSERT INTO whoami VALUES ('y')")
+            finally:
+                reset_session(token)
+        self.now = 10.0
+        await router.execute("INSERT INTO whoami VALUES ('y')")
+        assert set(router._pinned_until) == {""}
+
+    async def test_registry_builds_router(self, tmp_path):
+        adapter = await AdapterRegistry.create_and_connect(
+            type="sqlite",
+            database=str(tmp_path / "p.db"),
+            replicas=[{"database": str(tmp_path / "r.db")}],
+        )
+        try:
+            assert isinstance(adapter, RoutingAdapter)
+            assert adapter.db_type == "sqlite"
+            assert adapter.for_reads() is not adapter
+        finally:
+            await adapter.close()
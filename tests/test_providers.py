@@ -1,8 +1,24 @@
 """Tests for LLM provider layer."""
 
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import litellm
 import pytest
 
-from queryclaw.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from queryclaw.providers.base import (
+    LLMProvider,
+    LLMResponse,
+    LLMStreamChunk,
+    ToolCallAccumulator,
+    ToolCallRequest,
+)
+from queryclaw.providers.litellm_provider import LiteLLMProvider
+from queryclaw.providers.pool import FairLimiter, ProviderPool
+from queryclaw.providers.ratelimit import RateLimits, classify_error, error_headers, parse_delay
+from queryclaw.providers.replay import RecordingProvider, ReplayProvider, request_key
 from queryclaw.providers.registry import (
     PROVIDERS,
     ProviderSpec,
@@ -61,6 +77,378 @@ class TestSanitizeEmptyContent:
         assert result[0]["content"] == "hello"
 
 
+class TestToolCallAccumulator:
+    def test_fragments_assembled_by_index(self):
+        acc = ToolCallAccumulator()
+        acc.add({"index": 0, "id": "call_1", "function": {"name": "query_execute", "arguments": '{"sql": '}})
+        acc.add({"index": 1, "id": "call_2", "function": {"name": "schema_inspect", "arguments": ""}})
+        acc.add({"index": 0, "function": {"arguments": '"SELECT 1"}'}})
+        acc.add({"index": 1, "function": {"arguments": '{"action": "list_tables"}'}})
+        calls = acc.build()
+        assert [c.id for c in calls] == ["call_1", "call_2"]
+        assert calls[0].name == "query_execute"
+        assert calls[0].arguments == {"sql": "SELECT 1"}
+        assert calls[1].arguments == {"action": "list_tables"}
+
+    def test_empty(self):
+        assert ToolCallAccumulator().build() == []
+
+
+class _OneShotProvider(LLMProvider):
+    def __init__(self, response: LLMResponse) -> None:
+        super().__init__()
+        self._response = response
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        return self._response
+
+    def get_default_model(self) -> str:
+        return "mock-model"
+
+
+@pytest.mark.asyncio
+class TestDefaultChatStream:
+    async def test_yields_content_then_response(self):
+        provider = _OneShotProvider(LLMResponse(content="hello"))
+        chunks = [c async for c in provider.chat_stream([{"role": "user", "content": "hi"}])]
+        assert [c.delta for c in chunks] == ["hello", ""]
+        assert chunks[-1].response.content == "hello"
+
+    async def test_error_not_streamed_as_content(self):
+        provider = _OneShotProvider(LLMResponse(content="Error calling LLM: boom", finish_reason="error"))
+        chunks = [c async for c in provider.chat_stream([{"role": "user", "content": "hi"}])]
+        assert len(chunks) == 1
+        assert chunks[0].response.finish_reason == "error"
+
+
+def _turn(question: str, now: str = "2026-01-05 09:30 (Monday)") -> list[dict]:
+    return [
+        {"role": "system", "content": f"# Session\n\n- Current time: {now}"},
+        {"role": "user", "content": question},
+    ]
+
+
+@pytest.mark.asyncio
+class TestRecordReplay:
+    async def _record(self, path, responses):
+        for question, response in responses:
+            recorder = RecordingProvider(_OneShotProvider(response), path)
+            await recorder.chat(_turn(question))
+
+    async def test_round_trip(self, tmp_path):
+        path = tmp_path / "llm.jsonl"
+        call = ToolCallRequest(id="c1", name="query_execute", arguments={"sql": "SELECT 1"})
+        await self._record(path, [
+            ("q1", LLMResponse(content=None, tool_calls=[call], usage={"prompt_tokens": 10})),
+            ("q2", LLMResponse(content="two")),
+        ])
+        replay = ReplayProvider(path)
+        assert len(replay) == 2 and replay.get_default_model() == "mock-model"
+        # Out of order, on another day: matched by normalized request, not by position or clock.
+        assert (await replay.chat(_turn("q2", now="2027-03-01 18:00 (Monday)"))).content == "two"
+        first = await replay.chat(_turn("q1"))
+        assert first.tool_calls == [call] and first.usage == {"prompt_tokens": 10}
+        assert replay.stats() == {"recorded": 2, "hits": 2, "misses": 0}
+
+    async def test_stream_is_recorded(self, tmp_path):
+        recorder = RecordingProvider(_OneShotProvider(LLMResponse(content="hello")), tmp_path / "s.jsonl")
+        chunks = [c async for c in recorder.chat_stream(_turn("hi"))]
+        assert chunks[-1].response.content == "hello"
+        assert recorder.recorded == 1
+
+    async def test_miss_falls_back_to_file_order(self, tmp_path):
+        path = tmp_path / "llm.jsonl"
+        await self._record(path, [("q1", LLMResponse(content="one")), ("q2", LLMResponse(content="two"))])
+        replay = ReplayProvider(path)
+        assert (await replay.chat(_turn("q2"))).content == "two"
+        assert (await replay.chat(_turn("different"))).content == "one"
+        assert (await replay.chat(_turn("more"))).finish_reason == "error"
+        assert replay.stats()["misses"] == 2
+
+        strict = ReplayProvider(path, strict=True)
+        assert (await strict.chat(_turn("different"))).finish_reason == "error"
+
+    async def test_simulated_latency(self, tmp_path, monkeypatch):
+        path = tmp_path / "llm.jsonl"
+        await self._record(path, [("q1", LLMResponse(content="one"))])
+        slept = []
+
+        async def _sleep(delay):
+            slept.append(delay)
+
+        monkeypatch.setattr("queryclaw.providers.replay.asyncio.sleep", _sleep)
+        await ReplayProvider(path, latency=0.25).chat(_turn("q1"))
+        assert slept == [0.25]
+
+    async def test_key_ignores_volatile_details(self):
+        base = [
+            {"role": "assistant", "content": None, "tool_calls": [
+                {"id": "call_a", "type": "function", "function": {"name": "query_execute", "arguments": "{}"}},
+            ]},
+            {"role": "tool", "tool_call_id": "call_a", "name": "query_execute", "content": "3 row(s) in 1.2ms"},
+        ]
+        other = [
+            {**base[0], "tool_calls": [{**base[0]["tool_calls"][0], "id": "call_b"}]},
+            {**base[1], "tool_call_id": "call_b", "content": "3 row(s)  in 9.8ms"},
+        ]
+        assert request_key(base) == request_key(other)
+        assert request_key(base) != request_key(base[:1])
+
+
+class TestPromptCaching:
+    MESSAGES = [
+        {"role": "system", "content": "stable"},
+        {"role": "system", "content": "volatile"},
+        {"role": "user", "content": "q"},
+        {"role": "assistant", "content": None, "tool_calls": [{"id": "1"}]},
+        {"role": "tool", "tool_call_id": "1", "name": "t", "content": "result"},
+    ]
+
+    def _messages(self, model: str) -> list[dict]:
+        provider = LiteLLMProvider(default_model=model)
+        return provider._build_kwargs(self.MESSAGES, None, None, 100, 0.0)["messages"]
+
+    def test_breakpoints_for_caching_provider(self):
+        messages = self._messages("anthropic/claude-sonnet-4-5")
+        assert messages[0]["content"] == [{"type": "text", "text": "stable", "cache_control": {"type": "ephemeral"}}]
+        assert messages[1]["content"] == "volatile"
+        assert messages[-1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+        assert self.MESSAGES[0]["content"] == "stable"
+
+    def test_no_breakpoints_otherwise(self):
+        messages = self._messages("deepseek/deepseek-chat")
+        assert [m["content"] for m in messages] == [m["content"] for m in self.MESSAGES]
+
+    def test_cached_tokens_parsed(self):
+        class Details:
+            cached_tokens = 80
+
+        class Usage:
+            prompt_tokens, completion_tokens, total_tokens = 100, 5, 105
+            prompt_tokens_details = Details()
+
+        usage = LiteLLMProvider._parse_usage(Usage())
+        assert usage["cached_tokens"] == 80
+        assert usage["cache_creation_tokens"] == 0
+
+    def test_estimate_cost(self):
+        provider = LiteLLMProvider(default_model="anthropic/claude-sonnet-4-5")
+        full = provider.estimate_cost({"prompt_tokens": 1000, "completion_tokens": 100})
+        cached = provider.estimate_cost({"prompt_tokens": 1000, "completion_tokens": 100, "cached_tokens": 500})
+        assert 0 < cached < full
+        assert provider.estimate_cost({"prompt_tokens": 10}, model="nobody/unknown-model") == 0.0
+
+
+def _http_error(cls, status: int, headers: dict[str, str] | None = None, **kwargs):
+    response = httpx.Response(status, headers=headers or {}, request=httpx.Request("POST", "https://llm.test"))
+    return cls("failed", llm_provider="openai", model="m", response=response, **kwargs)
+
+
+class _Key(LLMProvider):
+    """Pool member that raises its queued errors, then answers with its name and the model."""
+
+    def __init__(self, name: str, errors: list[Exception] | None = None, headers: dict | None = None) -> None:
+        super().__init__(api_key=name)
+        self.name = name
+        self.errors = list(errors or [])
+        self.headers = headers
+        self.limits = RateLimits()
+        self.models: list[str | None] = []
+
+    def _next(self, model):
+        self.models.append(model)
+        if self.errors:
+            error = self.errors.pop(0)
+            self.limits.update(error_headers(error))
+            raise error
+        self.limits.update(self.headers)
+
+    async def complete(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        self._next(model)
+        return LLMResponse(content=f"{self.name}:{model}")
+
+    async def stream(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        self._next(model)
+        yield LLMStreamChunk(delta=self.name)
+        yield LLMStreamChunk(response=LLMResponse(content=self.name))
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        return await self.complete(messages, tools, model, max_tokens, temperature)
+
+    def get_default_model(self) -> str:
+        return "main-model"
+
+
+_HI = [{"role": "user", "content": "hi"}]
+
+
+class TestRateLimits:
+    def test_parse_delay(self):
+        assert parse_delay("2") == 2.0
+        assert parse_delay("6m0s") == 360.0
+        assert parse_delay("20ms") == pytest.approx(0.02)
+        assert 9 < parse_delay(time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 10))) <= 10
+        assert parse_delay("soon") is None
+
+    def test_headers_update_limits(self):
+        limits = RateLimits()
+        limits.update({"x-ratelimit-remaining-requests": "0", "x-ratelimit-remaining-tokens": "1500",
+                       "x-ratelimit-reset-requests": "30s"})
+        assert (limits.remaining_requests, limits.remaining_tokens) == (0, 1500)
+        assert limits.ready_at() > time.monotonic() + 25
+        limits = RateLimits()
+        limits.update({"llm_provider-anthropic-ratelimit-requests-remaining": "41", "llm_provider-retry-after": "3"})
+        assert limits.remaining_requests == 41
+        assert 2 < limits.ready_at() - time.monotonic() <= 3
+
+    def test_used_up_tokens_delay_key(self):
+        limits = RateLimits()
+        limits.update({"x-ratelimit-remaining-requests": "40", "x-ratelimit-remaining-tokens": "0",
+                       "x-ratelimit-reset-tokens": "20s"})
+        assert limits.ready_at() > time.monotonic() + 15
+        limits = RateLimits()
+        limits.update({"anthropic-ratelimit-tokens-remaining": "0", "anthropic-ratelimit-requests-reset": "10s"})
+        assert limits.ready_at() > time.monotonic() + 5
+
+    def test_classify_error(self):
+        assert classify_error(_http_error(litellm.RateLimitError, 429)) == "retry"
+        assert classify_error(_http_error(litellm.ServiceUnavailableError, 503)) == "retry"
+        assert classify_error(litellm.Timeout("slow", model="m", llm_provider="openai")) == "retry"
+        assert classify_error(_http_error(litellm.AuthenticationError, 401)) == "auth"
+        assert classify_error(litellm.BadRequestError("bad", model="m", llm_provider="openai")) == "fatal"
+        assert classify_error(ValueError("bug")) == "fatal"
+
+    @pytest.mark.asyncio
+    async def test_litellm_provider_reads_headers(self, monkeypatch):
+        message = SimpleNamespace(content="ok", tool_calls=None)
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=None,
+            _hidden_params={"additional_headers": {"x-ratelimit-remaining-requests": "99"}},
+        )
+
+        async def fake_acompletion(**kwargs):
+            return response
+
+        monkeypatch.setattr("queryclaw.providers.litellm_provider.acompletion", fake_acompletion)
+        provider = LiteLLMProvider(default_model="openai/gpt-4o")
+        assert (await provider.chat(_HI)).content == "ok"
+        assert provider.limits.remaining_requests == 99
+
+        async def rate_limited(**kwargs):
+            raise _http_error(litellm.RateLimitError, 429, {"retry-after": "5"})
+
+        monkeypatch.setattr("queryclaw.providers.litellm_provider.acompletion", rate_limited)
+        result = await provider.chat(_HI)
+        assert result.finish_reason == "error" and result.content.startswith("Error calling LLM:")
+        assert provider.limits.ready_at() > time.monotonic() + 4
+        with pytest.raises(litellm.RateLimitError):
+            await provider.complete(_HI)
+
+
+@pytest.mark.asyncio
+class TestProviderPool:
+    async def test_rate_limited_key_fails_over(self):
+        a = _Key("a", [_http_error(litellm.RateLimitError, 429, {"retry-after": "60"})])
+        b = _Key("b")
+        pool = ProviderPool([a, b])
+        assert (await pool.chat(_HI, model="m")).content == "b:m"
+        assert (await pool.chat(_HI, model="m")).content == "b:m"  # a is still cooling down
+        assert len(a.models) == 1
+        assert pool.stats()["retries"] == 1
+
+    async def test_prefers_key_with_most_requests_left(self):
+        a = _Key("a", headers={"x-ratelimit-remaining-requests": "3"})
+        b = _Key("b", headers={"x-ratelimit-remaining-requests": "50"})
+        pool = ProviderPool([a, b])
+        for _ in range(4):
+            await pool.chat(_HI)
+        assert len(b.models) >= 3
+
+    async def test_skips_key_out_of_tokens(self):
+        a = _Key("a", headers={"x-ratelimit-remaining-tokens": "0", "x-ratelimit-reset-tokens": "30s"})
+        b = _Key("b")
+        a.limits.update(a.headers)  # as left by a's last call
+        pool = ProviderPool([a, b])
+        for _ in range(3):
+            assert (await pool.chat(_HI, model="m")).content == "b:m"
+        assert a.models == []
+
+    async def test_retries_with_backoff(self):
+        timeout = litellm.Timeout("slow", model="m", llm_provider="openai")
+        key = _Key("a", [timeout, timeout])
+        pool = ProviderPool([key], retry_base_delay=0.01)
+        assert (await pool.chat(_HI, model="m")).content == "a:m"
+        assert pool.stats()["retries"] == 2
+
+    async def test_falls_back_after_retries(self):
+        down = [_http_error(litellm.ServiceUnavailableError, 503) for _ in range(5)]
+        primary, backup = _Key("a", down), _Key("fb")
+        pool = ProviderPool([primary], fallback=[backup], fallback_model="backup-model",
+                            max_retries=1, retry_base_delay=0.01)
+        assert (await pool.chat(_HI, model="m")).content == "fb:backup-model"
+        assert len(primary.models) == 2
+        assert pool.stats()["fallbacks"] == 1
+
+    async def test_exhausted_returns_error_response(self):
+        pool = ProviderPool([_Key("a", [_http_error(litellm.RateLimitError, 429)] * 3)],
+                            max_retries=2, retry_base_delay=0.01)
+        response = await pool.chat(_HI)
+        assert response.finish_reason == "error"
+        assert response.content.startswith("Error calling LLM:")
+
+    async def test_rejected_key_leaves_pool(self):
+        a = _Key("a", [_http_error(litellm.AuthenticationError, 401)])
+        b = _Key("b")
+        pool = ProviderPool([a, b])
+        assert (await pool.chat(_HI)).content.startswith("b:")
+        await pool.chat(_HI)
+        assert len(a.models) == 1
+        assert pool.stats()["keys"]["primary#0"]["disabled"] == "AuthenticationError"
+
+    async def test_bad_request_not_retried(self):
+        key = _Key("a", [litellm.BadRequestError("bad", model="m", llm_provider="openai")])
+        pool = ProviderPool([key], fallback=[_Key("fb")], fallback_model="backup-model")
+        assert (await pool.chat(_HI)).finish_reason == "error"
+        assert len(key.models) == 1
+
+    async def test_stream_retried_before_first_delta(self):
+        a = _Key("a", [_http_error(litellm.RateLimitError, 429, {"retry-after": "60"})])
+        pool = ProviderPool([a, _Key("b")])
+        chunks = [c async for c in pool.chat_stream(_HI)]
+        assert [c.delta for c in chunks] == ["b", ""]
+        assert chunks[-1].response.content == "b"
+
+    async def test_fair_queue_alternates_sessions(self):
+        limiter = FairLimiter(1)
+        await limiter.acquire("busy")
+        order: list[str] = []
+
+        async def call(session: str) -> None:
+            await limiter.acquire(session)
+            order.append(session)
+            limiter.release()
+
+        tasks = [asyncio.create_task(call(s)) for s in ("busy", "busy", "busy", "quiet")]
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*tasks)
+        assert order == ["busy", "quiet", "busy", "busy"]
+        assert limiter.active == 0
+
+    async def test_pool_queues_calls_by_session(self):
+        sessions: list[str] = []
+        pool = ProviderPool([_Key("a")], session_of=lambda: "chat-1")
+        acquire = pool.limiter.acquire
+
+        async def spy(session: str = "") -> None:
+            sessions.append(session)
+            await acquire(session)
+
+        pool.limiter.acquire = spy
+        await pool.chat(_HI)
+        assert sessions == ["chat-1"]
+
+
 class TestProviderRegistry:
     def test_providers_not_empty(self):
         assert len(PROVIDERS) > 0
@@ -186,6 +186,15 @@ class TestDryRunEngine:
         result = await engine.analyze("DELETE FROM items WHERE id = 1")
         assert result.explain_plan != "" or len(result.warnings) > 0
 
+    async def test_count_timeout_flags_unknown_impact(self, dry_run_db):
+        engine = DryRunEngine(dry_run_db, timeout=0.1)
+        result = await engine.analyze(
+            "DELETE FROM items WHERE id IN "
+            "(WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT x FROM c)"
+        )
+        assert result.timed_out is True
+        assert any("timed out" in w for w in result.warnings)
+
 
 # -- Audit --------------------------------------------------------------------
 
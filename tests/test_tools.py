@@ -1,5 +1,7 @@
 """Tests for the tool system: base, registry, schema, query, explain."""
 
+import asyncio
+
 import pytest
 import pytest_asyncio
 from typing import Any
@@ -12,6 +14,8 @@ from queryclaw.tools.registry import ToolRegistry
 from queryclaw.tools.schema import SchemaInspectTool
 from queryclaw.tools.query import QueryExecuteTool
 from queryclaw.tools.explain import ExplainPlanTool
+from queryclaw.tools.results import QueryResultTool, ResultStore
+from queryclaw.db.routing import bind_session, reset_session
 
 
 # -- Helpers ------------------------------------------------------------------
@@ -60,6 +64,41 @@ class ErrorTool(Tool):
         raise RuntimeError("intentional failure")
 
 
+class RecordingTool(Tool):
+    """Sleeps briefly and records start/finish order and peak concurrency."""
+
+    def __init__(self, name: str, read_only: bool, log: dict[str, Any]) -> None:
+        self._name = name
+        self._read_only = read_only
+        self._log = log
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def read_only(self) -> bool:
+        return self._read_only
+
+    @property
+    def description(self) -> str:
+        return "Records calls."
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {"id": {"type": "string"}}}
+
+    async def execute(self, id: str = "", **kwargs: Any) -> str:
+        log = self._log
+        log["running"] += 1
+        log["peak"] = max(log["peak"], log["running"])
+        log["events"].append(f"start {id}")
+        await asyncio.sleep(0.01)
+        log["events"].append(f"end {id}")
+        log["running"] -= 1
+        return f"{self._name}:{id}"
+
+
 @pytest_asyncio.fixture
 async def populated_db(tmp_path):
     """SQLite adapter with sample tables for tool testing."""
@@ -187,6 +226,56 @@ class TestToolRegistry:
 
 # -- ReadSkillTool ------------------------------------------------------------
 
+@pytest.mark.asyncio
+class TestToolRegistryBatch:
+    @staticmethod
+    def _registry() -> tuple[ToolRegistry, dict[str, Any]]:
+        log: dict[str, Any] = {"running": 0, "peak": 0, "events": []}
+        reg = ToolRegistry()
+        reg.register(RecordingTool("read", True, log))
+        reg.register(RecordingTool("write", False, log))
+        return reg, log
+
+    async def test_read_only_calls_run_concurrently_in_order(self):
+        reg, log = self._registry()
+        calls = [("read", {"id": str(i)}) for i in range(4)]
+        results = await reg.execute_batch(calls, max_concurrency=4)
+        assert results == ["read:0", "read:1", "read:2", "read:3"]
+        assert log["peak"] == 4
+
+    async def test_concurrency_bound(self):
+        reg, log = self._registry()
+        await reg.execute_batch([("read", {"id": str(i)}) for i in range(5)], max_concurrency=2)
+        assert log["peak"] == 2
+
+    async def test_mutating_call_is_a_barrier(self):
+        reg, log = self._registry()
+        calls = [("read", {"id": "a"}), ("write", {"id": "w"}), ("read", {"id": "b"}), ("read", {"id": "c"})]
+        results = await reg.execute_batch(calls, max_concurrency=4)
+        assert results == ["read:a", "write:w", "read:b", "read:c"]
+        events = log["events"]
+        assert events.index("end a") < events.index("start w") < events.index("end w") < events.index("start b")
+
+    async def test_limit_one_runs_sequentially(self):
+        reg, log = self._registry()
+        results = await reg.execute_batch([("read", {"id": "a"}), ("read", {"id": "b"})])
+        assert results == ["read:a", "read:b"]
+        assert log["peak"] == 1
+
+    async def test_unknown_tool_reported_in_place(self):
+        reg, _ = self._registry()
+        results = await reg.execute_batch([("read", {"id": "a"}), ("nope", {})], max_concurrency=2)
+        assert results[0] == "read:a"
+        assert "not found" in results[1]
+
+    async def test_builtin_tools_marked(self):
+        db = SQLiteAdapter()
+        assert QueryExecuteTool(db).read_only is True
+        assert SchemaInspectTool(db).read_only is True
+        assert ExplainPlanTool(db).read_only is True
+        assert EchoTool().read_only is False
+
+
 class TestReadSkillTool:
     def test_parameters_enum_contains_builtin_skills(self):
         loader = SkillsLoader()
@@ -279,6 +368,20 @@ class TestSchemaInspectTool:
         result = await tool.execute(action="unknown_action")
         assert "Error" in result
 
+    async def test_describe_tables(self, populated_db):
+        tool = SchemaInspectTool(populated_db)
+        result = await tool.execute(action="describe_tables", tables=["users", "orders", "nope"])
+        assert "Columns in 'users'" in result
+        assert "Columns in 'orders'" in result
+        assert "Foreign keys on 'orders'" in result
+        assert "Not found: nope" in result
+
+    async def test_describe_tables_all(self, populated_db):
+        tool = SchemaInspectTool(populated_db)
+        result = await tool.execute(action="describe_tables")
+        assert "Columns in 'users'" in result
+        assert "Indexes on 'orders'" in result
+
     async def test_nonexistent_table(self, populated_db):
         tool = SchemaInspectTool(populated_db)
         result = await tool.execute(action="describe_table", table="nonexistent")
@@ -302,6 +405,28 @@ class TestQueryExecuteTool:
         result = await tool.execute(sql="SELECT COUNT(*) AS cnt FROM users")
         assert "3" in result
 
+    async def test_truncated_result_flagged(self, populated_db):
+        tool = QueryExecuteTool(populated_db, max_rows=2)
+        result = await tool.execute(sql="SELECT name FROM users ORDER BY id LIMIT 50")
+        assert "2 row(s)" in result
+        assert "truncated" in result
+        assert "Charlie" not in result
+
+    async def test_large_result_is_profiled(self, populated_db):
+        tool = QueryExecuteTool(populated_db, profile_threshold=2)
+        result = await tool.execute(sql="SELECT name, age FROM users ORDER BY id")
+        assert "Column profile (3 rows):" in result
+        assert "- age: 3 values, 0 nulls, 3 distinct; min 25" in result
+        assert "Sample of 3 rows" in result
+
+    async def test_timeout_reported_to_llm(self, populated_db):
+        tool = QueryExecuteTool(populated_db, timeout=0.1)
+        result = await tool.execute(
+            sql="WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+        )
+        assert result.startswith("Error: Query cancelled")
+        assert "Rewrite it" in result
+
     async def test_empty_result(self, populated_db):
         tool = QueryExecuteTool(populated_db)
         result = await tool.execute(sql="SELECT * FROM users WHERE id = 999")
@@ -356,6 +481,90 @@ class TestQueryExecuteTool:
         assert "Error" in result
 
 
+# -- Stored results -------------------------------------------------------------
+
+@pytest.mark.asyncio
+class TestQueryResultTool:
+    @pytest_asyncio.fixture
+    async def tools(self, populated_db):
+        store = ResultStore()
+        yield QueryExecuteTool(populated_db, result_store=store, preview_rows=1), QueryResultTool(store), store
+        await store.close()
+
+    async def test_stored_rows_capped_by_max_rows(self, populated_db):
+        store = ResultStore()
+        tool = QueryExecuteTool(populated_db, max_rows=2, result_store=store)
+        result = await tool.execute(sql="SELECT name FROM users ORDER BY id")
+        assert "2 rows x 1 columns" in result
+        assert len((await store.get("r1")).rows) == 2
+        await store.close()
+
+    async def test_execute_returns_handle_and_preview(self, tools):
+        query, _, store = tools
+        result = await query.execute(sql="SELECT name, age FROM users ORDER BY id")
+        assert "Result `r1`: 3 rows x 2 columns (name, age)" in result
+        assert "Alice" in result
+        assert "Bob" not in result
+        assert (await store.get("r1")).rows[2] == ("Charlie", 35)
+
+    async def test_page_filter_sort_aggregate(self, tools):
+        query, results, _ = tools
+        await query.execute(sql="SELECT name, age FROM users ORDER BY id")
+        page = await results.execute(handle="r1", action="page", offset=1, limit=1)
+        assert "Bob" in page and "Alice" not in page and "Rows 2-2 of 3" in page
+
+        filtered = await results.execute(handle="r1", action="filter", column="age", op=">=", value="30")
+        assert "`r2`: 2 rows" in filtered and "Bob" not in filtered
+
+        ordered = await results.execute(handle="r1", action="sort", column="age", descending=True)
+        assert ordered.index("Charlie") < ordered.index("Alice") < ordered.index("Bob")
+
+        agg = await results.execute(handle="r1", action="aggregate", metrics=["count", "avg:age", "max:name"])
+        assert "3 | 30.0 | Charlie" in agg
+
+        profile = await results.execute(handle="r1", action="profile")
+        assert "- age: 3 values, 0 nulls, 3 distinct; min 25, p25 25, p50 30, p75 35, max 35" in profile
+
+    async def test_errors(self, tools):
+        query, results, _ = tools
+        await query.execute(sql="SELECT name FROM users")
+        assert "unknown column" in await results.execute(handle="r1", action="sort", column="nope")
+        assert "needs numeric" in await results.execute(handle="r1", action="aggregate", metrics=["sum:name"])
+        assert "no stored result" in await results.execute(handle="r9", action="page")
+
+    async def test_handles_are_per_session(self, tools):
+        query, results, _ = tools
+        token = bind_session("chat-a")
+        try:
+            await query.execute(sql="SELECT name FROM users")
+        finally:
+            reset_session(token)
+        assert "no stored result" in await results.execute(handle="r1", action="page")
+
+
+@pytest.mark.asyncio
+class TestResultStore:
+    async def test_lru_eviction_drops_without_spill(self):
+        store = ResultStore(max_bytes=120)  # room for two of these results
+        first = await store.put(["v"], [("x" * 40,)], "q1")
+        await store.put(["v"], [("y" * 40,)], "q2")
+        await store.get(first.handle)
+        await store.put(["v"], [("z" * 40,)], "q3")
+        assert await store.get("r2") is None
+        assert await store.get("r1") is not None
+        assert store.stats()["evictions"] == 1
+
+    async def test_spill_and_reload(self, tmp_path):
+        store = ResultStore(max_bytes=100, spill=True, spill_path=tmp_path / "results.db")
+        await store.put(["v"], [("x" * 60,)], "q1")
+        await store.put(["v"], [("y" * 60,)], "q2")
+        reloaded = await store.get("r1")
+        assert reloaded.rows == [("x" * 60,)]
+        assert store.stats()["spill_reads"] == 1
+        assert await store.get("r2") is not None  # evicted in turn, and read back
+        await store.close()
+
+
 # -- ExplainPlanTool ----------------------------------------------------------
 
 @pytest.mark.asyncio
@@ -3,6 +3,7 @@
 import pytest
 import pytest_asyncio
 
+from queryclaw.db.schema_cache import SchemaCache
 from queryclaw.db.sqlite import SQLiteAdapter
 from queryclaw.safety.audit import AuditLogger, AUDIT_TABLE
 from queryclaw.safety.policy import SafetyPolicy
@@ -213,6 +214,18 @@ class TestDDLExecuteTool:
         col_names = [c.name for c in cols]
         assert "age" in col_names
 
+    async def test_invalidates_only_affected_table(self, write_db):
+        await write_db.execute("CREATE TABLE other (id INTEGER PRIMARY KEY)")
+        cache = SchemaCache(write_db, check_interval=3600)
+        await cache.get_columns("users")
+        await cache.get_columns("other")
+        tool = DDLExecuteTool(write_db, _write_policy(), schema_cache=cache)
+        assert "Success" in await tool.execute(sql="ALTER TABLE users ADD COLUMN age INTEGER")
+        misses = cache.misses
+        assert "age" in [c.name for c in await cache.get_columns("users")]
+        await cache.get_columns("other")
+        assert cache.misses == misses + 1
+
     async def test_drop_no_confirmation_when_disabled(self, write_db):
         """When require_confirmation=False, DROP executes without confirmation."""
         await write_db.execute("CREATE TABLE temp_drop (id INT)")
@@ -364,7 +377,8 @@ class TestAgentLoopWriteTools:
         assert agent.tools.has("query_execute")
         assert agent.tools.has("explain_plan")
         assert agent.tools.has("spawn_subagent")
-        assert len(agent.tools) == 8
+        assert agent.tools.has("query_result")
+        assert len(agent.tools) == 9
 
     async def test_write_tools_not_registered_when_readonly(self, write_db):
         from queryclaw.agent.loop import AgentLoop
@@ -385,4 +399,4 @@ class TestAgentLoopWriteTools:
         assert not agent.tools.has("data_modify")
         assert not agent.tools.has("ddl_execute")
         assert not agent.tools.has("transaction")
-        assert len(agent.tools) == 5
+        assert len(agent.tools) == 6
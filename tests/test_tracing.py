@@ -0,0 +1,158 @@
+"""Tests for request tracing: spans, export and agent instrumentation."""
+
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+
+from queryclaw import tracing
+from queryclaw.agent.loop import AgentLoop
+from queryclaw.bus.events import InboundMessage
+from queryclaw.db.sqlite import SQLiteAdapter
+from queryclaw.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class ScriptedProvider(LLMProvider):
+    def __init__(self, responses: list[LLMResponse]) -> None:
+        super().__init__()
+        self._responses = list(responses)
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        return self._responses.pop(0) if len(self._responses) > 1 else self._responses[0]
+
+    def get_default_model(self) -> str:
+        return "mock-model"
+
+
+def _spans(path) -> list[dict]:
+    tracing.flush()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.configure(path=path)
+    yield path
+    tracing.shutdown()
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    adapter = SQLiteAdapter()
+    await adapter.connect(database=str(tmp_path / "trace.db"))
+    await adapter.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    await adapter.execute("INSERT INTO items VALUES (1, 'Apple')")
+    yield adapter
+    await adapter.close()
+
+
+class TestSpans:
+    def test_disabled_is_noop(self, tmp_path):
+        tracing.shutdown()
+        with tracing.span("x", a=1) as span:
+            span.set(b=2)
+            assert not span
+            assert tracing.current_trace_id() is None
+        assert not tracing.enabled()
+
+    def test_nesting_shares_trace(self, trace_file):
+        with tracing.span("outer") as outer:
+            with tracing.span("inner", k="v") as inner:
+                assert tracing.current_trace_id() == outer.trace_id
+            assert inner.parent_id == outer.span_id
+        spans = {s["name"]: s for s in _spans(trace_file)}
+        assert spans["inner"]["trace_id"] == spans["outer"]["trace_id"]
+        assert spans["inner"]["parent_id"] == spans["outer"]["span_id"]
+        assert spans["outer"]["parent_id"] is None
+        assert spans["inner"]["attrs"] == {"k": "v"}
+        assert spans["outer"]["duration_ms"] >= spans["inner"]["duration_ms"]
+
+    def test_explicit_trace_id_joins_trace(self, trace_file):
+        with tracing.span("send", trace_id="abc") as span:
+            assert span.trace_id == "abc"
+            assert span.parent_id is None
+
+    def test_error_status(self, trace_file):
+        with pytest.raises(ValueError):
+            with tracing.span("boom"):
+                raise ValueError("bad")
+        (record,) = _spans(trace_file)
+        assert record["status"] == "error"
+        assert "ValueError: bad" in record["attrs"]["error"]
+
+    @pytest.mark.asyncio
+    async def test_tasks_inherit_trace(self, trace_file):
+        async def child():
+            with tracing.span("child"):
+                await asyncio.sleep(0)
+
+        with tracing.span("parent") as parent:
+            await asyncio.gather(child(), child())
+        children = [s for s in _spans(trace_file) if s["name"] == "child"]
+        assert len(children) == 2
+        assert all(c["parent_id"] == parent.span_id for c in children)
+
+    def test_jsonl_rotation(self, tmp_path):
+        path = tmp_path / "t.jsonl"
+        exporter = tracing.JsonlExporter(path, max_bytes=200, backups=2)
+        for i in range(20):
+            exporter.export({"i": i, "pad": "x" * 50})
+        exporter.close()
+        assert path.with_name("t.jsonl.1").exists()
+        assert path.with_name("t.jsonl.2").exists()
+        assert not path.with_name("t.jsonl.3").exists()
+        assert path.stat().st_size <= 200
+        last = json.loads(path.read_text().splitlines()[-1])
+        assert last["i"] == 19
+
+    def test_sql_fingerprint(self):
+        sql = "SELECT * FROM users  WHERE email = 'a@b.com' AND id IN (1, 2, 3) AND score > 4.5"
+        assert tracing.sql_fingerprint(sql) == "SELECT * FROM users WHERE email = ? AND id IN (?+) AND score > ?"
+
+    def test_sql_fingerprint_masks_double_quoted_strings(self):
+        sql = 'SELECT * FROM users WHERE email = "a@b.com"'
+        assert tracing.sql_fingerprint(sql, "mysql") == "SELECT * FROM users WHERE email = ?"
+        assert tracing.sql_fingerprint('SELECT "Email" FROM users', "postgresql") == 'SELECT "Email" FROM users'
+
+
+@pytest.mark.asyncio
+class TestAgentTracing:
+    async def test_turn_produces_llm_tool_and_db_spans(self, db, trace_file):
+        provider = ScriptedProvider([
+            LLMResponse(
+                content=None,
+                tool_calls=[ToolCallRequest(id="c1", name="query_execute",
+                                            arguments={"sql": "SELECT name FROM items WHERE id = 1"})],
+                usage={"prompt_tokens": 120, "completion_tokens": 8},
+            ),
+            LLMResponse(content="Apple", usage={"prompt_tokens": 150, "completion_tokens": 2}),
+        ])
+        agent = AgentLoop(provider=provider, db=db, enable_subagent=False)
+        assert await agent.chat("name of item 1?") == "Apple"
+
+        spans = _spans(trace_file)
+        by_name: dict[str, list[dict]] = {}
+        for s in spans:
+            by_name.setdefault(s["name"], []).append(s)
+        (turn,) = by_name["agent.turn"]
+        assert {s["trace_id"] for s in spans} == {turn["trace_id"]}
+        assert turn["attrs"]["iterations"] == 2
+        llm = by_name["llm.chat"]
+        assert [s["attrs"]["prompt_tokens"] for s in llm] == [120, 150]
+        assert llm[0]["attrs"]["tool_calls"] == 1
+        (tool,) = by_name["tool.execute"]
+        assert tool["attrs"]["tool"] == "query_execute"
+        assert tool["attrs"]["error"] is False
+        queries = by_name["db.query"]
+        assert any(q["attrs"]["sql"].startswith("SELECT name FROM items WHERE id = ?") for q in queries)
+        assert all(q["parent_id"] == tool["span_id"] for q in queries)
+
+    async def test_channel_reply_carries_trace_id(self, db, trace_file):
+        agent = AgentLoop(provider=ScriptedProvider([LLMResponse(content="hi")]), db=db, enable_subagent=False)
+        msg = InboundMessage(channel="test", sender_id="u", chat_id="c", content="hello")
+        out = await agent._process_message_impl(msg)
+        (turn,) = [s for s in _spans(trace_file) if s["name"] == "agent.turn"]
+        assert out.metadata["trace_id"] == turn["trace_id"]
+        assert turn["attrs"]["channel"] == "test"